@@ -187,7 +187,10 @@ class SaltCMD(parsers.SaltCMDOptionParser):
                                 ret_, out, retcode = self._format_ret(full_ret)
                                 retcodes.append(retcode)
                                 self._output_ret(ret_, out)
-                                ret.update(ret_)
+                                if self.config['cli_summary'] is True:
+                                    # The returns are printed as they come,
+                                    # only keep what the summary needs
+                                    ret.update(self._summary_ret(ret_))
                             except KeyError:
                                 errors.append(full_ret)
 
@@ -219,6 +222,22 @@ class SaltCMD(parsers.SaltCMDOptionParser):
             for minion in errors:
                 print_cli(self._format_error(minion))
 
+    def _summary_ret(self, ret):
+        '''
+        Reduce returns to the data needed by _print_returns_summary
+        '''
+        summary = {}
+        for minion, data in six.iteritems(ret):
+            minion_ret = data.get('ret') if isinstance(data, dict) else None
+            if (
+                    isinstance(minion_ret, string_types)
+                    and minion_ret.startswith("Minion did not return")
+                    ):
+                summary[minion] = data
+            else:
+                summary[minion] = {}
+        return summary
+
     def _print_returns_summary(self, ret):
         '''
         Display returns summary
@@ -854,6 +854,34 @@ class LocalClient(object):
                 else:
                     yield None
 
+    def _present_minions(self, ids):
+        '''
+        Return the sets of the passed minion ids which the master has, and
+        has not, seen connected within ``presence_stale_time`` seconds, or
+        None if the master does not track minion presence. Minions which were
+        never seen connected, such as minions connected through localhost,
+        are in neither set.
+
+        The minions of syndics are not connected to this master, so presence
+        is not used on a master of masters.
+        '''
+        if not self.opts.get('presence_events', False) \
+                or self.opts['order_masters']:
+            return None
+        last_seen = salt.utils.minions.CkMinions(self.opts).presence()
+        if not last_seen:
+            return None
+        oldest = time.time() - self.opts.get('presence_stale_time', 180)
+        present = set()
+        absent = set()
+        for id_ in ids:
+            if id_ in last_seen:
+                if last_seen[id_] < oldest:
+                    absent.add(id_)
+                else:
+                    present.add(id_)
+        return present, absent
+
     def get_iter_returns(
             self,
             jid,
@@ -867,6 +895,20 @@ class LocalClient(object):
         '''
         Watch the event system and return job data as it comes in
 
+        Returns are yielded as their events arrive, and the iteration ends as
+        soon as all expected minions have returned. Once the timeout is
+        reached, the minions which have not returned yet are handled as
+        follows:
+
+        - minions which the master has not seen connected for
+          ``presence_stale_time`` seconds are given up on, if the master
+          tracks minion presence (``presence_events``)
+        - minions which acknowledged the start of the job (``job_start_ack``)
+          are waited for while they stay connected, and are only asked
+          whether they still run the job every ``timeout`` seconds
+        - only the other minions are asked whether they are still running the
+          job, with ``saltutil.find_job``, and are waited for while they are
+
         :returns: all of the information for the JID
         '''
         if not isinstance(minions, set):
@@ -877,37 +919,39 @@ class LocalClient(object):
 
         if timeout is None:
             timeout = self.opts['timeout']
-        start = int(time.time())
-
-        # timeouts per minion, id_ -> timeout time
-        minion_timeouts = {}
 
         found = set()
-        # Check to see if the jid is real, if not return the empty dict
-        try:
-            if self.returners['{0}.get_load'.format(self.opts['master_job_cache'])](jid) == {}:
-                log.warning('jid does not exist')
-                yield {}
-                # stop the iteration, since the jid is invalid
-                raise StopIteration()
-        except Exception as exc:
-            log.warning('Returner unavailable: {exc}'.format(exc=exc))
-        # Wait for the hosts to check in
-        syndic_wait = 0
-        last_time = False
+        # minions which have not returned yet
+        pending = set(minions)
+        # minions which acknowledged the start of the job -> time until which
+        # they are not asked whether they still run it
+        acked = {}
+        # Check to see if the jid is real, if not return the empty dict. A
+        # job published with expected minions is known to exist, so the job
+        # cache is only read when looking up other jobs.
+        if not minions:
+            try:
+                if self.returners['{0}.get_load'.format(self.opts['master_job_cache'])](jid) == {}:
+                    log.warning('jid does not exist')
+                    yield {}
+                    # stop the iteration, since the jid is invalid
+                    raise StopIteration()
+            except Exception as exc:
+                log.warning('Returner unavailable: {exc}'.format(exc=exc))
         # iterator for this job's return
         if self.opts['order_masters']:
             # If we are a MoM, we need to gather expected minions from downstreams masters.
             ret_iter = self.get_returns_no_block(jid, gather_errors=gather_errors, tags_regex='^syndic/.*/{0}'.format(jid))
         else:
             ret_iter = self.get_returns_no_block(jid, gather_errors=gather_errors)
+        ack_tag = salt.utils.event.tagify([jid, 'ack'], 'job')
         # iterator for the info of this job
         jinfo_iter = []
+        # minions asked whether they still run the job, and those which do
+        asked = set()
+        running = set()
         timeout_at = time.time() + timeout
         gather_syndic_wait = time.time() + self.opts['syndic_wait']
-        # are there still minions running the job out there
-        # start as True so that we ping at least once
-        minions_running = True
         log.debug(
             'get_iter_returns for jid {0} sent to {1} will timeout at {2}'.format(
                 jid, minions, datetime.fromtimestamp(timeout_at).time()
@@ -925,72 +969,43 @@ class LocalClient(object):
                         yield ret
                 if 'minions' in raw.get('data', {}):
                     minions.update(raw['data']['minions'])
+                    pending.update(set(raw['data']['minions']) - found)
                     continue
                 if 'return' not in raw['data']:
+                    if raw['tag'].startswith(ack_tag) and 'id' in raw['data']:
+                        acked[raw['data']['id']] = timeout_at + timeout
                     continue
+                id_ = raw['data']['id']
+                found.add(id_)
+                pending.discard(id_)
                 if kwargs.get('raw', False):
-                    found.add(raw['data']['id'])
                     yield raw
                 else:
-                    found.add(raw['data']['id'])
-                    ret = {raw['data']['id']: {'ret': raw['data']['return']}}
+                    ret = {id_: {'ret': raw['data']['return']}}
                     if 'out' in raw['data']:
-                        ret[raw['data']['id']]['out'] = raw['data']['out']
+                        ret[id_]['out'] = raw['data']['out']
                     if 'retcode' in raw['data']:
-                        ret[raw['data']['id']]['retcode'] = raw['data']['retcode']
+                        ret[id_]['retcode'] = raw['data']['retcode']
                     if kwargs.get('_cmd_meta', False):
-                        ret[raw['data']['id']].update(raw['data'])
-                    log.debug('jid {0} return from {1}'.format(jid, raw['data']['id']))
+                        ret[id_].update(raw['data'])
+                    log.debug('jid {0} return from {1}'.format(jid, id_))
                     yield ret
 
             # if we have all of the returns (and we aren't a syndic), no need for anything fancy
-            if len(found.intersection(minions)) >= len(minions) and not self.opts['order_masters']:
-                # All minions have returned, break out of the loop
-                log.debug('jid {0} found all minions {1}'.format(jid, found))
-                break
-            elif len(found.intersection(minions)) >= len(minions) and self.opts['order_masters']:
-                if len(found) >= len(minions) and len(minions) > 0 and time.time() > gather_syndic_wait:
+            if not pending:
+                if not self.opts['order_masters']:
+                    # All minions have returned, break out of the loop
+                    log.debug('jid {0} found all minions {1}'.format(jid, found))
+                    break
+                elif minions and time.time() > gather_syndic_wait:
                     # There were some minions to find and we found them
                     # However, this does not imply that *all* masters have yet responded with expected minion lists.
                     # Therefore, continue to wait up to the syndic_wait period (calculated in gather_syndic_wait) to see
                     # if additional lower-level masters deliver their lists of expected
                     # minions.
                     break
-           # If we get here we may not have gathered the minion list yet. Keep waiting
-           # for all lower-level masters to respond with their minion lists
-
-            # let start the timeouts for all remaining minions
-
-            for id_ in minions - found:
-                # if we have a new minion in the list, make sure it has a timeout
-                if id_ not in minion_timeouts:
-                    minion_timeouts[id_] = time.time() + timeout
-
-            # if the jinfo has timed out and some minions are still running the job
-            # re-do the ping
-            if time.time() > timeout_at and minions_running:
-                # need our own event listener, so we don't clobber the class one
-                event = salt.utils.event.get_event(
-                        'master',
-                        self.opts['sock_dir'],
-                        self.opts['transport'],
-                        opts=self.opts,
-                        listen=not self.opts.get('__worker', False))
-                # start listening for new events, before firing off the pings
-                event.connect_pub()
-                # since this is a new ping, no one has responded yet
-                jinfo = self.gather_job_info(jid, tgt, tgt_type)
-                minions_running = False
-                # if we weren't assigned any jid that means the master thinks
-                # we have nothing to send
-                if 'jid' not in jinfo:
-                    jinfo_iter = []
-                else:
-                    jinfo_iter = self.get_returns_no_block(jinfo['jid'], event=event)
-                timeout_at = time.time() + self.opts['gather_job_timeout']
-                # if you are a syndic, wait a little longer
-                if self.opts['order_masters']:
-                    timeout_at += self.opts.get('syndic_wait', 1)
+            # If we get here we may not have gathered the minion list yet. Keep waiting
+            # for all lower-level masters to respond with their minion lists
 
             # check for minions that are running the job still
             for raw in jinfo_iter:
@@ -1000,10 +1015,6 @@ class LocalClient(object):
 
                 # TODO: move to a library??
                 if 'minions' in raw.get('data', {}):
-                    minions.update(raw['data']['minions'])
-                    continue
-                if 'syndic' in raw.get('data', {}):
-                    minions.update(raw['syndic'])
                     continue
                 if 'return' not in raw.get('data', {}):
                     continue
@@ -1015,25 +1026,63 @@ class LocalClient(object):
                 # if we didn't originally target the minion, lets add it to the list
                 if raw['data']['id'] not in minions:
                     minions.add(raw['data']['id'])
-                # update this minion's timeout, as long as the job is still running
-                minion_timeouts[raw['data']['id']] = time.time() + timeout
-                # a minion returned, so we know its running somewhere
-                minions_running = True
-
-            # if we have hit gather_job_timeout (after firing the job) AND
-            # if we have hit all minion timeouts, lets call it
-            now = time.time()
-            # if we have finished waiting, and no minions are running the job
-            # then we need to see if each minion has timedout
-            done = (now > timeout_at) and not minions_running
-            if done:
-                # if all minions have timeod out
-                for id_ in minions - found:
-                    if now < minion_timeouts[id_]:
-                        done = False
-                        break
-            if done:
+                    if raw['data']['id'] not in found:
+                        pending.add(raw['data']['id'])
+                running.add(raw['data']['id'])
+
+            if time.time() > timeout_at and not pending:
+                # Nothing left to wait for, syndics included
                 break
+            elif time.time() > timeout_at:
+                # Minions asked in the previous round which are not running
+                # the job anymore are given up on
+                pending.difference_update(asked - running)
+                now = time.time()
+                for id_ in running.intersection(acked):
+                    acked[id_] = now + timeout
+                presence = self._present_minions(pending)
+                if presence is not None:
+                    present, absent = presence
+                    pending.difference_update(absent)
+                    if absent:
+                        log.debug(
+                            'jid {0} giving up on disconnected minions {1}'
+                            .format(jid, absent)
+                        )
+                    # acknowledged jobs run as long as their minion is there,
+                    # which is checked again every timeout seconds in case
+                    # the job process died
+                    waiting = set([id_ for id_ in pending & present
+                                   if acked.get(id_, 0) > now])
+                else:
+                    waiting = set()
+                to_ask = pending - waiting
+                asked = set()
+                running = set()
+                jinfo_iter = []
+                if to_ask:
+                    # need our own event listener, so we don't clobber the class one
+                    event = salt.utils.event.get_event(
+                            'master',
+                            self.opts['sock_dir'],
+                            self.opts['transport'],
+                            opts=self.opts,
+                            listen=not self.opts.get('__worker', False))
+                    # start listening for new events, before firing off the pings
+                    event.connect_pub()
+                    # only ask the minions we are still waiting for
+                    jinfo = self.gather_job_info(jid, list(to_ask), 'list')
+                    # if we weren't assigned any jid that means the master thinks
+                    # we have nothing to send
+                    if 'jid' in jinfo:
+                        jinfo_iter = self.get_returns_no_block(jinfo['jid'], event=event)
+                    asked = to_ask
+                elif not pending:
+                    break
+                timeout_at = time.time() + self.opts['gather_job_timeout']
+                # if you are a syndic, wait a little longer
+                if self.opts['order_masters']:
+                    timeout_at += self.opts.get('syndic_wait', 1)
 
             # don't spin
             time.sleep(0.01)
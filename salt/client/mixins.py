@@ -423,12 +423,16 @@ class AsyncClientMixin(object):
         tag = tagify(jid, prefix=self.tag_prefix)
         return {'tag': tag, 'jid': jid}
 
-    def async(self, fun, low, user='UNKNOWN'):
+    def async(self, fun, low, user='UNKNOWN', pub=None):
         '''
         Execute the function in a multiprocess and return the event tag to use
         to watch for the return
+
+        Pass the jid and tag to use as ``pub``, as returned by
+        ``_gen_async_pub``, to start watching for the return before the
+        function is executed.
         '''
-        async_pub = self._gen_async_pub()
+        async_pub = pub if pub is not None else self._gen_async_pub()
 
         proc = multiprocessing.Process(
                 target=self._proc_function,
@@ -463,6 +467,10 @@ class AsyncClientMixin(object):
                 outputter = event['return']['outputter']
             else:
                 event_data = event['return']
+        elif suffix == 'progress' and set(event) == set(('data', 'outputter')):
+            # Part of the return printed by the runner as it goes
+            event_data = event['data']
+            outputter = self.opts.get('output') or event['outputter']
         else:
             event_data = {'suffix': suffix, 'event': event}
 
@@ -35,6 +35,7 @@ import salt.utils.network
 import salt.syspaths
 import salt.utils.validate.path
 import salt.utils.xdg
+import salt.utils.yamlloader
 import salt.exceptions
 import salt.utils.sdb
 
@@ -351,14 +352,24 @@ VALID_OPTS = {
     # in the event of a disconnect event
     'recon_randomize': float,  # FIXME This should really be a bool, according to the implementation
 
-    # Specify a returner in which all events will be sent to. Requires that the returner in question
-    # have an event_return(event) function!
+    # Specify a returner, or a list of returners, in which all events will be sent to. Requires that
+    # the returners in question have an event_return(event) function!
     'event_return': str,
 
     # The number of events to queue up in memory before pushing them down the pipe to an event returner
     # specified by 'event_return'
     'event_return_queue': int,
 
+    # Push queued events to the event returners at least every this many seconds, 0 to disable
+    'event_return_queue_max_seconds': int,
+
+    # The maximum number of events kept in memory per event returner, the oldest events are dropped
+    # beyond that
+    'event_return_max_queue_size': int,
+
+    # Spool events to disk while an event returner is failing
+    'event_return_spool': bool,
+
     # Only forward events to an event returner if it matches one of the tags in this list
     'event_return_whitelist': list,
 
@@ -428,6 +439,8 @@ VALID_OPTS = {
     'gitfs_passphrase': str,
     'gitfs_env_whitelist': list,
     'gitfs_env_blacklist': list,
+    'gitfs_update_workers': int,
+    'gitfs_update_timeout': int,
     'hgfs_remotes': list,
     'hgfs_mountpoint': str,
     'hgfs_root': str,
@@ -479,6 +492,9 @@ VALID_OPTS = {
     'fileserver_ignoresymlinks': bool,
     'fileserver_limit_traversal': bool,
 
+    # Watch the file_roots with inotify instead of scanning them on every fileserver update
+    'fileserver_roots_watch': bool,
+
     # The number of open files a daemon is allowed to have open. Frequently needs to be increased
     # higher than the system default in order to account for the way zeromq consumes file handles.
     'max_open_files': int,
@@ -499,6 +515,14 @@ VALID_OPTS = {
     # Whether or not to cache jobs so that they can be examined later on
     'job_cache': bool,
 
+    # Store identical returns, and identical large parts of returns, of the minions of a job only once
+    # in the local job cache
+    'job_cache_dedup': bool,
+
+    # Keep an index of the jobs of the local job cache, so jobs can be listed and cleaned without
+    # reading every job
+    'job_cache_index': bool,
+
     # Define a returner to be used as an external job caching storage backend
     'ext_job_cache': str,
 
@@ -547,9 +571,19 @@ VALID_OPTS = {
     # Set a hard limit for the amount of memory modules can consume on a minion.
     'modules_max_memory': int,
 
+    # Fire an event on the master when a job starts, so the publisher knows the job is running
+    'job_start_ack': bool,
+
     # The number of minutes between the minion refreshing its cache of grains
     'grains_refresh_every': int,
 
+    # A dict mapping grain function globs (e.g. core.os_data) to the number of
+    # seconds their result is cached for, or 'static' to never expire
+    'grains_cache_ttl': dict,
+
+    # The number of threads used to compute grain functions
+    'grains_refresh_workers': int,
+
     # Use lspci to gather system data for grains on a minion
     'enable_lspci': bool,
 
@@ -564,12 +598,19 @@ VALID_OPTS = {
     # If this is set to True the first newline after a Jinja block is removed
     'jinja_trim_blocks': bool,
 
+    # Store the compiled Jinja templates in the cachedir
+    'jinja_bytecode_cache': bool,
+
     # FIXME Appears to be unused
     'minion_id_caching': bool,
 
     # If set, the master will sign all publications before they are sent out
     'sign_pub_messages': bool,
 
+    # Encrypt the messages between the master and the minions with AES-GCM
+    # instead of AES-CBC and HMAC-SHA256. Requires PyCryptodome.
+    'aes_gcm': bool,
+
     # The size of key that should be generated when creating new keys
     'keysize': int,
 
@@ -658,6 +699,13 @@ VALID_OPTS = {
 
     # Connection caching. Can greatly speed up salt performance.
     'con_cache': bool,
+
+    # Fire presence events and track when minions were last seen connected
+    'presence_events': bool,
+
+    # Seconds after which a minion that has not been seen connected is
+    # considered down by the presence-based manage runners
+    'presence_stale_time': int,
     'rotate_aes_key': bool,
 
     # Cache ZeroMQ connections. Can greatly improve salt performance.
@@ -691,10 +739,13 @@ DEFAULT_MINION_OPTS = {
     'cache_jobs': False,
     'grains_cache': False,
     'grains_cache_expiration': 300,
+    'grains_cache_ttl': {},
+    'grains_refresh_workers': 1,
     'conf_file': os.path.join(salt.syspaths.CONFIG_DIR, 'minion'),
     'sock_dir': os.path.join(salt.syspaths.SOCK_DIR, 'minion'),
     'backup_mode': '',
     'renderer': 'yaml_jinja',
+    'jinja_bytecode_cache': False,
     'failhard': False,
     'autoload_dynamic_modules': True,
     'environment': None,
@@ -794,8 +845,10 @@ DEFAULT_MINION_OPTS = {
     'tcp_keepalive_cnt': -1,
     'tcp_keepalive_intvl': -1,
     'modules_max_memory': -1,
+    'job_start_ack': False,
     'grains_refresh_every': 0,
     'minion_id_caching': True,
+    'aes_gcm': False,
     'keysize': 2048,
     'transport': 'zeromq',
     'auth_timeout': 60,
@@ -861,6 +914,8 @@ DEFAULT_MASTER_OPTS = {
     'gitfs_passphrase': '',
     'gitfs_env_whitelist': [],
     'gitfs_env_blacklist': [],
+    'gitfs_update_workers': 1,
+    'gitfs_update_timeout': 0,
     'hgfs_remotes': [],
     'hgfs_mountpoint': '',
     'hgfs_root': '',
@@ -909,17 +964,21 @@ DEFAULT_MASTER_OPTS = {
     'fileserver_followsymlinks': True,
     'fileserver_ignoresymlinks': False,
     'fileserver_limit_traversal': False,
+    'fileserver_roots_watch': False,
     'max_open_files': 100000,
     'hash_type': 'md5',
     'conf_file': os.path.join(salt.syspaths.CONFIG_DIR, 'master'),
     'open_mode': False,
     'auto_accept': False,
     'renderer': 'yaml_jinja',
+    'jinja_bytecode_cache': False,
     'failhard': False,
     'state_top': 'top.sls',
     'master_tops': {},
     'order_masters': False,
     'job_cache': True,
+    'job_cache_dedup': False,
+    'job_cache_index': True,
     'ext_job_cache': '',
     'master_job_cache': 'local_cache',
     'minion_data_cache': True,
@@ -947,6 +1006,9 @@ DEFAULT_MASTER_OPTS = {
     'reactor_worker_hwm': 10000,
     'event_return': '',
     'event_return_queue': 0,
+    'event_return_queue_max_seconds': 0,
+    'event_return_max_queue_size': 10000,
+    'event_return_spool': False,
     'event_return_whitelist': [],
     'event_return_blacklist': [],
     'serial': 'msgpack',
@@ -974,6 +1036,7 @@ DEFAULT_MASTER_OPTS = {
     'jinja_lstrip_blocks': False,
     'jinja_trim_blocks': False,
     'sign_pub_messages': False,
+    'aes_gcm': False,
     'keysize': 2048,
     'transport': 'zeromq',
     'enumerate_proxy_minions': False,
@@ -1013,6 +1076,8 @@ DEFAULT_MASTER_OPTS = {
     'master_use_pubkey_signature': False,
     'zmq_filtering': False,
     'con_cache': False,
+    'presence_events': False,
+    'presence_stale_time': 180,
     'rotate_aes_key': True,
     'cache_sreqs': True,
     'dummy_pub': False,
@@ -1149,7 +1214,7 @@ def _read_conf_file(path):
     log.debug('Reading configuration from {0}'.format(path))
     with salt.utils.fopen(path, 'r') as conf_file:
         try:
-            conf_opts = yaml.safe_load(conf_file.read()) or {}
+            conf_opts = salt.utils.yamlloader.safe_load(conf_file.read()) or {}
         except yaml.YAMLError as err:
             log.error(
                 'Error parsing configuration file: {0} - {1}'.format(path, err)
@@ -15,12 +15,18 @@ import logging
 import traceback
 import binascii
 import weakref
+import salt.ext.six as six
 from salt.ext.six.moves import zip  # pylint: disable=import-error,redefined-builtin
 
 # Import third party libs
+# PyCrypto only reads the old style buffer objects on Python 2, where
+# PyCryptodome and Python 3 take memoryviews
+OLD_BUFFERS = False
 try:
     from M2Crypto import RSA, EVP
+    import Crypto
     from Crypto.Cipher import AES
+    OLD_BUFFERS = six.PY2 and Crypto.version_info[0] < 3
 except ImportError:
     # No need for crypt in local mode
     pass
@@ -1059,23 +1065,63 @@ class SAuth(AsyncAuth):
         sys.exit(42)
 
 
+def _view(data, start, stop):
+    '''
+    Return a slice of a string without copying it
+    '''
+    if OLD_BUFFERS:
+        return buffer(data, start, stop - start)  # pylint: disable=incompatible-py3-code,undefined-variable
+    return memoryview(data)[start:stop]
+
+
+if hasattr(hmac, 'compare_digest'):
+    _compare_digest = hmac.compare_digest  # pylint: disable=no-member
+else:
+    def _compare_digest(mac_bytes, sig):
+        '''
+        Compare two digests in constant time, for Python < 2.7.7
+        '''
+        if len(mac_bytes) != len(sig):
+            return False
+        result = 0
+        for zipped_x, zipped_y in zip(mac_bytes, sig):
+            result |= ord(zipped_x) ^ ord(zipped_y)
+        return result == 0
+
+
 class Crypticle(object):
     '''
     Authenticated encryption class
 
     Encryption algorithm: AES-CBC
     Signing algorithm: HMAC-SHA256
+
+    With the ``aes_gcm`` option, messages are encrypted and authenticated
+    with AES-GCM instead, and start with a marker so that a master and a
+    minion which disagree on the option report it instead of failing to
+    authenticate every message.
     '''
 
     PICKLE_PAD = 'pickle::'
     AES_BLOCK_SIZE = 16
     SIG_SIZE = hashlib.sha256().digest_size
+    GCM_NONCE_SIZE = 12
+    GCM_TAG_SIZE = 16
+    GCM_MARKER = 'gcm::'
 
     def __init__(self, opts, key_string, key_size=192):
         self.key_string = key_string
         self.keys = self.extract_keys(self.key_string, key_size)
         self.key_size = key_size
         self.serial = salt.payload.Serial(opts)
+        # Keyed once, copied for every message
+        self.hmac = hmac.new(self.keys[1], digestmod=hashlib.sha256)
+        self.gcm = isinstance(opts, dict) and opts.get('aes_gcm', False)
+        if self.gcm and not hasattr(AES, 'MODE_GCM'):
+            raise SaltClientError(
+                'aes_gcm is enabled but the installed AES module does not '
+                'support GCM, install PyCryptodome'
+            )
 
     @classmethod
     def generate_key_string(cls, key_size=192):
@@ -1092,37 +1138,94 @@ class Crypticle(object):
         '''
         encrypt data with AES-CBC and sign it with HMAC-SHA256
         '''
-        aes_key, hmac_key = self.keys
+        if self.gcm:
+            return self._encrypt_gcm(data)
+        aes_key = self.keys[0]
         pad = self.AES_BLOCK_SIZE - len(data) % self.AES_BLOCK_SIZE
-        data = data + pad * chr(pad)
         iv_bytes = os.urandom(self.AES_BLOCK_SIZE)
         cypher = AES.new(aes_key, AES.MODE_CBC, iv_bytes)
-        data = iv_bytes + cypher.encrypt(data)
-        sig = hmac.new(hmac_key, data, hashlib.sha256).digest()
-        return data + sig
+        data = cypher.encrypt(data + pad * chr(pad))
+        mac = self.hmac.copy()
+        mac.update(iv_bytes)
+        mac.update(data)
+        return ''.join((iv_bytes, data, mac.digest()))
 
     def decrypt(self, data):
         '''
         verify HMAC-SHA256 signature and decrypt data with AES-CBC
         '''
-        aes_key, hmac_key = self.keys
-        sig = data[-self.SIG_SIZE:]
-        data = data[:-self.SIG_SIZE]
-        mac_bytes = hmac.new(hmac_key, data, hashlib.sha256).digest()
-        if len(mac_bytes) != len(sig):
+        data, pad = self._decrypt(data)
+        return data[:len(data) - pad]
+
+    def _decrypt(self, data):
+        '''
+        Verify and decrypt data, return the decrypted data still padded and
+        the length of its padding. The input is only read through views, the
+        decrypted data is the only copy made.
+        '''
+        if self.gcm:
+            return self._decrypt_gcm(data), 0
+        end = len(data) - self.SIG_SIZE
+        if len(data) >= self.AES_BLOCK_SIZE * 2 + self.SIG_SIZE:
+            mac = self.hmac.copy()
+            mac.update(_view(data, 0, end))
+            authenticated = _compare_digest(mac.digest(), data[end:])
+        else:
+            authenticated = False
+        if not authenticated:
+            if data.startswith(self.GCM_MARKER):
+                raise self._mode_mismatch(True)
             log.debug('Failed to authenticate message')
             raise AuthenticationError('message authentication failed')
-        result = 0
-        for zipped_x, zipped_y in zip(mac_bytes, sig):
-            result |= ord(zipped_x) ^ ord(zipped_y)
-        if result != 0:
+        cypher = AES.new(self.keys[0],
+                         AES.MODE_CBC,
+                         data[:self.AES_BLOCK_SIZE])
+        data = cypher.decrypt(_view(data, self.AES_BLOCK_SIZE, end))
+        return data, ord(data[-1])
+
+    def _encrypt_gcm(self, data):
+        '''
+        encrypt and authenticate data with AES-GCM
+        '''
+        nonce = os.urandom(self.GCM_NONCE_SIZE)
+        cypher = AES.new(self.keys[0], AES.MODE_GCM, nonce=nonce)
+        data, tag = cypher.encrypt_and_digest(data)
+        return ''.join((self.GCM_MARKER, nonce, data, tag))
+
+    def _decrypt_gcm(self, data):
+        '''
+        verify and decrypt data with AES-GCM
+        '''
+        if not data.startswith(self.GCM_MARKER):
+            raise self._mode_mismatch(False)
+        start = len(self.GCM_MARKER) + self.GCM_NONCE_SIZE
+        if len(data) < start + self.GCM_TAG_SIZE:
             log.debug('Failed to authenticate message')
             raise AuthenticationError('message authentication failed')
-        iv_bytes = data[:self.AES_BLOCK_SIZE]
-        data = data[self.AES_BLOCK_SIZE:]
-        cypher = AES.new(aes_key, AES.MODE_CBC, iv_bytes)
-        data = cypher.decrypt(data)
-        return data[:-ord(data[-1])]
+        end = len(data) - self.GCM_TAG_SIZE
+        cypher = AES.new(self.keys[0],
+                         AES.MODE_GCM,
+                         nonce=data[len(self.GCM_MARKER):start])
+        try:
+            return cypher.decrypt_and_verify(_view(data, start, end),
+                                             data[end:])
+        except ValueError:
+            log.debug('Failed to authenticate message')
+            raise AuthenticationError('message authentication failed')
+
+    def _mode_mismatch(self, gcm):
+        '''
+        Return the error for a message encrypted by a peer which does not use
+        the same aes_gcm setting
+        '''
+        msg = (
+            'Received a message encrypted with {0}, but aes_gcm is {1} '
+            'here. Set aes_gcm to the same value on the master and on its '
+            'minions.'.format('AES-GCM' if gcm else 'AES-CBC',
+                              'disabled' if gcm else 'enabled')
+        )
+        log.error(msg)
+        return AuthenticationError(msg)
 
     def dumps(self, obj):
         '''
@@ -1134,8 +1237,10 @@ class Crypticle(object):
         '''
         Decrypt and un-serialize a python object
         '''
-        data = self.decrypt(data)
+        data, pad = self._decrypt(data)
         # simple integrity check to verify that we got meaningful data
         if not data.startswith(self.PICKLE_PAD):
             return {}
-        return self.serial.loads(data[len(self.PICKLE_PAD):])
+        # Deserialize without copying the decrypted data again
+        return self.serial.loads(
+            memoryview(data)[len(self.PICKLE_PAD):len(data) - pad])
@@ -12,7 +12,6 @@ import os
 import re
 import time
 import stat
-import tempfile
 
 # Import salt libs
 import salt.crypt
@@ -30,6 +29,7 @@ import salt.key
 import salt.fileserver
 import salt.utils.atomicfile
 import salt.utils.event
+import salt.utils.mine
 import salt.utils.verify
 import salt.utils.minions
 import salt.utils.gzip_util
@@ -392,6 +392,9 @@ class RemoteFuncs(object):
                 listen=False)
         self.serial = salt.payload.Serial(opts)
         self.ckminions = salt.utils.minions.CkMinions(opts)
+        self.data_cache = salt.utils.minions.MinionDataCache(opts, self.event)
+        # Per-process reader/writer of the mine data
+        self.mine = salt.utils.mine.MineCache(opts)
         # Create the tops dict for loading external top data
         self.tops = salt.loader.tops(self.opts)
         # Make a client
@@ -546,20 +549,7 @@ class RemoteFuncs(object):
                 match_type,
                 greedy=False
                 )
-        for minion in minions:
-            mine = os.path.join(
-                    self.opts['cachedir'],
-                    'minions',
-                    minion,
-                    'mine.p')
-            try:
-                with salt.utils.fopen(mine, 'rb') as fp_:
-                    fdata = self.serial.load(fp_).get(load['fun'])
-                    if fdata:
-                        ret[minion] = fdata
-            except Exception:
-                continue
-        return ret
+        return self.mine.get_many(minions, load['fun'])
 
     def _mine(self, load, skip_verify=False):
         '''
@@ -569,19 +559,9 @@ class RemoteFuncs(object):
             if 'id' not in load or 'data' not in load:
                 return False
         if self.opts.get('minion_data_cache', False) or self.opts.get('enforce_mine_cache', False):
-            cdir = os.path.join(self.opts['cachedir'], 'minions', load['id'])
-            if not os.path.isdir(cdir):
-                os.makedirs(cdir)
-            datap = os.path.join(cdir, 'mine.p')
-            if not load.get('clear', False):
-                if os.path.isfile(datap):
-                    with salt.utils.fopen(datap, 'rb') as fp_:
-                        new = self.serial.load(fp_)
-                    if isinstance(new, dict):
-                        new.update(load['data'])
-                        load['data'] = new
-            with salt.utils.fopen(datap, 'w+b') as fp_:
-                fp_.write(self.serial.dumps(load['data']))
+            self.mine.store(load['id'],
+                            load['data'],
+                            clear=load.get('clear', False))
         return True
 
     def _mine_delete(self, load):
@@ -594,17 +574,10 @@ class RemoteFuncs(object):
             cdir = os.path.join(self.opts['cachedir'], 'minions', load['id'])
             if not os.path.isdir(cdir):
                 return False
-            datap = os.path.join(cdir, 'mine.p')
-            if os.path.isfile(datap):
-                try:
-                    with salt.utils.fopen(datap, 'rb') as fp_:
-                        mine_data = self.serial.load(fp_)
-                    if isinstance(mine_data, dict):
-                        if mine_data.pop(load['fun'], False):
-                            with salt.utils.fopen(datap, 'w+b') as fp_:
-                                fp_.write(self.serial.dumps(mine_data))
-                except OSError:
-                    return False
+            try:
+                self.mine.delete(load['id'], load['fun'])
+            except (IOError, OSError):
+                return False
         return True
 
     def _mine_flush(self, load, skip_verify=False):
@@ -617,12 +590,7 @@ class RemoteFuncs(object):
             cdir = os.path.join(self.opts['cachedir'], 'minions', load['id'])
             if not os.path.isdir(cdir):
                 return False
-            datap = os.path.join(cdir, 'mine.p')
-            if os.path.isfile(datap):
-                try:
-                    os.remove(datap)
-                except OSError:
-                    return False
+            self.mine.flush(load['id'])
         return True
 
     def _file_recv(self, load):
@@ -697,19 +665,7 @@ class RemoteFuncs(object):
         pillar_dirs = {}
         data = pillar.compile_pillar(pillar_dirs=pillar_dirs)
         if self.opts.get('minion_data_cache', False):
-            cdir = os.path.join(self.opts['cachedir'], 'minions', load['id'])
-            if not os.path.isdir(cdir):
-                os.makedirs(cdir)
-            datap = os.path.join(cdir, 'data.p')
-            tmpfh, tmpfname = tempfile.mkstemp(dir=cdir)
-            os.close(tmpfh)
-            with salt.utils.fopen(tmpfname, 'w+b') as fp_:
-                fp_.write(
-                        self.serial.dumps(
-                            {'grains': load['grains'],
-                             'pillar': data})
-                            )
-            os.rename(tmpfname, datap)
+            self.data_cache.store(load['id'], load['grains'], data)
         return data
 
     def _minion_event(self, load):
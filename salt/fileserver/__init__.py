@@ -5,8 +5,10 @@ File server pluggable modules and generic backend functions
 
 # Import python libs
 from __future__ import absolute_import
+import bisect
 import errno
 import fnmatch
+import itertools
 import logging
 import os
 import re
@@ -15,6 +17,7 @@ import time
 # Import salt libs
 import salt.loader
 import salt.utils
+import salt.utils.atomicfile
 
 # Import 3rd-party libs
 import salt.ext.six as six
@@ -22,6 +25,19 @@ import salt.ext.six as six
 
 log = logging.getLogger(__name__)
 
+# Name of the file holding the file list generation of a backend
+LIST_GENERATION_FILE = '.generation'
+# Extension of the files holding the file list generation of an environment,
+# next to its file list cache
+LIST_ENV_GENERATION_EXT = '.gen'
+
+# list_cache path -> ((generation, stat signature), file lists)
+_FILE_LISTS = {}
+# list_cache path -> generation the lists being built belong to
+_FILE_LISTS_PENDING = {}
+# Backends whose generation has been bumped by this process
+_GENERATIONS_BUMPED = set()
+
 
 def _unlock_cache(w_lock):
     '''
@@ -95,15 +111,167 @@ def wait_lock(lk_fn, dest, wait_timeout=0):
     return False
 
 
-def check_file_list_cache(opts, form, list_cache, w_lock):
+def _read_generation(path):
+    try:
+        with salt.utils.fopen(path, 'r') as fp_:
+            return int(fp_.read().strip())
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def _file_list_generation(list_cachedir):
+    '''
+    Return the file list generation of a backend, or None if the backend has
+    not been updated yet
+    '''
+    return _read_generation(os.path.join(list_cachedir, LIST_GENERATION_FILE))
+
+
+def _env_generation_path(list_cache):
+    return os.path.splitext(list_cache)[0] + LIST_ENV_GENERATION_EXT
+
+
+def _list_generation(list_cache):
+    '''
+    Return the generation a file list cache must have been built in to be
+    current: the generation of the backend and the generation of the
+    environment, or None if the backend has not been updated yet
+    '''
+    generation = _file_list_generation(os.path.dirname(list_cache))
+    if generation is None:
+        return None
+    return [generation,
+            _read_generation(_env_generation_path(list_cache)) or 0]
+
+
+def update_file_list_generation(opts, backend, changed):
+    '''
+    Called by the update function of fileserver backends. Bump the file list
+    generation of the backend if the backend reports changes, which discards
+    all of its file list caches. Until a backend has a generation, its file
+    list caches expire after ``fileserver_list_cache_time`` seconds.
+    '''
+    list_cachedir = os.path.join(opts['cachedir'], 'file_lists', backend)
+    generation = _file_list_generation(list_cachedir)
+    if generation is not None and not changed \
+            and backend in _GENERATIONS_BUMPED:
+        return generation
+    # The first update after a restart always starts a new generation, the
+    # caches may have been built with a different configuration
+    _GENERATIONS_BUMPED.add(backend)
+    generation = (generation or 0) + 1
+    if not os.path.isdir(list_cachedir):
+        try:
+            os.makedirs(list_cachedir)
+        except OSError:
+            if not os.path.isdir(list_cachedir):
+                raise
+    with salt.utils.atomicfile.atomic_open(
+            os.path.join(list_cachedir, LIST_GENERATION_FILE), 'w') as fp_:
+        fp_.write(str(generation))
+    log.trace('File list generation of {0} is now {1}'
+              .format(backend, generation))
+    return generation
+
+
+def invalidate_file_list_cache(list_cache):
+    '''
+    Called by the update function of fileserver backends. Discard the file
+    list cache of a single environment by bumping the generation of that
+    environment, so that lists which are being built for the previous
+    generation while this runs are not used either.
+    '''
+    path = _env_generation_path(list_cache)
+    generation = (_read_generation(path) or 0) + 1
+    with salt.utils.atomicfile.atomic_open(path, 'w') as fp_:
+        fp_.write(str(generation))
+    try:
+        os.remove(list_cache)
+    except OSError:
+        pass
+    log.trace('File list generation of {0} is now {1}'
+              .format(list_cache, generation))
+
+
+def _stat_sig(path):
+    try:
+        st_ = os.stat(path)
+    except OSError:
+        return None
+    return (st_.st_ino, st_.st_mtime, st_.st_size)
+
+
+def _filter_file_list(data, prefix):
+    '''
+    Return a copy of a cached file list, limited to the entries beginning with
+    prefix. Cached lists are sorted, so the matches are found with a bisection.
+    '''
+    if isinstance(data, dict):
+        return dict([(key, val) for key, val in six.iteritems(data)
+                     if key.startswith(prefix)])
+    if not prefix:
+        return list(data)
+    ret = []
+    for item in itertools.islice(data, bisect.bisect_left(data, prefix), None):
+        if not item.startswith(prefix):
+            break
+        ret.append(item)
+    return ret
+
+
+def _load_file_list_cache(opts, list_cache, generation):
+    '''
+    Return the file lists stored in list_cache, or None if the cache does not
+    exist or is outdated. Loaded lists are kept in memory for as long as the
+    cache file and the generation do not change.
+    '''
+    sig = _stat_sig(list_cache)
+    if sig is None:
+        return None
+    if generation is None:
+        # No update has run yet, fall back to expiring the cache by age
+        age = time.time() - sig[1]
+        if age >= opts.get('fileserver_list_cache_time', 30):
+            return None
+    cached = _FILE_LISTS.get(list_cache)
+    if cached is not None and cached[0] == (generation, sig):
+        return cached[1]
+    serial = salt.payload.Serial(opts)
+    with salt.utils.fopen(list_cache, 'rb') as fp_:
+        log.trace('Returning file_lists cache data from '
+                  '{0}'.format(list_cache))
+        data = serial.load(fp_)
+    if not isinstance(data, dict) or 'lists' not in data:
+        # Written by an older version
+        return None
+    if generation is not None and data.get('generation') != generation:
+        return None
+    lists = {}
+    for form, items in six.iteritems(data['lists']):
+        lists[form] = items if isinstance(items, dict) else sorted(items)
+    _FILE_LISTS[list_cache] = ((generation, sig), lists)
+    return lists
+
+
+def check_file_list_cache(opts, form, list_cache, w_lock, prefix=''):
     '''
     Checks the cache file to see if there is a new enough file list cache, and
     returns the match (if found, along with booleans used by the fileserver
     backend to determine if the cache needs to be refreshed/written).
+
+    A cache is current as long as it was written during the current file list
+    generation of the backend and of the environment. Matches can be limited
+    to the entries beginning with ``prefix``.
     '''
     refresh_cache = False
     save_cache = True
-    serial = salt.payload.Serial(opts)
+    generation = _list_generation(list_cache)
+    try:
+        lists = _load_file_list_cache(opts, list_cache, generation)
+    except Exception:
+        lists = None
+    if lists is not None:
+        return _filter_file_list(lists.get(form, []), prefix), False, False
     wait_lock(w_lock, list_cache, 5 * 60)
     if not os.path.isfile(list_cache) and _lock_cache(w_lock):
         refresh_cache = True
@@ -114,19 +282,11 @@ def check_file_list_cache(opts, form, list_cache, w_lock):
                 if os.path.exists(w_lock):
                     # wait for a filelist lock for max 15min
                     wait_lock(w_lock, list_cache, 15 * 60)
-                if os.path.exists(list_cache):
-                    # calculate filelist age is possible
-                    cache_stat = os.stat(list_cache)
-                    age = time.time() - cache_stat.st_mtime
-                else:
-                    # if filelist does not exists yet, mark it as expired
-                    age = opts.get('fileserver_list_cache_time', 30) + 1
-                if age < opts.get('fileserver_list_cache_time', 30):
-                    # Young enough! Load this sucker up!
-                    with salt.utils.fopen(list_cache, 'rb') as fp_:
-                        log.trace('Returning file_lists cache data from '
-                                  '{0}'.format(list_cache))
-                        return serial.load(fp_).get(form, []), False, False
+                lists = _load_file_list_cache(opts, list_cache, generation)
+                if lists is not None:
+                    return (_filter_file_list(lists.get(form, []), prefix),
+                            False,
+                            False)
                 elif _lock_cache(w_lock):
                     # Set the w_lock and go
                     refresh_cache = True
@@ -138,20 +298,27 @@ def check_file_list_cache(opts, form, list_cache, w_lock):
         if attempt > 10:
             save_cache = False
             refresh_cache = True
+    if refresh_cache:
+        # The lists about to be built belong to the generation seen now, even
+        # if an update bumps it while they are being built
+        _FILE_LISTS_PENDING[list_cache] = generation
     return None, refresh_cache, save_cache
 
 
 def write_file_list_cache(opts, data, list_cache, w_lock):
     '''
-    Checks the cache file to see if there is a new enough file list cache, and
-    returns the match (if found, along with booleans used by the fileserver
-    backend to determine if the cache needs to be refreshed/written).
+    Write the file lists built by a fileserver backend to the cache file,
+    tagged with the generation they were built for, and release the lock
     '''
     serial = salt.payload.Serial(opts)
-    with salt.utils.fopen(list_cache, 'w+b') as fp_:
-        fp_.write(serial.dumps(data))
-        _unlock_cache(w_lock)
-        log.trace('Lockfile {0} removed'.format(w_lock))
+    generation = _FILE_LISTS_PENDING.pop(
+        list_cache,
+        _list_generation(list_cache)
+    )
+    with salt.utils.atomicfile.atomic_open(list_cache, 'w+b') as fp_:
+        fp_.write(serial.dumps({'generation': generation, 'lists': data}))
+    _unlock_cache(w_lock)
+    log.trace('Lockfile {0} removed'.format(w_lock))
 
 
 def check_env_cache(opts, env_cache):
@@ -172,12 +339,17 @@ def check_env_cache(opts, env_cache):
 
 def generate_mtime_map(path_map):
     '''
-    Generate a dict of filename -> mtime
+    Generate a dict of filename -> mtime. Directories are included, so that
+    added and removed (empty) directories are noticed as well.
     '''
     file_map = {}
     for saltenv, path_list in six.iteritems(path_map):
         for path in path_list:
             for directory, dirnames, filenames in os.walk(path):
+                try:
+                    file_map[directory] = os.path.getmtime(directory)
+                except (OSError, IOError):
+                    pass
                 for item in filenames:
                     try:
                         file_path = os.path.join(directory, item)
@@ -48,23 +48,38 @@ Walkthrough <tutorial-gitfs>`.
 
 # Import python libs
 from __future__ import absolute_import
+import binascii
 import copy
 import distutils.version  # pylint: disable=E0611
 import errno
 import fnmatch
-import glob
 import hashlib
 import logging
+import multiprocessing
 import os
 import re
 import shutil
 import stat
 import subprocess
+import time
 from datetime import datetime
+from multiprocessing.pool import ThreadPool
 
 VALID_PROVIDERS = ('gitpython', 'pygit2', 'dulwich')
 PER_REMOTE_PARAMS = ('base', 'mountpoint', 'root')
 SYMLINK_RECURSE_DEPTH = 100
+# Maximum number of seconds a failing remote is skipped for
+UPDATE_BACKOFF_MAX = 3600
+
+# Fetch failures, backoff and results of each remote, keyed by URL
+_REMOTE_STATE = {}
+
+# Blobs up to BLOB_CACHE_MAX_ITEM bytes are served from memory, larger ones
+# are written to the refs cache and served from there
+BLOB_CACHE_SIZE = 32 * 1024 * 1024
+BLOB_CACHE_MAX_ITEM = 4 * 1024 * 1024
+# Maximum number of paths kept in the blob index
+BLOB_INDEX_MAX = 100000
 
 # Auth support (auth params can be global or per-remote, too)
 AUTH_PROVIDERS = ('pygit2',)
@@ -97,7 +112,9 @@ _INVALID_REPO = (
 
 # Import salt libs
 import salt.utils
+import salt.utils.atomicfile
 import salt.fileserver
+from salt.utils.odict import OrderedDict
 from salt.exceptions import FileserverConfigError
 from salt.utils.event import tagify
 
@@ -133,6 +150,13 @@ log = logging.getLogger(__name__)
 # Define the module's virtual name
 __virtualname__ = 'git'
 
+# (saltenv, path) -> (remote URL, blob SHA, size), None for missing paths
+_BLOB_INDEX = {'sig': None, 'blobs': {}}
+# Least recently used blob contents, keyed by blob SHA
+_BLOB_CACHE = {'size': 0, 'blobs': OrderedDict()}
+# blob SHA -> {hash_type: hash}
+_BLOB_HASHES = {}
+
 
 def _verify_gitpython(quiet=False):
     '''
@@ -1106,128 +1130,293 @@ def lock(remote=None):
     return locked, errors
 
 
+def _fetch_repo(repo, provider):
+    '''
+    Fetch a single gitfs remote, return True if anything changed
+    '''
+    changed = False
+    if provider == 'gitpython':
+        origin = repo['repo'].remotes[0]
+        try:
+            fetch_results = origin.fetch()
+        except AssertionError:
+            fetch_results = origin.fetch()
+        cleaned = _clean_stale(repo['repo'])
+        if fetch_results or cleaned:
+            changed = True
+    elif provider == 'pygit2':
+        origin = repo['repo'].remotes[0]
+        refs_pre = repo['repo'].listall_references()
+        try:
+            origin.credentials = repo['credentials']
+        except KeyError:
+            # No credentials configured for this repo
+            pass
+        fetch = origin.fetch()
+        try:
+            # pygit2.Remote.fetch() returns a dict in pygit2 < 0.21.0
+            received_objects = fetch['received_objects']
+        except (AttributeError, TypeError):
+            # pygit2.Remote.fetch() returns a class instance in
+            # pygit2 >= 0.21.0
+            received_objects = fetch.received_objects
+        log.debug(
+            'gitfs received {0} objects for remote {1}'
+            .format(received_objects, repo['url'])
+        )
+        # Clean up any stale refs
+        refs_post = repo['repo'].listall_references()
+        cleaned = _clean_stale(repo['repo'], refs_post)
+        if received_objects or refs_pre != refs_post or cleaned:
+            changed = True
+    elif provider == 'dulwich':
+        # origin is just a url here, there is no origin object
+        origin = repo['url']
+        client, path = \
+            dulwich.client.get_transport_and_path_from_url(
+                origin, thin_packs=True
+            )
+        refs_pre = repo['repo'].get_refs()
+        try:
+            refs_post = client.fetch(path, repo['repo'])
+        except dulwich.errors.NotGitRepository:
+            log.critical(
+                'Dulwich does not recognize remote {0} as a valid '
+                'remote URL. Perhaps it is missing \'.git\' at the '
+                'end.'.format(repo['url'])
+            )
+            return changed
+        except KeyError:
+            log.critical(
+                'Local repository cachedir {0!r} (corresponding '
+                'remote: {1}) has been corrupted. Salt will now '
+                'attempt to remove the local checkout to allow it to '
+                'be re-initialized in the next fileserver cache '
+                'update.'
+                .format(repo['cachedir'], repo['url'])
+            )
+            try:
+                salt.utils.rm_rf(repo['cachedir'])
+            except OSError as exc:
+                log.critical(
+                    'Unable to remove {0!r}: {1}'
+                    .format(repo['cachedir'], exc)
+                )
+            return changed
+        if refs_post is None:
+            # Empty repository
+            log.warning(
+                'gitfs remote {0!r} is an empty repository and will '
+                'be skipped.'.format(origin)
+            )
+            return changed
+        if refs_pre != refs_post:
+            changed = True
+            # Update local refs
+            for ref in _dulwich_env_refs(refs_post):
+                repo['repo'][ref] = refs_post[ref]
+            # Prune stale refs
+            for ref in repo['repo'].get_refs():
+                if ref not in refs_post:
+                    del repo['repo'][ref]
+    return changed
+
+
+def _env_shas(repo, provider):
+    '''
+    Return a dict mapping the environments provided by a repo to the SHA of
+    the commit they point to
+    '''
+    ret = {}
+    if provider == 'gitpython':
+        for ref in repo['repo'].refs:
+            parted = ref.name.partition('/')
+            rspec = parted[2] if parted[2] else parted[0]
+            if isinstance(ref, git.Head):
+                if rspec == repo['base']:
+                    rspec = 'base'
+            elif not isinstance(ref, git.Tag):
+                continue
+            try:
+                ret[rspec] = ref.commit.hexsha
+            except ValueError:
+                continue
+    elif provider == 'pygit2':
+        for ref in repo['repo'].listall_references():
+            rtype, rspec = re.sub('^refs/', '', ref).split('/', 1)
+            if rtype == 'remotes':
+                parted = rspec.partition('/')
+                rspec = parted[2] if parted[2] else parted[0]
+                if rspec == repo['base']:
+                    rspec = 'base'
+            elif rtype != 'tags':
+                continue
+            try:
+                target = repo['repo'].lookup_reference(ref).resolve().target
+            except (KeyError, ValueError):
+                continue
+            ret[rspec] = getattr(target, 'hex', str(target))
+    elif provider == 'dulwich':
+        refs = repo['repo'].get_refs()
+        for ref in _dulwich_env_refs(refs):
+            rtype, rspec = ref[5:].split('/', 1)
+            if rtype == 'heads' and rspec == repo['base']:
+                rspec = 'base'
+            ret[rspec] = refs[ref]
+    return ret
+
+
+def _update_repo(repo, provider):
+    '''
+    Fetch a single gitfs remote under its update lock, backing off after
+    failed fetches. The result is recorded in _REMOTE_STATE, so that fetches
+    which outlive the update timeout are picked up by the next update().
+    '''
+    state = _REMOTE_STATE.setdefault(
+        repo['url'], {'failures': 0, 'retry_after': 0}
+    )
+    if time.time() < state['retry_after']:
+        log.debug(
+            'Skipping gitfs remote {0} after {1} failed fetch(es)'
+            .format(repo['url'], state['failures'])
+        )
+        return
+    if os.path.exists(repo['lockfile']):
+        log.warning(
+            'Update lockfile is present for gitfs remote {0}, skipping. '
+            'If this warning persists, it is possible that the update '
+            'process was interrupted. Removing {1} or running '
+            '\'salt-run fileserver.clear_lock gitfs\' will allow updates '
+            'to continue for this remote.'
+            .format(repo['url'], repo['lockfile'])
+        )
+        return
+    _, errors = lock(repo)
+    if errors:
+        log.error('Unable to set update lock for gitfs remote {0}, '
+                  'skipping.'.format(repo['url']))
+        return
+    log.debug('gitfs is fetching from {0}'.format(repo['url']))
+    changed = False
+    moved = set()
+    start = time.time()
+    try:
+        shas_pre = _env_shas(repo, provider)
+        changed = _fetch_repo(repo, provider)
+        shas_post = _env_shas(repo, provider)
+        moved = set(
+            [env for env in set(shas_pre).union(shas_post)
+             if shas_pre.get(env) != shas_post.get(env)]
+        )
+        state['failures'] = 0
+        state['retry_after'] = 0
+    except Exception as exc:
+        # Do not use {0!r} in the error message, as exc is not a string
+        log.error(
+            'Exception \'{0}\' caught while fetching gitfs remote {1}'
+            .format(exc, repo['url']),
+            exc_info_on_loglevel=logging.DEBUG
+        )
+        state['failures'] += 1
+        state['retry_after'] = time.time() + min(
+            UPDATE_BACKOFF_MAX,
+            __opts__['loop_interval'] * 2 ** (state['failures'] - 1)
+        )
+    finally:
+        clear_lock(repo)
+    elapsed = time.time() - start
+    log.debug(
+        'gitfs fetch from {0} took {1:.2f}s'.format(repo['url'], elapsed)
+    )
+    pending = state.setdefault('pending', {'changed': False, 'envs': set()})
+    pending['changed'] = pending['changed'] or changed
+    pending['envs'].update(moved)
+    pending['time'] = elapsed
+
+
+def _update_repo_in_flight(repo, provider):
+    '''
+    Run _update_repo for a remote marked as in flight by update(), and clear
+    the mark once it is done
+    '''
+    try:
+        _update_repo(repo, provider)
+    finally:
+        _REMOTE_STATE[repo['url']]['in_flight'] = False
+
+
 def update():
     '''
     Execute a git fetch on all of the repos
+
+    Up to :conf_master:`gitfs_update_workers` remotes are fetched
+    concurrently. Remotes whose fetch outlived the update timeout of a
+    previous update are skipped until that fetch is done. Only the file list
+    caches of the environments whose refs moved are invalidated.
     '''
     # data for the fileserver event
     data = {'changed': False,
-            'backend': 'gitfs'}
+            'backend': 'gitfs',
+            'envs': [],
+            'timings': {}}
     provider = _get_provider()
     # _clear_old_remotes runs init(), so use the value from there to avoid a
     # second init()
     data['changed'], repos = _clear_old_remotes()
+    # Adding or removing remotes can change any environment. Otherwise only
+    # the file list caches of environments whose refs moved are removed below.
+    salt.fileserver.update_file_list_generation(
+        __opts__, 'gitfs', data['changed']
+    )
+    fetch = []
     for repo in repos:
-        if os.path.exists(repo['lockfile']):
-            log.warning(
-                'Update lockfile is present for gitfs remote {0}, skipping. '
-                'If this warning persists, it is possible that the update '
-                'process was interrupted. Removing {1} or running '
-                '\'salt-run fileserver.clear_lock gitfs\' will allow updates '
-                'to continue for this remote.'
-                .format(repo['url'], repo['lockfile'])
+        state = _REMOTE_STATE.setdefault(
+            repo['url'], {'failures': 0, 'retry_after': 0}
+        )
+        if state.get('in_flight'):
+            log.debug(
+                'gitfs fetch from {0} started by a previous update is still '
+                'running, skipping'.format(repo['url'])
             )
             continue
-        _, errors = lock(repo)
-        if errors:
-            log.error('Unable to set update lock for gitfs remote {0}, '
-                      'skipping.'.format(repo['url']))
-            continue
-        log.debug('gitfs is fetching from {0}'.format(repo['url']))
-        try:
-            if provider == 'gitpython':
-                origin = repo['repo'].remotes[0]
-                try:
-                    fetch_results = origin.fetch()
-                except AssertionError:
-                    fetch_results = origin.fetch()
-                cleaned = _clean_stale(repo['repo'])
-                if fetch_results or cleaned:
-                    data['changed'] = True
-            elif provider == 'pygit2':
-                origin = repo['repo'].remotes[0]
-                refs_pre = repo['repo'].listall_references()
-                try:
-                    origin.credentials = repo['credentials']
-                except KeyError:
-                    # No credentials configured for this repo
-                    pass
-                fetch = origin.fetch()
-                try:
-                    # pygit2.Remote.fetch() returns a dict in pygit2 < 0.21.0
-                    received_objects = fetch['received_objects']
-                except (AttributeError, TypeError):
-                    # pygit2.Remote.fetch() returns a class instance in
-                    # pygit2 >= 0.21.0
-                    received_objects = fetch.received_objects
-                log.debug(
-                    'gitfs received {0} objects for remote {1}'
-                    .format(received_objects, repo['url'])
+        # Marked before the fetch is queued, so that a fetch still waiting
+        # for a worker is not queued again by the next update
+        state['in_flight'] = True
+        fetch.append(repo)
+    workers = min(__opts__.get('gitfs_update_workers', 1), len(fetch))
+    if workers > 1:
+        timeout = __opts__.get('gitfs_update_timeout', 0)
+        pool = ThreadPool(workers)
+        results = [pool.apply_async(_update_repo_in_flight, (repo, provider))
+                   for repo in fetch]
+        pool.close()
+        deadline = time.time() + timeout
+        for repo, result in zip(fetch, results):
+            try:
+                if timeout:
+                    result.get(max(0, deadline - time.time()))
+                else:
+                    result.get()
+            except multiprocessing.TimeoutError:
+                log.warning(
+                    'gitfs fetch from {0} did not finish within {1} seconds, '
+                    'its changes will be picked up by the next update'
+                    .format(repo['url'], timeout)
                 )
-                # Clean up any stale refs
-                refs_post = repo['repo'].listall_references()
-                cleaned = _clean_stale(repo['repo'], refs_post)
-                if received_objects or refs_pre != refs_post or cleaned:
-                    data['changed'] = True
-            elif provider == 'dulwich':
-                # origin is just a url here, there is no origin object
-                origin = repo['url']
-                client, path = \
-                    dulwich.client.get_transport_and_path_from_url(
-                        origin, thin_packs=True
-                    )
-                refs_pre = repo['repo'].get_refs()
-                try:
-                    refs_post = client.fetch(path, repo['repo'])
-                except dulwich.errors.NotGitRepository:
-                    log.critical(
-                        'Dulwich does not recognize remote {0} as a valid '
-                        'remote URL. Perhaps it is missing \'.git\' at the '
-                        'end.'.format(repo['url'])
-                    )
-                    continue
-                except KeyError:
-                    log.critical(
-                        'Local repository cachedir {0!r} (corresponding '
-                        'remote: {1}) has been corrupted. Salt will now '
-                        'attempt to remove the local checkout to allow it to '
-                        'be re-initialized in the next fileserver cache '
-                        'update.'
-                        .format(repo['cachedir'], repo['url'])
-                    )
-                    try:
-                        salt.utils.rm_rf(repo['cachedir'])
-                    except OSError as exc:
-                        log.critical(
-                            'Unable to remove {0!r}: {1}'
-                            .format(repo['cachedir'], exc)
-                        )
-                    continue
-                if refs_post is None:
-                    # Empty repository
-                    log.warning(
-                        'gitfs remote {0!r} is an empty repository and will '
-                        'be skipped.'.format(origin)
-                    )
-                    continue
-                if refs_pre != refs_post:
-                    data['changed'] = True
-                    # Update local refs
-                    for ref in _dulwich_env_refs(refs_post):
-                        repo['repo'][ref] = refs_post[ref]
-                    # Prune stale refs
-                    for ref in repo['repo'].get_refs():
-                        if ref not in refs_post:
-                            del repo['repo'][ref]
-        except Exception as exc:
-            # Do not use {0!r} in the error message, as exc is not a string
-            log.error(
-                'Exception \'{0}\' caught while fetching gitfs remote {1}'
-                .format(exc, repo['url']),
-                exc_info_on_loglevel=logging.DEBUG
-            )
-        finally:
-            clear_lock(repo)
+    else:
+        for repo in fetch:
+            _update_repo_in_flight(repo, provider)
+
+    changed_envs = set()
+    for repo in repos:
+        pending = _REMOTE_STATE.get(repo['url'], {}).pop('pending', None)
+        if pending is None:
+            continue
+        data['timings'][repo['url']] = pending['time']
+        if pending['changed']:
+            data['changed'] = True
+        changed_envs.update(pending['envs'])
+    data['envs'] = sorted(changed_envs)
 
     env_cache = os.path.join(__opts__['cachedir'], 'gitfs/envs.p')
     if data.get('changed', False) is True or not os.path.isfile(env_cache):
@@ -1236,10 +1425,19 @@ def update():
             os.makedirs(env_cachedir)
         new_envs = envs(ignore_cache=True)
         serial = salt.payload.Serial(__opts__)
-        with salt.utils.fopen(env_cache, 'w+') as fp_:
+        # Written atomically, find_file() uses the inode to detect updates
+        with salt.utils.atomicfile.atomic_open(env_cache, 'w+b') as fp_:
             fp_.write(serial.dumps(new_envs))
             log.trace('Wrote env cache data to {0}'.format(env_cache))
 
+    # Only the file lists of the environments which moved are stale
+    list_cachedir = os.path.join(__opts__['cachedir'], 'file_lists/gitfs')
+    for env in changed_envs:
+        salt.fileserver.invalidate_file_list_cache(os.path.join(
+            list_cachedir,
+            '{0}.p'.format(env.replace(os.path.sep, '_|-'))
+        ))
+
     # if there is a change, fire an event
     if __opts__.get('fileserver_events', False):
         event = salt.utils.event.get_event(
@@ -1359,47 +1557,33 @@ def _envs_dulwich(repo):
     return ret
 
 
-def find_file(path, tgt_env='base', **kwargs):  # pylint: disable=W0613
+def _blob_index():
     '''
-    Find the first file to match the path and ref, read the file out of git
-    and send the path to the newly cached file
+    Return the (saltenv, path) -> blob index of this process. The index is
+    dropped whenever update() has rewritten the environment cache, which it
+    does every time the refs of a remote have moved. Without an environment
+    cache there is nothing to validate against, and a throwaway dict is
+    returned.
     '''
-    fnd = {'path': '',
-           'rel': ''}
-    if os.path.isabs(path) or tgt_env not in envs():
-        return fnd
+    env_cache = os.path.join(__opts__['cachedir'], 'gitfs/envs.p')
+    try:
+        st_ = os.stat(env_cache)
+    except OSError:
+        return {}
+    sig = (st_.st_ino, st_.st_mtime, st_.st_size)
+    if _BLOB_INDEX['sig'] != sig or len(_BLOB_INDEX['blobs']) > BLOB_INDEX_MAX:
+        _BLOB_INDEX['sig'] = sig
+        _BLOB_INDEX['blobs'] = {}
+    return _BLOB_INDEX['blobs']
 
-    provider = _get_provider()
-    dest = os.path.join(__opts__['cachedir'], 'gitfs/refs', tgt_env, path)
-    hashes_glob = os.path.join(__opts__['cachedir'],
-                               'gitfs/hash',
-                               tgt_env,
-                               '{0}.hash.*'.format(path))
-    blobshadest = os.path.join(__opts__['cachedir'],
-                               'gitfs/hash',
-                               tgt_env,
-                               '{0}.hash.blob_sha1'.format(path))
-    lk_fn = os.path.join(__opts__['cachedir'],
-                         'gitfs/hash',
-                         tgt_env,
-                         '{0}.lk'.format(path))
-    destdir = os.path.dirname(dest)
-    hashdir = os.path.dirname(blobshadest)
-    if not os.path.isdir(destdir):
-        try:
-            os.makedirs(destdir)
-        except OSError:
-            # Path exists and is a file, remove it and retry
-            os.remove(destdir)
-            os.makedirs(destdir)
-    if not os.path.isdir(hashdir):
-        try:
-            os.makedirs(hashdir)
-        except OSError:
-            # Path exists and is a file, remove it and retry
-            os.remove(hashdir)
-            os.makedirs(hashdir)
 
+def _find_blob(path, tgt_env):
+    '''
+    Look up a path in the remotes, following symlinks. Return a tuple of the
+    URL of the first remote containing it, the blob SHA and the blob size, or
+    None if no remote contains the path.
+    '''
+    provider = _get_provider()
     for repo in init():
         if repo['mountpoint'] \
                 and not path.startswith(repo['mountpoint'] + os.path.sep):
@@ -1442,7 +1626,7 @@ def find_file(path, tgt_env='base', **kwargs):  # pylint: disable=W0613
                     break
             if blob is None:
                 continue
-            blob_hexsha = blob.hexsha
+            return repo['url'], blob.hexsha, blob.size
 
         elif provider == 'pygit2':
             tree = _get_tree_pygit2(repo, tgt_env)
@@ -1470,7 +1654,7 @@ def find_file(path, tgt_env='base', **kwargs):  # pylint: disable=W0613
                     break
             if blob is None:
                 continue
-            blob_hexsha = blob.hex
+            return repo['url'], blob.hex, blob.size
 
         elif provider == 'dulwich':
             while True:
@@ -1501,39 +1685,105 @@ def find_file(path, tgt_env='base', **kwargs):  # pylint: disable=W0613
                     break
             if blob is None:
                 continue
-            blob_hexsha = blob.sha().hexdigest()
-
-        salt.fileserver.wait_lock(lk_fn, dest)
-        if os.path.isfile(blobshadest) and os.path.isfile(dest):
-            with salt.utils.fopen(blobshadest, 'r') as fp_:
-                sha = fp_.read()
-                if sha == blob_hexsha:
-                    fnd['rel'] = path
-                    fnd['path'] = dest
-                    return fnd
-        with salt.utils.fopen(lk_fn, 'w+') as fp_:
-            fp_.write('')
-        for filename in glob.glob(hashes_glob):
-            try:
-                os.remove(filename)
-            except Exception:
-                pass
-        with salt.utils.fopen(dest, 'w+') as fp_:
-            if provider == 'gitpython':
-                blob.stream_data(fp_)
-            elif provider == 'pygit2':
-                fp_.write(blob.data)
-            elif provider == 'dulwich':
-                fp_.write(blob.as_raw_string())
-        with salt.utils.fopen(blobshadest, 'w+') as fp_:
-            fp_.write(blob_hexsha)
-        try:
-            os.remove(lk_fn)
-        except OSError:
-            pass
-        fnd['rel'] = path
-        fnd['path'] = dest
+            return repo['url'], blob.sha().hexdigest(), blob.raw_length()
+    return None
+
+
+def _read_blob(url, blob_hexsha):
+    '''
+    Return the contents of a blob from the object database of the remote
+    with the given URL. Blobs up to BLOB_CACHE_MAX_ITEM bytes are kept in a
+    least recently used cache of at most BLOB_CACHE_SIZE bytes.
+    '''
+    data = _BLOB_CACHE['blobs'].pop(blob_hexsha, None)
+    if data is not None:
+        # Move the blob to the most recently used end
+        _BLOB_CACHE['blobs'][blob_hexsha] = data
+        return data
+    provider = _get_provider()
+    for repo in init():
+        if repo['url'] != url:
+            continue
+        if provider == 'gitpython':
+            data = repo['repo'].odb.stream(
+                binascii.unhexlify(blob_hexsha)
+            ).read()
+        elif provider == 'pygit2':
+            data = repo['repo'][blob_hexsha].data
+        elif provider == 'dulwich':
+            data = repo['repo'].get_object(blob_hexsha).as_raw_string()
+        break
+    if data is None:
+        return ''
+    if len(data) <= BLOB_CACHE_MAX_ITEM:
+        _BLOB_CACHE['blobs'][blob_hexsha] = data
+        _BLOB_CACHE['size'] += len(data)
+        while _BLOB_CACHE['size'] > BLOB_CACHE_SIZE:
+            _, old = _BLOB_CACHE['blobs'].popitem(last=False)
+            _BLOB_CACHE['size'] -= len(old)
+    return data
+
+
+def find_file(path, tgt_env='base', **kwargs):  # pylint: disable=W0613
+    '''
+    Find the first file to match the path and ref. Files are served straight
+    from the git object database, only blobs too large for the in-memory
+    cache are read out of git and written to the refs cache.
+    '''
+    fnd = {'path': '',
+           'rel': ''}
+    if os.path.isabs(path) or tgt_env not in envs():
+        return fnd
+
+    index = _blob_index()
+    if (tgt_env, path) not in index:
+        index[(tgt_env, path)] = _find_blob(path, tgt_env)
+    found = index[(tgt_env, path)]
+    if found is None:
         return fnd
+    url, blob_hexsha, size = found
+
+    dest = os.path.join(__opts__['cachedir'], 'gitfs/refs', tgt_env, path)
+    fnd['rel'] = path
+    fnd['path'] = dest
+    fnd['url'] = url
+    fnd['blob'] = blob_hexsha
+    fnd['size'] = size
+    if size <= BLOB_CACHE_MAX_ITEM:
+        return fnd
+
+    blobshadest = os.path.join(__opts__['cachedir'],
+                               'gitfs/hash',
+                               tgt_env,
+                               '{0}.hash.blob_sha1'.format(path))
+    lk_fn = os.path.join(__opts__['cachedir'],
+                         'gitfs/hash',
+                         tgt_env,
+                         '{0}.lk'.format(path))
+    for dirname in (os.path.dirname(dest), os.path.dirname(blobshadest)):
+        if not os.path.isdir(dirname):
+            try:
+                os.makedirs(dirname)
+            except OSError:
+                # Path exists and is a file, remove it and retry
+                os.remove(dirname)
+                os.makedirs(dirname)
+
+    salt.fileserver.wait_lock(lk_fn, dest)
+    if os.path.isfile(blobshadest) and os.path.isfile(dest):
+        with salt.utils.fopen(blobshadest, 'r') as fp_:
+            if fp_.read() == blob_hexsha:
+                return fnd
+    with salt.utils.fopen(lk_fn, 'w+') as fp_:
+        fp_.write('')
+    with salt.utils.fopen(dest, 'w+') as fp_:
+        fp_.write(_read_blob(url, blob_hexsha))
+    with salt.utils.fopen(blobshadest, 'w+') as fp_:
+        fp_.write(blob_hexsha)
+    try:
+        os.remove(lk_fn)
+    except OSError:
+        pass
     return fnd
 
 
@@ -1564,13 +1814,18 @@ def serve_file(load, fnd):
         return ret
     ret['dest'] = fnd['rel']
     gzip = load.get('gzip', None)
-    with salt.utils.fopen(fnd['path'], 'rb') as fp_:
-        fp_.seek(load['loc'])
-        data = fp_.read(__opts__['file_buffer_size'])
-        if gzip and data:
-            data = salt.utils.gzip_util.compress(data, gzip)
-            ret['gzip'] = gzip
-        ret['data'] = data
+    if fnd['size'] <= BLOB_CACHE_MAX_ITEM:
+        data = _read_blob(fnd['url'], fnd['blob'])[
+            load['loc']:load['loc'] + __opts__['file_buffer_size']
+        ]
+    else:
+        with salt.utils.fopen(fnd['path'], 'rb') as fp_:
+            fp_.seek(load['loc'])
+            data = fp_.read(__opts__['file_buffer_size'])
+    if gzip and data:
+        data = salt.utils.gzip_util.compress(data, gzip)
+        ret['gzip'] = gzip
+    ret['data'] = data
     return ret
 
 
@@ -1589,24 +1844,21 @@ def file_hash(load, fnd):
     if not all(x in load for x in ('path', 'saltenv')):
         return ''
     ret = {'hash_type': __opts__['hash_type']}
-    relpath = fnd['rel']
-    path = fnd['path']
-    hashdest = os.path.join(__opts__['cachedir'],
-                            'gitfs/hash',
-                            load['saltenv'],
-                            '{0}.hash.{1}'.format(relpath,
-                                                  __opts__['hash_type']))
-    if not os.path.isfile(hashdest):
-        if not os.path.exists(os.path.dirname(hashdest)):
-            os.makedirs(os.path.dirname(hashdest))
-        ret['hsum'] = salt.utils.get_hash(path, __opts__['hash_type'])
-        with salt.utils.fopen(hashdest, 'w+') as fp_:
-            fp_.write(ret['hsum'])
-        return ret
-    else:
-        with salt.utils.fopen(hashdest, 'rb') as fp_:
-            ret['hsum'] = fp_.read()
-        return ret
+    # The contents of a blob never change, so neither does its hash
+    if len(_BLOB_HASHES) > BLOB_INDEX_MAX:
+        _BLOB_HASHES.clear()
+    hashes = _BLOB_HASHES.setdefault(fnd['blob'], {})
+    if ret['hash_type'] not in hashes:
+        if fnd['size'] <= BLOB_CACHE_MAX_ITEM:
+            hashes[ret['hash_type']] = getattr(hashlib, ret['hash_type'])(
+                _read_blob(fnd['url'], fnd['blob'])
+            ).hexdigest()
+        else:
+            hashes[ret['hash_type']] = salt.utils.get_hash(
+                fnd['path'], ret['hash_type']
+            )
+    ret['hsum'] = hashes[ret['hash_type']]
+    return ret
 
 
 def _file_lists(load, form):
@@ -1638,7 +1890,8 @@ def _file_lists(load, form):
     )
     cache_match, refresh_cache, save_cache = \
         salt.fileserver.check_file_list_cache(
-            __opts__, form, list_cache, w_lock
+            __opts__, form, list_cache, w_lock,
+            prefix=load.get('prefix', '').strip('/')
         )
     if cache_match is not None:
         return cache_match
@@ -530,6 +530,10 @@ def update():
         repo['repo'].close()
         clear_lock(repo)
 
+    salt.fileserver.update_file_list_generation(
+        __opts__, 'hgfs', data['changed']
+    )
+
     env_cache = os.path.join(__opts__['cachedir'], 'hgfs/envs.p')
     if data.get('changed', False) is True or not os.path.isfile(env_cache):
         env_cachedir = os.path.dirname(env_cache)
@@ -777,7 +781,8 @@ def _file_lists(load, form):
     w_lock = os.path.join(list_cachedir, '.{0}.w'.format(load['saltenv']))
     cache_match, refresh_cache, save_cache = \
         salt.fileserver.check_file_list_cache(
-            __opts__, form, list_cache, w_lock
+            __opts__, form, list_cache, w_lock,
+            prefix=load.get('prefix', '').strip('/')
         )
     if cache_match is not None:
         return cache_match
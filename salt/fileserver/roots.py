@@ -18,6 +18,7 @@ configuration option.
 from __future__ import absolute_import
 
 # Import python libs
+import collections
 import os
 import logging
 
@@ -27,8 +28,18 @@ import salt.utils
 from salt.utils.event import tagify
 import salt.ext.six as six
 
+# Import third party libs
+try:
+    import pyinotify
+    HAS_PYINOTIFY = True
+except ImportError:
+    HAS_PYINOTIFY = False
+
 log = logging.getLogger(__name__)
 
+# inotify watches, queued events and mtime map of fileserver_roots_watch
+_WATCHER = {}
+
 
 def find_file(path, saltenv='base', env=None, **kwargs):
     '''
@@ -110,9 +121,139 @@ def serve_file(load, fnd):
     return ret
 
 
+def _watch_roots():
+    '''
+    Return the set of paths below the file_roots which changed since the last
+    call, using inotify. None is returned when the changes are not known and
+    the file_roots have to be scanned: on the first call, which sets up the
+    watches, and after the inotify event queue overflowed.
+    '''
+    if _WATCHER.get('disabled'):
+        return None
+    roots = set()
+    for path_list in six.itervalues(__opts__['file_roots']):
+        roots.update([os.path.normpath(path) for path in path_list])
+    if _WATCHER.get('roots') != roots:
+        _stop_watcher()
+        if not all([os.path.isdir(root) for root in roots]):
+            # Try again on the next update
+            return None
+        events = collections.deque()
+        wm_ = pyinotify.WatchManager()
+        notifier = pyinotify.Notifier(wm_, events.append, timeout=0)
+        mask = (pyinotify.IN_CREATE | pyinotify.IN_DELETE |
+                pyinotify.IN_MODIFY | pyinotify.IN_ATTRIB |
+                pyinotify.IN_MOVED_FROM | pyinotify.IN_MOVED_TO |
+                pyinotify.IN_DELETE_SELF | pyinotify.IN_MOVE_SELF)
+        for root in roots:
+            wds = wm_.add_watch(root, mask, rec=True, auto_add=True)
+            if [wd for wd in six.itervalues(wds) if wd < 0]:
+                log.warning(
+                    'Unable to watch all files below {0}, falling back to '
+                    'scanning the file_roots. The inotify watch limit '
+                    '(fs.inotify.max_user_watches) may need to be raised.'
+                    .format(root)
+                )
+                notifier.stop()
+                _WATCHER['disabled'] = True
+                return None
+        _WATCHER.update({'roots': roots,
+                         'notifier': notifier,
+                         'events': events})
+        return None
+
+    notifier = _WATCHER['notifier']
+    while notifier.check_events(0):
+        notifier.read_events()
+        notifier.process_events()
+    changed = set()
+    overflow = False
+    events = _WATCHER['events']
+    while events:
+        event = events.popleft()
+        if event.mask & pyinotify.IN_Q_OVERFLOW:
+            overflow = True
+        elif event.mask & (pyinotify.IN_DELETE_SELF | pyinotify.IN_MOVE_SELF) \
+                and os.path.normpath(event.pathname) in roots:
+            # A root went away, set up the watches again once it is back
+            _stop_watcher()
+            return None
+        elif event.pathname:
+            changed.add(os.path.normpath(event.pathname))
+    if overflow:
+        log.warning('The inotify event queue overflowed, scanning the '
+                    'file_roots for changes')
+        return None
+    return changed
+
+
+def _stop_watcher():
+    '''
+    Remove the inotify watches of the file_roots
+    '''
+    notifier = _WATCHER.pop('notifier', None)
+    if notifier is not None:
+        notifier.stop()
+    _WATCHER.pop('roots', None)
+    _WATCHER.pop('events', None)
+    _WATCHER.pop('mtime_map', None)
+
+
+def _apply_changes(mtime_map, changed):
+    '''
+    Update an mtime map with the paths reported by the watcher. Return the
+    paths which were added, removed or modified, and whether any path was
+    added or removed.
+    '''
+    paths = set()
+    listed = False
+    for path in changed:
+        try:
+            mtime = os.path.getmtime(path)
+        except (OSError, IOError):
+            prefix = path + os.path.sep
+            for item in [x for x in mtime_map
+                         if x == path or x.startswith(prefix)]:
+                del mtime_map[item]
+                paths.add(item)
+                listed = True
+            continue
+        if path not in mtime_map:
+            listed = True
+            if os.path.isdir(path):
+                # Files may have been created in a new directory before its
+                # watch was added
+                for item, item_mtime in six.iteritems(
+                        salt.fileserver.generate_mtime_map({'': [path]})):
+                    if item not in mtime_map:
+                        mtime_map[item] = item_mtime
+                        paths.add(item)
+        if mtime_map.get(path) != mtime:
+            mtime_map[path] = mtime
+            paths.add(path)
+    return paths, listed
+
+
+def _changed_envs(paths):
+    '''
+    Return the environments having a root which contains one of the paths
+    '''
+    ret = set()
+    for saltenv, path_list in six.iteritems(__opts__['file_roots']):
+        for root in path_list:
+            prefix = os.path.normpath(root) + os.path.sep
+            if [path for path in paths if path.startswith(prefix)]:
+                ret.add(saltenv)
+                break
+    return ret
+
+
 def update():
     '''
     When we are asked to update (regular interval) lets reap the cache
+
+    With :conf_master:`fileserver_roots_watch` enabled, the file_roots are
+    watched with inotify instead of being scanned on every update.
     '''
     try:
         salt.fileserver.reap_fileserver_cache_dir(
@@ -126,35 +267,69 @@ def update():
     mtime_map_path = os.path.join(__opts__['cachedir'], 'roots/mtime_map')
     # data to send on event
     data = {'changed': False,
-            'backend': 'roots'}
-
-    old_mtime_map = {}
-    # if you have an old map, load that
-    if os.path.exists(mtime_map_path):
-        with salt.utils.fopen(mtime_map_path, 'rb') as fp_:
-            for line in fp_:
-                try:
-                    file_path, mtime = line.split(':', 1)
-                    old_mtime_map[file_path] = mtime
-                except ValueError:
-                    # Document the invalid entry in the log
-                    log.warning('Skipped invalid cache mtime entry in {0}: {1}'
-                                .format(mtime_map_path, line))
-
-    # generate the new map
-    new_mtime_map = salt.fileserver.generate_mtime_map(__opts__['file_roots'])
-
-    # compare the maps, set changed to the return value
-    data['changed'] = salt.fileserver.diff_mtime_map(old_mtime_map, new_mtime_map)
+            'backend': 'roots',
+            'paths': []}
+
+    changed = None
+    if __opts__.get('fileserver_roots_watch', False):
+        if HAS_PYINOTIFY:
+            changed = _watch_roots()
+        else:
+            log.warning('fileserver_roots_watch is enabled, but pyinotify '
+                        'is not installed')
+
+    if changed is not None and 'mtime_map' in _WATCHER:
+        new_mtime_map = _WATCHER['mtime_map']
+        paths, listed = _apply_changes(new_mtime_map, changed)
+        # Only the file lists of the environments containing added or
+        # removed paths are outdated
+        salt.fileserver.update_file_list_generation(__opts__, 'roots', False)
+        if listed:
+            list_cachedir = os.path.join(__opts__['cachedir'],
+                                         'file_lists/roots')
+            for saltenv in _changed_envs(paths):
+                salt.fileserver.invalidate_file_list_cache(
+                    os.path.join(list_cachedir, '{0}.p'.format(saltenv))
+                )
+    else:
+        old_mtime_map = {}
+        # if you have an old map, load that
+        if os.path.exists(mtime_map_path):
+            with salt.utils.fopen(mtime_map_path, 'rb') as fp_:
+                for line in fp_:
+                    try:
+                        file_path, mtime = line.rstrip('\n').split(':', 1)
+                        old_mtime_map[file_path] = mtime
+                    except ValueError:
+                        # Document the invalid entry in the log
+                        log.warning('Skipped invalid cache mtime entry in {0}: {1}'
+                                    .format(mtime_map_path, line))
+
+        # generate the new map
+        new_mtime_map = salt.fileserver.generate_mtime_map(__opts__['file_roots'])
+        if 'roots' in _WATCHER:
+            _WATCHER['mtime_map'] = new_mtime_map
+
+        # compare the maps, the file lists are outdated by any change
+        listed = salt.fileserver.diff_mtime_map(old_mtime_map, new_mtime_map)
+        salt.fileserver.update_file_list_generation(__opts__, 'roots', listed)
+        paths = set(old_mtime_map).symmetric_difference(new_mtime_map)
+        for file_path in set(old_mtime_map).intersection(new_mtime_map):
+            if old_mtime_map[file_path] != str(new_mtime_map[file_path]):
+                paths.add(file_path)
+    # Added, removed or modified paths, whether watched or scanned
+    data['changed'] = bool(paths)
+    data['paths'] = sorted(paths)
 
     # write out the new map
-    mtime_map_path_dir = os.path.dirname(mtime_map_path)
-    if not os.path.exists(mtime_map_path_dir):
-        os.makedirs(mtime_map_path_dir)
-    with salt.utils.fopen(mtime_map_path, 'w') as fp_:
-        for file_path, mtime in six.iteritems(new_mtime_map):
-            fp_.write('{file_path}:{mtime}\n'.format(file_path=file_path,
-                                                     mtime=mtime))
+    if paths or not os.path.exists(mtime_map_path):
+        mtime_map_path_dir = os.path.dirname(mtime_map_path)
+        if not os.path.exists(mtime_map_path_dir):
+            os.makedirs(mtime_map_path_dir)
+        with salt.utils.fopen(mtime_map_path, 'w') as fp_:
+            for file_path, mtime in six.iteritems(new_mtime_map):
+                fp_.write('{file_path}:{mtime}\n'.format(file_path=file_path,
+                                                         mtime=mtime))
 
     if __opts__.get('fileserver_events', False):
         # if there is a change, fire an event
@@ -263,7 +438,8 @@ def _file_lists(load, form):
     w_lock = os.path.join(list_cachedir, '.{0}.w'.format(load['saltenv']))
     cache_match, refresh_cache, save_cache = \
         salt.fileserver.check_file_list_cache(
-            __opts__, form, list_cache, w_lock
+            __opts__, form, list_cache, w_lock,
+            prefix=load.get('prefix', '').strip('/')
         )
     if cache_match is not None:
         return cache_match
@@ -53,35 +53,66 @@ structure::
 
     s3://<bucket name>/<environment>/<files>
 
+Buckets are listed, and files are downloaded, by up to ``s3.workers`` (default:
+4) threads at the same time. Files are only downloaded again when their ETag
+changed.
+
+To use an S3-compatible service which does not support virtual host style
+bucket names, or which is only reachable over plain HTTP (for instance a local
+test instance), set ``s3.path_style`` and ``s3.https_enable``:
+
+.. code-block:: yaml
+
+    s3.service_url: localhost:9000
+    s3.path_style: True
+    s3.https_enable: False
+
 .. note:: This fileserver back-end requires the use of the MD5 hashing algorithm.
     MD5 may not be compliant with all security policies.
 '''
 
 # Import python libs
 from __future__ import absolute_import
-import datetime
+import hashlib
 import os
 import time
 import pickle
 import logging
+from contextlib import contextmanager
+from multiprocessing.pool import ThreadPool
 
 # Import salt libs
 import salt.fileserver as fs
 import salt.modules
 import salt.utils
+import salt.utils.atomicfile
 import salt.utils.s3 as s3
 
 # Import 3rd-party libs
 # pylint: disable=import-error,no-name-in-module,redefined-builtin
 import salt.ext.six as six
-from salt.ext.six.moves import filter
 from salt.ext.six.moves.urllib.parse import quote as _quote
 # pylint: enable=import-error,no-name-in-module,redefined-builtin
 
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    # fcntl is not available on windows
+    HAS_FCNTL = False
+
 log = logging.getLogger(__name__)
 
 S3_CACHE_EXPIRE = 30  # cache for 30 seconds
 S3_SYNC_ON_UPDATE = True  # sync cache on update rather than jit
+S3_WORKERS = 4  # buckets listed and files downloaded at the same time
+
+# Buckets cache file contents, and the stat signature of the file they were
+# read from
+_METADATA = {}
+# cached file path -> ([size, mtime] of the cached file, ETag), and the stat
+# signature of the index they were last read from
+_CACHED_ETAGS = {'sig': None, 'dirty': False, 'etags': {}}
 
 
 def envs():
@@ -105,14 +136,29 @@ def update():
     if S3_SYNC_ON_UPDATE:
         # sync the buckets to the local cache
         log.info('Syncing local cache from S3...')
+        files = []
         for saltenv, env_meta in six.iteritems(metadata):
-            for bucket, files in six.iteritems(_find_files(env_meta)):
-                for file_path in files:
-                    cached_file_path = _get_cached_file_name(bucket, saltenv, file_path)
-                    log.info('{0} - {1} : {2}'.format(bucket, saltenv, file_path))
-
-                    # load the file from S3 if it's not in the cache or it's old
-                    _get_file_from_s3(metadata, saltenv, bucket, file_path, cached_file_path)
+            for bucket, env_files in six.iteritems(_find_files(env_meta)):
+                for file_path in env_files:
+                    files.append((saltenv, bucket, file_path))
+
+        def _sync(item):
+            saltenv, bucket, file_path = item
+            cached_file_path = _get_cached_file_name(bucket, saltenv, file_path)
+            log.debug('{0} - {1} : {2}'.format(bucket, saltenv, file_path))
+            # load the file from S3 if it's not in the cache or it's old
+            try:
+                _get_file_from_s3(
+                    metadata, saltenv, bucket, file_path, cached_file_path
+                )
+            except Exception as exc:
+                log.error(
+                    'Unable to sync {0} - {1} : {2}: {3}'.format(
+                        bucket, saltenv, file_path, exc)
+                )
+
+        _map(_sync, files)
+        _write_cached_etags()
 
         log.info('Sync local cache from S3 completed.')
 
@@ -156,7 +202,9 @@ def find_file(path, saltenv='base', env=None, **kwargs):
     cached_file_path = _get_cached_file_name(fnd['bucket'], saltenv, path)
 
     # jit load the file from S3 if it's not in the cache or it's old
-    _get_file_from_s3(metadata, saltenv, fnd['bucket'], path, cached_file_path)
+    if _get_file_from_s3(metadata, saltenv, fnd['bucket'], path,
+                         cached_file_path):
+        _write_cached_etags()
 
     return fnd
 
@@ -187,7 +235,12 @@ def file_hash(load, fnd):
             fnd['path'])
 
     if os.path.isfile(cached_file_path):
-        ret['hsum'] = salt.utils.get_hash(cached_file_path)
+        etag = _cached_etag(cached_file_path)
+        if etag and '-' not in etag:
+            # Single part upload, the ETag is the MD5 of the content
+            ret['hsum'] = etag
+        else:
+            ret['hsum'] = salt.utils.get_hash(cached_file_path)
         ret['hash_type'] = 'md5'
 
     return ret
@@ -324,6 +377,36 @@ def _get_s3_key():
     return key, keyid, service_url, verify_ssl
 
 
+def _s3_query(**kwargs):
+    '''
+    Query S3 with the credentials and connection settings from the config
+    '''
+    key, keyid, service_url, verify_ssl = _get_s3_key()
+    return s3.query(
+        key=key,
+        keyid=keyid,
+        service_url=service_url,
+        verify_ssl=verify_ssl,
+        https_enable=__opts__.get('s3.https_enable', True),
+        path_style=__opts__.get('s3.path_style', False),
+        **kwargs)
+
+
+def _map(func, items):
+    '''
+    Apply func to all items, using up to s3.workers threads
+    '''
+    workers = min(__opts__.get('s3.workers', S3_WORKERS), len(items))
+    if workers < 2:
+        return [func(item) for item in items]
+    pool = ThreadPool(workers)
+    try:
+        return pool.map(func, items)
+    finally:
+        pool.close()
+        pool.join()
+
+
 def _init():
     '''
     Connect to S3 and download the metadata for each file in all buckets
@@ -335,8 +418,15 @@ def _init():
     # check mtime of the buckets files cache
     metadata = None
     try:
-        if os.path.getmtime(cache_file) > exp:
-            metadata = _read_buckets_cache_file(cache_file)
+        cache_stat = os.stat(cache_file)
+        if cache_stat.st_mtime > exp:
+            sig = (cache_stat.st_ino, cache_stat.st_mtime, cache_stat.st_size)
+            if _METADATA.get('sig') == sig:
+                metadata = _METADATA['data']
+            else:
+                metadata = _read_buckets_cache_file(cache_file)
+                if metadata is not None:
+                    _METADATA.update({'sig': sig, 'data': metadata})
     except OSError:
         pass
 
@@ -365,7 +455,12 @@ def _get_cached_file_name(bucket_name, saltenv, path):
 
     # make sure bucket and saltenv directories exist
     if not os.path.exists(os.path.dirname(file_path)):
-        os.makedirs(os.path.dirname(file_path))
+        try:
+            os.makedirs(os.path.dirname(file_path))
+        except OSError:
+            # Created by another download thread in the meantime
+            if not os.path.isdir(os.path.dirname(file_path)):
+                raise
 
     return file_path
 
@@ -383,110 +478,106 @@ def _get_buckets_cache_filename():
     return os.path.join(cache_dir, 'buckets_files.cache')
 
 
+def _list_bucket(bucket_name):
+    '''
+    Return the metadata of all objects in a bucket as a dict keyed by object
+    key, or None if the bucket could not be listed. S3 returns at most 1000
+    objects per request, larger buckets are listed page by page.
+    '''
+    ret = {}
+    marker = None
+    while True:
+        params = {}
+        if marker is not None:
+            params['marker'] = marker
+        s3_meta = _s3_query(bucket=bucket_name, params=params, return_bin=False)
+
+        # s3 query returned nothing
+        if not s3_meta:
+            return None
+
+        # grab only the files/dirs
+        files = [k for k in s3_meta if 'Key' in k]
+
+        # check to see if we added any keys, otherwise investigate possible error conditions
+        if not files:
+            meta_response = {}
+            for k in s3_meta:
+                if 'Code' in k or 'Message' in k:
+                    # assumes no duplicate keys, consisdent with current erro response.
+                    meta_response.update(k)
+            if meta_response:
+                # attempt use of human readable output first.
+                log.warning("'{0}' response for bucket '{1}'".format(
+                    meta_response.get('Message', meta_response.get('Code')),
+                    bucket_name))
+                return None
+            # empty bucket
+            return ret
+
+        for item in files:
+            ret[item['Key']] = {
+                # Get rid of quotes surrounding md5
+                'ETag': item.get('ETag', '').strip('"'),
+                'Size': int(item.get('Size', 0)),
+                'LastModified': item.get('LastModified'),
+            }
+
+        if not [k for k in s3_meta if k.get('IsTruncated') == 'true']:
+            return ret
+        marker = files[-1]['Key']
+
+
 def _refresh_buckets_cache_file(cache_file):
     '''
     Retrieve the content of all buckets and cache the metadata to the buckets
     cache file
+
+    The metadata is a dict of saltenv -> bucket -> object key -> object
+    metadata. Buckets are listed in parallel.
     '''
 
     log.debug('Refreshing buckets cache file')
 
-    key, keyid, service_url, verify_ssl = _get_s3_key()
     metadata = {}
-
-    # helper s3 query function
-    def __get_s3_meta(bucket, key=key, keyid=keyid):
-        return s3.query(
-                key=key,
-                keyid=keyid,
-                bucket=bucket,
-                service_url=service_url,
-                verify_ssl=verify_ssl,
-                return_bin=False)
+    buckets = _get_buckets()
+    if _is_env_per_bucket():
+        bucket_names = set()
+        for env_buckets in six.itervalues(buckets):
+            bucket_names.update(env_buckets)
+        bucket_names = sorted(bucket_names)
+    else:
+        bucket_names = list(buckets)
+    listings = dict(zip(bucket_names, _map(_list_bucket, bucket_names)))
 
     if _is_env_per_bucket():
         # Single environment per bucket
-        for saltenv, buckets in six.iteritems(_get_buckets()):
-            bucket_files = {}
-            for bucket_name in buckets:
-                s3_meta = __get_s3_meta(bucket_name)
-
-                # s3 query returned nothing
-                if not s3_meta:
-                    continue
-
-                # grab only the files/dirs
-                bucket_files[bucket_name] = [k for k in s3_meta if 'Key' in k]
-
-                # check to see if we added any keys, otherwise investigate possible error conditions
-                if len(bucket_files[bucket_name]) == 0:
-                    meta_response = {}
-                    for k in s3_meta:
-                        if 'Code' in k or 'Message' in k:
-                            # assumes no duplicate keys, consisdent with current erro response.
-                            meta_response.update(k)
-                    # attempt use of human readable output first.
-                    try:
-                        log.warning("'{0}' response for bucket '{1}'".format(meta_response['Message'], bucket_name))
-                        continue
-                    except KeyError:
-                        # no human readable error message provided
-                        log.warning("'{0}' response for bucket '{1}'".format(meta_response['Code'], bucket_name))
-                        continue
-
-            metadata[saltenv] = bucket_files
+        for saltenv, env_buckets in six.iteritems(buckets):
+            metadata[saltenv] = dict(
+                [(bucket_name, listings[bucket_name])
+                 for bucket_name in env_buckets
+                 if listings.get(bucket_name) is not None]
+            )
 
     else:
         # Multiple environments per buckets
-        for bucket_name in _get_buckets():
-            s3_meta = __get_s3_meta(bucket_name)
-
-            # s3 query returned nothing
-            if not s3_meta:
+        for bucket_name in bucket_names:
+            listing = listings.get(bucket_name)
+            if listing is None:
                 continue
 
-            # pull out the environment dirs (e.g. the root dirs)
-            files = [k for k in s3_meta if 'Key' in k]
-
-            # check to see if we added any keys, otherwise investigate possible error conditions
-            if len(files) == 0:
-                meta_response = {}
-                for k in s3_meta:
-                    if 'Code' in k or 'Message' in k:
-                        # assumes no duplicate keys, consisdent with current erro response.
-                        meta_response.update(k)
-                # attempt use of human readable output first.
-                try:
-                    log.warning("'{0}' response for bucket '{1}'".format(meta_response['Message'], bucket_name))
+            # pull out the environment dirs (e.g. the root dirs) and the
+            # files/dirs that belong to them
+            for key, meta in six.iteritems(listing):
+                saltenv = os.path.dirname(key).split('/', 1)[0]
+                if not saltenv:
                     continue
-                except KeyError:
-                    # no human readable error message provided
-                    log.warning("'{0}' response for bucket '{1}'".format(meta_response['Code'], bucket_name))
-                    continue
-
-            environments = [(os.path.dirname(k['Key']).split('/', 1))[0] for k in files]
-            environments = set(environments)
-
-            # pull out the files for the environment
-            for saltenv in environments:
-                # grab only files/dirs that match this saltenv
-                env_files = [k for k in files if k['Key'].startswith(saltenv)]
-
-                if saltenv not in metadata:
-                    metadata[saltenv] = {}
-
-                if bucket_name not in metadata[saltenv]:
-                    metadata[saltenv][bucket_name] = []
-
-                metadata[saltenv][bucket_name] += env_files
-
-    # write the metadata to disk
-    if os.path.isfile(cache_file):
-        os.remove(cache_file)
+                metadata.setdefault(saltenv, {}) \
+                    .setdefault(bucket_name, {})[key] = meta
 
     log.debug('Writing buckets cache file')
 
-    with salt.utils.fopen(cache_file, 'w') as fp_:
+    with salt.utils.atomicfile.atomic_open(cache_file, 'wb') as fp_:
         pickle.dump(metadata, fp_)
 
     return metadata
@@ -506,6 +597,13 @@ def _read_buckets_cache_file(cache_file):
                 IndexError, KeyError):
             data = None
 
+    # Caches written by older versions hold lists of object metadata
+    if isinstance(data, dict):
+        for env_meta in six.itervalues(data):
+            for bucket_meta in six.itervalues(env_meta):
+                if not isinstance(bucket_meta, dict):
+                    return None
+
     return data
 
 
@@ -517,12 +615,8 @@ def _find_files(metadata):
     ret = {}
 
     for bucket_name, data in six.iteritems(metadata):
-        if bucket_name not in ret:
-            ret[bucket_name] = []
-
-        filePaths = [k['Key'] for k in data]
         # filter out the dirs
-        ret[bucket_name] += [k for k in filePaths if not k.endswith('/')]
+        ret[bucket_name] = [k for k in data if not k.endswith('/')]
 
     return ret
 
@@ -541,7 +635,7 @@ def _find_dirs(metadata):
         if bucket_name not in ret:
             ret[bucket_name] = set()
 
-        for path in [k['Key'] for k in data]:
+        for path in data:
             prefix = ''
             for part in path.split('/')[:-1]:
                 directory = prefix + part + '/'
@@ -555,18 +649,7 @@ def _find_file_meta(metadata, bucket_name, saltenv, path):
     '''
     Looks for a file's metadata in the S3 bucket cache file
     '''
-    env_meta = metadata[saltenv] if saltenv in metadata else {}
-    bucket_meta = env_meta[bucket_name] if bucket_name in env_meta else {}
-    files_meta = list(list(filter((lambda k: 'Key' in k), bucket_meta)))
-
-    for item_meta in files_meta:
-        if 'Key' in item_meta and item_meta['Key'] == path:
-            try:
-                # Get rid of quotes surrounding md5
-                item_meta['ETag'] = item_meta['ETag'].strip('"')
-            except KeyError:
-                pass
-            return item_meta
+    return metadata.get(saltenv, {}).get(bucket_name, {}).get(path)
 
 
 def _get_buckets():
@@ -577,78 +660,213 @@ def _get_buckets():
     return __opts__['s3.buckets'] if 's3.buckets' in __opts__ else {}
 
 
+def _get_cached_etags_filename():
+    '''
+    Return the filename of the index of the ETags of the cached files
+    '''
+    return os.path.join(_get_cache_dir(), 'cached_etags.p')
+
+
+def _cached_etag(cached_file_path):
+    '''
+    Return the ETag of the S3 object a cached file was downloaded from, or
+    None if it is not known
+    '''
+    try:
+        cached_stat = os.stat(cached_file_path)
+    except OSError:
+        return None
+    sig = [cached_stat.st_size, cached_stat.st_mtime]
+    _load_cached_etags()
+    entry = _CACHED_ETAGS['etags'].get(cached_file_path)
+    if entry is not None and entry[0] == sig:
+        return entry[1]
+    # The ETag of an object which was not uploaded in multiple parts is the
+    # MD5 of its content
+    etag = salt.utils.get_hash(cached_file_path, 'md5')
+    _CACHED_ETAGS['etags'][cached_file_path] = (sig, etag)
+    return etag
+
+
+def _load_cached_etags():
+    '''
+    Pick up the files downloaded by other processes whenever the index changed
+    since it was last read
+    '''
+    index_file = _get_cached_etags_filename()
+    try:
+        index_stat = os.stat(index_file)
+    except OSError:
+        return
+    sig = [index_stat.st_size, index_stat.st_mtime, index_stat.st_ino]
+    if sig == _CACHED_ETAGS['sig']:
+        return
+    try:
+        with salt.utils.fopen(index_file, 'rb') as fp_:
+            etags = pickle.load(fp_)
+    except Exception:
+        return
+    # The entries are keyed on the stat signature of the cached file, so
+    # stale ones are never used
+    etags.update(_CACHED_ETAGS['etags'])
+    _CACHED_ETAGS['etags'] = etags
+    _CACHED_ETAGS['sig'] = sig
+
+
+def _write_cached_etags():
+    '''
+    Merge the ETags of the files downloaded by this process into the index
+    '''
+    if not _CACHED_ETAGS['dirty']:
+        return
+    index_file = _get_cached_etags_filename()
+    etags = {}
+    try:
+        with salt.utils.fopen(index_file, 'rb') as fp_:
+            etags.update(pickle.load(fp_))
+    except Exception:
+        pass
+    etags.update(_CACHED_ETAGS['etags'])
+    with salt.utils.atomicfile.atomic_open(index_file, 'wb') as fp_:
+        pickle.dump(etags, fp_)
+    _CACHED_ETAGS['dirty'] = False
+
+
+def _get_partial_file_name(cached_file_path):
+    '''
+    Return the name of the file an object is downloaded to before it is moved
+    into the cache
+    '''
+    partial_dir = os.path.join(_get_cache_dir(), '.partial')
+    if not os.path.isdir(partial_dir):
+        try:
+            os.makedirs(partial_dir)
+        except OSError:
+            if not os.path.isdir(partial_dir):
+                raise
+    return os.path.join(
+        partial_dir,
+        hashlib.md5(cached_file_path.encode('utf-8')).hexdigest()
+    )
+
+
+@contextmanager
+def _download_lock(partial):
+    '''
+    Serialize the downloads of an object, between the download threads and
+    the master processes, so that a partial file only has one writer
+    '''
+    with salt.utils.fopen(partial + '.lk', 'a') as fp_:
+        if HAS_FCNTL:
+            fcntl.flock(fp_.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if HAS_FCNTL:
+                fcntl.flock(fp_.fileno(), fcntl.LOCK_UN)
+
+
+def _verify_download(partial, file_meta):
+    '''
+    Return True if a completed download matches the size and, for objects
+    which were not uploaded in multiple parts, the ETag of the object
+    '''
+    size = os.path.getsize(partial)
+    if size != file_meta['Size']:
+        log.warning(
+            'Downloaded {0} bytes instead of {1}, discarding'.format(
+                size, file_meta['Size'])
+        )
+        return False
+    if '-' not in file_meta['ETag']:
+        md5 = salt.utils.get_hash(partial, 'md5')
+        if md5 != file_meta['ETag']:
+            log.warning(
+                'Downloaded file has MD5 {0} instead of ETag {1}, '
+                'discarding'.format(md5, file_meta['ETag'])
+            )
+            return False
+    return True
+
+
 def _get_file_from_s3(metadata, saltenv, bucket_name, path, cached_file_path):
     '''
     Checks the local cache for the file, if it's old or missing go grab the
-    file from S3 and update the cache
+    file from S3 and update the cache. Return True if the file was downloaded.
+
+    The download is conditional on the ETag of the cached copy, and an
+    interrupted download is resumed with a ranged GET.
     '''
-    key, keyid, service_url, verify_ssl = _get_s3_key()
+    file_meta = _find_file_meta(metadata, bucket_name, saltenv, path)
 
     # check the local cache...
-    if os.path.isfile(cached_file_path):
-        file_meta = _find_file_meta(metadata, bucket_name, saltenv, path)
-        if file_meta:
-            file_etag = file_meta['ETag']
+    cached_etag = _cached_etag(cached_file_path)
+    if file_meta and cached_etag == file_meta['ETag']:
+        # hashes match we have a cache hit
+        return False
 
-            if file_etag.find('-') == -1:
-                file_md5 = file_etag
-                cached_md5 = salt.utils.get_hash(cached_file_path, 'md5')
+    partial = _get_partial_file_name(cached_file_path)
+    with _download_lock(partial):
+        return _download_file(file_meta, bucket_name, path, cached_file_path,
+                              partial)
 
-                # hashes match we have a cache hit
-                if cached_md5 == file_md5:
-                    return
-            else:
-                cached_file_stat = os.stat(cached_file_path)
-                cached_file_size = cached_file_stat.st_size
-                cached_file_mtime = datetime.datetime.fromtimestamp(
-                    cached_file_stat.st_mtime)
-
-                cached_file_lastmod = datetime.datetime.strptime(
-                    file_meta['LastModified'], '%Y-%m-%dT%H:%M:%S.%fZ')
-                if (cached_file_size == int(file_meta['Size']) and
-                        cached_file_mtime > cached_file_lastmod):
-                    log.debug('cached file size equal to metadata size and '
-                              'cached file mtime later than metadata last '
-                              'modification time.')
-                    ret = s3.query(
-                        key=key,
-                        keyid=keyid,
-                        method='HEAD',
-                        bucket=bucket_name,
-                        service_url=service_url,
-                        verify_ssl=verify_ssl,
-                        path=_quote(path),
-                        local_file=cached_file_path
-                    )
-                    if ret is not None:
-                        for header in ret['headers']:
-                            name, value = header.split(':', 1)
-                            name = name.strip()
-                            value = value.strip()
-                            if name == 'Last-Modified':
-                                s3_file_mtime = datetime.datetime.strptime(
-                                    value, '%a, %d %b %Y %H:%M:%S %Z')
-                            elif name == 'Content-Length':
-                                s3_file_size = int(value)
-                        if (cached_file_size == s3_file_size and
-                                cached_file_mtime > s3_file_mtime):
-                            log.info(
-                                '{0} - {1} : {2} skipped download since cached file size '
-                                'equal to and mtime after s3 values'.format(
-                                    bucket_name, saltenv, path))
-                            return
+
+def _download_file(file_meta, bucket_name, path, cached_file_path, partial):
+    '''
+    Download an object into the cache, holding the download lock of its
+    partial file
+    '''
+    # Another thread or process may have fetched it while we waited
+    cached_etag = _cached_etag(cached_file_path)
+    if file_meta and cached_etag == file_meta['ETag']:
+        return False
+
+    headers = {}
+    partial_size = 0
+    if file_meta and os.path.isfile(partial):
+        # Continue where an earlier download stopped, as long as the object
+        # did not change in the meantime
+        partial_size = os.path.getsize(partial)
+        headers['Range'] = 'bytes={0}-'.format(partial_size)
+        headers['If-Match'] = '"{0}"'.format(file_meta['ETag'])
+    else:
+        if os.path.isfile(partial):
+            os.remove(partial)
+        if cached_etag is not None:
+            # The listing may be older than the object
+            headers['If-None-Match'] = '"{0}"'.format(cached_etag)
 
     # ... or get the file from S3
-    s3.query(
-        key=key,
-        keyid=keyid,
+    _s3_query(
         bucket=bucket_name,
-        service_url=service_url,
-        verify_ssl=verify_ssl,
         path=_quote(path),
-        local_file=cached_file_path
+        headers=headers,
+        local_file=partial
     )
 
+    if not os.path.isfile(partial):
+        # Not modified, or the request failed
+        return False
+    size = os.path.getsize(partial)
+    if partial_size and size == partial_size:
+        # The object changed since the partial download, start over
+        os.remove(partial)
+        return False
+    if file_meta and size < file_meta['Size']:
+        # Incomplete, resumed by the next attempt
+        return False
+    if file_meta and not _verify_download(partial, file_meta):
+        os.remove(partial)
+        return False
+    os.rename(partial, cached_file_path)
+    if file_meta:
+        cached_stat = os.stat(cached_file_path)
+        _CACHED_ETAGS['etags'][cached_file_path] = (
+            [cached_stat.st_size, cached_stat.st_mtime], file_meta['ETag']
+        )
+        _CACHED_ETAGS['dirty'] = True
+    return True
+
 
 def _trim_env_off_path(paths, saltenv, trim_slash=False):
     '''
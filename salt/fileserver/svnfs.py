@@ -445,6 +445,10 @@ def update():
 
         clear_lock(repo)
 
+    salt.fileserver.update_file_list_generation(
+        __opts__, 'svnfs', data['changed']
+    )
+
     env_cache = os.path.join(__opts__['cachedir'], 'svnfs/envs.p')
     if data.get('changed', False) is True or not os.path.isfile(env_cache):
         env_cachedir = os.path.dirname(env_cache)
@@ -699,7 +703,8 @@ def _file_lists(load, form):
     w_lock = os.path.join(list_cachedir, '.{0}.w'.format(load['saltenv']))
     cache_match, refresh_cache, save_cache = \
         salt.fileserver.check_file_list_cache(
-            __opts__, form, list_cache, w_lock
+            __opts__, form, list_cache, w_lock,
+            prefix=load.get('prefix', '').strip('/')
         )
     if cache_match is not None:
         return cache_match
@@ -11,9 +11,11 @@ import sys
 import salt
 import time
 import logging
+import fnmatch
 import inspect
 import tempfile
 from collections import MutableMapping
+from multiprocessing.pool import ThreadPool
 
 # Import salt libs
 from salt.exceptions import LoaderError
@@ -434,11 +436,92 @@ def render(opts, functions, states=None):
     return rend
 
 
-def grains(opts, force_refresh=False):
+def _grains_func_ttl(opts, key):
+    '''
+    Return the cache TTL in seconds configured in ``grains_cache_ttl`` for the
+    grain function ``key`` (e.g. ``core.os_data``), ``'static'`` if it never
+    expires, or None if it is not cached
+    '''
+    for pattern, ttl in six.iteritems(opts.get('grains_cache_ttl') or {}):
+        if fnmatch.fnmatch(key, pattern):
+            if ttl == 'static':
+                return ttl
+            try:
+                return int(ttl)
+            except (TypeError, ValueError):
+                log.error(
+                    'Invalid grains_cache_ttl {0!r} for {1}'.format(ttl, pattern)
+                )
+    return None
+
+
+def _grains_func_cache_path(opts):
+    return os.path.join(opts['cachedir'], 'grains.funcs.p')
+
+
+def _load_grains_func_cache(opts):
+    '''
+    Load the per grain function cache, only used if ``grains_cache_ttl`` is set
+    '''
+    if not opts.get('grains_cache_ttl') or \
+            opts.get('refresh_grains_cache', False):
+        return {}
+    try:
+        serial = salt.payload.Serial(opts)
+        with salt.utils.fopen(_grains_func_cache_path(opts), 'rb') as fp_:
+            cache = serial.load(fp_)
+    except Exception:
+        return {}
+    if not isinstance(cache, dict):
+        return {}
+    return cache
+
+
+def _write_grains_func_cache(opts, cache):
+    cfn = _grains_func_cache_path(opts)
+    cumask = os.umask(0o77)
+    try:
+        with salt.utils.fopen(cfn, 'w+b') as fp_:
+            try:
+                serial = salt.payload.Serial(opts)
+                serial.dump(cache, fp_)
+            except TypeError:
+                # Can't serialize pydsl
+                pass
+    except (IOError, OSError):
+        log.error('Unable to write to grains cache file {0}'.format(cfn))
+    os.umask(cumask)
+
+
+def _call_grains_func(key, fun):
+    '''
+    Run a single grain function, errors in non-core grains are logged
+    '''
+    log.trace('Loading {0} grain'.format(key))
+    if key.startswith('core.'):
+        return fun()
+    try:
+        return fun()
+    except Exception:
+        log.critical(
+            'Failed to load grains defined in grain file {0} in '
+            'function {1}, error:\n'.format(
+                key, fun
+            ),
+            exc_info=True
+        )
+    return None
+
+
+def grains(opts, force_refresh=False, refresh_funcs=None):
     '''
     Return the functions for the dynamic grains and the values for the static
     grains.
 
+    Grain functions matching a pattern in the ``grains_cache_ttl`` option are
+    only recomputed once their TTL has expired, or if they are listed in
+    ``refresh_funcs``.
+
     .. code-block:: python
 
         import salt.config
@@ -449,12 +532,13 @@ def grains(opts, force_refresh=False):
         print __grains__['id']
     '''
     # if we hae no grains, lets try loading from disk (TODO: move to decorator?)
+    if opts.get('grains_cache', False):
+        cfn = os.path.join(
+            opts['cachedir'],
+            'grains.cache.p'
+        )
     if not force_refresh:
         if opts.get('grains_cache', False):
-            cfn = os.path.join(
-                opts['cachedir'],
-                'grains.cache.p'
-            )
             if os.path.isfile(cfn):
                 grains_cache_age = int(time.time() - os.path.getmtime(cfn))
                 if opts.get('grains_cache_expiration', 300) >= grains_cache_age and not \
@@ -512,36 +596,50 @@ def grains(opts, force_refresh=False):
                      )
     if force_refresh:  # if we refresh, lets reload grain modules
         funcs.clear()
-    # Run core grains
-    for key, fun in six.iteritems(funcs):
-        if not key.startswith('core.'):
-            continue
-        log.trace('Loading {0} grain'.format(key))
-        ret = fun()
-        if not isinstance(ret, dict):
-            continue
-        grains_data.update(ret)
+    # Core grains run first so that other grain modules can override them
+    keys = sorted(
+        [key for key in funcs if '.' in key and key != '_errors'],
+        key=lambda key: not key.startswith('core.')
+    )
+    # Grain functions with a TTL are only recomputed once it expires
+    func_cache = _load_grains_func_cache(opts)
+    now = time.time()
+    results = {}
+    stale = []
+    for key in keys:
+        ttl = _grains_func_ttl(opts, key)
+        cached = func_cache.get(key)
+        if ttl is not None and cached is not None and \
+                key not in (refresh_funcs or ()) and \
+                (ttl == 'static' or now - cached['time'] < ttl):
+            log.trace('Using cached {0} grain'.format(key))
+            results[key] = cached['data']
+        else:
+            stale.append(key)
 
-    # Run the rest of the grains
-    for key, fun in six.iteritems(funcs):
-        if '.' not in key:
-            continue
-        if key.startswith('core.') or key == '_errors':
-            continue
+    workers = opts.get('grains_refresh_workers', 1)
+    if workers > 1 and len(stale) > 1:
+        pool = ThreadPool(min(workers, len(stale)))
         try:
-            ret = fun()
-        except Exception:
-            log.critical(
-                'Failed to load grains defined in grain file {0} in '
-                'function {1}, error:\n'.format(
-                    key, fun
-                ),
-                exc_info=True
-            )
-            continue
+            computed = pool.map(lambda key: _call_grains_func(key, funcs[key]),
+                                stale)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        computed = [_call_grains_func(key, funcs[key]) for key in stale]
+
+    for key, ret in zip(stale, computed):
         if not isinstance(ret, dict):
             continue
-        grains_data.update(ret)
+        results[key] = ret
+        if _grains_func_ttl(opts, key) is not None:
+            func_cache[key] = {'time': now, 'data': ret}
+    for key in keys:
+        if key in results:
+            grains_data.update(results[key])
+    if stale and opts.get('grains_cache_ttl'):
+        _write_grains_func_cache(opts, func_cache)
 
     # Write cache if enabled
     if opts.get('grains_cache', False):
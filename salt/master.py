@@ -11,9 +11,10 @@ import re
 import sys
 import time
 import errno
+import signal
 import logging
-import tempfile
 import multiprocessing
+from multiprocessing.pool import ThreadPool
 
 # Import third party libs
 import zmq
@@ -49,6 +50,7 @@ import salt.daemons.masterapi
 import salt.defaults.exitcodes
 import salt.transport.server
 import salt.utils.atomicfile
+import salt.utils.dbpool
 import salt.utils.event
 import salt.utils.job
 import salt.utils.reactor
@@ -142,6 +144,8 @@ class Maintenance(multiprocessing.Process):
         self.loop_interval = int(self.opts['loop_interval'])
         # Track key rotation intervals
         self.rotate = int(time.time())
+        # Minions found connected on the previous presence check
+        self.presence = set()
 
     def _post_fork_init(self):
         '''
@@ -191,7 +195,6 @@ class Maintenance(multiprocessing.Process):
         # Clean out pub auth
         salt.daemons.masterapi.clean_pub_auth(self.opts)
 
-        old_present = set()
         while True:
             now = int(time.time())
             if (now - last) >= self.loop_interval:
@@ -200,7 +203,7 @@ class Maintenance(multiprocessing.Process):
             self.handle_search(now, last)
             self.handle_pillargit()
             self.handle_schedule()
-            self.handle_presence(old_present)
+            self.handle_presence()
             self.handle_key_rotate(now)
             salt.daemons.masterapi.fileserver_update(self.fileserver)
             salt.utils.verify.check_max_open_files(self.opts)
@@ -256,9 +259,22 @@ class Maintenance(multiprocessing.Process):
         '''
         Update git pillar
         '''
+        workers = min(self.opts.get('gitfs_update_workers', 1),
+                      len(self.pillargitfs))
         try:
-            for pillargit in self.pillargitfs:
-                pillargit.update()
+            if workers > 1:
+                # Each GitPillar works on its own repository, so the fetches
+                # are independent of each other
+                pool = ThreadPool(workers)
+                try:
+                    pool.map(lambda pillargit: pillargit.update(),
+                             self.pillargitfs)
+                finally:
+                    pool.close()
+                    pool.join()
+            else:
+                for pillargit in self.pillargitfs:
+                    pillargit.update()
         except Exception as exc:
             log.error('Exception {0} occurred in file server update '
                       'for git_pillar module.'.format(exc))
@@ -278,14 +294,14 @@ class Maintenance(multiprocessing.Process):
                 'Exception {0} occurred in scheduled job'.format(exc)
             )
 
-    def handle_presence(self, old_present):
+    def handle_presence(self):
         '''
-        Fire presence events if enabled
+        Fire presence events and record last-seen times if enabled
         '''
         if self.opts.get('presence_events', False):
             present = self.ckminions.connected_ids()
-            new = present.difference(old_present)
-            lost = old_present.difference(present)
+            new = present.difference(self.presence)
+            lost = self.presence.difference(present)
             if new or lost:
                 # Fire new minions present event
                 data = {'new': list(new),
@@ -293,7 +309,8 @@ class Maintenance(multiprocessing.Process):
                 self.event.fire_event(data, tagify('change', 'presence'))
             data = {'present': list(present)}
             self.event.fire_event(data, tagify('present', 'presence'))
-            old_present = present
+            self.ckminions.update_presence(present)
+            self.presence = present
 
 
 class Master(SMaster):
@@ -736,6 +753,12 @@ class MWorker(multiprocessing.Process):
             return False
         return self.aes_funcs.run_func(data['cmd'], data)
 
+    def _handle_signals(self, signum, sigframe):  # pylint: disable=unused-argument
+        '''
+        Leave the IOLoop, so that the queued returns are written
+        '''
+        sys.exit(salt.defaults.exitcodes.EX_OK)
+
     def run(self):
         '''
         Start a Master Worker
@@ -746,7 +769,12 @@ class MWorker(multiprocessing.Process):
             self.key,
             )
         self.aes_funcs = AESFuncs(self.opts)
-        self.__bind()
+        signal.signal(signal.SIGTERM, self._handle_signals)
+        try:
+            self.__bind()
+        finally:
+            # multiprocessing leaves with os._exit, which skips atexit
+            salt.utils.dbpool.flush_writers()
 
 
 # TODO: rename? No longer tied to "AES", just "encrypted" or "private" requests
@@ -769,6 +797,7 @@ class AESFuncs(object):
         self.event = salt.utils.event.get_master_event(self.opts, self.opts['sock_dir'])
         self.serial = salt.payload.Serial(opts)
         self.ckminions = salt.utils.minions.CkMinions(opts)
+        self.data_cache = salt.utils.minions.MinionDataCache(opts, self.event)
         # Make a client
         self.local = salt.client.get_local_client(self.opts['conf_file'])
         # Create the master minion to access the external job cache
@@ -1120,19 +1149,7 @@ class AESFuncs(object):
             pillar=load.get('pillar_override', {}))
         data = pillar.compile_pillar(pillar_dirs=pillar_dirs)
         if self.opts.get('minion_data_cache', False):
-            cdir = os.path.join(self.opts['cachedir'], 'minions', load['id'])
-            if not os.path.isdir(cdir):
-                os.makedirs(cdir)
-            datap = os.path.join(cdir, 'data.p')
-            tmpfh, tmpfname = tempfile.mkstemp(dir=cdir)
-            os.close(tmpfh)
-            with salt.utils.fopen(tmpfname, 'w+b') as fp_:
-                fp_.write(
-                    self.serial.dumps(
-                        {'grains': load['grains'],
-                         'pillar': data})
-                    )
-            os.rename(tmpfname, datap)
+            self.data_cache.store(load['id'], load['grains'], data)
         return data
 
     def _minion_event(self, load):
@@ -1158,6 +1175,12 @@ class AESFuncs(object):
             log.error('Received minion error from [{minion}]: '
                       '{data}'.format(minion=load['id'],
                                       data=load['data']['message']))
+        elif load.get('tag', '') == tagify([load['id'], 'grains'], 'minion'):
+            # Grains delta sent by the minion after a grains refresh
+            if self.opts.get('minion_data_cache', False):
+                self.data_cache.update_grains(load['id'],
+                                              load['data'].get('changed'),
+                                              load['data'].get('removed'))
 
     def _return(self, load):
         '''
@@ -810,10 +810,11 @@ class Minion(MinionBase):
                 self.handle_event(event)
                 self.epub_sock.send(event)
 
-    def _load_modules(self, force_refresh=False, notify=False):
+    def _load_modules(self, force_refresh=False, notify=False, grains=None):
         '''
         Return the functions and the returners loaded up from the loader
-        module
+        module. The grains are recomputed unless freshly computed ones are
+        passed in.
         '''
         # if this is a *nix system AND modules_max_memory is set, lets enforce
         # a memory limit on module imports
@@ -832,7 +833,9 @@ class Minion(MinionBase):
             if not HAS_RESOURCE:
                 log.error('Unable to enforce modules_max_memory because resource is missing')
 
-        self.opts['grains'] = salt.loader.grains(self.opts, force_refresh)
+        if grains is None:
+            grains = salt.loader.grains(self.opts, force_refresh)
+        self.opts['grains'] = grains
         self.utils = salt.loader.utils(self.opts)
         if self.opts.get('multimaster', False):
             s_opts = copy.deepcopy(self.opts)
@@ -949,6 +952,18 @@ class Minion(MinionBase):
         log.info('Starting a new job with PID {0}'.format(sdata['pid']))
         with salt.utils.fopen(fn_, 'w+b') as fp_:
             fp_.write(minion_instance.serial.dumps(sdata))
+        if opts.get('job_start_ack', False):
+            # Let the publisher know the job is running, so it does not have
+            # to ask with saltutil.find_job. The job does not wait for the
+            # master to receive it.
+            ack = threading.Thread(
+                target=minion_instance._fire_master,
+                args=({'fun': data['fun'], 'pid': sdata['pid']},
+                      tagify([data['jid'], 'ack', opts['id']], 'job')),
+                kwargs={'timeout': 5}
+            )
+            ack.daemon = True
+            ack.start()
         ret = {'success': False}
         function_name = data['fun']
         if function_name in minion_instance.functions:
@@ -1254,16 +1269,18 @@ class Minion(MinionBase):
             tagify([self.opts['id'], 'start'], 'minion'),
         )
 
-    def module_refresh(self, force_refresh=False, notify=False):
+    def module_refresh(self, force_refresh=False, notify=False, grains=None):
         '''
         Refresh the functions and returners.
         '''
         log.debug('Refreshing modules. Notify={0}'.format(notify))
-        self.functions, self.returners, _ = self._load_modules(force_refresh, notify=notify)
+        self.functions, self.returners, _ = self._load_modules(force_refresh,
+                                                               notify=notify,
+                                                               grains=grains)
         self.schedule.functions = self.functions
         self.schedule.returners = self.returners
 
-    def pillar_refresh(self, force_refresh=False):
+    def pillar_refresh(self, force_refresh=False, grains=None):
         '''
         Refresh the pillar
         '''
@@ -1279,7 +1296,34 @@ class Minion(MinionBase):
             # Do not exit if a pillar refresh fails.
             log.error('Pillar data could not be refreshed. '
                       'One or more masters may be down!')
-        self.module_refresh(force_refresh)
+        self.module_refresh(force_refresh, grains=grains)
+
+    def grains_refresh(self, refresh_funcs=None):
+        '''
+        Recompute the stale grains and, if any of them changed, send the
+        changed keys to the master and refresh the pillar
+        '''
+        log.debug('Refreshing grains')
+        old_grains = self.opts['grains']
+        new_grains = salt.loader.grains(self.opts,
+                                        force_refresh=True,
+                                        refresh_funcs=refresh_funcs)
+        changed = dict(
+            [(key, val) for key, val in six.iteritems(new_grains)
+             if key not in old_grains or old_grains[key] != val]
+        )
+        removed = [key for key in old_grains if key not in new_grains]
+        self.opts['grains'] = new_grains
+        if changed or removed:
+            log.debug('Grains changed: {0}'.format(
+                sorted(list(changed) + removed))
+            )
+            self._fire_master({'changed': changed, 'removed': removed},
+                              tagify([self.opts['id'], 'grains'], 'minion'))
+            # The grains were just computed, do not compute them again
+            # when reloading the modules
+            self.pillar_refresh(grains=new_grains)
+        self.grains_cache = self.opts['grains']
 
     def manage_schedule(self, package):
         '''
@@ -1409,9 +1453,8 @@ class Minion(MinionBase):
         elif package.startswith('manage_beacons'):
             self.manage_beacons(package)
         elif package.startswith('grains_refresh'):
-            if self.grains_cache != self.opts['grains']:
-                self.pillar_refresh(force_refresh=True)
-                self.grains_cache = self.opts['grains']
+            tag, data = salt.utils.event.MinionEvent.unpack(package)
+            self.grains_refresh(refresh_funcs=data.get('refresh_funcs'))
         elif package.startswith('environ_setenv'):
             self.environ_setenv(package)
         elif package.startswith('_minion_mine'):
@@ -2403,9 +2446,9 @@ class ProxyMinion(Minion):
         '''
         return super(ProxyMinion, self)._prep_mod_opts()
 
-    def _load_modules(self, force_refresh=False, notify=False):
+    def _load_modules(self, force_refresh=False, notify=False, grains=None):
         '''
         Return the functions and the returners loaded up from the loader
         module
         '''
-        return super(ProxyMinion, self)._load_modules(force_refresh=force_refresh, notify=notify)
+        return super(ProxyMinion, self)._load_modules(force_refresh=force_refresh, notify=notify, grains=grains)
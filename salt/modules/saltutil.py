@@ -463,6 +463,31 @@ def refresh_pillar():
 pillar_refresh = refresh_pillar
 
 
+def refresh_grains(*funcs):
+    '''
+    .. versionadded:: Beryllium
+
+    Signal the minion to recompute its grains. Grain functions cached through
+    the ``grains_cache_ttl`` minion option are only recomputed if their TTL
+    has expired, unless they are passed as arguments. If any grains changed,
+    the changed keys are sent to the master and the pillar is refreshed.
+
+    CLI Example:
+
+    .. code-block:: bash
+
+        salt '*' saltutil.refresh_grains
+        salt '*' saltutil.refresh_grains core.os_data
+    '''
+    try:
+        ret = __salt__['event.fire']({'refresh_funcs': list(funcs)},
+                                     'grains_refresh')
+    except KeyError:
+        log.error('Event module not available. Grains refresh failed.')
+        ret = False  # Effectively a no-op, since we can't really return without an event system
+    return ret
+
+
 def refresh_modules(async=True):
     '''
     Signal the minion to refresh the module and grain data
@@ -80,6 +80,11 @@ A REST API for Salt
         Collect and report statistics about the CherryPy server
 
         Reports are available via the :py:class:`Stats` URL.
+    event_buffer_size : ``1000``
+        The number of events buffered for each client of the
+        :py:class:`Events` and :py:class:`WebsocketEndpoint` URLs. All clients
+        share a single subscription to the event bus; clients falling further
+        behind are disconnected.
     static
         A filesystem path to static HTML/JavaScript/CSS/image assets.
     static_path : ``/static``
@@ -227,6 +232,7 @@ command sent to minions as well as a runner function on the master::
     :mailheader:`Accept` request header.
 
 .. |200| replace:: success
+.. |400| replace:: bad request
 .. |401| replace:: authentication required
 .. |406| replace:: requested Content-Type not available
 '''
@@ -242,8 +248,8 @@ import logging
 import json
 import StringIO
 import tarfile
-import time
-from multiprocessing import Process, Pipe
+import threading
+from multiprocessing import Pipe
 
 # Import third-party libs
 # pylint: disable=import-error
@@ -261,6 +267,7 @@ import salt.utils.event
 
 # Import salt-api libs
 import salt.netapi
+from . import event_fanout
 
 logger = logging.getLogger(__name__)
 
@@ -943,7 +950,8 @@ class Jobs(LowDataAdapter):
         'tools.salt_auth.on': True,
     })
 
-    def GET(self, jid=None):
+    def GET(self, jid=None, minions=None, offset=0, limit=None,
+            summary=False):
         '''
         A convenience URL for getting lists of previously run jobs or getting
         the return from a single job
@@ -952,7 +960,18 @@ class Jobs(LowDataAdapter):
 
             List jobs or show a single job from the job cache.
 
+            The returns of a single job can be filtered and paged through,
+            the minions are sorted by id.
+
+            :query minions: a comma separated list of the minions to return
+                the results of
+            :query offset: skip the results of this many minions
+            :query limit: return the results of at most this many minions
+            :query summary: return the number of succeeded, failed and changed
+                states of each minion instead of its results
+
             :status 200: |200|
+            :status 400: |400|
             :status 401: |401|
             :status 406: |406|
 
@@ -990,6 +1009,7 @@ class Jobs(LowDataAdapter):
         .. code-block:: bash
 
             curl -i localhost:8000/jobs/20121130104633606931
+            curl -i 'localhost:8000/jobs/20121130104633606931?offset=100&limit=100'
 
         .. code-block:: http
 
@@ -1031,10 +1051,25 @@ class Jobs(LowDataAdapter):
         }]
 
         if jid:
+            try:
+                offset = int(offset)
+                limit = int(limit) if limit is not None else None
+            except ValueError:
+                raise cherrypy.HTTPError(400, 'Invalid offset or limit')
+            if offset < 0 or (limit is not None and limit < 0):
+                raise cherrypy.HTTPError(400, 'Invalid offset or limit')
+            lowstate[0].update({
+                'minions': minions,
+                'offset': offset,
+                'limit': limit,
+                'summary': salt.utils.is_true(summary),
+            })
+            # The results are already returned by lookup_jid
             lowstate.append({
                 'client': 'runner',
                 'fun': 'jobs.list_job',
                 'jid': jid,
+                'results': False,
             })
 
         cherrypy.request.lowstate = lowstate
@@ -1537,6 +1572,17 @@ class Run(LowDataAdapter):
         }
 
 
+def _get_fanout(opts):
+    '''
+    Return the event subscription shared by the event stream clients of this
+    process
+    '''
+    return event_fanout.get_fanout(
+        opts,
+        cherrypy.config['apiopts'].get('event_buffer_size',
+                                       event_fanout.DEFAULT_BUFFER_SIZE))
+
+
 class Events(object):
     '''
     Expose the Salt event bus
@@ -1592,13 +1638,16 @@ class Events(object):
 
         return False
 
-    def GET(self, token=None, salt_token=None):
+    def GET(self, token=None, salt_token=None, tag=None):
         r'''
         An HTTP stream of the Salt master event bus
 
         This stream is formatted per the Server Sent Events (SSE) spec. Each
         event is formatted as JSON.
 
+        Clients which cannot keep up with the stream are disconnected once
+        ``event_buffer_size`` events are waiting to be sent to them.
+
         .. http:get:: /events
 
             :status 200: |200|
@@ -1613,6 +1662,9 @@ class Events(object):
                 *eauth token* (not to be confused with the token returned from
                 the /login URL). E.g.,
                 ``curl -NsS localhost:8000/events?salt_token=30742765``
+            :query tag: **optional** only stream the events whose tag starts
+                with this prefix, may be passed several times. E.g.,
+                ``curl -NsS 'localhost:8000/events?tag=salt/job/&tag=salt/auth'``
 
         **Example request:**
 
@@ -1711,23 +1763,18 @@ class Events(object):
         cherrypy.response.headers['Cache-Control'] = 'no-cache'
         cherrypy.response.headers['Connection'] = 'keep-alive'
 
+        if tag is not None and not isinstance(tag, list):
+            tag = [tag]
+        subscriber = _get_fanout(self.opts).subscribe(tag, 'sse')
+
         def listen():
             '''
             An iterator to yield Salt events
             '''
-            event = salt.utils.event.get_event(
-                    'master',
-                    sock_dir=self.opts['sock_dir'],
-                    transport=self.opts['transport'],
-                    opts=self.opts)
-            stream = event.iter_events(full=True)
-
             yield u'retry: {0}\n'.format(400)
 
-            while True:
-                data = next(stream)
-                yield u'tag: {0}\n'.format(data.get('tag', ''))
-                yield u'data: {0}\n\n'.format(json.dumps(data))
+            for frame in subscriber:
+                yield frame
 
         return listen()
 
@@ -1763,12 +1810,15 @@ class WebsocketEndpoint(object):
         self.opts = cherrypy.config['saltopts']
         self.auth = salt.auth.LoadAuth(self.opts)
 
-    def GET(self, token=None, **kwargs):
+    def GET(self, token=None, tag=None, **kwargs):
         '''
         Return a websocket connection of Salt's event stream
 
         .. http:get:: /ws/(token)
 
+            :query tag: **optional** only send the events whose tag starts
+                with this prefix, may be passed several times.
+
             :query format_events: The event stream will undergo server-side
                 formatting if the ``format_events`` URL parameter is included
                 in the request. This can be useful to avoid formatting on the
@@ -1881,42 +1931,52 @@ class WebsocketEndpoint(object):
         # request spawns a new instance of this handler
         handler = cherrypy.request.ws_handler
 
+        if tag is not None and not isinstance(tag, list):
+            tag = [tag]
+        fanout = _get_fanout(self.opts)
+
         def event_stream(handler, pipe):
             '''
-            An iterator to return Salt events (and optionally format them)
+            Send Salt events (and optionally format them) to the client
             '''
-            # blocks until send is called on the parent end of this pipe.
-            pipe.recv()
-
-            event = salt.utils.event.get_event(
-                    'master',
-                    sock_dir=self.opts['sock_dir'],
-                    transport=self.opts['transport'],
-                    opts=self.opts)
-            stream = event.iter_events(full=True)
+            # wait until send is called on the parent end of this pipe.
+            while not pipe.poll(1):
+                if handler.terminated:
+                    return
+
+            format_events = 'format_events' in kwargs
+            subscriber = fanout.subscribe(tag, 'raw' if format_events else 'ws')
             SaltInfo = event_processor.SaltInfo(handler)
-            while True:
-                data = next(stream)
-                if data:
+            try:
+                while not handler.terminated:
+                    try:
+                        data = subscriber.get(timeout=1)
+                    except StopIteration:
+                        handler.close()
+                        break
+                    if data is None:
+                        continue
                     try:  # work around try to decode catch unicode errors
-                        if 'format_events' in kwargs:
+                        if format_events:
                             SaltInfo.process(data, salt_token, self.opts)
                         else:
-                            handler.send('data: {0}\n\n'.format(
-                                json.dumps(data)), False)
+                            handler.send(data, False)
                     except UnicodeDecodeError:
                         logger.error(
                                 "Error: Salt event has non UTF-8 data:\n{0}"
                                 .format(data))
-                time.sleep(0.1)
+            finally:
+                subscriber.close()
 
         parent_pipe, child_pipe = Pipe()
         handler.pipe = parent_pipe
         handler.opts = self.opts
-        # Process to handle async push to a client.
-        # Each GET request causes a process to be kicked off.
-        proc = Process(target=event_stream, args=(handler, child_pipe))
-        proc.start()
+        # Thread to handle async push to a client. Each GET request causes a
+        # thread to be kicked off, the events are read once for all of them.
+        thread = threading.Thread(target=event_stream,
+                                  args=(handler, child_pipe))
+        thread.daemon = True
+        thread.start()
 
 
 class Webhook(object):
@@ -0,0 +1,210 @@
+# encoding: utf-8
+'''
+Share one subscription to the master event bus between all the event stream
+clients of the API process.
+
+Every event is read and decoded once, matched against the tag prefixes the
+clients asked for, and serialized once per output format before being handed
+to the clients. Each client has a bounded buffer, clients falling too far
+behind are disconnected instead of holding events in memory without limit.
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import collections
+import json
+import logging
+import os
+import threading
+
+# Import Salt libs
+import salt.utils.event
+
+# Import 3rd-party libs
+import salt.ext.six as six
+
+logger = logging.getLogger(__name__)
+
+# Default number of events buffered for a client before it is disconnected
+DEFAULT_BUFFER_SIZE = 1000
+
+_FANOUT = None
+_LOCK = threading.Lock()
+
+
+def format_event(fmt, data):
+    '''
+    Serialize an event for the output format of a client. ``sse`` is a
+    complete Server Sent Events record, ``ws`` the websocket message and
+    ``raw`` the event data itself.
+    '''
+    if fmt == 'raw':
+        return data
+    if fmt == 'sse':
+        return u'tag: {0}\ndata: {1}\n\n'.format(data.get('tag', ''),
+                                                json.dumps(data))
+    return u'data: {0}\n\n'.format(json.dumps(data))
+
+
+class EventSubscriber(object):
+    '''
+    The buffered events of one client, as returned by
+    :py:meth:`EventFanout.subscribe`
+    '''
+    def __init__(self, fanout, tags, fmt, buffer_size):
+        self.fanout = fanout
+        self.tags = tuple(set(tags))
+        self.fmt = fmt
+        self.buffer_size = buffer_size
+        self.buffer = collections.deque()
+        self.cond = threading.Condition()
+        self.closed = False
+        self.dropped = False
+
+    def put(self, frame):
+        '''
+        Queue a serialized event, return False if the buffer is full
+        '''
+        with self.cond:
+            if len(self.buffer) >= self.buffer_size:
+                self.dropped = True
+                self.buffer.clear()
+                self.cond.notify()
+                return False
+            self.buffer.append(frame)
+            self.cond.notify()
+        return True
+
+    def get(self, timeout=None):
+        '''
+        Return the next serialized event, or None if none arrived within
+        timeout. Raises StopIteration once the subscription is closed.
+        '''
+        with self.cond:
+            if not self.buffer and not (self.closed or self.dropped):
+                self.cond.wait(timeout)
+            if self.dropped or (self.closed and not self.buffer):
+                raise StopIteration
+            if self.buffer:
+                return self.buffer.popleft()
+        return None
+
+    def __iter__(self):
+        try:
+            while True:
+                try:
+                    frame = self.get()
+                except StopIteration:
+                    return
+                if frame is not None:
+                    yield frame
+        finally:
+            self.close()
+
+    def close(self):
+        '''
+        Stop receiving events
+        '''
+        self.fanout.unsubscribe(self)
+        with self.cond:
+            self.closed = True
+            self.cond.notify()
+
+
+class EventFanout(object):
+    '''
+    Read the master event bus in a background thread and dispatch the events
+    to the subscribed clients
+    '''
+    def __init__(self, opts, buffer_size=DEFAULT_BUFFER_SIZE):
+        self.opts = opts
+        self.buffer_size = buffer_size
+        # tag prefix -> set of subscribers
+        self.index = {}
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def subscribe(self, tags=None, fmt='sse'):
+        '''
+        Return a subscriber receiving the events whose tag starts with one of
+        tags, all events by default, serialized with :py:func:`format_event`
+        '''
+        sub = EventSubscriber(self, tags or [''], fmt, self.buffer_size)
+        with self.lock:
+            for tag in sub.tags:
+                self.index.setdefault(tag, set()).add(sub)
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run,
+                                               name='EventFanout')
+                self.thread.daemon = True
+                self.thread.start()
+        return sub
+
+    def unsubscribe(self, sub):
+        '''
+        Remove a subscriber from the index
+        '''
+        with self.lock:
+            for tag in sub.tags:
+                subs = self.index.get(tag)
+                if subs is None:
+                    continue
+                subs.discard(sub)
+                if not subs:
+                    del self.index[tag]
+
+    def publish(self, data):
+        '''
+        Hand an event to the subscribers of its tag
+        '''
+        tag = data.get('tag', '')
+        matched = set()
+        with self.lock:
+            for prefix, subs in six.iteritems(self.index):
+                if tag.startswith(prefix):
+                    matched.update(subs)
+        frames = {}
+        for sub in matched:
+            if sub.fmt not in frames:
+                try:
+                    frames[sub.fmt] = format_event(sub.fmt, data)
+                except (TypeError, ValueError, UnicodeDecodeError) as exc:
+                    logger.error(
+                        'Unable to serialize event {0}: {1}'.format(tag, exc)
+                    )
+                    frames[sub.fmt] = None
+            if frames[sub.fmt] is None:
+                continue
+            if not sub.put(frames[sub.fmt]):
+                logger.warning(
+                    'Event stream client fell {0} events behind, '
+                    'disconnecting it'.format(sub.buffer_size)
+                )
+                self.unsubscribe(sub)
+
+    def _run(self):
+        event = salt.utils.event.get_event(
+                'master',
+                sock_dir=self.opts['sock_dir'],
+                transport=self.opts['transport'],
+                opts=self.opts)
+        for data in event.iter_events(full=True):
+            if data:
+                try:
+                    self.publish(data)
+                except Exception as exc:
+                    logger.error(
+                        'Error dispatching event: {0}'.format(exc),
+                        exc_info_on_loglevel=logging.DEBUG
+                    )
+
+
+def get_fanout(opts, buffer_size=DEFAULT_BUFFER_SIZE):
+    '''
+    Return the event fan-out of this process
+    '''
+    global _FANOUT
+    with _LOCK:
+        if _FANOUT is None or _FANOUT[0] != os.getpid():
+            _FANOUT = (os.getpid(), EventFanout(opts, buffer_size))
+        return _FANOUT[1]
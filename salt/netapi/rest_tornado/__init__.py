@@ -60,6 +60,7 @@ def start():
         (r"/jobs/(.*)", saltnado.JobsSaltAPIHandler),
         (r"/jobs", saltnado.JobsSaltAPIHandler),
         (r"/run", saltnado.RunSaltAPIHandler),
+        (r"/stats", saltnado.StatsSaltAPIHandler),
         (r"/events", saltnado.EventsSaltAPIHandler),
         (r"/hook(/.*)?", saltnado.WebhookSaltAPIHandler),
     ]
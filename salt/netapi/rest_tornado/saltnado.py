@@ -31,7 +31,23 @@ add the following to the Salt master config file.
         debug: False
         disable_ssl: False
         webhook_disable_auth: False
-
+        # threads running blocking Salt client calls
+        executor_threads: 10
+        # client calls allowed to wait for a thread before requests are
+        # turned away with a 503, 0 for no limit
+        max_pending_calls: 200
+
+Calls to the Salt clients which block, such as publishing a job or
+authenticating, are run by a pool of ``executor_threads`` threads so they never
+stall the other requests and websockets served by the process. Each of these
+threads publishes with its own LocalClient, as the ZeroMQ sockets of a client
+must not be shared between threads. Runners are started by a helper process
+forked before the threads, as a process forked while another thread holds a
+lock, such as the logging locks, would never see it released.
+Requests are answered with a ``503`` once ``max_pending_calls`` calls are
+waiting for a thread. The number, errors and latency of the requests to each
+endpoint and of the client calls are available from the
+:py:class:`StatsSaltAPIHandler` URL.
 
 .. _rest_tornado-auth:
 
@@ -153,12 +169,17 @@ a return like::
 
 # Import Python libs
 from __future__ import absolute_import
+import os
+import sys
 import time
 import math
 import fnmatch
 import logging
+import threading
+import multiprocessing
 from copy import copy
-from collections import defaultdict
+from collections import defaultdict, deque
+from multiprocessing.pool import ThreadPool
 
 # pylint: disable=import-error
 import yaml
@@ -178,6 +199,7 @@ ioloop.install()
 import salt.netapi
 import salt.utils
 import salt.utils.event
+import salt.utils.jid
 from salt.utils.event import tagify
 import salt.client
 import salt.runner
@@ -221,6 +243,171 @@ class SaltClientsMixIn(object):
         return SaltClientsMixIn.__saltclients
 
 
+class ExecutorBusy(Exception):
+    '''
+    Raised when too many client calls are waiting for the executor
+    '''
+
+
+class LatencyStats(object):
+    '''
+    Count and time operations by name
+    '''
+    def __init__(self):
+        # name -> [count, errors, total seconds, max seconds]
+        self.stats = defaultdict(lambda: [0, 0, 0.0, 0.0])
+
+    def record(self, name, duration, error=False):
+        stat = self.stats[name]
+        stat[0] += 1
+        if error:
+            stat[1] += 1
+        stat[2] += duration
+        stat[3] = max(stat[3], duration)
+
+    def report(self):
+        return dict([(name, {'count': count,
+                             'errors': errors,
+                             'avg_time': total / count,
+                             'max_time': max_time})
+                     for name, (count, errors, total, max_time)
+                     in six.iteritems(self.stats)])
+
+
+def _runner_launcher(opts, conn):
+    '''
+    Start the runners received from the API process through conn. Runs in a
+    process without threads, so that the runner processes it forks do not
+    inherit locks held by other threads.
+    '''
+    runner_client = salt.runner.RunnerClient(opts=opts)
+    while True:
+        try:
+            fun, low, pub = conn.recv()
+        except EOFError:
+            # The API process is gone
+            return
+        try:
+            runner_client.async(fun, low, pub=pub)
+        except Exception:
+            logger.exception('Failed to start the runner {0}'.format(fun))
+
+
+class ClientExecutor(object):
+    '''
+    Run blocking Salt client calls in a thread pool and hand their results
+    back to the IOLoop as futures, so they do not stall the other requests
+
+    Calls which fork must not be run in the pool, nor from the IOLoop once
+    the pool exists: the child process would inherit the locks held by the
+    threads of the pool. When opts are passed, runners are started through
+    :py:meth:`start_runner` by a helper process forked before the pool.
+    '''
+    def __init__(self, workers=10, max_pending=200, opts=None):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.opts = opts
+        self.pending = 0
+        self.stats = LatencyStats()
+        self.pool = None
+        self.launcher = None
+        self.pid = None
+        # the LocalClient of each thread of the pool
+        self.threads = threading.local()
+
+    def _start(self):
+        '''
+        Start the runner launcher and then the thread pool of this process
+        '''
+        # The API forks its processes after the application is set up,
+        # threads do not survive a fork
+        if self.pid != os.getpid():
+            if self.opts is not None:
+                conn, child_conn = multiprocessing.Pipe()
+                proc = multiprocessing.Process(target=_runner_launcher,
+                                               args=(self.opts, child_conn))
+                proc.daemon = True
+                proc.start()
+                child_conn.close()
+                self.launcher = conn
+            self.pool = ThreadPool(self.workers)
+            self.pid = os.getpid()
+
+    def _get_pool(self):
+        self._start()
+        return self.pool
+
+    def start_runner(self, fun, low, pub):
+        '''
+        Start a runner with the jid and tag of pub, without waiting for it
+        '''
+        self._start()
+        if self.launcher is None:
+            raise ValueError('The executor was created without opts')
+        self.launcher.send((fun, low, pub))
+
+    def submit(self, name, func, *args, **kwargs):
+        '''
+        Run func in the thread pool and return a future of its result. Must
+        be called from the IOLoop.
+        '''
+        if self.max_pending and self.pending >= self.max_pending:
+            raise ExecutorBusy(
+                'Too many requests in progress, try again later'
+            )
+        future = Future()
+        io_loop = tornado.ioloop.IOLoop.current()
+        start = time.time()
+        self.pending += 1
+
+        def run():
+            try:
+                return True, func(*args, **kwargs)
+            except Exception:
+                return False, sys.exc_info()
+
+        def finish(result):
+            success, value = result
+            self.pending -= 1
+            self.stats.record(name, time.time() - start, not success)
+            if success:
+                future.set_result(value)
+            else:
+                future.set_exc_info(value)
+
+        self._get_pool().apply_async(
+            run,
+            callback=lambda result: io_loop.add_callback(finish, result)
+        )
+        return future
+
+    def _local_client(self, opts):
+        '''
+        Return the LocalClient of the current thread, ZeroMQ sockets must not
+        be used by more than one thread
+        '''
+        if getattr(self.threads, 'local_client', None) is None:
+            self.threads.local_client = salt.client.get_local_client(mopts=opts)
+        return self.threads.local_client
+
+    def _call_local(self, opts, method, *args, **kwargs):
+        return getattr(self._local_client(opts), method)(*args, **kwargs)
+
+    def submit_local(self, name, opts, method, *args, **kwargs):
+        '''
+        Call a method of a LocalClient in the thread pool and return a future
+        of its result. Must be called from the IOLoop.
+        '''
+        return self.submit(name, self._call_local, opts, method,
+                           *args, **kwargs)
+
+    def report(self):
+        return {'workers': self.workers,
+                'max_pending': self.max_pending,
+                'pending': self.pending,
+                'calls': self.stats.report()}
+
+
 AUTH_TOKEN_HEADER = 'X-Auth-Token'
 AUTH_COOKIE_NAME = 'session_id'
 
@@ -270,6 +457,9 @@ class EventListener(object):
 
         self.timeout_map = {}  # map of future -> timeout_callback
 
+        # (request_obj, tag) -> {'events': deque, 'waiters': list of futures}
+        self.listeners = {}
+
         self.stream = zmqstream.ZMQStream(self.event.sub,
                                           io_loop=tornado.ioloop.IOLoop.current())
         self.stream.on_recv(self._handle_event_socket_recv)
@@ -278,10 +468,25 @@ class EventListener(object):
         '''
         Remove all futures that were waiting for request `request` since it is done waiting
         '''
+        for key in [key for key in self.listeners if key[0] is request]:
+            for future in self.listeners.pop(key)['waiters']:
+                if not future.done():
+                    future.set_exception(TimeoutException())
         if request not in self.request_map:
             return
         for tag, future in self.request_map[request]:
             self._timeout_future(tag, future)
+        del self.request_map[request]
+
+    def listen(self, request, tag):
+        '''
+        Queue the events matching tag for request from now on. Later calls to
+        get_event for the same request and tag are served from the queue, so
+        no event is missed while the request is not waiting for one, e.g.
+        while the job they belong to is still being published.
+        '''
+        self.listeners.setdefault((request, tag),
+                                  {'events': deque(), 'waiters': []})
 
     def get_event(self,
                   request,
@@ -297,6 +502,17 @@ class EventListener(object):
             def handle_future(future):
                 tornado.ioloop.IOLoop.current().add_callback(callback, future)
             future.add_done_callback(handle_future)
+        listener = self.listeners.get((request, tag))
+        if listener is not None:
+            if listener['events']:
+                future.set_result(listener['events'].popleft())
+                return future
+            listener['waiters'].append(future)
+            if timeout:
+                timeout_future = tornado.ioloop.IOLoop.current().call_later(
+                    timeout, self._timeout_listener_future, listener, future)
+                self.timeout_map[future] = timeout_future
+            return future
         # add this tag and future to the callbacks
         self.tag_map[tag].append(future)
         self.request_map[request].append((tag, future))
@@ -319,11 +535,35 @@ class EventListener(object):
         if len(self.tag_map[tag]) == 0:
             del self.tag_map[tag]
 
+    def _timeout_listener_future(self, listener, future):
+        '''
+        Timeout a future waiting for a queued event
+        '''
+        self.timeout_map.pop(future, None)
+        if future in listener['waiters']:
+            listener['waiters'].remove(future)
+        if not future.done():
+            future.set_exception(TimeoutException())
+
     def _handle_event_socket_recv(self, raw):
         '''
         Callback for events on the event sub socket
         '''
         mtag, data = self.event.unpack(raw[0], self.event.serial)
+        for (_, tag_prefix), listener in list(six.iteritems(self.listeners)):
+            if not mtag.startswith(tag_prefix):
+                continue
+            event = {'data': data, 'tag': mtag}
+            while listener['waiters']:
+                future = listener['waiters'].pop(0)
+                if future.done():
+                    continue
+                future.set_result(event)
+                if future in self.timeout_map:
+                    tornado.ioloop.IOLoop.current().remove_timeout(self.timeout_map.pop(future))
+                break
+            else:
+                listener['events'].append(event)
         # see if we have any futures that need this info:
         for tag_prefix, futures in six.iteritems(self.tag_map):
             if mtag.startswith(tag_prefix):
@@ -367,6 +607,28 @@ class BaseSaltAPIHandler(tornado.web.RequestHandler, SaltClientsMixIn):  # pylin
         ('application/x-yaml', yaml.safe_dump),
     )
 
+    @property
+    def executor(self):
+        '''
+        The executor running the blocking client calls of this process
+        '''
+        if getattr(self.application, 'executor', None) is None:
+            mod_opts = getattr(self.application, 'mod_opts', {})
+            self.application.executor = ClientExecutor(
+                mod_opts.get('executor_threads', 10),
+                mod_opts.get('max_pending_calls', 200),
+                self.application.opts)
+        return self.application.executor
+
+    @property
+    def request_stats(self):
+        '''
+        The latency statistics of the requests to each endpoint
+        '''
+        if getattr(self.application, 'request_stats', None) is None:
+            self.application.request_stats = LatencyStats()
+        return self.application.request_stats
+
     def _verify_client(self, client):
         '''
         Verify that the client is in fact one we have
@@ -424,7 +686,8 @@ class BaseSaltAPIHandler(tornado.web.RequestHandler, SaltClientsMixIn):  # pylin
         timeout a session
         '''
         # TODO: set a header or something??? so we know it was a timeout
-        self.application.event_listener.clean_timeout_futures(self)
+        if getattr(self.application, 'event_listener', None) is not None:
+            self.application.event_listener.clean_timeout_futures(self)
 
     def on_finish(self):
         '''
@@ -432,6 +695,11 @@ class BaseSaltAPIHandler(tornado.web.RequestHandler, SaltClientsMixIn):  # pylin
         '''
         # timeout all the futures
         self.timeout_futures()
+        if getattr(self, 'start', None) is not None:
+            self.request_stats.record(
+                '{0} {1}'.format(self.request.method, self.__class__.__name__),
+                time.time() - self.start,
+                self.get_status() >= 500)
 
     def on_connection_close(self):
         '''
@@ -542,6 +810,7 @@ class SaltAuthHandler(BaseSaltAPIHandler):  # pylint: disable=W0223
         self.write(self.serialize(ret))
 
     # TODO: make async? Underlying library isn't... and we ARE making disk calls :(
+    @tornado.gen.coroutine
     def post(self):
         '''
         :ref:`Authenticate  <rest_tornado-auth>` against Salt's eauth system
@@ -616,7 +885,13 @@ class SaltAuthHandler(BaseSaltAPIHandler):  # pylint: disable=W0223
             self.send_error(400)
             return
 
-        token = self.application.auth.mk_token(creds)
+        try:
+            token = yield self.executor.submit('auth',
+                                               self.application.auth.mk_token,
+                                               creds)
+        except ExecutorBusy:
+            self.send_error(503)
+            return
         if 'token' not in token:
             # TODO: nicer error message
             # 'Could not authenticate using provided credentials')
@@ -795,6 +1070,11 @@ class SaltAPIHandler(BaseSaltAPIHandler, SaltClientsMixIn):  # pylint: disable=W
             try:
                 chunk_ret = yield getattr(self, '_disbatch_{0}'.format(low['client']))(low)
                 ret.append(chunk_ret)
+            except ExecutorBusy as ex:
+                self.set_status(503)
+                self.write(self.serialize({'return': str(ex)}))
+                self.finish()
+                return
             except Exception as ex:
                 ret.append('Unexpected exception while handling request: {0}'.format(ex))
                 logger.error('Unexpected exception while handling request:', exc_info=True)
@@ -860,10 +1140,22 @@ class SaltAPIHandler(BaseSaltAPIHandler, SaltClientsMixIn):  # pylint: disable=W
         '''
         chunk_ret = {}
 
+        # Listen for the returns before the job is published, the IOLoop
+        # keeps processing events while it is
+        if not chunk.get('jid'):
+            chunk = dict(chunk, jid=salt.utils.jid.gen_jid())
+        self.application.event_listener.listen(
+            self, tagify([chunk['jid'], 'ret'], 'job'))
+
         f_call = salt.utils.format_call(self.saltclients['local'], chunk)
         # fire a job off
         try:
-            pub_data = self.saltclients['local'](*f_call.get('args', ()), **f_call.get('kwargs', {}))
+            pub_data = yield self.executor.submit_local(
+                'local',
+                self.application.opts,
+                'run_job',
+                *f_call.get('args', ()),
+                **f_call.get('kwargs', {}))
         except EauthAuthenticationError:
             raise tornado.gen.Return('Not authorized to run this job')
 
@@ -944,11 +1236,7 @@ class SaltAPIHandler(BaseSaltAPIHandler, SaltClientsMixIn):  # pylint: disable=W
         if minions_remaining is None:
             minions_remaining = []
 
-        ping_pub_data = self.saltclients['local'](tgt,
-                                                  'saltutil.find_job',
-                                                  [jid],
-                                                  expr_form=tgt_type)
-        ping_tag = tagify([ping_pub_data['jid'], 'ret'], 'job')
+        ping_tag = yield self._find_job(jid, tgt, tgt_type)
 
         minion_running = False
         while True:
@@ -961,11 +1249,7 @@ class SaltAPIHandler(BaseSaltAPIHandler, SaltClientsMixIn):  # pylint: disable=W
                 if not minion_running:
                     raise tornado.gen.Return(True)
                 else:
-                    ping_pub_data = self.saltclients['local'](tgt,
-                                                              'saltutil.find_job',
-                                                              [jid],
-                                                              expr_form=tgt_type)
-                    ping_tag = tagify([ping_pub_data['jid'], 'ret'], 'job')
+                    ping_tag = yield self._find_job(jid, tgt, tgt_type)
                     minion_running = False
                     continue
             # Minions can return, we want to see if the job is running...
@@ -976,6 +1260,25 @@ class SaltAPIHandler(BaseSaltAPIHandler, SaltClientsMixIn):  # pylint: disable=W
             if id_ not in minions_remaining:
                 minions_remaining.append(event['data']['id'])
 
+    @tornado.gen.coroutine
+    def _find_job(self, jid, tgt, tgt_type):
+        '''
+        Ask the minions whether they are still running jid, and return the
+        tag of the returns of the question
+        '''
+        ping_jid = salt.utils.jid.gen_jid()
+        ping_tag = tagify([ping_jid, 'ret'], 'job')
+        self.application.event_listener.listen(self, ping_tag)
+        yield self.executor.submit_local('local',
+                                         self.application.opts,
+                                         'run_job',
+                                         tgt,
+                                         'saltutil.find_job',
+                                         [jid],
+                                         expr_form=tgt_type,
+                                         jid=ping_jid)
+        raise tornado.gen.Return(ping_tag)
+
     @tornado.gen.coroutine
     def _disbatch_local_async(self, chunk):
         '''
@@ -983,7 +1286,12 @@ class SaltAPIHandler(BaseSaltAPIHandler, SaltClientsMixIn):  # pylint: disable=W
         '''
         f_call = salt.utils.format_call(self.saltclients['local_async'], chunk)
         # fire a job off
-        pub_data = self.saltclients['local_async'](*f_call.get('args', ()), **f_call.get('kwargs', {}))
+        pub_data = yield self.executor.submit_local(
+            'local_async',
+            self.application.opts,
+            'run_job',
+            *f_call.get('args', ()),
+            **f_call.get('kwargs', {}))
 
         raise tornado.gen.Return(pub_data)
 
@@ -992,9 +1300,12 @@ class SaltAPIHandler(BaseSaltAPIHandler, SaltClientsMixIn):  # pylint: disable=W
         '''
         Disbatch runner client commands
         '''
-        f_call = {'args': [chunk['fun'], chunk]}
-        pub_data = self.saltclients['runner'](chunk['fun'], chunk)
-        tag = pub_data['tag'] + '/ret'
+        # Listen for the return before the runner is started
+        jid = salt.utils.jid.gen_jid()
+        pub = {'jid': jid, 'tag': tagify(jid, prefix='run')}
+        tag = pub['tag'] + '/ret'
+        self.application.event_listener.listen(self, tag)
+        self.executor.start_runner(chunk['fun'], chunk, pub)
         try:
             event = yield self.application.event_listener.get_event(self, tag=tag)
 
@@ -1147,7 +1458,18 @@ class JobsSaltAPIHandler(SaltAPIHandler):  # pylint: disable=W0223
 
             List jobs or show a single job from the job cache.
 
+            The returns of a single job can be filtered and paged through,
+            the minions are sorted by id.
+
+            :query minions: a comma separated list of the minions to return
+                the results of
+            :query offset: skip the results of this many minions
+            :query limit: return the results of at most this many minions
+            :query summary: return the number of succeeded, failed and changed
+                states of each minion instead of its results
+
             :status 200: |200|
+            :status 400: |400|
             :status 401: |401|
             :status 406: |406|
 
@@ -1225,10 +1547,26 @@ class JobsSaltAPIHandler(SaltAPIHandler):  # pylint: disable=W0223
             return
 
         if jid:
+            try:
+                offset = int(self.get_argument('offset', 0))
+                limit = self.get_argument('limit', None)
+                if limit is not None:
+                    limit = int(limit)
+            except ValueError:
+                self.send_error(400)
+                return
+            if offset < 0 or (limit is not None and limit < 0):
+                self.send_error(400)
+                return
             self.lowstate = [{
                 'fun': 'jobs.list_job',
                 'jid': jid,
                 'client': 'runner',
+                'minions': self.get_argument('minions', None),
+                'offset': offset,
+                'limit': limit,
+                'summary': salt.utils.is_true(
+                    self.get_argument('summary', False)),
             }]
         else:
             self.lowstate = [{
@@ -1239,6 +1577,62 @@ class JobsSaltAPIHandler(SaltAPIHandler):  # pylint: disable=W0223
         self.disbatch()
 
 
+class StatsSaltAPIHandler(SaltAPIHandler):  # pylint: disable=W0223
+    '''
+    Expose statistics on the running API process
+    '''
+    def get(self):  # pylint: disable=W0221
+        '''
+        Return the number, errors and latency of the requests to each
+        endpoint and of the blocking client calls of this process
+
+        .. http:get:: /stats
+
+            :reqheader X-Auth-Token: |req_token|
+            :reqheader Accept: |req_accept|
+
+            :resheader Content-Type: |res_ct|
+
+            :status 200: |200|
+            :status 401: |401|
+            :status 406: |406|
+
+        **Example response:**
+
+        .. code-block:: http
+
+            HTTP/1.1 200 OK
+            Content-Type: application/x-yaml
+
+            return:
+              executor:
+                calls:
+                  local:
+                    avg_time: 0.0132
+                    count: 12
+                    errors: 0
+                    max_time: 0.0413
+                max_pending: 200
+                pending: 0
+                workers: 10
+              requests:
+                POST SaltAPIHandler:
+                  avg_time: 1.0421
+                  count: 12
+                  errors: 0
+                  max_time: 2.3007
+        '''
+        # if you aren't authenticated, redirect to login
+        if not self._verify_auth():
+            self.redirect('/login')
+            return
+
+        self.write(self.serialize({'return': {
+            'requests': self.request_stats.report(),
+            'executor': self.executor.report(),
+        }}))
+
+
 class RunSaltAPIHandler(SaltAPIHandler):  # pylint: disable=W0223
     '''
     Endpoint to run commands without normal session handling
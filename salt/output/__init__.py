@@ -30,13 +30,15 @@ import salt.ext.six as six
 log = logging.getLogger(__name__)
 
 
-def try_printout(data, out, opts):
+def try_printout(data, out, opts, printout=None):
     '''
     Safely get the string to print out, try the configured outputter, then
     fall back to nested and then to raw
     '''
     try:
-        return get_printout(out, opts)(data).rstrip()
+        if printout is None:
+            printout = get_printout(out, opts)
+        return printout(data).rstrip()
     except (KeyError, AttributeError):
         log.debug(traceback.format_exc())
         try:
@@ -77,13 +79,84 @@ def progress_end(progress_iter):
     return None
 
 
+def _stream_output(data, printout_iter, output_filename):
+    '''
+    Write the chunks of output generated for data as they are produced,
+    return False if the outputter failed before writing anything
+
+    Like the output of try_printout, the output ends with its last non blank
+    character: the last chunk which is not blank is held back, along with the
+    blank chunks following it, until the next one arrives.
+    '''
+    written = []
+    ofh = None
+
+    def _write(chunk):
+        if ofh is not None:
+            if isinstance(chunk, six.text_type):
+                try:
+                    chunk = chunk.encode('utf-8')
+                except (UnicodeDecodeError, UnicodeEncodeError):
+                    # try to let the stream write
+                    # even if we didn't encode it
+                    pass
+            ofh.write(chunk)
+            ofh.write('\n')
+        else:
+            print_cli(chunk)
+        written.append(True)
+
+    held = []
+    try:
+        if output_filename:
+            ofh = salt.utils.fopen(output_filename, 'a')
+        for chunk in printout_iter(data):
+            if chunk.strip():
+                for held_chunk in held:
+                    _write(held_chunk)
+                held = [chunk]
+            else:
+                held.append(chunk)
+        if held and held[0].rstrip():
+            _write(held[0].rstrip())
+    except (KeyError, AttributeError):
+        if written:
+            log.error('Output failed: ', exc_info=True)
+            return True
+        log.debug(traceback.format_exc())
+        return False
+    finally:
+        if ofh is not None:
+            ofh.close()
+    return True
+
+
 def display_output(data, out=None, opts=None):
     '''
     Print the passed data using the desired output
     '''
     if opts is None:
         opts = {}
-    display_data = try_printout(data, out, opts)
+
+    # Outputters which can format their output in chunks write it as it is
+    # produced, instead of building all of it in memory first
+    printout = None
+    printout_iter = None
+    try:
+        printout, printout_iter = _get_printouts(out, opts)
+    except (KeyError, AttributeError):
+        log.debug(traceback.format_exc())
+    if printout_iter is not None:
+        try:
+            if _stream_output(data, printout_iter, opts.get('output_file')):
+                return
+        except IOError as exc:
+            # Only raise if it's NOT a broken pipe
+            if exc.errno != errno.EPIPE:
+                raise exc
+            return
+
+    display_data = try_printout(data, out, opts, printout)
 
     output_filename = opts.get('output_file', None)
     log.trace('data = {0}'.format(data))
@@ -114,6 +187,14 @@ def get_printout(out, opts=None, **kwargs):
     '''
     Return a printer function
     '''
+    return _get_printouts(out, opts, **kwargs)[0]
+
+
+def _get_printouts(out, opts=None, **kwargs):
+    '''
+    Return the printer function of an outputter, and its output_iter
+    generator or None if it cannot format its output in chunks
+    '''
     if opts is None:
         opts = {}
 
@@ -153,8 +234,11 @@ def get_printout(out, opts=None, **kwargs):
         # error when old minions are asking for it
         if out != 'grains':
             log.error('Invalid outputter {0} specified, fall back to nested'.format(out))
-        return outputters['nested']
-    return outputters[out]
+        out = 'nested'
+    # The outputters loader only exposes the output functions, look up
+    # output_iter in the loader it wraps
+    printout_iter = outputters._dict.get('{0}.output_iter'.format(out))
+    return outputters[out], printout_iter
 
 
 def out_format(data, out, opts=None):
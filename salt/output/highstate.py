@@ -17,7 +17,7 @@ state_verbose:
     means that nothing with a result of True and no changes will not be printed
 state_output:
     The highstate outputter has five output modes, `full`, `terse`, `mixed`,
-    `changes` and `filter`. The default is set to full, which will display many
+    `changes`, `filter` and `summary`. The default is set to full, which will display many
     lines of detailed information for each executed chunk. If the `state_output`
     option is set to `terse` then the output is greatly simplified and shown in
     only one line.  If `mixed` is used, then terse output will be used unless a
@@ -29,7 +29,9 @@ state_output:
     `state_output_exclude` or `state_output_terse`, respectively. The values to
     exclude must be a comma-separated list of `True`, `False` and/or `None`.
     Because of parsing nuances, if only one of these is used, it must still
-    contain a comma. For instance: `exclude=True,`.
+    contain a comma. For instance: `exclude=True,`. If `summary` is used, only
+    the summary of the state counts is shown for each minion, which keeps the
+    output of large highstate runs short and quick to produce.
 state_tabular:
     If `state_output` uses the terse output, set this to `True` for an aligned
     output format.  If you wish to use a custom format, this can be set to a
@@ -76,8 +78,15 @@ def output(data):
     The HighState Outputter is only meant to be used with the state.highstate
     function, or a function that returns highstate return data.
     '''
+    return u'\n'.join(output_iter(data))
+
+
+def output_iter(data):
+    '''
+    Generate the output of each minion in turn
+    '''
     for host, hostdata in six.iteritems(data):
-        return _format_host(host, hostdata)[0]
+        yield _format_host(host, hostdata)[0]
 
 
 def _format_host(host, data):
@@ -90,6 +99,7 @@ def _format_host(host, data):
     hstrs = []
     nchanges = 0
     strip_colors = __opts__.get('strip_colors', True)
+    summary = __opts__.get('state_output', 'full').lower() == 'summary'
 
     if isinstance(data, int) or isinstance(data, str):
         # Data in this format is from saltmod.function,
@@ -130,6 +140,18 @@ def _format_host(host, data):
             rcounts.setdefault(ret['result'], 0)
             rcounts[ret['result']] += 1
 
+            if summary:
+                # Only count, without formatting the state
+                nchanges += 1 if _has_changes(ret['changes']) else 0
+                if ret['result'] is False:
+                    hcolor = colors['RED']
+                if ret['result'] is None:
+                    hcolor = colors['LIGHT_YELLOW']
+                if 'warnings' in ret:
+                    rcounts.setdefault('warnings', 0)
+                    rcounts['warnings'] += 1
+                continue
+
             tcolor = colors['GREEN']
             schanged, ctext = _format_changes(ret['changes'])
             nchanges += 1 if schanged else 0
@@ -357,6 +379,29 @@ def _format_host(host, data):
     return u'\n'.join(hstrs), nchanges > 0
 
 
+def _has_changes(changes):
+    '''
+    Return whether _format_changes would report the changes as changed,
+    without formatting them
+    '''
+    if not changes:
+        return False
+    if not isinstance(changes, dict):
+        return True
+    ret = changes.get('ret')
+    if ret is not None and changes.get('out') == 'highstate':
+        for hostdata in six.itervalues(ret):
+            if isinstance(hostdata, (int, str)):
+                return True
+            if isinstance(hostdata, dict):
+                for sdata in six.itervalues(hostdata):
+                    if isinstance(sdata, dict) \
+                            and _has_changes(sdata.get('changes')):
+                        return True
+        return False
+    return True
+
+
 def _format_changes(changes):
     '''
     Format the changes dict based on what the data is
@@ -68,81 +68,84 @@ class NestDisplay(object):
         '''
         Recursively iterate down through data structures to determine output
         '''
+        out.extend(self.display_iter(ret, indent, prefix))
+        return out
+
+    def display_iter(self, ret, indent, prefix):
+        '''
+        Generate the output lines one at a time, so that large data can be
+        written out without holding all of its output in memory
+        '''
         if ret is None or ret is True or ret is False:
-            out.append(
-                self.ustring(
-                    indent,
-                    self.LIGHT_YELLOW,
-                    ret,
-                    prefix=prefix
-                )
+            yield self.ustring(
+                indent,
+                self.LIGHT_YELLOW,
+                ret,
+                prefix=prefix
             )
         # Number includes all python numbers types
         #  (float, int, long, complex, ...)
         elif isinstance(ret, Number):
-            out.append(
-                self.ustring(
-                    indent,
-                    self.LIGHT_YELLOW,
-                    ret,
-                    prefix=prefix
-                )
+            yield self.ustring(
+                indent,
+                self.LIGHT_YELLOW,
+                ret,
+                prefix=prefix
             )
         elif isinstance(ret, string_types):
             for line in ret.splitlines():
                 if self.strip_colors:
                     line = salt.output.strip_esc_sequence(line)
-                out.append(
-                    self.ustring(
-                        indent,
-                        self.GREEN,
-                        line,
-                        prefix=prefix
-                    )
+                yield self.ustring(
+                    indent,
+                    self.GREEN,
+                    line,
+                    prefix=prefix
                 )
         elif isinstance(ret, (list, tuple)):
             for ind in ret:
                 if isinstance(ind, (list, tuple, dict)):
-                    out.append(
-                        self.ustring(
-                            indent,
-                            self.GREEN,
-                            '|_'
-                        )
+                    yield self.ustring(
+                        indent,
+                        self.GREEN,
+                        '|_'
                     )
                     prefix = '' if isinstance(ind, dict) else '- '
-                    self.display(ind, indent + 2, prefix, out)
+                    for line in self.display_iter(ind, indent + 2, prefix):
+                        yield line
                 else:
-                    self.display(ind, indent, '- ', out)
+                    for line in self.display_iter(ind, indent, '- '):
+                        yield line
         elif isinstance(ret, dict):
             if indent:
-                out.append(
-                    self.ustring(
-                        indent,
-                        self.CYAN,
-                        '----------'
-                    )
+                yield self.ustring(
+                    indent,
+                    self.CYAN,
+                    '----------'
                 )
             for key in sorted(ret):
                 val = ret[key]
-                out.append(
-                    self.ustring(
-                        indent,
-                        self.CYAN,
-                        key,
-                        suffix=':',
-                        prefix=prefix
-                    )
+                yield self.ustring(
+                    indent,
+                    self.CYAN,
+                    key,
+                    suffix=':',
+                    prefix=prefix
                 )
-                self.display(val, indent + 4, '', out)
-        return out
+                for line in self.display_iter(val, indent + 4, ''):
+                    yield line
 
 
 def output(ret):
     '''
     Display ret data
     '''
+    return '\n'.join(output_iter(ret))
+
+
+def output_iter(ret):
+    '''
+    Generate the lines displaying ret data
+    '''
     nest = NestDisplay()
-    return '\n'.join(
-        nest.display(ret, __opts__.get('nested_indent', 0), '', [])
-    )
+    return nest.display_iter(ret, __opts__.get('nested_indent', 0), '')
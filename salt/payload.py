@@ -11,6 +11,7 @@ from __future__ import absolute_import
 import logging
 import gc
 import datetime
+import threading
 
 # Import salt libs
 import salt.log
@@ -48,6 +49,54 @@ except ImportError:
         # work without msgpack
         #sys.exit(salt.defaults.exitcodes.EX_GENERIC)
 
+# Messages at least this large are decoded with the garbage collector
+# disabled. Decoding them creates enough containers to trigger several
+# collections per message, for small messages switching the collector off
+# and on again costs more than it saves.
+GC_DISABLE_SIZE = 64 * 1024
+
+# Packer objects are reused between messages but are not thread safe, each
+# thread gets its own
+_LOCAL = threading.local()
+
+
+def _default(obj):
+    '''
+    Encode the objects msgpack does not support natively
+    '''
+    if isinstance(obj, datetime.datetime):
+        # msgpack doesn't support datetime.datetime datatype, they are sent as
+        # the packed string of the date, as they have always been
+        return msgpack.packb(obj.strftime('%Y%m%dT%H:%M:%S.%f'))
+    if isinstance(obj, six.integer_types):
+        # Integers out of the range of msgpack, such as very long jids
+        return str(obj)
+    raise TypeError('can not serialize {0!r} object'.format(type(obj).__name__))
+
+
+def _use_packer():
+    '''
+    Return True if msgpack supports reusable packers with a default hook.
+    msgpack_pure and msgpack releases before 0.2.0 do not.
+    '''
+    return hasattr(msgpack, 'Packer') and msgpack.version >= (0, 2, 0)
+
+
+def _pack(msg):
+    '''
+    Serialize msg with the packer of the current thread
+    '''
+    packer = getattr(_LOCAL, 'packer', None)
+    if packer is None:
+        packer = _LOCAL.packer = msgpack.Packer(default=_default)
+    try:
+        return packer.pack(msg)
+    except Exception:
+        # A failed pack can leave part of the message in the buffer of the
+        # packer, don't reuse it
+        _LOCAL.packer = None
+        raise
+
 
 def package(payload):
     '''
@@ -92,10 +141,17 @@ class Serial(object):
 
     def loads(self, msg):
         '''
-        Run the correct loads serialization format
+        Run the correct loads serialization format. ``msg`` can also be a
+        buffer, such as a memoryview of a zeromq frame received without
+        copying.
         '''
+        if isinstance(msg, memoryview) and msgpack.version < (0, 5, 0):
+            # Older msgpack only reads objects with the old buffer interface
+            msg = msg.tobytes()
+        disable_gc = len(msg) >= GC_DISABLE_SIZE and gc.isenabled()
         try:
-            gc.disable()  # performance optimization for msgpack
+            if disable_gc:
+                gc.disable()  # performance optimization for msgpack
             return msgpack.loads(msg, use_list=True)
         except Exception as exc:
             log.critical('Could not deserialize msgpack message: {0}'
@@ -103,7 +159,17 @@ class Serial(object):
                          'Please open an issue and include the following error: {1}'.format(msg, exc))
             raise
         finally:
-            gc.enable()
+            if disable_gc:
+                gc.enable()
+
+    def unpacker(self, file_like=None):
+        '''
+        Return a streaming msgpack Unpacker decoding messages like
+        :py:meth:`loads`. The messages are read from ``file_like`` if given,
+        otherwise the data is passed to its ``feed`` method as it arrives.
+        Iterating over the unpacker yields each complete message.
+        '''
+        return msgpack.Unpacker(file_like, use_list=True, max_buffer_size=0)
 
     def load(self, fn_):
         '''
@@ -118,10 +184,14 @@ class Serial(object):
         '''
         Run the correct dumps serialization format
         '''
+        dumps = _pack if _use_packer() else msgpack.dumps
         try:
-            return msgpack.dumps(msg)
+            # The packer of the thread is reused and datetime objects are
+            # handled by its default hook, without walking the message first
+            return dumps(msg)
         except OverflowError:
-            # msgpack can't handle the very long Python longs for jids
+            # msgpack can't handle the very long Python longs for jids, older
+            # releases don't pass them to the default hook
             # Convert any very long longs to strings
             # We borrow the technique used by TypeError below
             def verylong_encoder(obj):
@@ -134,13 +204,12 @@ class Serial(object):
                     for idx, entry in enumerate(obj):
                         obj[idx] = verylong_encoder(entry)
                     return obj
-                if six.PY2 and isinstance(obj, long) and long > pow(2, 64):  # pylint: disable=incompatible-py3-code
-                    return str(obj)
-                elif six.PY3 and isinstance(obj, int) and int > pow(2, 64):
+                if isinstance(obj, six.integer_types) \
+                        and not -pow(2, 63) <= obj < pow(2, 64):
                     return str(obj)
                 else:
                     return obj
-            return msgpack.dumps(verylong_encoder(msg))
+            return dumps(verylong_encoder(msg))
         except TypeError as e:
             # msgpack doesn't support datetime.datetime datatype
             # So here we have converted datetime.datetime to custom datatype
@@ -195,8 +264,8 @@ class Serial(object):
             return msgpack.dumps(odict_encoder(msg))
         except SystemError as exc:
             log.critical('Unable to serialize message! Consider upgrading msgpack. '
-                         'Message which failed was {failed_message} '
-                         'with exception {exception_message}').format(msg, exc)
+                         'Message which failed was {0} '
+                         'with exception {1}'.format(msg, exc))
 
     def dump(self, msg, fn_):
         '''
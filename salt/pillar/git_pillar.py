@@ -93,6 +93,7 @@ except ImportError:
     pass
 
 # Import salt libs
+import salt.utils
 from salt.pillar import Pillar
 
 # Set up logging
@@ -170,10 +171,109 @@ class GitPillar(object):
                     # write.
                     # This should place a lock down.
                     pass
+                self._share_gitfs_objects()
             else:
                 if self.repo.remotes.origin.url != self.rp_location:
                     self.repo.remotes.origin.config_writer.set('url', self.rp_location)
 
+    def _alternates(self):
+        '''
+        Return the path to the alternates file of the repository and the
+        object directories listed in it
+        '''
+        alternates = os.path.join(self.repo.git_dir,
+                                  'objects',
+                                  'info',
+                                  'alternates')
+        try:
+            with salt.utils.fopen(alternates, 'r') as fp_:
+                paths = [x.strip() for x in fp_.read().splitlines()
+                         if x.strip()]
+        except (IOError, OSError):
+            paths = []
+        return alternates, paths
+
+    def _share_gitfs_objects(self):
+        '''
+        If a new repository is also one of the gitfs_remotes, borrow the
+        objects already fetched by gitfs through the alternates file, so that
+        the first fetch does not download the same history again. The
+        borrowed objects are copied into the repository after that fetch by
+        :py:meth:`_unshare_gitfs_objects`.
+        '''
+        for remote in self.opts.get('gitfs_remotes', []):
+            if isinstance(remote, dict):
+                remote = next(iter(remote))
+            if remote == self.rp_location:
+                break
+        else:
+            return
+        hash_type = getattr(hashlib, self.opts.get('hash_type', 'md5'))
+        objects = os.path.join(self.opts['cachedir'],
+                               'gitfs',
+                               hash_type(self.rp_location).hexdigest(),
+                               '.git',
+                               'objects')
+        if not os.path.isdir(objects):
+            return
+        info_dir = os.path.join(self.repo.git_dir, 'objects', 'info')
+        alternates = os.path.join(info_dir, 'alternates')
+        try:
+            if os.path.isfile(alternates):
+                with salt.utils.fopen(alternates, 'r') as fp_:
+                    if objects in fp_.read().splitlines():
+                        return
+            elif not os.path.isdir(info_dir):
+                os.makedirs(info_dir)
+            with salt.utils.fopen(alternates, 'a') as fp_:
+                fp_.write(objects + '\n')
+        except (IOError, OSError) as exc:
+            log.debug(
+                'Unable to share gitfs objects with git_pillar repo {0}: {1}'
+                .format(self.rp_location, exc)
+            )
+
+    def _unshare_gitfs_objects(self):
+        '''
+        Copy the objects borrowed from the gitfs cache into the repository
+        and remove the alternates file, so that clearing or pruning the gitfs
+        cache cannot leave the repository with missing objects. Returns False
+        if the borrowed objects are gone.
+        '''
+        alternates, paths = self._alternates()
+        if not paths:
+            return True
+        if not all([os.path.isdir(path) for path in paths]):
+            return False
+        try:
+            self.repo.git.repack('-a', '-d')
+        except git.exc.GitCommandError as exc:
+            log.error('Unable to copy the objects shared with gitfs into '
+                      'git_pillar repo {0}: {1}'.format(self.rp_location, exc))
+            return False
+        try:
+            os.remove(alternates)
+        except OSError:
+            pass
+        return True
+
+    def _drop_gitfs_objects(self):
+        '''
+        Remove the alternates file and the remote refs, so that the next
+        fetch downloads all objects again
+        '''
+        log.warning('The gitfs objects shared with git_pillar repo {0} are '
+                    'gone, fetching it again'.format(self.rp_location))
+        alternates, _ = self._alternates()
+        try:
+            os.remove(alternates)
+        except OSError:
+            pass
+        refs = self.repo.git.for_each_ref('--format=%(refname)',
+                                          'refs/remotes/origin')
+        for ref in refs.splitlines():
+            self.repo.git.update_ref('-d', ref)
+
     def map_branch(self, branch, opts=None):
         opts = __opts__ if opts is None else opts
         if branch == '__env__':
@@ -190,7 +290,13 @@ class GitPillar(object):
         '''
         try:
             log.debug('Updating fileserver for git_pillar module')
+            _, paths = self._alternates()
+            if not all([os.path.isdir(path) for path in paths]):
+                self._drop_gitfs_objects()
             self.repo.git.fetch()
+            if not self._unshare_gitfs_objects():
+                self._drop_gitfs_objects()
+                self.repo.git.fetch()
         except git.exc.GitCommandError as exc:
             log.error('Unable to fetch the latest changes from remote '
                       '{0}: {1}'.format(self.rp_location, exc))
@@ -12,7 +12,7 @@ from yaml.scanner import ScannerError
 from yaml.constructor import ConstructorError
 
 # Import salt libs
-from salt.utils.yamlloader import SaltYamlSafeLoader, load
+from salt.utils.yamlloader import SaltYamlCSafeLoader, load
 from salt.utils.odict import OrderedDict
 from salt.exceptions import SaltRenderError
 import salt.ext.six as six
@@ -26,13 +26,31 @@ _ERROR_MAP = {
      "start any token"): 'Illegal tab character'
 }
 
+# libyaml does not name the character it could not scan
+_LIBYAML_BAD_CHARACTER = 'found character that cannot start any token'
+
+
+def _get_error_type(exc, yaml_data):
+    '''
+    Return the description of a scanner error
+    '''
+    if exc.problem in _ERROR_MAP:
+        return _ERROR_MAP[exc.problem]
+    if exc.problem == _LIBYAML_BAD_CHARACTER:
+        mark = exc.problem_mark
+        lines = yaml_data.splitlines()
+        if mark.line < len(lines) \
+                and lines[mark.line][mark.column:mark.column + 1] == '\t':
+            return 'Illegal tab character'
+    return 'Unknown yaml render error'
+
 
 def get_yaml_loader(argline):
     '''
     Return the ordered dict yaml loader
     '''
     def yaml_loader(*args):
-        return SaltYamlSafeLoader(*args, dictclass=OrderedDict)
+        return SaltYamlCSafeLoader(*args, dictclass=OrderedDict)
     return yaml_loader
 
 
@@ -49,9 +67,11 @@ def render(yaml_data, saltenv='base', sls='', argline='', **kws):
         try:
             data = load(yaml_data, Loader=get_yaml_loader(argline))
         except ScannerError as exc:
-            err_type = _ERROR_MAP.get(exc.problem, 'Unknown yaml render error')
+            err_type = _get_error_type(exc, yaml_data)
             line_num = exc.problem_mark.line + 1
-            raise SaltRenderError(err_type, line_num, exc.problem_mark.buffer)
+            # The marks of the libyaml parser do not hold the buffer
+            buf = exc.problem_mark.buffer or yaml_data
+            raise SaltRenderError(err_type, line_num, buf)
         except ConstructorError as exc:
             raise SaltRenderError(exc)
         if len(warn_list) > 0:
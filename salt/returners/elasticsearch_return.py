@@ -36,6 +36,24 @@ or to specify multiple elasticsearch hosts for resiliency:
 The above configuration can be placed in a targeted pillar, minion or
 master configurations.
 
+On the master, returns can be queued and indexed with the bulk API. A batch
+is sent as soon as ``batch_size`` returns are queued, and at most
+``flush_interval`` seconds after its first return was queued. Batching is
+disabled by default (a batch size of 1):
+
+.. code-block:: yaml
+
+    elasticsearch:
+      batch_size: 100
+      flush_interval: 1
+
+The returns of a batch which could not be indexed are sent again with the
+next batch. Returns still queued by other master processes are not found by
+``get_jid`` until their batch was sent.
+
+The index is created once per process, with mappings for the returns, job
+loads and events.
+
 To use the returner per salt call:
 
 .. code-block:: bash
@@ -52,14 +70,18 @@ from __future__ import absolute_import
 
 # Import Python libs
 import datetime
+import os
+import threading
 
 # Import Salt libs
+import salt.utils.dbpool
 import salt.utils.jid
 
 __virtualname__ = 'elasticsearch'
 
 try:
     import elasticsearch
+    import elasticsearch.helpers
     HAS_ELASTICSEARCH = True
 except ImportError:
     HAS_ELASTICSEARCH = False
@@ -70,6 +92,12 @@ try:
 except ImportError:
     HAS_PICKLER = False
 
+# (pid, hosts) -> elasticsearch.Elasticsearch
+_CLIENTS = {}
+# (pid, hosts, index) of the indexes which have been set up
+_INDEXES = set()
+_LOCK = threading.Lock()
+
 
 def _create_index(client, index):
     '''
@@ -92,16 +120,45 @@ def _create_index(client, index):
                             'type': 'boolean'
                         },
                         'id': {
-                            'type': 'string'
+                            'type': 'string',
+                            'index': 'not_analyzed'
                         },
                         'retcode': {
                             'type': 'integer'
                         },
                         'fun': {
-                            'type': 'string'
+                            'type': 'string',
+                            'index': 'not_analyzed'
+                        },
+                        'jid': {
+                            'type': 'string',
+                            'index': 'not_analyzed'
+                        }
+                    }
+                },
+                'load': {
+                    'properties': {
+                        '@timestamp': {
+                            'type': 'date'
                         },
                         'jid': {
-                            'type': 'string'
+                            'type': 'string',
+                            'index': 'not_analyzed'
+                        }
+                    }
+                },
+                'event': {
+                    'properties': {
+                        '@timestamp': {
+                            'type': 'date'
+                        },
+                        'tag': {
+                            'type': 'string',
+                            'index': 'not_analyzed'
+                        },
+                        'master_id': {
+                            'type': 'string',
+                            'index': 'not_analyzed'
                         }
                     }
                 }
@@ -124,29 +181,157 @@ def _get_pickler():
     return Pickler(max_depth=5)
 
 
-def _get_instance():
+def _get_hosts():
     '''
-    Return the elasticsearch instance
+    Return the configured elasticsearch hosts as a tuple
     '''
     # Check whether we have a single elasticsearch host string, or a list of host strings.
-    if isinstance(__salt__['config.get']('elasticsearch:host'), list):
-        return elasticsearch.Elasticsearch(__salt__['config.get']('elasticsearch:host'))
-    else:
-        return elasticsearch.Elasticsearch([__salt__['config.get']('elasticsearch:host')])
+    hosts = __salt__['config.get']('elasticsearch:host')
+    if isinstance(hosts, list):
+        return tuple(hosts)
+    return (hosts,)
+
+
+def _get_index():
+    return __salt__['config.get']('elasticsearch:index')
+
+
+def _get_instance():
+    '''
+    Return the elasticsearch instance, with the index set up. Both are only
+    created once per process.
+    '''
+    hosts = _get_hosts()
+    index = _get_index()
+    pid = os.getpid()
+    with _LOCK:
+        client = _CLIENTS.get((pid, hosts))
+        if client is None:
+            client = _CLIENTS[(pid, hosts)] = \
+                elasticsearch.Elasticsearch(list(hosts))
+        if (pid, hosts, index) not in _INDEXES:
+            _create_index(client, index)
+            _INDEXES.add((pid, hosts, index))
+    return client
+
+
+def _bulk(actions):
+    '''
+    Index a list of bulk actions
+    '''
+    elasticsearch.helpers.bulk(_get_instance(), actions)
+
+
+def _timestamp():
+    return datetime.datetime.utcnow().isoformat()
 
 
 def returner(ret):
     '''
     Process the return from Salt
+
+    On the master returns can be queued and indexed in bulk, as soon as
+    ``elasticsearch:batch_size`` (default: 1, no batching) returns are queued
+    or ``elasticsearch:flush_interval`` (default: 1) seconds after the first
+    one was queued. Minions index their returns right away.
+    '''
+    ret['@timestamp'] = _timestamp()
+    action = {'_index': _get_index(),
+              '_type': 'returner',
+              '_id': '{0}:{1}'.format(ret['jid'], ret['id']),
+              '_source': _get_pickler().flatten(ret)}
+    batch_size = int(__salt__['config.get']('elasticsearch:batch_size') or 1)
+    if __opts__.get('__role') == 'master' and batch_size > 1:
+        flush_interval = float(
+            __salt__['config.get']('elasticsearch:flush_interval') or 1
+        )
+        salt.utils.dbpool.get_writer(
+            ('elasticsearch',) + _get_hosts(),
+            _bulk,
+            batch_size=batch_size,
+            flush_interval=flush_interval
+        ).add(action)
+    else:
+        _bulk([action])
+
+
+def event_return(events):
+    '''
+    Index events with a single bulk request
+
+    Requires that configuration be enabled via 'event_return'
+    option in master config.
     '''
-    es_ = _get_instance()
-    _create_index(es_, __salt__['config.get']('elasticsearch:index'))
-    the_time = datetime.datetime.utcnow().isoformat()
-    ret['@timestamp'] = the_time
-    es_.index(index=__salt__['config.get']('elasticsearch:index'),
-             doc_type='returner',
-             body=_get_pickler().flatten(ret),
-             )
+    index = _get_index()
+    the_time = _timestamp()
+    pickler = _get_pickler()
+    actions = []
+    for event in events:
+        actions.append({'_index': index,
+                        '_type': 'event',
+                        '_source': {'tag': event.get('tag', ''),
+                                    'data': pickler.flatten(event.get('data', '')),
+                                    'master_id': __opts__['id'],
+                                    '@timestamp': the_time}})
+    _bulk(actions)
+
+
+def save_load(jid, load):
+    '''
+    Save the load to the specified jid
+    '''
+    _get_instance().index(index=_get_index(),
+                          doc_type='load',
+                          id=jid,
+                          body={'jid': jid,
+                                'load': _get_pickler().flatten(load),
+                                '@timestamp': _timestamp()})
+
+
+def get_load(jid):
+    '''
+    Return the load data that marks a specified jid
+    '''
+    data = _get_instance().get(index=_get_index(),
+                               doc_type='load',
+                               id=jid,
+                               ignore=404)
+    if data and data.get('found'):
+        return data['_source']['load']
+    return {}
+
+
+def get_jid(jid):
+    '''
+    Return the information returned when the specified job id was executed
+    '''
+    client = _get_instance()
+    # Send the returns this process still has queued, and make them
+    # searchable
+    if salt.utils.dbpool.flush_writers(('elasticsearch',) + _get_hosts()):
+        client.indices.refresh(index=_get_index())
+    ret = {}
+    for hit in elasticsearch.helpers.scan(
+            client,
+            index=_get_index(),
+            doc_type='returner',
+            query={'query': {'term': {'jid': jid}}}):
+        ret[hit['_source']['id']] = hit['_source']
+    return ret
+
+
+def get_jids():
+    '''
+    Return a list of all job ids
+    '''
+    data = _get_instance().search(
+        index=_get_index(),
+        doc_type='returner',
+        body={'size': 0,
+              'aggs': {'jids': {'terms': {'field': 'jid', 'size': 0}}}}
+    )
+    return [bucket['key']
+            for bucket in data['aggregations']['jids']['buckets']]
 
 
 def prep_jid(nocache=False, passed_jid=None):  # pylint: disable=unused-argument
@@ -16,8 +16,12 @@ import hashlib
 # Import salt libs
 import salt.payload
 import salt.utils
+import salt.utils.atomicfile
 import salt.utils.jid
 
+# Import 3rd-party libs
+import salt.ext.six as six
+
 log = logging.getLogger(__name__)
 
 # load is the published job
@@ -28,6 +32,21 @@ MINIONS_P = '.minions.p'
 RETURN_P = 'return.p'
 # out is the "out" from the minion data
 OUT_P = 'out.p'
+# parts of the returns of a job stored once by hash, see job_cache_dedup
+BLOBS_DIR = '.blobs'
+# the key of a reference to a blob in a return
+BLOB_REF = '__job_cache_blob__'
+# serialized parts smaller than this are not worth storing as blobs
+BLOB_MIN_SIZE = 512
+# the job index, one file of appended records per hour of jids
+INDEX_DIR = '.index'
+INDEX_EXT = '.p'
+# marks an index which holds all the jobs of the cache
+INDEX_COMPLETE = '.complete'
+# the bucket of the jids which are not timestamps, cleaned on the next run
+INVALID_BUCKET = '0000000000'
+# the fields of the job loads kept in the index
+INDEX_FIELDS = ('fun', 'arg', 'tgt', 'tgt_type', 'user', 'metadata')
 
 
 def _job_dir():
@@ -56,6 +75,8 @@ def _walk_through(job_dir):
     serial = salt.payload.Serial(__opts__)
 
     for top in os.listdir(job_dir):
+        if top.startswith('.'):
+            continue
         t_path = os.path.join(job_dir, top)
 
         for final in os.listdir(t_path):
@@ -69,6 +90,131 @@ def _walk_through(job_dir):
             yield jid, job, t_path, final
 
 
+def _index_dir():
+    '''
+    Return the directory of the job index
+    '''
+    return os.path.join(_job_dir(), INDEX_DIR)
+
+
+def _use_index():
+    '''
+    Return True if the job index can be used instead of walking the cache
+    '''
+    return __opts__.get('job_cache_index', True) \
+        and os.path.isfile(os.path.join(_index_dir(), INDEX_COMPLETE))
+
+
+def _bucket(jid):
+    '''
+    Return the index bucket of a jid, the hour it was generated in
+    '''
+    if len(jid) < 18 or not jid[:10].isdigit():
+        return INVALID_BUCKET
+    return jid[:10]
+
+
+def _index_add(jid, load=None, serial=None):
+    '''
+    Append the record of a job to the job index. Records are small and
+    written with a single write to a file opened for appending, so the
+    records written by concurrent workers are not interleaved.
+
+    Return False if the record could not be written, the index is then
+    marked incomplete so that it is rebuilt from the cache on the next
+    cleaning run and the job is not left out of it.
+    '''
+    if not __opts__.get('job_cache_index', True):
+        return True
+    jid = str(jid)
+    record = {'jid': jid}
+    if load is not None:
+        for field in INDEX_FIELDS:
+            if field in load:
+                record[field] = load[field]
+        if 'metadata' not in record \
+                and isinstance(load.get('kwargs'), dict) \
+                and 'metadata' in load['kwargs']:
+            record['metadata'] = load['kwargs']['metadata']
+    if serial is None:
+        serial = salt.payload.Serial(__opts__)
+    index_dir = _index_dir()
+    path = os.path.join(index_dir, _bucket(jid) + INDEX_EXT)
+    try:
+        if not os.path.isdir(index_dir):
+            try:
+                os.makedirs(index_dir)
+            except OSError:
+                # Created by another worker in the meantime
+                if not os.path.isdir(index_dir):
+                    raise
+        fd_ = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            os.write(fd_, serial.dumps(record))
+        finally:
+            os.close(fd_)
+    except (IOError, OSError) as exc:
+        log.warning(
+            'Could not write job index file {0}, the index will be rebuilt: '
+            '{1}'.format(path, exc)
+        )
+        _index_invalidate()
+        return False
+    return True
+
+
+def _index_invalidate():
+    '''
+    Drop the mark of a complete index, the jobs are then listed and cleaned
+    by walking the cache until the index is rebuilt
+    '''
+    try:
+        os.remove(os.path.join(_index_dir(), INDEX_COMPLETE))
+    except OSError as exc:
+        if exc.errno != errno.ENOENT:
+            log.error(
+                'Could not remove the job index mark, the index may miss '
+                'jobs: {0}'.format(exc)
+            )
+
+
+def _index_buckets(start=None, end=None, reverse=False):
+    '''
+    Return the sorted paths of the index buckets which can hold jids from
+    start to end
+    '''
+    index_dir = _index_dir()
+    try:
+        buckets = sorted([fn_[:-len(INDEX_EXT)]
+                          for fn_ in os.listdir(index_dir)
+                          if fn_.endswith(INDEX_EXT)], reverse=reverse)
+    except OSError:
+        return []
+    return [os.path.join(index_dir, bucket + INDEX_EXT)
+            for bucket in buckets
+            if (start is None or bucket >= start[:10])
+            and (end is None or bucket <= end[:10])]
+
+
+def _read_bucket(path, serial):
+    '''
+    Return a dict of the jobs recorded in an index bucket, by jid
+    '''
+    jobs = {}
+    try:
+        with salt.utils.fopen(path, 'rb') as fp_:
+            # A record still being appended by another worker is incomplete,
+            # the unpacker stops before it
+            for record in serial.unpacker(fp_):
+                if isinstance(record, dict) and 'jid' in record:
+                    jobs.setdefault(record['jid'], {}).update(record)
+    except (IOError, OSError) as exc:
+        log.warning('Could not read job index file {0}: {1}'.format(path, exc))
+    except Exception as exc:
+        log.error('Corrupted job index file {0}: {1}'.format(path, exc))
+    return jobs
+
+
 def _format_job_instance(job):
     '''
     Format the job instance correctly
@@ -98,6 +244,68 @@ def _format_jid_instance(jid, job):
     return ret
 
 
+def _dedup(data, blob_dir, serial):
+    '''
+    Store the parts of data which are at least BLOB_MIN_SIZE bytes once in
+    the blob_dir of the job, and return data with them replaced by
+    references. Large parts which are not stored yet are reduced
+    recursively, so identical sub-trees of otherwise different returns are
+    stored only once as well, and are kept inline if they become small.
+    '''
+    packed = serial.dumps(data)
+    if len(packed) < BLOB_MIN_SIZE:
+        return data
+    # Do not use hash_type, a collision would mix up returns
+    digest = hashlib.sha256(packed).hexdigest()
+    path = os.path.join(blob_dir, digest)
+    if not os.path.isfile(path):
+        if isinstance(data, (dict, list)):
+            if isinstance(data, dict):
+                data = dict([(key, _dedup(val, blob_dir, serial))
+                             for key, val in six.iteritems(data)])
+            else:
+                data = [_dedup(val, blob_dir, serial) for val in data]
+            packed = serial.dumps(data)
+            if len(packed) < BLOB_MIN_SIZE:
+                return data
+        if not os.path.isdir(blob_dir):
+            try:
+                os.makedirs(blob_dir)
+            except OSError:
+                # Created by another worker in the meantime
+                if not os.path.isdir(blob_dir):
+                    raise
+        with salt.utils.atomicfile.atomic_open(path, 'w+b') as fp_:
+            fp_.write(packed)
+    return {BLOB_REF: digest}
+
+
+def _resolve(data, blob_dir, serial, blobs):
+    '''
+    Replace the blob references in data with the blobs. blobs is a dict of
+    already read blobs, so they are read only once per lookup.
+    '''
+    if isinstance(data, dict):
+        if len(data) == 1 and BLOB_REF in data:
+            digest = data[BLOB_REF]
+            if digest not in blobs:
+                path = os.path.join(blob_dir, digest)
+                try:
+                    with salt.utils.fopen(path, 'rb') as fp_:
+                        blobs[digest] = fp_.read()
+                except (IOError, OSError) as exc:
+                    log.error('Unable to read job cache blob {0}: {1}'.format(path, exc))
+                    return data
+            # Deserialize again for every reference, so the returns of
+            # different minions do not share objects
+            return _resolve(serial.loads(blobs[digest]), blob_dir, serial, blobs)
+        return dict([(key, _resolve(val, blob_dir, serial, blobs))
+                     for key, val in six.iteritems(data)])
+    if isinstance(data, list):
+        return [_resolve(val, blob_dir, serial, blobs) for val in data]
+    return data
+
+
 #TODO: add to returner docs-- this is a new one
 def prep_jid(nocache=False, passed_jid=None):
     '''
@@ -126,6 +334,7 @@ def prep_jid(nocache=False, passed_jid=None):
     if nocache:
         with salt.utils.fopen(os.path.join(jid_dir_, 'nocache'), 'w+') as fn_:
             fn_.write('')
+    _index_add(jid)
 
     return jid
 
@@ -166,8 +375,12 @@ def returner(load):
             return False
         raise
 
+    ret_data = load['return']
+    if __opts__.get('job_cache_dedup'):
+        ret_data = _dedup(ret_data, os.path.join(jid_dir, BLOBS_DIR), serial)
+
     serial.dump(
-        load['return'],
+        ret_data,
         # Use atomic open here to avoid the file being read before it's
         # completely written to. Refs #1935
         salt.utils.atomicfile.atomic_open(
@@ -221,6 +434,8 @@ def save_load(jid, clear_load):
             )
     except IOError as exc:
         log.warning('Could not write job invocation cache file: {0}'.format(exc))
+        return
+    _index_add(jid, clear_load, serial)
 
 
 def get_load(jid):
@@ -246,85 +461,223 @@ def get_jid(jid):
     '''
     Return the information returned when the specified job id was executed
     '''
+    return dict(get_jid_iter(jid))
+
+
+def get_jid_iter(jid, minions=None, offset=0, limit=None):
+    '''
+    Yield the ``(minion id, information)`` pairs of the specified job id one
+    at a time, sorted by minion id, so the returns of large jobs do not have
+    to be held in memory at once.
+
+    minions
+        Only yield the returns of these minion ids
+
+    offset
+        Skip the returns of this many minions
+
+    limit
+        Yield the returns of at most this many minions
+    '''
     jid_dir = _jid_dir(jid)
     serial = salt.payload.Serial(__opts__)
 
-    ret = {}
-    # Check to see if the jid is real, if not return the empty dict
+    # Check to see if the jid is real, if not there are no returns
     if not os.path.isdir(jid_dir):
-        return ret
+        return
+    if minions is not None:
+        minions = set(minions)
+    returned = []
     for fn_ in os.listdir(jid_dir):
         if fn_.startswith('.'):
             continue
-        if fn_ not in ret:
-            retp = os.path.join(jid_dir, fn_, RETURN_P)
-            outp = os.path.join(jid_dir, fn_, OUT_P)
-            if not os.path.isfile(retp):
-                continue
-            while fn_ not in ret:
-                try:
-                    ret_data = serial.load(
-                        salt.utils.fopen(retp, 'rb'))
-                    ret[fn_] = {'return': ret_data}
-                    if os.path.isfile(outp):
-                        ret[fn_]['out'] = serial.load(
-                            salt.utils.fopen(outp, 'rb'))
-                except Exception as exc:
-                    if 'Permission denied:' in str(exc):
-                        raise
-    return ret
+        if minions is not None and fn_ not in minions:
+            continue
+        if os.path.isfile(os.path.join(jid_dir, fn_, RETURN_P)):
+            returned.append(fn_)
+    returned.sort()
+    stop = offset + limit if limit is not None else None
+
+    blob_dir = os.path.join(jid_dir, BLOBS_DIR)
+    dedup = os.path.isdir(blob_dir)
+    blobs = {}
+    for fn_ in returned[offset:stop]:
+        retp = os.path.join(jid_dir, fn_, RETURN_P)
+        outp = os.path.join(jid_dir, fn_, OUT_P)
+        while True:
+            try:
+                ret_data = serial.load(
+                    salt.utils.fopen(retp, 'rb'))
+                if dedup:
+                    ret_data = _resolve(ret_data, blob_dir, serial, blobs)
+                ret = {'return': ret_data}
+                if os.path.isfile(outp):
+                    ret['out'] = serial.load(
+                        salt.utils.fopen(outp, 'rb'))
+                break
+            except Exception as exc:
+                if 'Permission denied:' in str(exc):
+                    raise
+        yield fn_, ret
 
 
 def get_jids():
     '''
     Return a list of all job ids
     '''
-    ret = {}
-    for jid, job, _, _ in _walk_through(_job_dir()):
-        ret[jid] = _format_jid_instance(jid, job)
-    return ret
+    return dict(get_jids_iter())
+
+
+def get_jids_iter(start_time=None, end_time=None, reverse=False):
+    '''
+    Yield the ``(jid, job)`` pairs of the jobs started from ``start_time``
+    to ``end_time``, both datetime objects and optional, sorted by jid,
+    newest first if ``reverse`` is True.
+
+    The jobs are read from the job index, only the hourly buckets of the
+    requested time range are read. Without a complete index the job loads
+    of the whole cache are read.
+    '''
+    start = start_time.strftime('%Y%m%d%H%M%S%f') if start_time else None
+    end = end_time.strftime('%Y%m%d%H%M%S%f') if end_time else None
+    if not _use_index():
+        jobs = {}
+        job_dir = _job_dir()
+        if os.path.isdir(job_dir):
+            for jid, job, _, _ in _walk_through(job_dir):
+                jobs[jid] = job
+        buckets = [jobs]
+    else:
+        serial = salt.payload.Serial(__opts__)
+        buckets = (_read_bucket(path, serial)
+                   for path in _index_buckets(start, end, reverse))
+    for jobs in buckets:
+        for jid in sorted(jobs, reverse=reverse):
+            job = jobs[jid]
+            if 'fun' not in job:
+                # Jobs without a saved load are not listed
+                continue
+            if start is not None and jid < start:
+                continue
+            if end is not None and jid > end:
+                continue
+            yield jid, _format_jid_instance(jid, job)
 
 
 def clean_old_jobs():
     '''
     Clean out the old jobs from the job cache
     '''
-    if __opts__['keep_jobs'] != 0:
-        cur = datetime.datetime.now()
-
-        jid_root = _job_dir()
-        if not os.path.exists(jid_root):
-            return
-
-        for top in os.listdir(jid_root):
-            t_path = os.path.join(jid_root, top)
-            for final in os.listdir(t_path):
-                f_path = os.path.join(t_path, final)
-                jid_file = os.path.join(f_path, 'jid')
-                if not os.path.isfile(jid_file):
-                    # No jid file means corrupted cache entry, scrub it
-                    shutil.rmtree(f_path)
-                else:
-                    with salt.utils.fopen(jid_file, 'r') as fn_:
-                        jid = fn_.read()
-                    if len(jid) < 18:
-                        # Invalid jid, scrub the dir
-                        shutil.rmtree(f_path)
-                    else:
-                        # Parse the jid into a proper datetime object.
-                        # We only parse down to the minute, since keep
-                        # jobs is measured in hours, so a minute
-                        # difference is not important.
-                        try:
-                            jidtime = datetime.datetime(int(jid[0:4]),
-                                                        int(jid[4:6]),
-                                                        int(jid[6:8]),
-                                                        int(jid[8:10]),
-                                                        int(jid[10:12]))
-                        except ValueError:
-                            # Invalid jid, scrub the dir
-                            shutil.rmtree(f_path)
-                        difference = cur - jidtime
-                        hours_difference = salt.utils.total_seconds(difference) / 3600.0
-                        if hours_difference > __opts__['keep_jobs']:
-                            shutil.rmtree(f_path)
+    jid_root = _job_dir()
+    if not os.path.exists(jid_root):
+        return
+    if _use_index():
+        if __opts__['keep_jobs'] != 0:
+            _clean_old_buckets()
+        return
+    if __opts__.get('job_cache_index', True):
+        _rebuild_index()
+    elif __opts__['keep_jobs'] != 0:
+        # The index will not be kept up to date, have it rebuilt if it is
+        # enabled again
+        shutil.rmtree(_index_dir(), ignore_errors=True)
+        _walk_clean(jid_root)
+
+
+def _clean_old_buckets():
+    '''
+    Remove the jobs of the index buckets older than keep_jobs. Buckets are
+    removed as a whole, jobs are kept up to an hour longer than keep_jobs.
+    '''
+    serial = salt.payload.Serial(__opts__)
+    cutoff = datetime.datetime.now() \
+        - datetime.timedelta(hours=__opts__['keep_jobs'])
+    cutoff = cutoff.strftime('%Y%m%d%H')
+    for path in _index_buckets():
+        if os.path.basename(path)[:-len(INDEX_EXT)] >= cutoff:
+            break
+        for jid in _read_bucket(path, serial):
+            shutil.rmtree(_jid_dir(jid), ignore_errors=True)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _rebuild_index():
+    '''
+    Clean out the old jobs by walking the cache, and index the remaining
+    ones. Jobs added meanwhile are indexed by the workers adding them.
+    '''
+    index_dir = _index_dir()
+    shutil.rmtree(index_dir, ignore_errors=True)
+    serial = salt.payload.Serial(__opts__)
+    complete = True
+    for jid in _walk_clean(_job_dir()):
+        load = None
+        load_path = os.path.join(_jid_dir(jid), LOAD_P)
+        if os.path.isfile(load_path):
+            try:
+                load = serial.load(salt.utils.fopen(load_path, 'rb'))
+            except Exception as exc:
+                log.warning(
+                    'Could not read job load {0}: {1}'.format(load_path, exc)
+                )
+        if not _index_add(jid, load, serial):
+            complete = False
+    if not complete:
+        # Keep walking the cache, the index is rebuilt on the next run
+        return
+    if not os.path.isdir(index_dir):
+        os.makedirs(index_dir)
+    with salt.utils.fopen(os.path.join(index_dir, INDEX_COMPLETE), 'w+') as fp_:
+        fp_.write('')
+
+
+def _walk_clean(jid_root):
+    '''
+    Remove the old jobs of the cache and return the jids of the remaining ones
+    '''
+    cur = datetime.datetime.now()
+    kept = []
+    for top in os.listdir(jid_root):
+        if top.startswith('.'):
+            continue
+        t_path = os.path.join(jid_root, top)
+        for final in os.listdir(t_path):
+            f_path = os.path.join(t_path, final)
+            jid_file = os.path.join(f_path, 'jid')
+            if not os.path.isfile(jid_file):
+                # No jid file means corrupted cache entry, scrub it
+                shutil.rmtree(f_path)
+                continue
+            with salt.utils.fopen(jid_file, 'r') as fn_:
+                jid = fn_.read()
+            if len(jid) < 18:
+                # Invalid jid, scrub the dir
+                shutil.rmtree(f_path)
+                continue
+            if __opts__['keep_jobs'] == 0:
+                kept.append(jid)
+                continue
+            # Parse the jid into a proper datetime object.
+            # We only parse down to the minute, since keep
+            # jobs is measured in hours, so a minute
+            # difference is not important.
+            try:
+                jidtime = datetime.datetime(int(jid[0:4]),
+                                            int(jid[4:6]),
+                                            int(jid[6:8]),
+                                            int(jid[8:10]),
+                                            int(jid[10:12]))
+            except ValueError:
+                # Invalid jid, scrub the dir
+                shutil.rmtree(f_path)
+                continue
+            difference = cur - jidtime
+            hours_difference = salt.utils.total_seconds(difference) / 3600.0
+            if hours_difference > __opts__['keep_jobs']:
+                shutil.rmtree(f_path)
+            else:
+                kept.append(jid)
+    return kept
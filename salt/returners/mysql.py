@@ -28,6 +28,23 @@ either exclude these options or set them to None.
     mysql.ssl_cert: None
     mysql.ssl_key: None
 
+Connections are kept open in a pool of up to ``mysql.pool_size`` (default:
+5) connections per process, and are checked before they are reused after
+being idle.
+
+On the master, returns and job loads can be written in batches with multi-row
+INSERTs. A batch is written when ``mysql.batch_size`` rows are queued, and at
+most ``mysql.flush_interval`` seconds after its first row was queued. Batching
+is disabled by default (a batch size of 1), and should only be enabled where
+the returner runs in long running processes, such as for the
+:conf_master:`master_job_cache`.
+
+.. code-block:: yaml
+
+    mysql.pool_size: 5
+    mysql.batch_size: 100
+    mysql.flush_interval: 1
+
 Alternative configuration values can be used by prefacing the configuration
 with `alternative.`. Any values not found in the alternative configuration will
 be pulled from the default location. As stated above, SSL configuration is
@@ -121,18 +138,21 @@ from __future__ import absolute_import
 
 # Import python libs
 from contextlib import contextmanager
+import functools
 import sys
 import json
 import logging
 
 # Import salt libs
 import salt.returners
+import salt.utils.dbpool
 import salt.utils.jid
 import salt.exceptions
 
 # Import third party libs
 try:
     import MySQLdb
+    import MySQLdb.cursors
     HAS_MYSQL = True
 except ImportError:
     HAS_MYSQL = False
@@ -160,7 +180,10 @@ def _get_options(ret=None):
                 'port': 3306,
                 'ssl_ca': None,
                 'ssl_cert': None,
-                'ssl_key': None}
+                'ssl_key': None,
+                'pool_size': 5,
+                'batch_size': 1,
+                'flush_interval': 1}
 
     attrs = {'host': 'host',
              'user': 'user',
@@ -169,7 +192,10 @@ def _get_options(ret=None):
              'port': 'port',
              'ssl_ca': 'ssl_ca',
              'ssl_cert': 'ssl_cert',
-             'ssl_key': 'ssl_key'}
+             'ssl_key': 'ssl_key',
+             'pool_size': 'pool_size',
+             'batch_size': 'batch_size',
+             'flush_interval': 'flush_interval'}
 
     _options = salt.returners.get_returner_options(__virtualname__,
                                                    ret,
@@ -177,62 +203,136 @@ def _get_options(ret=None):
                                                    __salt__=__salt__,
                                                    __opts__=__opts__,
                                                    defaults=defaults)
-    # Ensure port is an int
-    if 'port' in _options:
-        _options['port'] = int(_options['port'])
+    # Ensure port and the pool and batch settings are numbers
+    for opt in ('port', 'pool_size', 'batch_size'):
+        if opt in _options:
+            _options[opt] = int(_options[opt])
+    if 'flush_interval' in _options:
+        _options['flush_interval'] = float(_options['flush_interval'])
     return _options
 
 
+def _pool_key(_options):
+    '''
+    Return the key of the connection pool for the given options
+    '''
+    return (__virtualname__,) + tuple(
+        [_options.get(opt) for opt in ('host', 'user', 'pass', 'db', 'port',
+                                       'ssl_ca', 'ssl_cert', 'ssl_key')]
+    )
+
+
+def _connect(_options):
+    '''
+    Open a new MySQL connection
+    '''
+    # An empty ssl_options dictionary passed to MySQLdb.connect will
+    # effectively connect w/o SSL.
+    ssl_options = {}
+    if _options.get('ssl_ca'):
+        ssl_options['ca'] = _options.get('ssl_ca')
+    if _options.get('ssl_cert'):
+        ssl_options['cert'] = _options.get('ssl_cert')
+    if _options.get('ssl_key'):
+        ssl_options['key'] = _options.get('ssl_key')
+    return MySQLdb.connect(host=_options.get('host'),
+                           user=_options.get('user'),
+                           passwd=_options.get('pass'),
+                           db=_options.get('db'),
+                           port=_options.get('port'),
+                           ssl=ssl_options)
+
+
+def _ping(conn):
+    '''
+    Raise an exception if a pooled connection is no longer usable
+    '''
+    conn.ping()
+
+
 @contextmanager
-def _get_serv(ret=None, commit=False):
+def _get_serv(ret=None, commit=False, cursorclass=None):
     '''
     Return a mysql cursor
+
+    The connection is taken from, and handed back to, the connection pool of
+    the process. Pass ``MySQLdb.cursors.SSCursor`` as ``cursorclass`` to
+    stream the rows of large results instead of buffering them.
     '''
     _options = _get_options(ret)
+    pool = salt.utils.dbpool.get_pool(_pool_key(_options),
+                                      functools.partial(_connect, _options),
+                                      ping=_ping,
+                                      size=_options.get('pool_size', 5))
+    try:
+        conn = pool.acquire()
+    except MySQLdb.connections.OperationalError as exc:
+        raise salt.exceptions.SaltMasterError('MySQL returner could not connect to database: {exc}'.format(exc=exc))
 
-    if __context__ and 'mysql_returner_conn' in __context__:
-        log.debug('Reusing MySQL connection pool')
-        conn = __context__['mysql_returner_conn']
+    if cursorclass is None:
+        cursor = conn.cursor()
     else:
-        log.debug('Generating new MySQL connection pool')
-        try:
-            # An empty ssl_options dictionary passed to MySQLdb.connect will
-            # effectively connect w/o SSL.
-            ssl_options = {}
-            if _options.get('ssl_ca'):
-                ssl_options['ca'] = _options.get('ssl_ca')
-            if _options.get('ssl_cert'):
-                ssl_options['cert'] = _options.get('ssl_cert')
-            if _options.get('ssl_key'):
-                ssl_options['key'] = _options.get('ssl_key')
-            conn = MySQLdb.connect(host=_options.get('host'),
-                                   user=_options.get('user'),
-                                   passwd=_options.get('pass'),
-                                   db=_options.get('db'),
-                                   port=_options.get('port'),
-                                   ssl=ssl_options)
-
-            try:
-                __context__['mysql_returner_conn'] = conn
-            except TypeError:
-                pass
-        except MySQLdb.connections.OperationalError as exc:
-            raise salt.exceptions.SaltMasterError('MySQL returner could not connect to database: {exc}'.format(exc=exc))
-
-    cursor = conn.cursor()
+        cursor = conn.cursor(cursorclass)
 
+    broken = False
     try:
         yield cursor
     except MySQLdb.DatabaseError as err:
         error = err.args
         sys.stderr.write(str(error))
-        cursor.execute("ROLLBACK")
+        try:
+            cursor.execute("ROLLBACK")
+        except MySQLdb.DatabaseError:
+            broken = True
         raise err
     else:
-        if commit:
-            cursor.execute("COMMIT")
+        try:
+            if commit:
+                cursor.execute("COMMIT")
+            else:
+                cursor.execute("ROLLBACK")
+        except MySQLdb.DatabaseError:
+            broken = True
+            raise
+    finally:
+        try:
+            cursor.close()
+        except MySQLdb.DatabaseError:
+            broken = True
+        if broken:
+            try:
+                conn.close()
+            except MySQLdb.DatabaseError:
+                pass
         else:
-            cursor.execute("ROLLBACK")
+            pool.release(conn)
+
+
+def _insert(ret, sql, rows, suffix=''):
+    '''
+    Insert rows with multi-row INSERT statements
+    '''
+    with _get_serv(ret, commit=True) as cur:
+        salt.utils.dbpool.insert_rows(cur, sql, rows, suffix)
+
+
+def _write(ret, sql, row, suffix=''):
+    '''
+    Insert a row, or queue it for the next batch if batching is enabled
+    '''
+    _options = _get_options(ret)
+    if _options.get('batch_size', 1) > 1:
+        # Only keep what is needed to find the options again
+        ret_config = {'ret_config': ret.get('ret_config')} \
+            if isinstance(ret, dict) else None
+        salt.utils.dbpool.get_writer(
+            (sql,) + _pool_key(_options),
+            functools.partial(_insert, ret_config, sql, suffix=suffix),
+            batch_size=_options['batch_size'],
+            flush_interval=_options['flush_interval']
+        ).add(row)
+    else:
+        _insert(ret, sql, [row], suffix)
 
 
 def returner(ret):
@@ -240,16 +340,15 @@ def returner(ret):
     Return data to a mysql server
     '''
     try:
-        with _get_serv(ret, commit=True) as cur:
-            sql = '''INSERT INTO `salt_returns`
-                    (`fun`, `jid`, `return`, `id`, `success`, `full_ret` )
-                    VALUES (%s, %s, %s, %s, %s, %s)'''
-
-            cur.execute(sql, (ret['fun'], ret['jid'],
-                              json.dumps(ret['return']),
-                              ret['id'],
-                              ret.get('success', False),
-                              json.dumps(ret)))
+        _write(ret,
+               '''INSERT INTO `salt_returns`
+                  (`fun`, `jid`, `return`, `id`, `success`, `full_ret` )
+                  VALUES''',
+               (ret['fun'], ret['jid'],
+                json.dumps(ret['return']),
+                ret['id'],
+                ret.get('success', False),
+                json.dumps(ret)))
     except salt.exceptions.SaltMasterError:
         log.critical('Could not store return with MySQL returner. MySQL server unavailable.')
 
@@ -261,32 +360,31 @@ def event_return(events):
     Requires that configuration be enabled via 'event_return'
     option in master config.
     '''
-    with _get_serv(events, commit=True) as cur:
-        for event in events:
-            tag = event.get('tag', '')
-            data = event.get('data', '')
-            sql = '''INSERT INTO `salt_events` (`tag`, `data`, `master_id` )
-                     VALUES (%s, %s, %s)'''
-            cur.execute(sql, (tag, json.dumps(data), __opts__['id']))
+    rows = []
+    for event in events:
+        tag = event.get('tag', '')
+        data = event.get('data', '')
+        rows.append((tag, json.dumps(data), __opts__['id']))
+    _insert(events,
+            '''INSERT INTO `salt_events` (`tag`, `data`, `master_id` )
+               VALUES''',
+            rows)
 
 
 def save_load(jid, load):
     '''
     Save the load to the specified jid id
     '''
-    with _get_serv(commit=True) as cur:
-
-        sql = '''INSERT INTO `jids`
-               (`jid`, `load`)
-                VALUES (%s, %s)'''
-
-        try:
-            cur.execute(sql, (jid, json.dumps(load)))
-        except MySQLdb.IntegrityError:
-            # https://github.com/saltstack/salt/issues/22171
-            # Without this try:except: we get tons of duplicate entry errors
-            # which result in job returns not being stored properly
-            pass
+    # https://github.com/saltstack/salt/issues/22171
+    # The load of a jid can be saved more than once, keep the first one. This
+    # only ignores the duplicate jids, unlike INSERT IGNORE which would also
+    # hide any other error of the batch.
+    _write(None,
+           '''INSERT INTO `jids`
+              (`jid`, `load`)
+              VALUES''',
+           (jid, json.dumps(load)),
+           suffix='ON DUPLICATE KEY UPDATE `jid` = `jid`')
 
 
 def get_load(jid):
@@ -307,41 +405,59 @@ def get_jid(jid):
     '''
     Return the information returned when the specified job id was executed
     '''
-    with _get_serv(ret=None, commit=True) as cur:
+    return dict(get_jid_iter(jid))
 
-        sql = '''SELECT id, full_ret FROM `salt_returns`
-                WHERE `jid` = %s'''
 
-        cur.execute(sql, (jid,))
-        data = cur.fetchall()
-        ret = {}
-        if data:
-            for minion, full_ret in data:
-                ret[minion] = json.loads(full_ret)
-        return ret
+def get_jid_iter(jid, minions=None, offset=0, limit=None):
+    '''
+    Yield the ``(minion id, information)`` pairs of the specified job id,
+    sorted by minion id, as they are read from the database. Pass a list of
+    ``minions`` to only get their returns, ``offset`` and ``limit`` to page
+    through the returns.
+    '''
+    sql = '''SELECT id, full_ret FROM `salt_returns`
+            WHERE `jid` = %s'''
+    args = [jid]
+    if minions is not None:
+        minions = list(minions)
+        if not minions:
+            return
+        sql += ' AND `id` IN ({0})'.format(', '.join(['%s'] * len(minions)))
+        args.extend(minions)
+    sql += ' ORDER BY `id`'
+    if offset or limit is not None:
+        # MySQL has no OFFSET without LIMIT, use the largest possible limit
+        sql += ' LIMIT %s OFFSET %s'
+        args.extend([limit if limit is not None else 18446744073709551615,
+                     offset])
+
+    with _get_serv(ret=None, commit=True,
+                   cursorclass=MySQLdb.cursors.SSCursor) as cur:
+        cur.execute(sql, args)
+        for minion, full_ret in cur:
+            yield minion, json.loads(full_ret)
 
 
 def get_fun(fun):
     '''
     Return a dict of the last function called for all minions
     '''
-    with _get_serv(ret=None, commit=True) as cur:
+    with _get_serv(ret=None, commit=True,
+                   cursorclass=MySQLdb.cursors.SSCursor) as cur:
 
+        # Both the inner and the outer query can use the fun index
         sql = '''SELECT s.id,s.jid, s.full_ret
                 FROM `salt_returns` s
-                JOIN ( SELECT MAX(`jid`) as jid
-                    from `salt_returns` GROUP BY fun, id) max
-                ON s.jid = max.jid
+                JOIN ( SELECT id, MAX(`jid`) as jid
+                    from `salt_returns` WHERE fun = %s GROUP BY id) max
+                ON s.id = max.id AND s.jid = max.jid
                 WHERE s.fun = %s
                 '''
 
-        cur.execute(sql, (fun,))
-        data = cur.fetchall()
-
+        cur.execute(sql, (fun, fun))
         ret = {}
-        if data:
-            for minion, _, full_ret in data:
-                ret[minion] = json.loads(full_ret)
+        for minion, _, full_ret in cur:
+            ret[minion] = json.loads(full_ret)
         return ret
 
 
@@ -349,17 +465,15 @@ def get_jids():
     '''
     Return a list of all job ids
     '''
-    with _get_serv(ret=None, commit=True) as cur:
+    with _get_serv(ret=None, commit=True,
+                   cursorclass=MySQLdb.cursors.SSCursor) as cur:
 
-        sql = '''SELECT DISTINCT jid
+        # jid is unique, no need for DISTINCT
+        sql = '''SELECT jid
                 FROM `jids`'''
 
         cur.execute(sql)
-        data = cur.fetchall()
-        ret = []
-        for jid in data:
-            ret.append(jid[0])
-        return ret
+        return [jid[0] for jid in cur]
 
 
 def get_minions():
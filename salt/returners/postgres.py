@@ -30,6 +30,20 @@ the default location:
     alternative.returner.postgres.db: 'salt'
     alternative.returner.postgres.port: 5432
 
+Connections are kept open in a pool of up to ``pool_size`` (default: 5)
+connections per process, and are checked before they are reused after being
+idle. On the master, returns can be written in batches with multi-row
+INSERTs: a batch is written when ``batch_size`` returns are queued, and at
+most ``flush_interval`` seconds after its first return was queued. Batching
+is disabled by default (a batch size of 1), and should only be enabled where
+the returner runs in long running processes.
+
+.. code-block:: yaml
+
+    returner.postgres.pool_size: 5
+    returner.postgres.batch_size: 100
+    returner.postgres.flush_interval: 1
+
 Running the following commands as the postgres user should create the database
 correctly:
 
@@ -68,6 +82,20 @@ correctly:
     CREATE INDEX ON salt_returns (id);
     CREATE INDEX ON salt_returns (jid);
     CREATE INDEX ON salt_returns (fun);
+
+    --
+    -- Table structure for table 'salt_events'
+    --
+
+    DROP TABLE IF EXISTS salt_events;
+    CREATE TABLE salt_events (
+      id          SERIAL PRIMARY KEY,
+      tag         text NOT NULL,
+      data        text NOT NULL,
+      alter_time  TIMESTAMP WITH TIME ZONE DEFAULT now(),
+      master_id   text NOT NULL
+    );
+    CREATE INDEX ON salt_events (tag);
     EOF
 
 Required python modules: psycopg2
@@ -91,9 +119,12 @@ from __future__ import absolute_import
 # pylint: disable=W1321,E1321
 
 # Import python libs
+from contextlib import contextmanager
+import functools
 import json
 
 # Import Salt libs
+import salt.utils.dbpool
 import salt.utils.jid
 import salt.returners
 
@@ -118,171 +149,238 @@ def _get_options(ret=None):
     '''
     Get the postgres options from salt.
     '''
+    defaults = {'pool_size': 5,
+                'batch_size': 1,
+                'flush_interval': 1}
+
     attrs = {'host': 'host',
              'user': 'user',
              'passwd': 'passwd',
              'db': 'db',
-             'port': 'port'}
+             'port': 'port',
+             'pool_size': 'pool_size',
+             'batch_size': 'batch_size',
+             'flush_interval': 'flush_interval'}
 
     _options = salt.returners.get_returner_options('returner.{0}'.format(__virtualname__),
                                                    ret,
                                                    attrs,
                                                    __salt__=__salt__,
-                                                   __opts__=__opts__)
+                                                   __opts__=__opts__,
+                                                   defaults=defaults)
+    for opt in ('pool_size', 'batch_size'):
+        if opt in _options:
+            _options[opt] = int(_options[opt])
+    if 'flush_interval' in _options:
+        _options['flush_interval'] = float(_options['flush_interval'])
     return _options
 
 
-def _get_conn(ret=None):
+def _pool_key(_options):
     '''
-    Return a postgres connection.
+    Return the key of the connection pool for the given options
     '''
-    _options = _get_options(ret)
+    return (__virtualname__,) + tuple(
+        [_options.get(opt) for opt in ('host', 'user', 'passwd', 'db', 'port')]
+    )
 
-    host = _options.get('host')
-    user = _options.get('user')
-    passwd = _options.get('passwd')
-    db = _options.get('db')
-    port = _options.get('port')
 
+def _connect(_options):
+    '''
+    Open a new postgres connection
+    '''
     return psycopg2.connect(
-            host=host,
-            user=user,
-            password=passwd,
-            database=db,
-            port=port)
+            host=_options.get('host'),
+            user=_options.get('user'),
+            password=_options.get('passwd'),
+            database=_options.get('db'),
+            port=_options.get('port'))
+
+
+def _ping(conn):
+    '''
+    Raise an exception if a pooled connection is no longer usable
+    '''
+    cur = conn.cursor()
+    cur.execute('SELECT 1')
+    cur.close()
+    conn.rollback()
+
 
+@contextmanager
+def _get_serv(ret=None, commit=False, name=None):
+    '''
+    Return a postgres cursor
 
-def _close_conn(conn):
+    The connection is taken from, and handed back to, the connection pool of
+    the process. Pass a ``name`` to get a server side cursor, which streams
+    the rows of large results instead of buffering them.
+    '''
+    _options = _get_options(ret)
+    pool = salt.utils.dbpool.get_pool(_pool_key(_options),
+                                      functools.partial(_connect, _options),
+                                      ping=_ping,
+                                      size=_options.get('pool_size', 5))
+    with pool.connection() as conn:
+        cur = conn.cursor(name) if name else conn.cursor()
+        try:
+            yield cur
+        finally:
+            cur.close()
+        if commit:
+            conn.commit()
+        else:
+            conn.rollback()
+
+
+def _insert(ret, sql, rows):
     '''
-    Close the Postgres connection
+    Insert rows with multi-row INSERT statements
     '''
-    conn.commit()
-    conn.close()
+    with _get_serv(ret, commit=True) as cur:
+        salt.utils.dbpool.insert_rows(cur, sql, rows)
 
 
 def returner(ret):
     '''
     Return data to a postgres server
     '''
-    conn = _get_conn(ret)
-    cur = conn.cursor()
     sql = '''INSERT INTO salt_returns
             (fun, jid, return, id, success)
-            VALUES (%s, %s, %s, %s, %s)'''
-    cur.execute(
-        sql, (
-            ret['fun'],
-            ret['jid'],
-            json.dumps(ret['return']),
-            ret['id'],
-            ret['success']
-        )
-    )
-    _close_conn(conn)
+            VALUES'''
+    row = (ret['fun'],
+           ret['jid'],
+           json.dumps(ret['return']),
+           ret['id'],
+           ret['success'])
+    _options = _get_options(ret)
+    if _options.get('batch_size', 1) > 1:
+        # Only keep what is needed to find the options again
+        ret_config = {'ret_config': ret.get('ret_config')}
+        salt.utils.dbpool.get_writer(
+            (sql,) + _pool_key(_options),
+            functools.partial(_insert, ret_config, sql),
+            batch_size=_options['batch_size'],
+            flush_interval=_options['flush_interval']
+        ).add(row)
+    else:
+        _insert(ret, sql, [row])
+
+
+def event_return(events):
+    '''
+    Return events to a postgres server
+
+    Requires that configuration be enabled via 'event_return'
+    option in master config.
+    '''
+    rows = []
+    for event in events:
+        tag = event.get('tag', '')
+        data = event.get('data', '')
+        rows.append((tag, json.dumps(data), __opts__['id']))
+    _insert(None,
+            '''INSERT INTO salt_events (tag, data, master_id)
+               VALUES''',
+            rows)
 
 
 def save_load(jid, load):
     '''
     Save the load to the specified jid id
     '''
-    conn = _get_conn(ret=None)
-    cur = conn.cursor()
-    sql = '''INSERT INTO jids (jid, load) VALUES (%s, %s)'''
+    with _get_serv(ret=None, commit=True) as cur:
+        sql = '''INSERT INTO jids (jid, load) VALUES (%s, %s)'''
 
-    cur.execute(sql, (jid, json.dumps(load)))
-    _close_conn(conn)
+        cur.execute(sql, (jid, json.dumps(load)))
 
 
 def get_load(jid):
     '''
     Return the load data that marks a specified jid
     '''
-    conn = _get_conn(ret=None)
-    cur = conn.cursor()
-    sql = '''SELECT load FROM jids WHERE jid = %s;'''
+    with _get_serv(ret=None) as cur:
+        sql = '''SELECT load FROM jids WHERE jid = %s;'''
 
-    cur.execute(sql, (jid,))
-    data = cur.fetchone()
-    if data:
-        return json.loads(data)
-    _close_conn(conn)
-    return {}
+        cur.execute(sql, (jid,))
+        data = cur.fetchone()
+        if data:
+            return json.loads(data[0])
+        return {}
 
 
 def get_jid(jid):
     '''
     Return the information returned when the specified job id was executed
     '''
-    conn = _get_conn(ret=None)
-    cur = conn.cursor()
-    sql = '''SELECT id, full_ret FROM salt_returns WHERE jid = %s'''
+    return dict(get_jid_iter(jid))
 
-    cur.execute(sql, (jid,))
-    data = cur.fetchall()
-    ret = {}
-    if data:
-        for minion, full_ret in data:
-            ret[minion] = json.loads(full_ret)
-    _close_conn(conn)
-    return ret
+
+def get_jid_iter(jid, minions=None, offset=0, limit=None):
+    '''
+    Yield the ``(minion id, information)`` pairs of the specified job id,
+    sorted by minion id, as they are read from the database. Pass a list of
+    ``minions`` to only get their returns, ``offset`` and ``limit`` to page
+    through the returns.
+    '''
+    sql = '''SELECT id, return FROM salt_returns WHERE jid = %s'''
+    args = [jid]
+    if minions is not None:
+        minions = list(minions)
+        if not minions:
+            return
+        sql += ' AND id IN %s'
+        args.append(tuple(minions))
+    # A NULL limit is no limit
+    sql += ' ORDER BY id LIMIT %s OFFSET %s'
+    args.extend([limit, offset])
+
+    with _get_serv(ret=None, name='salt_get_jid') as cur:
+        cur.execute(sql, args)
+        for minion, ret in cur:
+            yield minion, {'return': json.loads(ret)}
 
 
 def get_fun(fun):
     '''
     Return a dict of the last function called for all minions
     '''
-    conn = _get_conn(ret=None)
-    cur = conn.cursor()
-    sql = '''SELECT s.id,s.jid, s.full_ret
-            FROM salt_returns s
-            JOIN ( SELECT MAX(jid) AS jid FROM salt_returns GROUP BY fun, id) max
-            ON s.jid = max.jid
-            WHERE s.fun = %s
-            '''
-
-    cur.execute(sql, (fun,))
-    data = cur.fetchall()
-
-    ret = {}
-    if data:
-        for minion, _, full_ret in data:
+    with _get_serv(ret=None, name='salt_get_fun') as cur:
+        sql = '''SELECT s.id,s.jid, s.full_ret
+                FROM salt_returns s
+                JOIN ( SELECT id, MAX(jid) AS jid
+                    FROM salt_returns WHERE fun = %s GROUP BY id) max
+                ON s.id = max.id AND s.jid = max.jid
+                WHERE s.fun = %s
+                '''
+
+        cur.execute(sql, (fun, fun))
+        ret = {}
+        for minion, _, full_ret in cur:
             ret[minion] = json.loads(full_ret)
-    _close_conn(conn)
-    return ret
+        return ret
 
 
 def get_jids():
     '''
     Return a list of all job ids
     '''
-    conn = _get_conn(ret=None)
-    cur = conn.cursor()
-    sql = '''SELECT jid FROM jids'''
+    with _get_serv(ret=None, name='salt_get_jids') as cur:
+        sql = '''SELECT jid FROM jids'''
 
-    cur.execute(sql)
-    data = cur.fetchall()
-    ret = []
-    for jid in data:
-        ret.append(jid[0])
-    _close_conn(conn)
-    return ret
+        cur.execute(sql)
+        return [jid[0] for jid in cur]
 
 
 def get_minions():
     '''
     Return a list of minions
     '''
-    conn = _get_conn(ret=None)
-    cur = conn.cursor()
-    sql = '''SELECT DISTINCT id FROM salt_returns'''
-
-    cur.execute(sql)
-    data = cur.fetchall()
-    ret = []
-    for minion in data:
-        ret.append(minion[0])
-    _close_conn(conn)
-    return ret
+    with _get_serv(ret=None) as cur:
+        sql = '''SELECT DISTINCT id FROM salt_returns'''
+
+        cur.execute(sql)
+        return [minion[0] for minion in cur.fetchall()]
 
 
 def prep_jid(nocache=False, passed_jid=None):  # pylint: disable=unused-argument
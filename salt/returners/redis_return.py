@@ -12,6 +12,27 @@ config, these are the defaults:
     redis.host: 'salt'
     redis.port: 6379
 
+Connections are shared through a connection pool per host, port and db.
+Each return is written with a single transaction, returns can also be queued
+and written in batches by setting ``redis.batch_size`` above 1. A batch is
+written at most ``redis.flush_interval`` seconds after its first return was
+queued. Only enable batching where the returner runs in long running
+processes, such as for the :conf_master:`master_job_cache`.
+
+Jobs are stored with the following keys, returns and loads expire after
+``keep_jobs`` hours, or never if ``keep_jobs`` is 0:
+
+``ret:<jid>``
+    Hash of the returns of a job, by minion id
+``load:<jid>``
+    The load of a job
+``fun:<function>``
+    Hash of the jid of the last call of the function, by minion id
+``jids``
+    Sorted set of jids, scored by the time of the job
+``minions``
+    Set of the ids of all minions which returned data
+
 Alternative configuration values can be used by prefacing the configuration.
 Any values not found in the alternative configuration will be pulled from
 the default location:
@@ -39,9 +60,14 @@ To use the alternative configuration, append '--return_config alternative' to th
 from __future__ import absolute_import
 
 # Import python libs
+import datetime
+import functools
 import json
+import threading
+import time
 
 # Import Salt libs
+import salt.utils.dbpool
 import salt.utils.jid
 import salt.returners
 
@@ -55,6 +81,10 @@ except ImportError:
 # Define the module's virtual name
 __virtualname__ = 'redis'
 
+# (host, port, db) -> redis.ConnectionPool
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+
 
 def __virtual__():
     if not HAS_REDIS:
@@ -66,53 +96,134 @@ def _get_options(ret=None):
     '''
     Get the redis options from salt.
     '''
+    defaults = {'batch_size': 1,
+                'flush_interval': 1}
+
     attrs = {'host': 'host',
              'port': 'port',
-             'db': 'db'}
+             'db': 'db',
+             'batch_size': 'batch_size',
+             'flush_interval': 'flush_interval'}
 
     _options = salt.returners.get_returner_options(__virtualname__,
                                                    ret,
                                                    attrs,
                                                    __salt__=__salt__,
-                                                   __opts__=__opts__)
+                                                   __opts__=__opts__,
+                                                   defaults=defaults)
+    if 'batch_size' in _options:
+        _options['batch_size'] = int(_options['batch_size'])
+    if 'flush_interval' in _options:
+        _options['flush_interval'] = float(_options['flush_interval'])
     return _options
 
 
+def _pool_key(_options):
+    return (_options.get('host'), _options.get('port'), _options.get('db'))
+
+
 def _get_serv(ret=None):
     '''
-    Return a redis server object
+    Return a redis server object, connections are shared between all calls
+    with the same host, port and db
     '''
     _options = _get_options(ret)
-    host = _options.get('host')
-    port = _options.get('port')
-    db = _options.get('db')
+    key = _pool_key(_options)
+    with _POOLS_LOCK:
+        if key not in _POOLS:
+            # The pool drops connections inherited through a fork by itself
+            _POOLS[key] = redis.ConnectionPool(
+                host=_options.get('host'),
+                port=_options.get('port'),
+                db=_options.get('db'))
+        pool = _POOLS[key]
+    return redis.StrictRedis(connection_pool=pool)
+
+
+def _jid_score(jid):
+    '''
+    Return the time of a jid as a timestamp, used as its score in the jids
+    index. Custom jids which are not timestamps are scored with the current
+    time.
+    '''
+    try:
+        return time.mktime(
+            datetime.datetime.strptime(jid, '%Y%m%d%H%M%S%f').timetuple()
+        )
+    except (TypeError, ValueError):
+        return time.time()
+
 
-    return redis.Redis(
-            host=host,
-            port=port,
-            db=db)
+def _zadd(pipe, name, score, member):
+    '''
+    Add a member to a sorted set, redis-py 3.0 takes a mapping of the members
+    to their scores instead of the scores and members as arguments
+    '''
+    if getattr(redis, 'VERSION', (2,)) >= (3,):
+        pipe.zadd(name, {member: score})
+    else:
+        pipe.zadd(name, score, member)
 
 
-def returner(ret):
+def _ttl():
     '''
-    Return data to a redis data store
+    Return the time in seconds job data is kept for, None to keep it forever
+    '''
+    keep_jobs = int(__opts__.get('keep_jobs', 24))
+    if keep_jobs <= 0:
+        return None
+    return keep_jobs * 3600
+
+
+def _write_returns(ret, rets):
+    '''
+    Write a list of returns in one transaction
     '''
     serv = _get_serv(ret)
-    pipe = serv.pipeline()
-    pipe.set('{0}:{1}'.format(ret['id'], ret['jid']), json.dumps(ret))
-    pipe.lpush('{0}:{1}'.format(ret['id'], ret['fun']), ret['jid'])
-    pipe.sadd('minions', ret['id'])
-    pipe.sadd('jids', ret['jid'])
+    ttl = _ttl()
+    pipe = serv.pipeline(transaction=True)
+    for ret_ in rets:
+        ret_key = 'ret:{0}'.format(ret_['jid'])
+        pipe.hset(ret_key, ret_['id'], json.dumps(ret_))
+        if ttl is not None:
+            pipe.expire(ret_key, ttl)
+        pipe.hset('fun:{0}'.format(ret_['fun']), ret_['id'], ret_['jid'])
+        _zadd(pipe, 'jids', _jid_score(ret_['jid']), ret_['jid'])
+        pipe.sadd('minions', ret_['id'])
     pipe.execute()
 
 
+def returner(ret):
+    '''
+    Return data to a redis data store
+    '''
+    _options = _get_options(ret)
+    if _options.get('batch_size', 1) > 1:
+        # Only keep what is needed to find the options again
+        ret_config = {'ret_config': ret.get('ret_config')}
+        salt.utils.dbpool.get_writer(
+            ('redis',) + _pool_key(_options),
+            functools.partial(_write_returns, ret_config),
+            batch_size=_options['batch_size'],
+            flush_interval=_options['flush_interval']
+        ).add(ret)
+    else:
+        _write_returns(ret, [ret])
+
+
 def save_load(jid, load):
     '''
     Save the load to the specified jid
     '''
     serv = _get_serv(ret=None)
-    serv.set(jid, json.dumps(load))
-    serv.sadd('jids', jid)
+    ttl = _ttl()
+    pipe = serv.pipeline(transaction=True)
+    if ttl is None:
+        pipe.set('load:{0}'.format(jid), json.dumps(load))
+    else:
+        pipe.setex('load:{0}'.format(jid), ttl, json.dumps(load))
+    _zadd(pipe, 'jids', _jid_score(jid), jid)
+    pipe.execute()
 
 
 def get_load(jid):
@@ -120,7 +231,7 @@ def get_load(jid):
     Return the load data that marks a specified jid
     '''
     serv = _get_serv(ret=None)
-    data = serv.get(jid)
+    data = serv.get('load:{0}'.format(jid))
     if data:
         return json.loads(data)
     return {}
@@ -132,10 +243,8 @@ def get_jid(jid):
     '''
     serv = _get_serv(ret=None)
     ret = {}
-    for minion in serv.smembers('minions'):
-        data = serv.get('{0}:{1}'.format(minion, jid))
-        if data:
-            ret[minion] = json.loads(data)
+    for minion, data in serv.hgetall('ret:{0}'.format(jid)).items():
+        ret[minion] = json.loads(data)
     return ret
 
 
@@ -144,14 +253,13 @@ def get_fun(fun):
     Return a dict of the last function called for all minions
     '''
     serv = _get_serv(ret=None)
+    last = list(serv.hgetall('fun:{0}'.format(fun)).items())
+    pipe = serv.pipeline(transaction=False)
+    for minion, jid in last:
+        pipe.hget('ret:{0}'.format(jid), minion)
     ret = {}
-    for minion in serv.smembers('minions'):
-        ind_str = '{0}:{1}'.format(minion, fun)
-        try:
-            jid = serv.lindex(ind_str, 0)
-        except Exception:
-            continue
-        data = serv.get('{0}:{1}'.format(minion, jid))
+    for (minion, _), data in zip(last, pipe.execute()):
+        # The return may have expired already
         if data:
             ret[minion] = json.loads(data)
     return ret
@@ -159,10 +267,10 @@ def get_fun(fun):
 
 def get_jids():
     '''
-    Return a list of all job ids
+    Return a list of all job ids, oldest first
     '''
     serv = _get_serv(ret=None)
-    return list(serv.smembers('jids'))
+    return serv.zrange('jids', 0, -1)
 
 
 def get_minions():
@@ -173,6 +281,18 @@ def get_minions():
     return list(serv.smembers('minions'))
 
 
+def clean_old_jobs():
+    '''
+    Remove jobs older than keep_jobs from the jids index, their returns and
+    loads expire by themselves
+    '''
+    ttl = _ttl()
+    if ttl is None:
+        return
+    serv = _get_serv(ret=None)
+    serv.zremrangebyscore('jids', '-inf', time.time() - ttl)
+
+
 def prep_jid(nocache=False, passed_jid=None):  # pylint: disable=unused-argument
     '''
     Do any work necessary to prepare a JID, including sending a custom id
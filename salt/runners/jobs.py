@@ -14,6 +14,7 @@ import salt.client
 import salt.payload
 import salt.utils
 import salt.utils.jid
+import salt.utils.minions
 import salt.minion
 
 # Import 3rd-party libs
@@ -28,6 +29,9 @@ except ImportError:
 
 log = logging.getLogger(__name__)
 
+# Number of minion returns printed at once by lookup_jid with stream=True
+STREAM_CHUNK_SIZE = 100
+
 
 def active(outputter=None, display_progress=False):
     '''
@@ -88,7 +92,12 @@ def lookup_jid(jid,
                ext_source=None,
                missing=False,
                outputter=None,
-               display_progress=False):
+               display_progress=False,
+               minions=None,
+               offset=0,
+               limit=None,
+               summary=False,
+               stream=False):
     '''
     Return the printout from a previously executed job
 
@@ -100,6 +109,7 @@ def lookup_jid(jid,
 
     missing
         When set to `True`, adds the minions that did not return from the command.
+        Ignored when paging through the returns with ``offset`` or ``limit``.
         Default: `False`.
 
     display_progress
@@ -107,12 +117,46 @@ def lookup_jid(jid,
 
         .. versionadded:: 2015.2.0
 
+    minions
+        Only return the results of these minions, as a list or a comma
+        separated string. Default: `None`.
+
+        .. versionadded:: Beryllium
+
+    offset
+        Skip the results of this many minions, sorted by minion id.
+        Default: `0`.
+
+        .. versionadded:: Beryllium
+
+    limit
+        Return the results of at most this many minions. Default: `None`.
+
+        .. versionadded:: Beryllium
+
+    summary
+        Return the number of succeeded, failed and changed states of each
+        minion instead of its results, or `True` for returns which are not
+        state results. Default: `False`.
+
+        .. versionadded:: Beryllium
+
+    stream
+        Print the results of the minions as they are read from the job cache,
+        :py:data:`STREAM_CHUNK_SIZE` minions at a time, instead of returning
+        them all at once. Only the number of minions which returned is
+        returned. Default: `False`.
+
+        .. versionadded:: Beryllium
+
     CLI Example:
 
     .. code-block:: bash
 
         salt-run jobs.lookup_jid 20130916125524463507
         salt-run jobs.lookup_jid 20130916125524463507 outputter=highstate
+        salt-run jobs.lookup_jid 20130916125524463507 offset=100 limit=100
+        salt-run jobs.lookup_jid 20130916125524463507 summary=True stream=True
     '''
     ret = {}
     mminion = salt.minion.MasterMinion(__opts__)
@@ -121,34 +165,47 @@ def lookup_jid(jid,
         __jid_event__.fire_event({'message': 'Querying returner: {0}'.format(returner)}, 'progress')
 
     try:
-        data = mminion.returners['{0}.get_jid'.format(returner)](jid)
+        data = _get_jid_iter(mminion, returner, jid, minions, offset, limit)
     except TypeError:
         return 'Requested returner could not be loaded. No JIDs could be retrieved.'
 
-    for minion in data:
+    out = None
+    returned = set()
+    for minion, minion_data in data:
         if display_progress:
             __jid_event__.fire_event({'message': minion}, 'progress')
-        if u'return' in data[minion]:
-            ret[minion] = data[minion].get(u'return')
-        else:
-            ret[minion] = data[minion].get('return')
-    if missing:
-        ckminions = salt.utils.minions.CkMinions(__opts__)
-        exp = ckminions.check_minions(data['tgt'], data['tgt_type'])
-        for minion_id in exp:
-            if minion_id not in data:
+        if not returned and isinstance(minion_data, dict):
+            # Check if the return data has an 'out' key. We'll use that as the
+            # outputter in the absence of one being passed on the CLI.
+            out = minion_data.get('out')
+        returned.add(minion)
+        ret[minion] = _minion_return(minion_data, summary)
+        if stream and len(ret) >= STREAM_CHUNK_SIZE:
+            _stream_chunk(ret, outputter or out, summary)
+            ret = {}
+    if missing and not offset and limit is None:
+        load = mminion.returners['{0}.get_load'.format(returner)](jid)
+        if load:
+            ckminions = salt.utils.minions.CkMinions(__opts__)
+            exp = ckminions.check_minions(load['tgt'],
+                                          load.get('tgt_type', 'glob'))
+            if minions is not None:
+                exp = set(exp).intersection(_split_minions(minions))
+            for minion_id in exp:
+                if minion_id in returned:
+                    continue
                 ret[minion_id] = 'Minion did not return'
+    if stream:
+        if ret:
+            _stream_chunk(ret, outputter or out, summary)
+        return {'Returned': len(returned)}
 
     # Once we remove the outputter argument in a couple releases, we still
     # need to check to see if the 'out' key is present and use it to specify
     # the correct outputter, so we get highstate output for highstate runs.
     if outputter is None:
-        try:
-            # Check if the return data has an 'out' key. We'll use that as the
-            # outputter in the absence of one being passed on the CLI.
-            outputter = data[next(iter(data))].get('out')
-        except (StopIteration, AttributeError):
-            outputter = None
+        # Summaries are not in the format of the outputter of the job
+        outputter = out if not summary else None
     else:
         salt.utils.warn_until(
             'Boron',
@@ -163,10 +220,26 @@ def lookup_jid(jid,
         return ret
 
 
-def list_job(jid, ext_source=None, outputter=None):
+def list_job(jid,
+             ext_source=None,
+             outputter=None,
+             results=True,
+             minions=None,
+             offset=0,
+             limit=None,
+             summary=False):
     '''
     List a specific job given by its jid
 
+    results
+        Include the results of the minions, set to `False` to only list the
+        job. Default: `True`.
+
+        .. versionadded:: Beryllium
+
+    The ``minions``, ``offset``, ``limit`` and ``summary`` arguments select the
+    results to include, as for :py:func:`lookup_jid`.
+
     CLI Example:
 
     .. code-block:: bash
@@ -179,7 +252,9 @@ def list_job(jid, ext_source=None, outputter=None):
 
     job = mminion.returners['{0}.get_load'.format(returner)](jid)
     ret.update(_format_jid_instance(jid, job))
-    ret['Result'] = mminion.returners['{0}.get_jid'.format(returner)](jid)
+    if results:
+        ret['Result'] = _get_results(mminion, returner, jid,
+                                     minions, offset, limit, summary)
     if outputter:
         salt.utils.warn_until(
             'Boron',
@@ -244,66 +319,14 @@ def list_jobs(ext_source=None,
         __jid_event__.fire_event({'message': 'Querying returner {0} for jobs.'.format(returner)}, 'progress')
     mminion = salt.minion.MasterMinion(__opts__)
 
-    ret = mminion.returners['{0}.get_jids'.format(returner)]()
-
     mret = {}
-    for item in ret:
-        _match = True
-        if search_metadata:
-            _match = False
-            if 'Metadata' in ret[item]:
-                if isinstance(search_metadata, dict):
-                    for key in search_metadata:
-                        if key in ret[item]['Metadata']:
-                            if ret[item]['Metadata'][key] == search_metadata[key]:
-                                _match = True
-                else:
-                    log.info('The search_metadata parameter must be specified'
-                             ' as a dictionary.  Ignoring.')
-        if search_target and _match:
-            _match = False
-            if 'Target' in ret[item]:
-                if isinstance(search_target, list):
-                    for key in search_target:
-                        if fnmatch.fnmatch(ret[item]['Target'], key):
-                            _match = True
-                elif isinstance(search_target, six.string_types):
-                    if fnmatch.fnmatch(ret[item]['Target'], search_target):
-                        _match = True
-
-        if search_function and _match:
-            _match = False
-            if 'Function' in ret[item]:
-                if isinstance(search_function, list):
-                    for key in search_function:
-                        if fnmatch.fnmatch(ret[item]['Function'], key):
-                            _match = True
-                elif isinstance(search_function, six.string_types):
-                    if fnmatch.fnmatch(ret[item]['Function'], search_function):
-                        _match = True
-
-        if start_time and _match:
-            _match = False
-            if DATEUTIL_SUPPORT:
-                parsed_start_time = dateutil_parser.parse(start_time)
-                _start_time = dateutil_parser.parse(ret[item]['StartTime'])
-                if _start_time >= parsed_start_time:
-                    _match = True
-            else:
-                log.error('"dateutil" library not available, skipping start_time comparision.')
-
-        if end_time and _match:
-            _match = False
-            if DATEUTIL_SUPPORT:
-                parsed_end_time = dateutil_parser.parse(end_time)
-                _start_time = dateutil_parser.parse(ret[item]['StartTime'])
-                if _start_time <= parsed_end_time:
-                    _match = True
-            else:
-                log.error('"dateutil" library not available, skipping start_time comparision.')
-
-        if _match:
-            mret[item] = ret[item]
+    if (start_time or end_time) and not DATEUTIL_SUPPORT:
+        log.error('"dateutil" library not available, skipping start_time comparision.')
+        return mret
+    jobs = _get_jids_iter(mminion, returner, start_time, end_time)
+    for jid, job in jobs:
+        if _match_job(job, search_metadata, search_function, search_target):
+            mret[jid] = job
 
     if outputter:
         return {'outputter': outputter, 'data': mret}
@@ -311,15 +334,25 @@ def list_jobs(ext_source=None,
         return mret
 
 
-def print_job(jid, ext_source=None, outputter=None):
+def print_job(jid,
+              ext_source=None,
+              outputter=None,
+              minions=None,
+              offset=0,
+              limit=None,
+              summary=False):
     '''
     Print a specific job's detail given by it's jid, including the return data.
 
+    The ``minions``, ``offset``, ``limit`` and ``summary`` arguments select the
+    returns to include, as for :py:func:`lookup_jid`.
+
     CLI Example:
 
     .. code-block:: bash
 
         salt-run jobs.print_job 20130916125524463507
+        salt-run jobs.print_job 20130916125524463507 minions=web1,web2
     '''
     ret = {}
 
@@ -333,7 +366,8 @@ def print_job(jid, ext_source=None, outputter=None):
         ret[jid]['Result'] = ('Requested returner {0} is not available. Jobs cannot be retrieved. '
             'Check master log for details.'.format(returner))
         return ret
-    ret[jid]['Result'] = mminion.returners['{0}.get_jid'.format(returner)](jid)
+    ret[jid]['Result'] = _get_results(mminion, returner, jid,
+                                      minions, offset, limit, summary)
     if outputter:
         salt.utils.warn_until(
             'Boron',
@@ -375,12 +409,16 @@ def last_run(ext_source=None,
             log.info('The metadata parameter must be specified as a dictionary')
             return False
 
-    _all_jobs = list_jobs(ext_source, outputter, metadata, function, target, display_progress)
-    if _all_jobs:
-        last_job = sorted(_all_jobs)[-1]
-        return print_job(last_job, ext_source, outputter)
-    else:
-        return False
+    returner = _get_returner((__opts__['ext_job_cache'], ext_source, __opts__['master_job_cache']))
+    if display_progress:
+        __jid_event__.fire_event({'message': 'Querying returner {0} for jobs.'.format(returner)}, 'progress')
+    mminion = salt.minion.MasterMinion(__opts__)
+
+    # Read the jobs newest first and stop at the first match
+    for jid, job in _get_jids_iter(mminion, returner, reverse=True):
+        if _match_job(job, metadata, function, target):
+            return print_job(jid, ext_source, outputter)
+    return False
 
 
 def _get_returner(returner_types):
@@ -392,6 +430,162 @@ def _get_returner(returner_types):
             return returner
 
 
+def _get_jids_iter(mminion, returner, start_time=None, end_time=None,
+                   reverse=False):
+    '''
+    Return an iterator over the ``(jid, job)`` pairs of the jobs started from
+    start_time to end_time, sorted by jid. Returners implementing
+    ``get_jids_iter`` only read the jobs of that time range, all the jobs of
+    other returners are read with ``get_jids`` first.
+    '''
+    if start_time:
+        start_time = dateutil_parser.parse(start_time)
+    if end_time:
+        end_time = dateutil_parser.parse(end_time)
+    fstr = '{0}.get_jids_iter'.format(returner)
+    if fstr in mminion.returners:
+        return mminion.returners[fstr](start_time=start_time,
+                                       end_time=end_time,
+                                       reverse=reverse)
+
+    jobs = mminion.returners['{0}.get_jids'.format(returner)]()
+
+    def in_range(job):
+        if not start_time and not end_time:
+            return True
+        _start_time = dateutil_parser.parse(job['StartTime'])
+        if start_time and _start_time < start_time:
+            return False
+        if end_time and _start_time > end_time:
+            return False
+        return True
+    return ((jid, jobs[jid]) for jid in sorted(jobs, reverse=reverse)
+            if in_range(jobs[jid]))
+
+
+def _match_job(job, search_metadata=None, search_function=None,
+               search_target=None):
+    '''
+    Return True if a job matches the metadata, function and target searches
+    of list_jobs
+    '''
+    if search_metadata:
+        if 'Metadata' not in job:
+            return False
+        if not isinstance(search_metadata, dict):
+            log.info('The search_metadata parameter must be specified'
+                     ' as a dictionary.  Ignoring.')
+            return False
+        if not any([job['Metadata'].get(key, object()) == value
+                    for key, value in six.iteritems(search_metadata)]):
+            return False
+    if search_target:
+        if not _match_any(job.get('Target'), search_target):
+            return False
+    if search_function:
+        if not _match_any(job.get('Function'), search_function):
+            return False
+    return True
+
+
+def _match_any(value, patterns):
+    '''
+    Return True if value matches the glob pattern, or one of the list of glob
+    patterns
+    '''
+    if not isinstance(value, six.string_types):
+        return False
+    if isinstance(patterns, six.string_types):
+        patterns = [patterns]
+    elif not isinstance(patterns, list):
+        return False
+    return any([fnmatch.fnmatch(value, pattern) for pattern in patterns])
+
+
+def _split_minions(minions):
+    '''
+    Return the list of minion ids passed as a list or a comma separated string
+    '''
+    if isinstance(minions, six.string_types):
+        return [minion.strip() for minion in minions.split(',')]
+    return list(minions)
+
+
+def _get_jid_iter(mminion, returner, jid, minions=None, offset=0, limit=None):
+    '''
+    Return an iterator over the ``(minion id, information)`` pairs of a job,
+    sorted by minion id. Returners implementing ``get_jid_iter`` read them one
+    at a time, the returns of other returners are all read with ``get_jid``
+    first.
+    '''
+    if minions is not None:
+        minions = _split_minions(minions)
+    offset = int(offset or 0)
+    if limit is not None:
+        limit = int(limit)
+    fstr = '{0}.get_jid_iter'.format(returner)
+    if fstr in mminion.returners:
+        return mminion.returners[fstr](jid,
+                                       minions=minions,
+                                       offset=offset,
+                                       limit=limit)
+    data = mminion.returners['{0}.get_jid'.format(returner)](jid)
+    if minions is not None:
+        minions = set(minions)
+    ids = sorted([minion for minion in data
+                  if minions is None or minion in minions])
+    stop = offset + limit if limit is not None else None
+    return ((minion, data[minion]) for minion in ids[offset:stop])
+
+
+def _get_results(mminion, returner, jid, minions=None, offset=0, limit=None,
+                 summary=False):
+    '''
+    Return the information stored for the selected minions of a job, or the
+    summaries of their returns
+    '''
+    ret = {}
+    for minion, minion_data in _get_jid_iter(mminion, returner, jid,
+                                             minions, offset, limit):
+        if summary:
+            minion_data = _minion_return(minion_data, summary)
+        ret[minion] = minion_data
+    return ret
+
+
+def _minion_return(minion_data, summary=False):
+    '''
+    Return the return of a minion from the information stored for it in the
+    job cache, or the summary of it
+    '''
+    if isinstance(minion_data, dict):
+        minion_data = minion_data.get('return')
+    if not summary:
+        return minion_data
+    if isinstance(minion_data, dict) and minion_data \
+            and all([isinstance(state, dict) and 'result' in state
+                     for state in six.itervalues(minion_data)]):
+        ret = {'Succeeded': 0, 'Failed': 0, 'Changed': 0}
+        for state in six.itervalues(minion_data):
+            if state['result'] is False:
+                ret['Failed'] += 1
+            else:
+                ret['Succeeded'] += 1
+            if state.get('changes'):
+                ret['Changed'] += 1
+        return ret
+    return True
+
+
+def _stream_chunk(data, outputter, summary=False):
+    '''
+    Print the returns of some of the minions of a job
+    '''
+    if summary or not outputter:
+        outputter = 'nested'
+    __jid_event__.fire_event({'data': data, 'outputter': outputter}, 'progress')
+
+
 def _format_job_instance(job):
     '''
     Helper to format a job instance
@@ -435,7 +629,6 @@ def _walk_through(job_dir, display_progress=False):
 
         for final in os.listdir(t_path):
             load_path = os.path.join(t_path, final, '.load.p')
-            job = serial.load(salt.utils.fopen(load_path, 'rb'))
 
             if not os.path.isfile(load_path):
                 continue
@@ -30,16 +30,34 @@ from salt.exceptions import SaltClientError
 FINGERPRINT_REGEX = re.compile(r'^([a-f0-9]{2}:){15}([a-f0-9]{2})$')
 
 
-def status(output=True):
+def status(output=True, probe_stale=False):
     '''
     Print the status of all known salt minions
 
+    When :conf_master:`presence_events` is enabled the status is answered
+    from the presence data recorded by the master, without sending any
+    commands to minions. Otherwise a ``test.ping`` is published to all
+    minions.
+
+    probe_stale : False
+        Only used with presence data. Send a ``test.ping`` to those minions
+        which have not been seen connected within
+        :conf_master:`presence_stale_time` seconds, or have never been seen
+        connected, and report the ones that answer as up. Nothing is returned
+        if the ping cannot be sent.
+
+        .. versionadded:: Beryllium
+
     CLI Example:
 
     .. code-block:: bash
 
         salt-run manage.status
+        salt-run manage.status probe_stale=True
     '''
+    if __opts__.get('presence_events', False):
+        return _presence_status(probe_stale)
+
     ret = {}
     client = salt.client.get_local_client(__opts__['conf_file'])
     try:
@@ -56,6 +74,32 @@ def status(output=True):
     return ret
 
 
+def _presence_status(probe_stale=False):
+    '''
+    Build the up/down lists from the presence data maintained by the master
+    '''
+    ckminions = salt.utils.minions.CkMinions(__opts__)
+    key = salt.key.Key(__opts__)
+    keys = set(key.list_keys()['minions'])
+    stale = ckminions.stale_ids(
+        stale_time=__opts__.get('presence_stale_time', 180)
+    ) & keys
+    up = keys - stale
+    if probe_stale and stale:
+        client = salt.client.get_local_client(__opts__['conf_file'])
+        try:
+            answered = client.cmd(list(stale),
+                                  'test.ping',
+                                  expr_form='list',
+                                  timeout=__opts__['timeout'])
+        except SaltClientError as client_error:
+            print(client_error)
+            return {}
+        up.update(answered)
+        stale.difference_update(answered)
+    return {'up': sorted(up), 'down': sorted(stale)}
+
+
 def key_regen():
     '''
     This routine is used to regenerate all keys in an environment. This is
@@ -108,11 +152,19 @@ def key_regen():
     return msg
 
 
-def down(removekeys=False):
+def down(removekeys=False, probe_stale=False):
     '''
     Print a list of all the down or unresponsive salt minions
     Optionally remove keys of down minions
 
+    probe_stale : False
+        Ping minions with stale presence data before reporting them as down,
+        see :mod:`manage.status <salt.runners.manage.status>`. Always done
+        with ``removekeys=True``, the keys of minions are never removed
+        because of the presence data alone.
+
+        .. versionadded:: Beryllium
+
     CLI Example:
 
     .. code-block:: bash
@@ -120,7 +172,11 @@ def down(removekeys=False):
         salt-run manage.down
         salt-run manage.down removekeys=True
     '''
-    ret = status(output=False).get('down', [])
+    if removekeys:
+        # Minions connecting from localhost, or not seen yet since presence
+        # tracking was enabled, have no presence data although they are up
+        probe_stale = True
+    ret = status(output=False, probe_stale=probe_stale).get('down', [])
     for minion in ret:
         if removekeys:
             wheel = salt.wheel.Wheel(__opts__)
@@ -128,17 +184,23 @@ def down(removekeys=False):
     return ret
 
 
-def up():  # pylint: disable=C0103
+def up(probe_stale=False):  # pylint: disable=C0103
     '''
     Print a list of all of the minions that are up
 
+    probe_stale : False
+        Ping minions with stale presence data before reporting them,
+        see :mod:`manage.status <salt.runners.manage.status>`.
+
+        .. versionadded:: Beryllium
+
     CLI Example:
 
     .. code-block:: bash
 
         salt-run manage.up
     '''
-    ret = status(output=False).get('up', [])
+    ret = status(output=False, probe_stale=probe_stale).get('up', [])
     return ret
 
 
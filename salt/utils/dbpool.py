@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+'''
+Connection pooling and batched writes for returners
+
+Returners are called many times by long running processes (the master's
+MWorkers and event returner), so connecting to the database on every call
+quickly dominates the time spent in them. :class:`ConnectionPool` keeps the
+connections of a process open between calls, and :class:`BatchWriter` turns
+many single writes into bulk writes, such as multi-row INSERTs.
+
+Both only hold state for the process they were created in. Connections
+inherited through a fork are dropped, never closed, because closing them
+would also close the connection of the parent process.
+
+Processes which exit with ``os._exit``, as the ``multiprocessing`` children do,
+skip the ``atexit`` handlers and have to call :func:`flush_writers` before
+exiting.
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import atexit
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+
+# Maximum number of rows in a single INSERT statement
+MAX_ROWS_PER_INSERT = 1000
+# Number of batches kept queued while their writes fail
+MAX_QUEUED_BATCHES = 10
+
+# pool key -> ConnectionPool
+_POOLS = {}
+# writer key -> BatchWriter
+_WRITERS = {}
+_LOCK = threading.Lock()
+
+
+class ConnectionPool(object):
+    '''
+    A pool of database connections, used by one process.
+
+    ``connect`` is called without arguments to open a new connection.
+    ``ping`` is called with a connection which has been idle for more than
+    ``check_interval`` seconds, and must raise an exception if the
+    connection can no longer be used.
+    '''
+    def __init__(self, connect, ping=None, size=5, check_interval=30):
+        self.connect = connect
+        self.ping = ping
+        self.size = size
+        self.check_interval = check_interval
+        self.idle = []
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+
+    def _check_pid(self):
+        if self.pid != os.getpid():
+            # Forked, the connections belong to the parent process
+            self.idle = []
+            self.pid = os.getpid()
+
+    def acquire(self):
+        '''
+        Return an idle connection which passes the health check, or a new one
+        '''
+        while True:
+            with self.lock:
+                self._check_pid()
+                if not self.idle:
+                    break
+                conn, last_used = self.idle.pop()
+            if self.ping is None \
+                    or time.time() - last_used < self.check_interval:
+                return conn
+            try:
+                self.ping(conn)
+            except Exception as exc:
+                log.debug('Dropping stale database connection: {0}'.format(exc))
+                _close(conn)
+                continue
+            return conn
+        log.debug('Opening new database connection')
+        return self.connect()
+
+    def release(self, conn):
+        '''
+        Hand a connection back to the pool
+        '''
+        with self.lock:
+            self._check_pid()
+            if len(self.idle) < self.size:
+                self.idle.append((conn, time.time()))
+                return
+        _close(conn)
+
+    @contextmanager
+    def connection(self):
+        '''
+        Lend a connection from the pool. The transaction is rolled back if
+        the block raises an exception, connections which cannot be rolled
+        back are closed instead of being returned to the pool.
+        '''
+        conn = self.acquire()
+        try:
+            yield conn
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception:
+                _close(conn)
+            else:
+                self.release(conn)
+            raise
+        self.release(conn)
+
+
+def _close(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+def get_pool(key, connect, ping=None, size=5):
+    '''
+    Return the connection pool of this process for key, which should
+    identify the database and credentials. The pool is created with
+    ``connect`` and ``ping`` if it does not exist yet.
+    '''
+    with _LOCK:
+        if key not in _POOLS:
+            _POOLS[key] = ConnectionPool(connect, ping=ping, size=size)
+        return _POOLS[key]
+
+
+def insert_rows(cursor, sql, rows, suffix=''):
+    '''
+    Insert rows with multi-row INSERT statements. ``sql`` is the statement up
+    to and including ``VALUES``, the placeholders for the rows are added,
+    followed by ``suffix`` (an ``ON DUPLICATE KEY`` clause for instance).
+    '''
+    if not rows:
+        return
+    placeholder = '({0})'.format(', '.join(['%s'] * len(rows[0])))
+    for start in range(0, len(rows), MAX_ROWS_PER_INSERT):
+        chunk = rows[start:start + MAX_ROWS_PER_INSERT]
+        statement = '{0} {1}'.format(sql, ', '.join([placeholder] * len(chunk)))
+        if suffix:
+            statement = '{0} {1}'.format(statement, suffix)
+        cursor.execute(statement, [value for row in chunk for value in row])
+
+
+class BatchWriter(object):
+    '''
+    Queue rows and write them in batches with ``write``, which is called with
+    a list of rows. A batch is written as soon as ``batch_size`` rows are
+    queued, and at most ``flush_interval`` seconds after its first row was
+    queued. Rows still queued when the process exits are written then.
+
+    The rows of a failed write are queued again and retried with the next
+    batch, up to ``MAX_QUEUED_BATCHES`` batches, beyond which the oldest rows
+    are dropped. ``write`` must therefore be safe to retry.
+    '''
+    def __init__(self, write, batch_size=100, flush_interval=1.0):
+        self.write = write
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.rows = []
+        self.timer = None
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def add(self, row):
+        '''
+        Queue a row
+        '''
+        with self.lock:
+            if self.pid != os.getpid():
+                # Forked, the queued rows are written by the parent process
+                self.rows = []
+                self.timer = None
+                self.pid = os.getpid()
+            self.rows.append(row)
+            full = len(self.rows) >= self.batch_size
+            if not full and self.timer is None:
+                self.timer = threading.Timer(self.flush_interval, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+        if full:
+            self.flush()
+
+    def flush(self):
+        '''
+        Write all queued rows, return the number of rows written
+        '''
+        with self.lock:
+            if self.pid != os.getpid():
+                return 0
+            rows, self.rows = self.rows, []
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        if not rows:
+            return 0
+        try:
+            self.write(rows)
+        except Exception as exc:
+            log.error(
+                'Unable to write {0} queued row(s) to the database, retrying '
+                'with the next batch: {1}'.format(len(rows), exc),
+                exc_info_on_loglevel=logging.DEBUG
+            )
+            self._requeue(rows)
+            return 0
+        return len(rows)
+
+    def _requeue(self, rows):
+        '''
+        Queue the rows of a failed write before the rows queued since
+        '''
+        with self.lock:
+            if self.pid != os.getpid():
+                return
+            self.rows[:0] = rows
+            dropped = len(self.rows) - self.batch_size * MAX_QUEUED_BATCHES
+            if dropped > 0:
+                log.error(
+                    'Dropping {0} queued row(s) which could not be written'
+                    .format(dropped)
+                )
+                del self.rows[:dropped]
+            if self.timer is None:
+                self.timer = threading.Timer(self.flush_interval, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+
+def get_writer(key, write, batch_size=100, flush_interval=1.0):
+    '''
+    Return the batch writer of this process for key, creating it with the
+    passed arguments if it does not exist yet
+    '''
+    with _LOCK:
+        if key not in _WRITERS:
+            _WRITERS[key] = BatchWriter(write,
+                                        batch_size=batch_size,
+                                        flush_interval=flush_interval)
+        return _WRITERS[key]
+
+
+def flush_writers(key=None):
+    '''
+    Write the rows queued by the batch writers of this process, or only by the
+    writer for key. Return the number of rows written.
+    '''
+    with _LOCK:
+        if key is None:
+            writers = list(_WRITERS.values())
+        else:
+            writers = [_WRITERS[key]] if key in _WRITERS else []
+    return sum([writer.flush() for writer in writers])
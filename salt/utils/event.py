@@ -56,9 +56,12 @@ from __future__ import absolute_import
 import os
 import time
 import errno
+import fnmatch
 import hashlib
 import logging
 import datetime
+import threading
+import collections
 import multiprocessing
 from collections import MutableMapping
 
@@ -79,6 +82,7 @@ except ImportError:
 import salt.payload
 import salt.loader
 import salt.utils
+import salt.utils.atomicfile
 import salt.utils.cache
 import salt.utils.dicttrim
 import salt.utils.process
@@ -93,6 +97,13 @@ SUB_EVENT = set([
     'state.sls',
 ])
 
+# Maximum number of seconds to wait before retrying a failed event returner
+EVENT_RETURN_MAX_BACKOFF = 60
+# Maximum number of batches spooled to disk per event returner
+EVENT_RETURN_SPOOL_MAX = 10000
+# Number of seconds between two salt/event_return/stats events
+EVENT_RETURN_STATS_INTERVAL = 60
+
 TAGEND = '\n\n'  # long tag delimiter
 TAGPARTER = '/'  # name spaced tag delimiter
 SALT = 'salt'  # base prefix for all salt/ events
@@ -851,10 +862,194 @@ class EventPublisher(multiprocessing.Process):
                 self.context.term()
 
 
+class EventReturnQueue(threading.Thread):
+    '''
+    Queue events for a single event returner and write them in batches from
+    a dedicated thread.
+
+    A batch is written once ``event_return_queue`` events are queued, or when
+    the oldest queued event is ``event_return_queue_max_seconds`` old. When
+    the returner fails it is retried with an exponential backoff, meanwhile
+    batches are spooled to disk if a ``spool_dir`` is given, or kept in
+    memory otherwise. At most ``event_return_max_queue_size`` events are kept
+    in memory, the oldest events are dropped beyond that.
+    '''
+    def __init__(self, opts, name, func, spool_dir=None):
+        threading.Thread.__init__(self, name='EventReturnQueue-{0}'.format(name))
+        self.daemon = True
+        self.returner = name
+        self.func = func
+        self.serial = salt.payload.Serial(opts)
+        self.batch_size = max(opts.get('event_return_queue', 0), 1)
+        self.max_seconds = opts.get('event_return_queue_max_seconds', 0)
+        self.max_size = max(opts.get('event_return_max_queue_size', 10000),
+                            self.batch_size)
+        self.spool_dir = spool_dir
+        self.spooled = []
+        if spool_dir is not None:
+            if not os.path.isdir(spool_dir):
+                os.makedirs(spool_dir)
+            # Batches spooled before a restart are written first
+            self.spooled = sorted(
+                [fn_ for fn_ in os.listdir(spool_dir) if fn_.endswith('.p')]
+            )
+        # (time received, event)
+        self.queue = collections.deque()
+        self.cond = threading.Condition()
+        self.backoff = 0
+        self.retry_at = 0
+        self.stats = {'stored': 0, 'dropped': 0, 'failures': 0}
+
+    def put(self, event):
+        '''
+        Queue an event
+        '''
+        with self.cond:
+            if len(self.queue) >= self.max_size:
+                self.queue.popleft()
+                self.stats['dropped'] += 1
+            self.queue.append((time.time(), event))
+            if len(self.queue) >= self.batch_size:
+                self.cond.notify()
+
+    def get_stats(self):
+        '''
+        Return the counters of the queue, the lag is the age of the oldest
+        queued event in seconds
+        '''
+        with self.cond:
+            ret = dict(self.stats)
+            ret['queued'] = len(self.queue)
+            ret['spooled'] = len(self.spooled)
+            ret['lag'] = time.time() - self.queue[0][0] if self.queue else 0
+        return ret
+
+    def _due(self, now):
+        if not self.queue:
+            return False
+        if len(self.queue) >= self.batch_size:
+            return True
+        return bool(self.max_seconds) \
+            and now - self.queue[0][0] >= self.max_seconds
+
+    def _next_action(self, now):
+        '''
+        Return what to do next: ``'send'`` or ``'spool'`` a batch from the
+        queue, ``'drain'`` the spool or None to wait
+        '''
+        due = self._due(now)
+        if now < self.retry_at:
+            if due and self.spool_dir is not None:
+                return 'spool'
+            return None
+        if self.spooled:
+            return 'drain'
+        if due:
+            return 'send'
+        return None
+
+    def _take(self):
+        batch = []
+        while self.queue and len(batch) < self.batch_size:
+            batch.append(self.queue.popleft()[1])
+        return batch
+
+    def _requeue(self, batch):
+        '''
+        Put a batch which could not be written back in front of the queue
+        '''
+        with self.cond:
+            self.queue.extendleft([(time.time(), event) for event in reversed(batch)])
+            while len(self.queue) > self.max_size:
+                self.queue.popleft()
+                self.stats['dropped'] += 1
+
+    def _send(self, batch):
+        '''
+        Write a batch with the returner, return True on success
+        '''
+        try:
+            self.func(batch)
+        except Exception as exc:
+            self.backoff = min(max(self.backoff * 2, 1), EVENT_RETURN_MAX_BACKOFF)
+            self.retry_at = time.time() + self.backoff
+            self.stats['failures'] += 1
+            log.error(
+                'Could not store {0} event(s) with the {1} returner, retrying '
+                'in {2} seconds: {3}'.format(
+                    len(batch), self.returner, self.backoff, exc),
+                exc_info_on_loglevel=logging.DEBUG
+            )
+            return False
+        self.backoff = 0
+        self.retry_at = 0
+        self.stats['stored'] += len(batch)
+        return True
+
+    def _spool(self, batch):
+        '''
+        Write a batch to the spool directory
+        '''
+        if len(self.spooled) >= EVENT_RETURN_SPOOL_MAX:
+            self.stats['dropped'] += len(batch)
+            return
+        name = '{0:017.6f}-{1}.p'.format(time.time(), len(self.spooled))
+        try:
+            with salt.utils.atomicfile.atomic_open(
+                    os.path.join(self.spool_dir, name), 'w+b') as fp_:
+                fp_.write(self.serial.dumps(batch))
+        except (IOError, OSError) as exc:
+            log.error('Unable to spool events to {0}: {1}'.format(
+                self.spool_dir, exc))
+            self.stats['dropped'] += len(batch)
+            return
+        self.spooled.append(name)
+
+    def _drain(self):
+        '''
+        Write the oldest spooled batch with the returner
+        '''
+        path = os.path.join(self.spool_dir, self.spooled[0])
+        try:
+            with salt.utils.fopen(path, 'rb') as fp_:
+                batch = self.serial.load(fp_)
+        except Exception as exc:
+            log.error('Unable to read spooled events from {0}: {1}'.format(
+                path, exc))
+            batch = None
+        if batch is not None and not self._send(batch):
+            return
+        self.spooled.pop(0)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def run(self):
+        while True:
+            with self.cond:
+                while True:
+                    action = self._next_action(time.time())
+                    if action is not None:
+                        break
+                    self.cond.wait(1)
+                batch = self._take() if action in ('send', 'spool') else None
+            if action == 'send':
+                if not self._send(batch):
+                    if self.spool_dir is not None:
+                        self._spool(batch)
+                    else:
+                        self._requeue(batch)
+            elif action == 'spool':
+                self._spool(batch)
+            else:
+                self._drain()
+
+
 class EventReturn(multiprocessing.Process):
     '''
     A dedicated process which listens to the master event bus and queues
-    and forwards events to the specified returner.
+    and forwards events to the specified returners.
     '''
     def __init__(self, opts):
         '''
@@ -870,50 +1065,80 @@ class EventReturn(multiprocessing.Process):
         local_minion_opts['file_client'] = 'local'
         self.minion = salt.minion.MasterMinion(local_minion_opts)
 
+    def _returners(self):
+        '''
+        Return the list of configured event returners
+        '''
+        returners = self.opts['event_return']
+        if isinstance(returners, six.string_types):
+            returners = [returners]
+        return [returner for returner in returners if returner]
+
     def run(self):
         '''
         Spin up the multiprocess event returner
         '''
         salt.utils.appendproctitle(self.__class__.__name__)
         self.event = get_event('master', opts=self.opts)
-        events = self.event.iter_events(full=True)
-        self.event.fire_event({}, 'salt/event_listen/start')
-        event_queue = []
-        for event in events:
-            if self._filter(event):
-                event_queue.append(event)
-            if len(event_queue) >= self.event_return_queue:
-                event_return = '{0}.event_return'.format(
-                    self.opts['event_return']
+        queues = []
+        for returner in self._returners():
+            event_return = '{0}.event_return'.format(returner)
+            if event_return not in self.minion.returners:
+                log.error(
+                    'Could not store events with returner \'{0}\', it was '
+                    'not found or has no event_return function.'
+                    .format(returner)
                 )
-                if event_return in self.minion.returners:
-                    try:
-                        self.minion.returners[event_return](event_queue)
-                    except Exception as exc:
-                        log.error('Could not store event {0}. '
-                                  'Returner raised exception: {1}'.format(
-                                      event, exc))
-                    event_queue = []
+                continue
+            spool_dir = None
+            if self.opts.get('event_return_spool'):
+                spool_dir = os.path.join(
+                    self.opts['cachedir'], 'event_return', returner)
+            queue = EventReturnQueue(self.opts,
+                                     returner,
+                                     self.minion.returners[event_return],
+                                     spool_dir=spool_dir)
+            queue.start()
+            queues.append(queue)
+        self.event.fire_event({}, 'salt/event_listen/start')
+        filtered = 0
+        next_stats = time.time() + EVENT_RETURN_STATS_INTERVAL
+        while True:
+            event = self.event.get_event(wait=1, full=True)
+            if event is not None:
+                # Filter before anything is queued or spooled
+                if self._filter(event):
+                    for queue in queues:
+                        queue.put(event)
                 else:
-                    log.error(
-                        'Could not store return for event(s) {0}. Returner '
-                        '\'{1}\' not found.'
-                        .format(event_queue, self.opts['event_return'])
-                    )
+                    filtered += 1
+            if time.time() >= next_stats:
+                next_stats = time.time() + EVENT_RETURN_STATS_INTERVAL
+                stats = dict([(queue.returner, queue.get_stats())
+                              for queue in queues])
+                log.debug('Event return statistics: {0}'.format(stats))
+                self.event.fire_event({'filtered': filtered,
+                                       'returners': stats},
+                                      'salt/event_return/stats')
+
+    def _match(self, tag, patterns):
+        for pattern in patterns:
+            if tag == pattern or fnmatch.fnmatch(tag, pattern):
+                return True
+        return False
 
     def _filter(self, event):
         '''
-        Take an event and run it through configured filters.
+        Take an event and run it through configured filters. The filters are
+        lists of tags, which may contain shell style globs.
 
         Returns True if event should be stored, else False
         '''
         tag = event['tag']
-        if tag in self.opts['event_return_whitelist']:
-            if tag not in self.opts['event_return_blacklist']:
-                return True
-            else:
-                return False  # Event was whitelisted and blacklisted
-        elif tag in self.opts['event_return_blacklist']:
+        if self.opts['event_return_whitelist'] \
+                and not self._match(tag, self.opts['event_return_whitelist']):
+            return False
+        if self._match(tag, self.opts['event_return_blacklist']):
             return False
         return True
 
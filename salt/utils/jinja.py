@@ -5,7 +5,9 @@ Jinja loading utils to enable a more powerful backend for jinja templates
 
 # Import python libs
 from __future__ import absolute_import
+import hashlib
 import json
+import os
 import pprint
 import logging
 from os import path
@@ -23,17 +25,50 @@ import yaml
 # Import salt libs
 import salt
 import salt.utils
+import salt.utils.atomicfile
 import salt.fileclient
 from salt.utils.odict import OrderedDict
 
 log = logging.getLogger(__name__)
 
+# Maximum number of compiled templates kept by a loader
+LOADER_CODE_CACHE_SIZE = 256
+
 __all__ = [
+    'SaltBytecodeCache',
     'SaltCacheLoader',
     'SerializerExtension'
 ]
 
 
+class SaltBytecodeCache(jinja2.FileSystemBytecodeCache):
+    '''
+    A Jinja bytecode cache shared by the processes of a master or minion.
+    Cache files are replaced atomically, and a cache file which cannot be
+    loaded is a cache miss.
+    '''
+    def load_bytecode(self, bucket):
+        try:
+            super(SaltBytecodeCache, self).load_bytecode(bucket)
+        except Exception as exc:
+            log.debug(
+                'Unable to load the Jinja bytecode of {0}: {1}'.format(
+                    bucket.key, exc)
+            )
+            bucket.reset()
+
+    def dump_bytecode(self, bucket):
+        filename = path.join(self.directory, self.pattern % bucket.key)
+        try:
+            with salt.utils.atomicfile.atomic_open(filename, 'wb') as fp_:
+                bucket.write_bytecode(fp_)
+        except (IOError, OSError) as exc:
+            log.debug(
+                'Unable to store the Jinja bytecode of {0}: {1}'.format(
+                    bucket.key, exc)
+            )
+
+
 # To dump OrderedDict objects as regular dicts. Used by the yaml
 # template filter.
 class OrderedDictDumper(yaml.Dumper):  # pylint: disable=W0232
@@ -51,7 +86,10 @@ class SaltCacheLoader(BaseLoader):
     Requested templates are always fetched from the server
     to guarantee that the file is up to date.
     Templates are cached like regular salt states
-    and only loaded once per loader instance.
+    and only loaded once per loader instance, or per render for long lived
+    loaders calling :py:meth:`reset` when a render starts.
+    The code compiled for a template is kept by the loader and reused by the
+    environments it loads the same source for.
     '''
     def __init__(self, opts, saltenv='base', encoding='utf-8', env=None,
                  pillar_rend=False):
@@ -67,14 +105,22 @@ class SaltCacheLoader(BaseLoader):
         self.opts = opts
         self.saltenv = saltenv
         self.encoding = encoding
-        if self.opts['file_roots'] is self.opts['pillar_roots']:
-            self.searchpath = opts['file_roots'][saltenv]
-        else:
-            self.searchpath = [path.join(opts['cachedir'], 'files', saltenv)]
+        self.searchpath = self.get_searchpath(opts, saltenv)
         log.debug('Jinja search path: {0!r}'.format(self.searchpath))
         self._file_client = None
         self.cached = []
         self.pillar_rend = pillar_rend
+        # (template, digest of the source) -> compiled code
+        self.code_cache = {}
+
+    @staticmethod
+    def get_searchpath(opts, saltenv):
+        '''
+        Return the directories the templates of saltenv are loaded from
+        '''
+        if opts['file_roots'] is opts['pillar_roots']:
+            return opts['file_roots'][saltenv]
+        return [path.join(opts['cachedir'], 'files', saltenv)]
 
     def file_client(self):
         '''
@@ -100,6 +146,37 @@ class SaltCacheLoader(BaseLoader):
             self.cache_file(template)
             self.cached.append(template)
 
+    def reset(self):
+        '''
+        Fetch the templates from the server again when they are next used
+        '''
+        self.cached = []
+
+    def load(self, environment, name, globals=None):  # pylint: disable=W0622
+        '''
+        Load a template, reusing the code compiled for the same source
+        '''
+        if globals is None:
+            globals = {}
+        source, filename, uptodate = self.get_source(environment, name)
+        key = (name, hashlib.sha1(source.encode(self.encoding)).digest())
+        code = self.code_cache.get(key)
+        if code is None:
+            bcc = environment.bytecode_cache
+            if bcc is not None:
+                bucket = bcc.get_bucket(environment, name, filename, source)
+                code = bucket.code
+            if code is None:
+                code = environment.compile(source, name, filename)
+                if bcc is not None:
+                    bucket.code = code
+                    bcc.set_bucket(bucket)
+            if len(self.code_cache) >= LOADER_CODE_CACHE_SIZE:
+                self.code_cache.clear()
+            self.code_cache[key] = code
+        return environment.template_class.from_code(environment, code,
+                                                     globals, uptodate)
+
     def get_source(self, environment, template):
         # checks for relative '..' paths
         if '..' in template:
@@ -125,14 +202,27 @@ class SaltCacheLoader(BaseLoader):
             filepath = path.join(spath, template)
             try:
                 with salt.utils.fopen(filepath, 'rb') as ifile:
-                    contents = ifile.read().decode(self.encoding)
-                    mtime = path.getmtime(filepath)
+                    raw = ifile.read()
+                    contents = raw.decode(self.encoding)
+                    # [(inode, mtime, size), digest] of the loaded file
+                    loaded = [_file_sig(filepath), hashlib.sha1(raw).digest()]
 
                     def uptodate():
+                        # Jinja reuses the compiled template while this is
+                        # True, make sure the file is the latest first
                         try:
-                            return path.getmtime(filepath) == mtime
-                        except OSError:
+                            self.check_cache(template)
+                            sig = _file_sig(filepath)
+                            if sig == loaded[0]:
+                                return True
+                            with salt.utils.fopen(filepath, 'rb') as ifile:
+                                digest = hashlib.sha1(ifile.read()).digest()
+                        except Exception:
                             return False
+                        if digest != loaded[1]:
+                            return False
+                        loaded[0] = sig
+                        return True
                     return contents, filepath, uptodate
             except IOError:
                 # there is no file under current path
@@ -143,6 +233,11 @@ class SaltCacheLoader(BaseLoader):
         raise TemplateNotFound(template)
 
 
+def _file_sig(filepath):
+    stat = os.stat(filepath)
+    return (stat.st_ino, stat.st_mtime, stat.st_size)
+
+
 class PrintableDict(OrderedDict):
     '''
     Ensures that dict str() and repr() are YAML friendly.
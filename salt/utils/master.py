@@ -21,6 +21,7 @@ import salt.log
 import salt.client
 import salt.pillar
 import salt.utils
+import salt.utils.mine
 import salt.utils.minions
 import salt.payload
 from salt.exceptions import SaltException
@@ -116,17 +117,12 @@ class MasterPillarUtil(object):
             log.debug('Skipping cached mine data minion_data_cache'
                       'and enfore_mine_cache are both disabled.')
             return mine_data
-        mdir = os.path.join(self.opts['cachedir'], 'minions')
+        mine = salt.utils.mine.MineCache(self.opts)
         try:
             for minion_id in minion_ids:
                 if not salt.utils.verify.valid_id(self.opts, minion_id):
                     continue
-                path = os.path.join(mdir, minion_id, 'mine.p')
-                if os.path.isfile(path):
-                    with salt.utils.fopen(path, 'rb') as fp_:
-                        mdata = self.serial.loads(fp_.read())
-                        if isinstance(mdata, dict):
-                            mine_data[minion_id] = mdata
+                mine_data[minion_id] = mine.get_all(minion_id)
         except (OSError, IOError):
             return mine_data
         return mine_data
@@ -360,6 +356,7 @@ class MasterPillarUtil(object):
             # to read in the pillar/grains data since they are both stored
             # in the same file, 'data.p'
             grains, pillars = self._get_cached_minion_data(*minion_ids)
+        mine = salt.utils.mine.MineCache(self.opts)
         try:
             for minion_id in minion_ids:
                 if not salt.utils.verify.valid_id(self.opts, minion_id):
@@ -369,7 +366,6 @@ class MasterPillarUtil(object):
                     # Cache dir for this minion does not exist. Nothing to do.
                     continue
                 data_file = os.path.join(cdir, 'data.p')
-                mine_file = os.path.join(cdir, 'mine.p')
                 minion_pillar = pillars.pop(minion_id, False)
                 minion_grains = grains.pop(minion_id, False)
                 if ((clear_pillar and clear_grains) or
@@ -389,20 +385,17 @@ class MasterPillarUtil(object):
                     with salt.utils.fopen(tmpfname, 'w+b') as fp_:
                         fp_.write(self.serial.dumps({'pillar': minion_pillar}))
                     os.rename(tmpfname, data_file)
+                if clear_pillar or clear_grains:
+                    # The content hashes no longer match data.p
+                    hash_file = os.path.join(cdir, 'data.hash')
+                    if os.path.isfile(hash_file):
+                        os.remove(hash_file)
                 if clear_mine:
-                    # Delete the whole mine file
-                    os.remove(os.path.join(mine_file))
+                    # Delete the whole mine
+                    mine.flush(minion_id)
                 elif clear_mine_func is not None:
-                    # Delete a specific function from the mine file
-                    with salt.utils.fopen(mine_file, 'rb') as fp_:
-                        mine_data = self.serial.loads(fp_.read())
-                    if isinstance(mine_data, dict):
-                        if mine_data.pop(clear_mine_func, False):
-                            tmpfh, tmpfname = tempfile.mkstemp(dir=cdir)
-                            os.close(tmpfh)
-                            with salt.utils.fopen(tmpfname, 'w+b') as fp_:
-                                fp_.write(self.serial.dumps(mine_data))
-                            os.rename(tmpfname, mine_file)
+                    # Delete a specific function from the mine
+                    mine.delete(minion_id, clear_mine_func)
         except (OSError, IOError):
             return True
         return True
@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+'''
+Storage of the salt mine on the master.
+
+Mine data is kept in the master minion data cache with one file per minion
+and mine function::
+
+    <cachedir>/minions/<minion id>/mine/<function>.p
+
+where the function name is percent-encoded, so that sending or reading a
+single function does not require the whole mine of a minion to be decoded and
+rewritten. Updates of the mine of a minion are serialized with a lock file.
+Decoded data is kept in memory and revalidated against the file's inode, mtime
+and size, which turns repeated ``mine.get`` calls from the same MWorker into a
+stat per minion.
+
+Mine data written by older masters into a single ``mine.p`` file is still
+read, and is migrated to the per-function layout on the next update.
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import contextlib
+import os
+import logging
+
+# Import salt libs
+import salt.payload
+import salt.utils
+import salt.utils.atomicfile
+
+# Import 3rd-party libs
+import salt.ext.six as six
+# pylint: disable=import-error,no-name-in-module
+from salt.ext.six.moves.urllib.parse import quote, unquote
+# pylint: enable=import-error,no-name-in-module
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    # fcntl is not available on windows
+    HAS_FCNTL = False
+
+log = logging.getLogger(__name__)
+
+LEGACY_MINE_FILE = 'mine.p'
+MINE_DIR = 'mine'
+MINE_EXT = '.p'
+LOCK_FILE = '.mine.lock'
+
+
+class MineCache(object):
+    '''
+    Read and write the mine data of minions stored on the master.
+
+    Instances should be long lived (one per worker process) to benefit from
+    the in-memory cache.
+    '''
+    def __init__(self, opts):
+        self.opts = opts
+        self.serial = salt.payload.Serial(opts)
+        self.cdir = os.path.join(opts['cachedir'], 'minions')
+        # (minion, fun) -> ((inode, mtime, size), data)
+        self.cache = {}
+
+    def _minion_dir(self, minion):
+        return os.path.join(self.cdir, minion)
+
+    def _mine_dir(self, minion):
+        return os.path.join(self.cdir, minion, MINE_DIR)
+
+    def _fun_path(self, minion, fun):
+        if isinstance(fun, six.text_type):
+            fun = fun.encode('utf-8')
+        # Percent-encoding keeps distinct function names in distinct files,
+        # plain function names are left as they are
+        return os.path.join(
+            self._mine_dir(minion),
+            quote(fun, safe='') + MINE_EXT
+        )
+
+    @contextlib.contextmanager
+    def _lock(self, minion):
+        '''
+        Hold the lock on the mine of a minion, for updates by concurrent
+        workers
+        '''
+        mdir = self._minion_dir(minion)
+        if not os.path.isdir(mdir):
+            try:
+                os.makedirs(mdir)
+            except OSError:
+                # Created by another worker in the meantime
+                if not os.path.isdir(mdir):
+                    raise
+        with salt.utils.fopen(os.path.join(mdir, LOCK_FILE), 'a') as fp_:
+            if HAS_FCNTL:
+                fcntl.flock(fp_.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if HAS_FCNTL:
+                    fcntl.flock(fp_.fileno(), fcntl.LOCK_UN)
+
+    def _read_legacy(self, minion):
+        '''
+        Return the contents of a minion's old style ``mine.p`` file
+        '''
+        path = os.path.join(self._minion_dir(minion), LEGACY_MINE_FILE)
+        try:
+            with salt.utils.fopen(path, 'rb') as fp_:
+                data = self.serial.load(fp_)
+        except (IOError, OSError):
+            return {}
+        except Exception as exc:
+            log.warning(
+                'Unable to read mine data from {0}: {1}'.format(path, exc)
+            )
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        return data
+
+    def _migrate(self, minion):
+        '''
+        Move the data of an old style ``mine.p`` file into per-function files,
+        must be called with the lock of the minion held. Functions already
+        stored per-function are newer than the old file and are kept.
+        '''
+        legacy = os.path.join(self._minion_dir(minion), LEGACY_MINE_FILE)
+        if not os.path.isfile(legacy):
+            return
+        for fun, data in six.iteritems(self._read_legacy(minion)):
+            if not os.path.exists(self._fun_path(minion, fun)):
+                self._write(minion, fun, data)
+        try:
+            os.remove(legacy)
+        except OSError:
+            pass
+
+    def _write(self, minion, fun, data):
+        mdir = self._mine_dir(minion)
+        if not os.path.isdir(mdir):
+            try:
+                os.makedirs(mdir)
+            except OSError:
+                # Created by another worker in the meantime
+                if not os.path.isdir(mdir):
+                    raise
+        with salt.utils.atomicfile.atomic_open(
+                self._fun_path(minion, fun), 'w+b') as fp_:
+            fp_.write(self.serial.dumps(data))
+        self.cache.pop((minion, fun), None)
+
+    def functions(self, minion):
+        '''
+        Return the list of mine functions stored for a minion
+        '''
+        mdir = self._mine_dir(minion)
+        try:
+            return [unquote(fn_[:-len(MINE_EXT)]) for fn_ in os.listdir(mdir)
+                    if fn_.endswith(MINE_EXT)]
+        except OSError:
+            return list(self._read_legacy(minion))
+
+    def store(self, minion, data, clear=False):
+        '''
+        Store the passed dict of mine function data for a minion. If
+        ``clear`` is True all other functions of that minion are removed.
+        '''
+        with self._lock(minion):
+            if clear:
+                self._flush(minion)
+            else:
+                self._migrate(minion)
+            for fun, fdata in six.iteritems(data):
+                self._write(minion, fun, fdata)
+
+    def delete(self, minion, fun):
+        '''
+        Remove a single function from the mine of a minion
+        '''
+        with self._lock(minion):
+            self._migrate(minion)
+            self.cache.pop((minion, fun), None)
+            try:
+                os.remove(self._fun_path(minion, fun))
+            except OSError:
+                return False
+            return True
+
+    def flush(self, minion):
+        '''
+        Remove all mine data of a minion
+        '''
+        with self._lock(minion):
+            self._flush(minion)
+
+    def _flush(self, minion):
+        for key in list(self.cache):
+            if key[0] == minion:
+                self.cache.pop(key)
+        mdir = self._mine_dir(minion)
+        if os.path.isdir(mdir):
+            for fn_ in os.listdir(mdir):
+                try:
+                    os.remove(os.path.join(mdir, fn_))
+                except OSError:
+                    pass
+        try:
+            os.remove(os.path.join(self._minion_dir(minion), LEGACY_MINE_FILE))
+        except OSError:
+            pass
+
+    def get(self, minion, fun):
+        '''
+        Return the data of one mine function for a minion, or None
+        '''
+        path = self._fun_path(minion, fun)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.cache.pop((minion, fun), None)
+            if not os.path.isdir(self._mine_dir(minion)):
+                return self._read_legacy(minion).get(fun)
+            return None
+        sig = (stat.st_ino, stat.st_mtime, stat.st_size)
+        cached = self.cache.get((minion, fun))
+        if cached is not None and cached[0] == sig:
+            return cached[1]
+        try:
+            with salt.utils.fopen(path, 'rb') as fp_:
+                data = self.serial.load(fp_)
+        except Exception as exc:
+            log.warning(
+                'Unable to read mine data from {0}: {1}'.format(path, exc)
+            )
+            return None
+        self.cache[(minion, fun)] = (sig, data)
+        return data
+
+    def get_many(self, minions, fun):
+        '''
+        Return a dict of the data of one mine function for several minions,
+        minions without data for the function are left out
+        '''
+        ret = {}
+        for minion in minions:
+            fdata = self.get(minion, fun)
+            if fdata:
+                ret[minion] = fdata
+        return ret
+
+    def get_all(self, minion):
+        '''
+        Return the whole mine of a minion as a dict
+        '''
+        ret = {}
+        for fun in self.functions(minion):
+            fdata = self.get(minion, fun)
+            if fdata is not None:
+                ret[fun] = fdata
+        return ret
@@ -8,13 +8,18 @@ expected to return
 from __future__ import absolute_import
 import os
 import fnmatch
+import hashlib
 import re
+import time
 import logging
 
 # Import salt libs
 import salt.payload
 import salt.utils
+import salt.utils.atomicfile
+import salt.utils.mine
 from salt.defaults import DEFAULT_TARGET_DELIM
+from salt.utils.event import tagify
 from salt.exceptions import CommandExecutionError
 from salt._compat import string_types
 
@@ -70,6 +75,113 @@ def get_minion_data(minion, opts):
     return minion if minion else None, None, None
 
 
+class MinionDataCache(object):
+    '''
+    Write the grains and pillar of minions into the master minion data cache,
+    ``<cachedir>/minions/<minion id>/data.p``.
+
+    A content hash of the grains and of the pillar is kept next to the data
+    in ``data.hash`` so that unchanged data is not rewritten. When data does
+    change, and an event object is passed, a
+    ``salt/minion/<minion id>/data/change`` event listing the changed parts
+    is fired so that consumers can update their own indexes incrementally.
+    '''
+    def __init__(self, opts, event=None):
+        self.opts = opts
+        self.event = event
+        self.serial = salt.payload.Serial(opts)
+        self.cdir = os.path.join(opts['cachedir'], 'minions')
+
+    def _hash(self, data):
+        '''
+        Hash the serialized data. Dicts are serialized in their order, data
+        rendered again in another order is only written once more.
+        '''
+        return hashlib.sha1(self.serial.dumps(data)).hexdigest()
+
+    def _read(self, minion_id, fn_):
+        try:
+            with salt.utils.fopen(
+                    os.path.join(self.cdir, minion_id, fn_), 'rb') as fp_:
+                data = self.serial.load(fp_)
+        except (IOError, OSError):
+            return {}
+        except Exception as exc:
+            log.warning('Unable to read {0} of minion {1}: {2}'.format(
+                fn_, minion_id, exc))
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        return data
+
+    def _write(self, minion_id, fn_, data):
+        cdir = os.path.join(self.cdir, minion_id)
+        if not os.path.isdir(cdir):
+            try:
+                os.makedirs(cdir)
+            except OSError:
+                if not os.path.isdir(cdir):
+                    raise
+        with salt.utils.atomicfile.atomic_open(
+                os.path.join(cdir, fn_), 'w+b') as fp_:
+            fp_.write(self.serial.dumps(data))
+
+    def hashes(self, minion_id):
+        '''
+        Return the content hashes of the cached grains and pillar of a minion
+        '''
+        return self._read(minion_id, 'data.hash')
+
+    def store(self, minion_id, grains=None, pillar=None):
+        '''
+        Store the passed grains and/or pillar of a minion, a part which is
+        None is left untouched. Returns the list of the parts which changed.
+        '''
+        old_hashes = self.hashes(minion_id)
+        new_hashes = dict(old_hashes)
+        changed = []
+        for key, val in (('grains', grains), ('pillar', pillar)):
+            if val is None:
+                continue
+            new_hashes[key] = self._hash(val)
+            if new_hashes[key] != old_hashes.get(key):
+                changed.append(key)
+        if not changed:
+            return changed
+        if grains is None or pillar is None:
+            data = self._read(minion_id, 'data.p')
+        else:
+            data = {}
+        if grains is not None:
+            data['grains'] = grains
+        if pillar is not None:
+            data['pillar'] = pillar
+        self._write(minion_id, 'data.p', data)
+        self._write(minion_id, 'data.hash', new_hashes)
+        if self.event is not None:
+            self.event.fire_event(
+                {'id': minion_id, 'changed': changed},
+                tagify([minion_id, 'data', 'change'], 'minion')
+            )
+        return changed
+
+    def update_grains(self, minion_id, changed=None, removed=None):
+        '''
+        Apply a delta to the cached grains of a minion, as sent by the minion
+        on ``salt/minion/<minion id>/grains`` after a grains refresh. Returns
+        the list of the parts which changed.
+        '''
+        data = self._read(minion_id, 'data.p')
+        if 'grains' not in data:
+            # Nothing to apply the delta to, wait for the full grains
+            return []
+        grains = data['grains']
+        grains.update(changed or {})
+        for key in removed or ():
+            grains.pop(key, None)
+        return self.store(minion_id, grains=grains)
+
+
 def nodegroup_comp(nodegroup, nodegroups, skip=None):
     '''
     Recursively expand ``nodegroup`` from ``nodegroups``; ignore nodegroups in ``skip``
@@ -476,6 +588,70 @@ class CkMinions(object):
                         break
         return minions
 
+    def _presence_path(self):
+        return os.path.join(self.opts['cachedir'], 'presence.p')
+
+    def presence(self):
+        '''
+        Return a dict mapping minion ids to the time (in epoch seconds) at
+        which the master last saw them connected. The data is maintained by
+        the master's Maintenance process when ``presence_events`` is enabled.
+        '''
+        try:
+            with salt.utils.fopen(self._presence_path(), 'rb') as fp_:
+                data = self.serial.load(fp_)
+        except (IOError, OSError):
+            return {}
+        except Exception as exc:
+            log.warning('Unable to read presence data: {0}'.format(exc))
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        return data.get('last_seen', {})
+
+    def update_presence(self, present, now=None):
+        '''
+        Record the passed minion ids as seen at ``now`` and write the
+        presence data to the master cache. Minions whose keys are no longer
+        accepted are dropped. Returns the updated last-seen mapping.
+        '''
+        if now is None:
+            now = int(time.time())
+        last_seen = self.presence()
+        for id_ in present:
+            last_seen[id_] = now
+        try:
+            accepted = set(self._all_minions())
+        except OSError:
+            accepted = None
+        if accepted is not None:
+            for id_ in list(last_seen):
+                if id_ not in accepted:
+                    last_seen.pop(id_)
+        try:
+            with salt.utils.atomicfile.atomic_open(
+                    self._presence_path(), 'wb+') as fp_:
+                self.serial.dump({'updated': now,
+                                  'last_seen': last_seen}, fp_)
+        except (IOError, OSError) as exc:
+            log.error('Unable to write presence data: {0}'.format(exc))
+        return last_seen
+
+    def stale_ids(self, stale_time=None, now=None):
+        '''
+        Return the set of accepted minion ids which have not been seen
+        connected within ``stale_time`` seconds, or have never been seen
+        '''
+        if stale_time is None:
+            stale_time = self.opts.get('presence_stale_time', 180)
+        if now is None:
+            now = int(time.time())
+        last_seen = self.presence()
+        return set(
+            [id_ for id_ in self._all_minions()
+             if id_ not in last_seen or now - last_seen[id_] > stale_time]
+        )
+
     def _all_minions(self, expr=None):
         '''
         Return a list of all minions that have auth'd
@@ -762,23 +938,8 @@ def mine_get(tgt, fun, tgt_type='glob', opts=None):
     Gathers the data from the specified minions' mine, pass in the target,
     function to look up and the target type
     '''
-    ret = {}
-    serial = salt.payload.Serial(opts)
     checker = salt.utils.minions.CkMinions(opts)
     minions = checker.check_minions(
             tgt,
             tgt_type)
-    for minion in minions:
-        mine = os.path.join(
-                opts['cachedir'],
-                'minions',
-                minion,
-                'mine.p')
-        try:
-            with salt.utils.fopen(mine, 'rb') as fp_:
-                fdata = serial.load(fp_).get(fun)
-                if fdata:
-                    ret[minion] = fdata
-        except Exception:
-            continue
-    return ret
+    return salt.utils.mine.MineCache(opts).get_many(minions, fun)
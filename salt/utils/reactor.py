@@ -7,8 +7,6 @@ import glob
 import logging
 import multiprocessing
 
-import yaml
-
 # Import salt libs
 import salt.runner
 import salt.state
@@ -16,6 +14,7 @@ import salt.utils
 import salt.utils.cache
 import salt.utils.event
 import salt.utils.process
+import salt.utils.yamlloader
 from salt.ext.six import string_types, iterkeys
 from salt._compat import string_types
 log = logging.getLogger(__name__)
@@ -73,7 +72,7 @@ class Reactor(multiprocessing.Process, salt.state.Compiler):
         if isinstance(self.opts['reactor'], string_types):
             try:
                 with salt.utils.fopen(self.opts['reactor']) as fp_:
-                    react_map = yaml.safe_load(fp_.read())
+                    react_map = salt.utils.yamlloader.safe_load(fp_.read())
             except (OSError, IOError):
                 log.error(
                     'Failed to read reactor map: "{0}"'.format(
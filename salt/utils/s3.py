@@ -25,11 +25,14 @@ from salt._compat import ElementTree as ET
 
 log = logging.getLogger(__name__)
 
+# Size of the chunks objects are streamed to local files in
+CHUNK_SIZE = 65536
+
 
 def query(key, keyid, method='GET', params=None, headers=None,
           requesturl=None, return_url=False, bucket=None, service_url=None,
           path=None, return_bin=False, action=None, local_file=None,
-          verify_ssl=True):
+          verify_ssl=True, https_enable=True, path_style=False):
     '''
     Perform a query against an S3-like API. This function requires that a
     secret key and the id for that key are passed in. For instance:
@@ -57,6 +60,18 @@ def query(key, keyid, method='GET', params=None, headers=None,
     This is required if using S3 bucket names that contain a period, as
     these will not match Amazon's S3 wildcard certificates. Certificate
     verification is enabled by default.
+
+    S3-compatible services which do not support virtual host style bucket
+    addressing, or which are only reachable over plain HTTP (such as a local
+    test instance), can be used by setting ``path_style`` to True and
+    ``https_enable`` to False.
+
+    When ``local_file`` is passed to a GET, the object is streamed into it.
+    Conditional and ranged requests can be made by passing the
+    ``If-None-Match``, ``If-Match`` or ``Range`` headers. The local file is
+    only written for a 200 response, and appended to for a 206 (partial
+    content) response, so it is left alone when the object is not modified
+    or the request fails.
     '''
     if not headers:
         headers = {}
@@ -70,7 +85,7 @@ def query(key, keyid, method='GET', params=None, headers=None,
     if not service_url:
         service_url = 's3.amazonaws.com'
 
-    if bucket:
+    if bucket and not path_style:
         endpoint = '{0}.{1}'.format(bucket, service_url)
     else:
         endpoint = service_url
@@ -136,7 +151,10 @@ def query(key, keyid, method='GET', params=None, headers=None,
                 querystring = '{0}&{1}'.format(action, querystring)
             else:
                 querystring = action
-        requesturl = 'https://{0}/'.format(endpoint)
+        requesturl = '{0}://{1}/'.format('https' if https_enable else 'http',
+                                         endpoint)
+        if bucket and path_style:
+            requesturl += '{0}/'.format(bucket)
         if path:
             requesturl += path
         if querystring:
@@ -152,11 +170,13 @@ def query(key, keyid, method='GET', params=None, headers=None,
     log.debug('S3 Headers::')
     log.debug('    Authorization: {0}'.format(headers['Authorization']))
 
+    stream = bool(local_file) and method == 'GET'
     try:
         result = requests.request(method, requesturl, headers=headers,
                                   data=data,
-                                  verify=verify_ssl)
-        response = result.content
+                                  verify=verify_ssl,
+                                  stream=stream)
+        response = None if stream else result.content
     except requests.exceptions.HTTPError as exc:
         log.error('There was an error::')
         if hasattr(exc, 'code') and hasattr(exc, 'msg'):
@@ -202,9 +222,20 @@ def query(key, keyid, method='GET', params=None, headers=None,
 
     # This can be used to save a binary object to disk
     if local_file and method == 'GET':
+        if result.status_code == 304:
+            log.debug('{0} is up to date'.format(local_file))
+            result.close()
+            return
+        if result.status_code not in (200, 206):
+            log.error('Unable to fetch {0}: {1}'.format(requesturl,
+                                                        result.status_code))
+            result.close()
+            return
         log.debug('Saving to local file: {0}'.format(local_file))
-        with salt.utils.fopen(local_file, 'w') as out:
-            out.write(response)
+        mode = 'ab' if result.status_code == 206 else 'wb'
+        with salt.utils.fopen(local_file, mode) as out:
+            for chunk in result.iter_content(CHUNK_SIZE):
+                out.write(chunk)
         return 'Saved to local file: {0}'.format(local_file)
 
     # This can be used to return a binary object wholesale
@@ -233,6 +233,7 @@ import datetime
 import multiprocessing
 import threading
 import sys
+import heapq
 import logging
 import errno
 import random
@@ -291,6 +292,14 @@ class Schedule(object):
         self.schedule_returner = self.option('schedule_returner')
         # Keep track of the lowest loop interval needed in this variable
         self.loop_interval = sys.maxint
+        # Priority queue of (next evaluation time, job name)
+        self._queue = []
+        # The next evaluation time of each queued job
+        self._next_run = {}
+        # The data of each job as of its last evaluation
+        self._jobs = {}
+        # The pillar, grains and functions as of the last evaluation
+        self._refs = ()
         clean_proc_dir(opts)
 
     def option(self, opt):
@@ -332,6 +341,7 @@ class Schedule(object):
         # remove from self.intervals
         if name in self.intervals:
             del self.intervals[name]
+        self._forget_job(name)
 
     def add_job(self, data):
         '''
@@ -355,6 +365,7 @@ class Schedule(object):
         else:
             log.info('Added new job {0} to scheduler'.format(new_job))
         self.opts['schedule'].update(data)
+        self._forget_job(new_job)
         self.persist()
 
     def enable_job(self, name, where=None):
@@ -365,6 +376,7 @@ class Schedule(object):
             self.opts['pillar']['schedule'][name]['enabled'] = True
         else:
             self.opts['schedule'][name]['enabled'] = True
+        self._forget_job(name)
         log.info('Enabling job {0} in scheduler'.format(name))
 
     def disable_job(self, name, where=None):
@@ -375,6 +387,7 @@ class Schedule(object):
             self.opts['pillar']['schedule'][name]['enabled'] = False
         else:
             self.opts['schedule'][name]['enabled'] = False
+        self._forget_job(name)
         log.info('Disabling job {0} in scheduler'.format(name))
 
     def modify_job(self, name, schedule, where=None):
@@ -389,6 +402,7 @@ class Schedule(object):
             if name in self.opts['schedule']:
                 self.delete_job(name, where=where)
             self.opts['schedule'][name] = schedule
+        self._forget_job(name)
 
     def run_job(self, name, where=None):
         '''
@@ -447,6 +461,9 @@ class Schedule(object):
 
         # Remove all jobs from self.intervals
         self.intervals = {}
+        self._jobs = {}
+        self._next_run = {}
+        self._queue = []
 
         if 'schedule' in self.opts:
             if 'schedule' in schedule:
@@ -610,199 +627,283 @@ class Schedule(object):
                     # we can cleanly handle.
                     raise
 
+    def _job_times(self, data):
+        '''
+        Return the sorted list of the epoch times given by the ``when``
+        option of a job, resolving the names defined in the ``whens`` pillar
+        or grain
+        '''
+        whens = data['when']
+        if not isinstance(whens, list):
+            whens = [whens]
+        times = []
+        for i in whens:
+            _when = i
+            for source in (self.opts.get('pillar', {}),
+                           self.opts.get('grains', {})):
+                if isinstance(source, dict) and \
+                        isinstance(source.get('whens'), dict) and \
+                        i in source['whens']:
+                    _when = source['whens'][i]
+                    break
+            try:
+                when__ = dateutil_parser.parse(_when)
+            except (ValueError, TypeError, AttributeError):
+                continue
+            times.append(int(time.mktime(when__.timetuple())))
+        times.sort()
+        return times
+
+    def _next_fire_time(self, job, data, now):
+        '''
+        Return the time at which the job needs to be evaluated next, or None
+        if it only needs to be evaluated again once it is modified
+        '''
+        if job == 'enabled' or not isinstance(data, dict) or not data:
+            return None
+        if 'enabled' in data and not data['enabled']:
+            return None
+        func = data.get('function', data.get('func', data.get('fun')))
+        if func not in self.functions:
+            # The function may show up with the next module refresh
+            return now + 60
+        if 'until' in data and _WHEN_SUPPORTED:
+            try:
+                until__ = dateutil_parser.parse(data['until'])
+            except ValueError:
+                return None
+            if int(time.mktime(until__.timetuple())) <= now:
+                return None
+        time_elements = ['seconds', 'minutes', 'hours', 'days']
+        if True in [True for item in time_elements if item in data]:
+            if 'when' in data or 'cron' in data:
+                return None
+            if job not in self.intervals:
+                # Did not run yet, e.g. outside of its range
+                return now + 1
+            seconds = int(data.get('seconds', 0))
+            seconds += int(data.get('minutes', 0)) * 60
+            seconds += int(data.get('hours', 0)) * 3600
+            seconds += int(data.get('days', 0)) * 86400
+            return self.intervals[job] + seconds
+        elif 'when' in data:
+            if not _WHEN_SUPPORTED or 'cron' in data:
+                return None
+            for when in self._job_times(data):
+                if when > now:
+                    return when
+            return None
+        elif 'cron' in data:
+            if not _CRON_SUPPORTED:
+                return None
+            # Cron jobs are started one second ahead of their time
+            try:
+                return int(croniter.croniter(data['cron'], now + 1).get_next()) - 1
+            except (ValueError, KeyError):
+                return None
+        return None
+
+    def _queue_job(self, job, when):
+        '''
+        Set the time at which a job needs to be evaluated next
+        '''
+        self._next_run[job] = when
+        heapq.heappush(self._queue, (when, job))
+
+    def _forget_job(self, name):
+        '''
+        Make the next eval() pick up the changed data of a job
+        '''
+        self._jobs.pop(name, None)
+        self._next_run.pop(name, None)
+
+    def _sync_queue(self, schedule, now):
+        '''
+        Queue the jobs which are new or whose data was replaced since the
+        last evaluation. Changes to the pillar, grains or functions, which
+        jobs may depend on, requeue all jobs.
+        '''
+        refs = (self.opts.get('pillar'), self.opts.get('grains'), self.functions)
+        if len(refs) != len(self._refs) or \
+                [ref for ref, old in zip(refs, self._refs) if ref is not old]:
+            self._refs = refs
+            self._jobs = {}
+            self._next_run = {}
+            self._queue = []
+        for job, data in six.iteritems(schedule):
+            if job == 'enabled':
+                continue
+            if job not in self._jobs or self._jobs[job] is not data:
+                self._jobs[job] = data
+                self._queue_job(job, now)
+        if len(self._jobs) > len(schedule):
+            for job in list(self._jobs):
+                if job not in schedule:
+                    self._forget_job(job)
+
     def eval(self):
         '''
         Evaluate and execute the schedule
+
+        Only the jobs which are due are evaluated, the time at which each job
+        needs to be evaluated next is kept in a priority queue.
         '''
         schedule = self.option('schedule')
         if not isinstance(schedule, dict):
             raise ValueError('Schedule must be of type dict.')
         if 'enabled' in schedule and not schedule['enabled']:
             return
-        for job, data in six.iteritems(schedule):
-            if job == 'enabled' or not data:
-                continue
-            if not isinstance(data, dict):
-                log.error('Scheduled job "{0}" should have a dict value, not {1}'.format(job, type(data)))
-                continue
-            # Job is disabled, continue
-            if 'enabled' in data and not data['enabled']:
-                continue
-            if 'function' in data:
-                func = data['function']
-            elif 'func' in data:
-                func = data['func']
-            elif 'fun' in data:
-                func = data['fun']
-            else:
-                func = None
-            if func not in self.functions:
-                log.info(
-                    'Invalid function: {0} in job {1}. Ignoring.'.format(
-                        func, job
-                    )
-                )
+        now = int(time.time())
+        self._sync_queue(schedule, now)
+        while self._queue and self._queue[0][0] <= now:
+            when, job = heapq.heappop(self._queue)
+            if self._next_run.get(job) != when:
+                # Superseded by a later entry for the same job
                 continue
-            if 'name' not in data:
-                data['name'] = job
-            # Add up how many seconds between now and then
-            when = 0
-            seconds = 0
-            cron = 0
-            now = int(time.time())
-            time_conflict = False
-
-            if 'until' in data:
-                if not _WHEN_SUPPORTED:
-                    log.error('Missing python-dateutil.'
-                              'Ignoring until.')
-                else:
-                    until__ = dateutil_parser.parse(data['until'])
-                    until = int(time.mktime(until__.timetuple()))
-
-                    if until <= now:
-                        log.debug('Until time has passed '
-                                  'skipping job: {0}.'.format(data['name']))
-                        continue
-
-            for item in ['seconds', 'minutes', 'hours', 'days']:
-                if item in data and 'when' in data:
-                    time_conflict = True
-                if item in data and 'cron' in data:
-                    time_conflict = True
-
-            if time_conflict:
-                log.error('Unable to use "seconds", "minutes",'
-                          '"hours", or "days" with '
-                          '"when" or "cron" options. Ignoring.')
-                continue
-
-            if 'when' in data and 'cron' in data:
-                log.error('Unable to use "when" and "cron" options together.'
-                          'Ignoring.')
-                continue
-
-            time_elements = ['seconds', 'minutes', 'hours', 'days']
-            if True in [True for item in time_elements if item in data]:
-                # Add up how many seconds between now and then
-                seconds += int(data.get('seconds', 0))
-                seconds += int(data.get('minutes', 0)) * 60
-                seconds += int(data.get('hours', 0)) * 3600
-                seconds += int(data.get('days', 0)) * 86400
-            elif 'when' in data:
-                if not _WHEN_SUPPORTED:
-                    log.error('Missing python-dateutil.'
-                              'Ignoring job {0}'.format(job))
-                    continue
-
-                if isinstance(data['when'], list):
-                    _when = []
-                    for i in data['when']:
-                        if ('whens' in self.opts['pillar'] and
-                                i in self.opts['pillar']['whens']):
-                            if not isinstance(self.opts['pillar']['whens'],
-                                              dict):
-                                log.error('Pillar item "whens" must be dict.'
-                                          'Ignoring')
-                                continue
-                            __when = self.opts['pillar']['whens'][i]
-                            try:
-                                when__ = dateutil_parser.parse(__when)
-                            except ValueError:
-                                log.error('Invalid date string. Ignoring')
-                                continue
-                        elif ('whens' in self.opts['grains'] and
-                              i in self.opts['grains']['whens']):
-                            if not isinstance(self.opts['grains']['whens'],
-                                              dict):
-                                log.error('Grain "whens" must be dict.'
-                                          'Ignoring')
-                                continue
-                            __when = self.opts['grains']['whens'][i]
-                            try:
-                                when__ = dateutil_parser.parse(__when)
-                            except ValueError:
-                                log.error('Invalid date string. Ignoring')
-                                continue
-                        else:
-                            try:
-                                when__ = dateutil_parser.parse(i)
-                            except ValueError:
-                                log.error('Invalid date string {0}.'
-                                          'Ignoring job {1}.'.format(i, job))
-                                continue
-                        when = int(time.mktime(when__.timetuple()))
-                        if when >= now:
-                            _when.append(when)
-                    _when.sort()
-                    if _when:
-                        # Grab the first element
-                        # which is the next run time
-                        when = _when[0]
-
-                        # If we're switching to the next run in a list
-                        # ensure the job can run
-                        if '_when' in data and data['_when'] != when:
-                            data['_when_run'] = True
-                            data['_when'] = when
-                        seconds = when - now
-
-                        # scheduled time is in the past
-                        if seconds < 0:
-                            continue
-
-                        if '_when_run' not in data:
-                            data['_when_run'] = True
+            del self._next_run[job]
+            data = schedule.get(job)
+            try:
+                self._eval_job(job, data)
+            finally:
+                next_run = self._next_fire_time(job, data, now)
+                if next_run is not None:
+                    self._queue_job(job, max(next_run, now + 1))
 
-                        # Backup the run time
-                        if '_when' not in data:
-                            data['_when'] = when
+    def _eval_job(self, job, data):
+        '''
+        Evaluate and execute a single job of the schedule
+        '''
 
-                        # A new 'when' ensure _when_run is True
-                        if when > data['_when']:
-                            data['_when'] = when
-                            data['_when_run'] = True
+        if job == 'enabled' or not data:
+            return
+        if not isinstance(data, dict):
+            log.error('Scheduled job "{0}" should have a dict value, not {1}'.format(job, type(data)))
+            return
+        # Job is disabled, nothing to do
+        if 'enabled' in data and not data['enabled']:
+            return
+        if 'function' in data:
+            func = data['function']
+        elif 'func' in data:
+            func = data['func']
+        elif 'fun' in data:
+            func = data['fun']
+        else:
+            func = None
+        if func not in self.functions:
+            log.info(
+                'Invalid function: {0} in job {1}. Ignoring.'.format(
+                    func, job
+                )
+            )
+            return
+        if 'name' not in data:
+            data['name'] = job
+        # Add up how many seconds between now and then
+        when = 0
+        seconds = 0
+        cron = 0
+        now = int(time.time())
+        time_conflict = False
+
+        if 'until' in data:
+            if not _WHEN_SUPPORTED:
+                log.error('Missing python-dateutil.'
+                          'Ignoring until.')
+            else:
+                until__ = dateutil_parser.parse(data['until'])
+                until = int(time.mktime(until__.timetuple()))
+
+                if until <= now:
+                    log.debug('Until time has passed '
+                              'skipping job: {0}.'.format(data['name']))
+                    return
+
+        for item in ['seconds', 'minutes', 'hours', 'days']:
+            if item in data and 'when' in data:
+                time_conflict = True
+            if item in data and 'cron' in data:
+                time_conflict = True
+
+        if time_conflict:
+            log.error('Unable to use "seconds", "minutes",'
+                      '"hours", or "days" with '
+                      '"when" or "cron" options. Ignoring.')
+            return
 
-                    else:
-                        continue
+        if 'when' in data and 'cron' in data:
+            log.error('Unable to use "when" and "cron" options together.'
+                      'Ignoring.')
+            return
 
-                else:
+        time_elements = ['seconds', 'minutes', 'hours', 'days']
+        if True in [True for item in time_elements if item in data]:
+            # Add up how many seconds between now and then
+            seconds += int(data.get('seconds', 0))
+            seconds += int(data.get('minutes', 0)) * 60
+            seconds += int(data.get('hours', 0)) * 3600
+            seconds += int(data.get('days', 0)) * 86400
+        elif 'when' in data:
+            if not _WHEN_SUPPORTED:
+                log.error('Missing python-dateutil.'
+                          'Ignoring job {0}'.format(job))
+                return
+
+            if isinstance(data['when'], list):
+                _when = []
+                for i in data['when']:
                     if ('whens' in self.opts['pillar'] and
-                            data['when'] in self.opts['pillar']['whens']):
-                        if not isinstance(self.opts['pillar']['whens'], dict):
+                            i in self.opts['pillar']['whens']):
+                        if not isinstance(self.opts['pillar']['whens'],
+                                          dict):
                             log.error('Pillar item "whens" must be dict.'
                                       'Ignoring')
                             continue
-                        _when = self.opts['pillar']['whens'][data['when']]
+                        __when = self.opts['pillar']['whens'][i]
                         try:
-                            when__ = dateutil_parser.parse(_when)
+                            when__ = dateutil_parser.parse(__when)
                         except ValueError:
                             log.error('Invalid date string. Ignoring')
                             continue
                     elif ('whens' in self.opts['grains'] and
-                          data['when'] in self.opts['grains']['whens']):
-                        if not isinstance(self.opts['grains']['whens'], dict):
-                            log.error('Grain "whens" must be dict. Ignoring')
+                          i in self.opts['grains']['whens']):
+                        if not isinstance(self.opts['grains']['whens'],
+                                          dict):
+                            log.error('Grain "whens" must be dict.'
+                                      'Ignoring')
                             continue
-                        _when = self.opts['grains']['whens'][data['when']]
+                        __when = self.opts['grains']['whens'][i]
                         try:
-                            when__ = dateutil_parser.parse(_when)
+                            when__ = dateutil_parser.parse(__when)
                         except ValueError:
                             log.error('Invalid date string. Ignoring')
                             continue
                     else:
                         try:
-                            when__ = dateutil_parser.parse(data['when'])
+                            when__ = dateutil_parser.parse(i)
                         except ValueError:
-                            log.error('Invalid date string. Ignoring')
+                            log.error('Invalid date string {0}.'
+                                      'Ignoring job {1}.'.format(i, job))
                             continue
                     when = int(time.mktime(when__.timetuple()))
-                    now = int(time.time())
+                    if when >= now:
+                        _when.append(when)
+                _when.sort()
+                if _when:
+                    # Grab the first element
+                    # which is the next run time
+                    when = _when[0]
+
+                    # If we're switching to the next run in a list
+                    # ensure the job can run
+                    if '_when' in data and data['_when'] != when:
+                        data['_when_run'] = True
+                        data['_when'] = when
                     seconds = when - now
 
                     # scheduled time is in the past
                     if seconds < 0:
-                        continue
+                        return
 
                     if '_when_run' not in data:
                         data['_when_run'] = True
@@ -816,175 +917,228 @@ class Schedule(object):
                         data['_when'] = when
                         data['_when_run'] = True
 
-            elif 'cron' in data:
-                if not _CRON_SUPPORTED:
-                    log.error('Missing python-croniter. Ignoring job {0}'.format(job))
-                    continue
+                else:
+                    return
 
-                now = int(time.mktime(datetime.datetime.now().timetuple()))
-                try:
-                    cron = int(croniter.croniter(data['cron'], now).get_next())
-                except (ValueError, KeyError):
-                    log.error('Invalid cron string. Ignoring')
-                    continue
-                seconds = cron - now
             else:
-                continue
-
-            # Check if the seconds variable is lower than current lowest
-            # loop interval needed. If it is lower than overwrite variable
-            # external loops using can then check this variable for how often
-            # they need to reschedule themselves
-            # Not used with 'when' parameter, causes run away jobs and CPU
-            # spikes.
-            if 'when' not in data:
-                if seconds < self.loop_interval:
-                    self.loop_interval = seconds
-            run = False
-
-            if job in self.intervals:
-                if 'when' in data:
-                    if seconds == 0:
-                        if data['_when_run']:
-                            data['_when_run'] = False
-                            run = True
-                elif 'cron' in data:
-                    if seconds == 1:
-                        run = True
+                if ('whens' in self.opts['pillar'] and
+                        data['when'] in self.opts['pillar']['whens']):
+                    if not isinstance(self.opts['pillar']['whens'], dict):
+                        log.error('Pillar item "whens" must be dict.'
+                                  'Ignoring')
+                        return
+                    _when = self.opts['pillar']['whens'][data['when']]
+                    try:
+                        when__ = dateutil_parser.parse(_when)
+                    except ValueError:
+                        log.error('Invalid date string. Ignoring')
+                        return
+                elif ('whens' in self.opts['grains'] and
+                      data['when'] in self.opts['grains']['whens']):
+                    if not isinstance(self.opts['grains']['whens'], dict):
+                        log.error('Grain "whens" must be dict. Ignoring')
+                        return
+                    _when = self.opts['grains']['whens'][data['when']]
+                    try:
+                        when__ = dateutil_parser.parse(_when)
+                    except ValueError:
+                        log.error('Invalid date string. Ignoring')
+                        return
                 else:
-                    if now - self.intervals[job] >= seconds:
+                    try:
+                        when__ = dateutil_parser.parse(data['when'])
+                    except ValueError:
+                        log.error('Invalid date string. Ignoring')
+                        return
+                when = int(time.mktime(when__.timetuple()))
+                now = int(time.time())
+                seconds = when - now
+
+                # scheduled time is in the past
+                if seconds < 0:
+                    return
+
+                if '_when_run' not in data:
+                    data['_when_run'] = True
+
+                # Backup the run time
+                if '_when' not in data:
+                    data['_when'] = when
+
+                # A new 'when' ensure _when_run is True
+                if when > data['_when']:
+                    data['_when'] = when
+                    data['_when_run'] = True
+
+        elif 'cron' in data:
+            if not _CRON_SUPPORTED:
+                log.error('Missing python-croniter. Ignoring job {0}'.format(job))
+                return
+
+            now = int(time.mktime(datetime.datetime.now().timetuple()))
+            try:
+                cron = int(croniter.croniter(data['cron'], now).get_next())
+            except (ValueError, KeyError):
+                log.error('Invalid cron string. Ignoring')
+                return
+            seconds = cron - now
+        else:
+            return
+
+        # Check if the seconds variable is lower than current lowest
+        # loop interval needed. If it is lower than overwrite variable
+        # external loops using can then check this variable for how often
+        # they need to reschedule themselves
+        # Not used with 'when' parameter, causes run away jobs and CPU
+        # spikes.
+        if 'when' not in data:
+            if seconds < self.loop_interval:
+                self.loop_interval = seconds
+        run = False
+
+        if job in self.intervals:
+            if 'when' in data:
+                if seconds == 0:
+                    if data['_when_run']:
+                        data['_when_run'] = False
                         run = True
+            elif 'cron' in data:
+                if seconds == 1:
+                    run = True
             else:
-                if 'splay' in data:
-                    if 'when' in data:
-                        log.error('Unable to use "splay" with "when" option at this time. Ignoring.')
-                    elif 'cron' in data:
-                        log.error('Unable to use "splay" with "cron" option at this time. Ignoring.')
-                    else:
-                        if 'seconds' in data:
-                            data['_seconds'] = data['seconds']
-                        else:
-                            data['_seconds'] = 0
-
+                if now - self.intervals[job] >= seconds:
+                    run = True
+        else:
+            if 'splay' in data:
                 if 'when' in data:
-                    if seconds == 0:
-                        if data['_when_run']:
-                            data['_when_run'] = False
-                            run = True
+                    log.error('Unable to use "splay" with "when" option at this time. Ignoring.')
                 elif 'cron' in data:
-                    if seconds == 1:
-                        run = True
+                    log.error('Unable to use "splay" with "cron" option at this time. Ignoring.')
                 else:
-                    # If run_on_start is True, the job will run when the Salt
-                    # minion start.  If the value is False will run at the next
-                    # scheduled run.  Default is True.
-                    if 'run_on_start' in data:
-                        if data['run_on_start']:
-                            run = True
-                        else:
-                            self.intervals[job] = int(time.time())
+                    if 'seconds' in data:
+                        data['_seconds'] = data['seconds']
                     else:
-                        run = True
+                        data['_seconds'] = 0
 
-            if run:
-                if 'range' in data:
-                    if not _RANGE_SUPPORTED:
-                        log.error('Missing python-dateutil. Ignoring job {0}'.format(job))
-                        continue
+            if 'when' in data:
+                if seconds == 0:
+                    if data['_when_run']:
+                        data['_when_run'] = False
+                        run = True
+            elif 'cron' in data:
+                if seconds == 1:
+                    run = True
+            else:
+                # If run_on_start is True, the job will run when the Salt
+                # minion start.  If the value is False will run at the next
+                # scheduled run.  Default is True.
+                if 'run_on_start' in data:
+                    if data['run_on_start']:
+                        run = True
                     else:
-                        if isinstance(data['range'], dict):
-                            try:
-                                start = int(time.mktime(dateutil_parser.parse(data['range']['start']).timetuple()))
-                            except ValueError:
-                                log.error('Invalid date string for start. Ignoring job {0}.'.format(job))
-                                continue
-                            try:
-                                end = int(time.mktime(dateutil_parser.parse(data['range']['end']).timetuple()))
-                            except ValueError:
-                                log.error('Invalid date string for end. Ignoring job {0}.'.format(job))
-                                continue
-                            if end > start:
-                                if 'invert' in data['range'] and data['range']['invert']:
-                                    if now <= start or now >= end:
-                                        run = True
-                                    else:
-                                        run = False
+                        self.intervals[job] = int(time.time())
+                else:
+                    run = True
+
+        if run:
+            if 'range' in data:
+                if not _RANGE_SUPPORTED:
+                    log.error('Missing python-dateutil. Ignoring job {0}'.format(job))
+                    return
+                else:
+                    if isinstance(data['range'], dict):
+                        try:
+                            start = int(time.mktime(dateutil_parser.parse(data['range']['start']).timetuple()))
+                        except ValueError:
+                            log.error('Invalid date string for start. Ignoring job {0}.'.format(job))
+                            return
+                        try:
+                            end = int(time.mktime(dateutil_parser.parse(data['range']['end']).timetuple()))
+                        except ValueError:
+                            log.error('Invalid date string for end. Ignoring job {0}.'.format(job))
+                            return
+                        if end > start:
+                            if 'invert' in data['range'] and data['range']['invert']:
+                                if now <= start or now >= end:
+                                    run = True
                                 else:
-                                    if now >= start and now <= end:
-                                        run = True
-                                    else:
-                                        run = False
+                                    run = False
                             else:
-                                log.error('schedule.handle_func: Invalid range, end must be larger than start. \
-                                         Ignoring job {0}.'.format(job))
-                                continue
+                                if now >= start and now <= end:
+                                    run = True
+                                else:
+                                    run = False
                         else:
-                            log.error('schedule.handle_func: Invalid, range must be specified as a dictionary. \
+                            log.error('schedule.handle_func: Invalid range, end must be larger than start. \
                                      Ignoring job {0}.'.format(job))
-                            continue
+                            return
+                    else:
+                        log.error('schedule.handle_func: Invalid, range must be specified as a dictionary. \
+                                 Ignoring job {0}.'.format(job))
+                        return
 
-            if not run:
-                continue
-            else:
-                if 'splay' in data:
-                    if 'when' in data:
-                        log.error('Unable to use "splay" with "when" option at this time. Ignoring.')
+        if not run:
+            return
+        else:
+            if 'splay' in data:
+                if 'when' in data:
+                    log.error('Unable to use "splay" with "when" option at this time. Ignoring.')
+                else:
+                    if isinstance(data['splay'], dict):
+                        if data['splay']['end'] >= data['splay']['start']:
+                            splay = random.randint(data['splay']['start'], data['splay']['end'])
+                        else:
+                            log.error('schedule.handle_func: Invalid Splay, end must be larger than start. \
+                                     Ignoring splay.')
+                            splay = None
                     else:
-                        if isinstance(data['splay'], dict):
-                            if data['splay']['end'] >= data['splay']['start']:
-                                splay = random.randint(data['splay']['start'], data['splay']['end'])
-                            else:
-                                log.error('schedule.handle_func: Invalid Splay, end must be larger than start. \
-                                         Ignoring splay.')
-                                splay = None
+                        splay = random.randint(0, data['splay'])
+
+                    if splay:
+                        log.debug('schedule.handle_func: Adding splay of '
+                                  '{0} seconds to next run.'.format(splay))
+                        if 'seconds' in data:
+                            data['seconds'] = data['_seconds'] + splay
                         else:
-                            splay = random.randint(0, data['splay'])
+                            data['seconds'] = 0 + splay
 
-                        if splay:
-                            log.debug('schedule.handle_func: Adding splay of '
-                                      '{0} seconds to next run.'.format(splay))
-                            if 'seconds' in data:
-                                data['seconds'] = data['_seconds'] + splay
-                            else:
-                                data['seconds'] = 0 + splay
+            log.info('Running scheduled job: {0}'.format(job))
 
-                log.info('Running scheduled job: {0}'.format(job))
+        if 'jid_include' not in data or data['jid_include']:
+            data['jid_include'] = True
+            log.debug('schedule: This job was scheduled with jid_include, '
+                      'adding to cache (jid_include defaults to True)')
+            if 'maxrunning' in data:
+                log.debug('schedule: This job was scheduled with a max '
+                          'number of {0}'.format(data['maxrunning']))
+            else:
+                log.info('schedule: maxrunning parameter was not specified for '
+                         'job {0}, defaulting to 1.'.format(job))
+                data['maxrunning'] = 1
 
-            if 'jid_include' not in data or data['jid_include']:
-                data['jid_include'] = True
-                log.debug('schedule: This job was scheduled with jid_include, '
-                          'adding to cache (jid_include defaults to True)')
-                if 'maxrunning' in data:
-                    log.debug('schedule: This job was scheduled with a max '
-                              'number of {0}'.format(data['maxrunning']))
-                else:
-                    log.info('schedule: maxrunning parameter was not specified for '
-                             'job {0}, defaulting to 1.'.format(job))
-                    data['maxrunning'] = 1
-
-            if salt.utils.is_windows():
-                # Temporarily stash our function references.
-                # You can't pickle function references, and pickling is
-                # required when spawning new processes on Windows.
-                functions = self.functions
-                self.functions = {}
-                returners = self.returners
-                self.returners = {}
-            try:
-                if self.opts.get('multiprocessing', True):
-                    thread_cls = multiprocessing.Process
-                else:
-                    thread_cls = threading.Thread
-                proc = thread_cls(target=self.handle_func, args=(func, data))
-                proc.start()
-                if self.opts.get('multiprocessing', True):
-                    proc.join()
-            finally:
-                self.intervals[job] = now
-            if salt.utils.is_windows():
-                # Restore our function references.
-                self.functions = functions
-                self.returners = returners
+        if salt.utils.is_windows():
+            # Temporarily stash our function references.
+            # You can't pickle function references, and pickling is
+            # required when spawning new processes on Windows.
+            functions = self.functions
+            self.functions = {}
+            returners = self.returners
+            self.returners = {}
+        try:
+            if self.opts.get('multiprocessing', True):
+                thread_cls = multiprocessing.Process
+            else:
+                thread_cls = threading.Thread
+            proc = thread_cls(target=self.handle_func, args=(func, data))
+            proc.start()
+            if self.opts.get('multiprocessing', True):
+                proc.join()
+        finally:
+            self.intervals[job] = now
+        if salt.utils.is_windows():
+            # Restore our function references.
+            self.functions = functions
+            self.returners = returners
 
 
 def clean_proc_dir(opts):
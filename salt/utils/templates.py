@@ -7,6 +7,7 @@ from __future__ import absolute_import
 
 # Import python libs
 import codecs
+import hashlib
 import os
 import imp
 import logging
@@ -26,6 +27,7 @@ from salt.exceptions import (
 )
 from salt.utils.jinja import ensure_sequence_filter, show_full_context
 from salt.utils.jinja import SaltCacheLoader as JinjaSaltCacheLoader
+from salt.utils.jinja import SaltBytecodeCache
 from salt.utils.jinja import SerializerExtension as JinjaSerializerExtension
 from salt.utils.odict import OrderedDict
 from salt import __path__ as saltpath
@@ -41,6 +43,14 @@ TEMPLATE_DIRNAME = os.path.join(saltpath[0], 'templates')
 SLS_ENCODING = 'utf-8'  # this one has no BOM.
 SLS_ENCODER = codecs.getencoder(SLS_ENCODING)
 
+# Maximum number of compiled template strings kept for a Jinja environment
+JINJA_CODE_CACHE_SIZE = 256
+
+# Jinja environments for the templates from the salt fileserver, shared by
+# all the renders of a process: environment key -> (environment, code cache)
+_JINJA_ENVS = {}
+_JINJA_ENVS_PID = None
+
 
 def wrap_tmpl_func(render_str):
 
@@ -231,32 +241,10 @@ def _get_jinja_error(trace, context=None):
     return line, out
 
 
-def render_jinja_tmpl(tmplstr, context, tmplpath=None):
-    opts = context['opts']
-    saltenv = context['saltenv']
-    loader = None
-    newline = False
-
-    if tmplstr and not isinstance(tmplstr, six.text_type):
-        # http://jinja.pocoo.org/docs/api/#unicode
-        tmplstr = tmplstr.decode(SLS_ENCODING)
-
-    if tmplstr.endswith('\n'):
-        newline = True
-
-    if not saltenv:
-        if tmplpath:
-            # i.e., the template is from a file outside the state tree
-            #
-            # XXX: FileSystemLoader is not being properly instantiated here is
-            # it? At least it ain't according to:
-            #
-            #   http://jinja.pocoo.org/docs/api/#jinja2.FileSystemLoader
-            loader = jinja2.FileSystemLoader(
-                context, os.path.dirname(tmplpath))
-    else:
-        loader = JinjaSaltCacheLoader(opts, saltenv, pillar_rend=context.get('_pillar_rend', False))
-
+def _make_jinja_env(opts, loader, bytecode_cache=None):
+    '''
+    Create a Jinja environment with Salt's extensions, filters and globals
+    '''
     env_args = {'extensions': [], 'loader': loader}
 
     if hasattr(jinja2.ext, 'with_'):
@@ -278,6 +266,9 @@ def render_jinja_tmpl(tmplstr, context, tmplpath=None):
         log.debug('Jinja2 lstrip_blocks is enabled')
         env_args['lstrip_blocks'] = True
 
+    if bytecode_cache is not None:
+        env_args['bytecode_cache'] = bytecode_cache
+
     if opts.get('allow_undefined', False):
         jinja_env = jinja2.Environment(**env_args)
     else:
@@ -292,6 +283,119 @@ def render_jinja_tmpl(tmplstr, context, tmplpath=None):
 
     jinja_env.globals['odict'] = OrderedDict
     jinja_env.globals['show_full_context'] = show_full_context
+    return jinja_env
+
+
+def _get_bytecode_cache(opts):
+    '''
+    Return a Jinja bytecode cache in the cachedir, or None if disabled
+    '''
+    if not opts.get('jinja_bytecode_cache', False) or not opts.get('cachedir'):
+        return None
+    cache_dir = os.path.join(opts['cachedir'], 'jinja')
+    if not os.path.isdir(cache_dir):
+        try:
+            os.makedirs(cache_dir)
+        except OSError:
+            # Created by another process in the meantime
+            if not os.path.isdir(cache_dir):
+                log.warning(
+                    'Unable to create the Jinja bytecode cache directory '
+                    '{0}'.format(cache_dir)
+                )
+                return None
+    return SaltBytecodeCache(cache_dir)
+
+
+def _get_jinja_env(opts, saltenv, pillar_rend=False):
+    '''
+    Return a Jinja environment for a render of the templates of a salt
+    environment, and the cache of its compiled template strings.
+
+    The environment is an overlay of the environment kept by this process for
+    the salt environment, with globals of its own for the context of the
+    render. Its loader is shared by all the renders and reuses the code it
+    compiled for includes, imports and macro libraries. The loader fetches
+    them from the master again once per render and the code is compiled
+    again when their contents change.
+    '''
+    global _JINJA_ENVS_PID
+    if _JINJA_ENVS_PID != os.getpid():
+        # Forked, the file clients of the loaders belong to the parent
+        _JINJA_ENVS.clear()
+        _JINJA_ENVS_PID = os.getpid()
+
+    key = (saltenv,
+           pillar_rend,
+           tuple(JinjaSaltCacheLoader.get_searchpath(opts, saltenv)),
+           opts.get('cachedir'),
+           opts.get('file_client'),
+           opts.get('master_uri'),
+           opts.get('jinja_trim_blocks', False),
+           opts.get('jinja_lstrip_blocks', False),
+           opts.get('allow_undefined', False),
+           opts.get('jinja_bytecode_cache', False))
+    if key not in _JINJA_ENVS:
+        loader = JinjaSaltCacheLoader(opts, saltenv, pillar_rend=pillar_rend)
+        _JINJA_ENVS[key] = (
+            _make_jinja_env(opts, loader, _get_bytecode_cache(opts)),
+            {}
+        )
+    base_env, code_cache = _JINJA_ENVS[key]
+    base_env.loader.reset()
+    jinja_env = base_env.overlay()
+    # Never update the globals of the shared environment, they would leak
+    # the context of a render into the following ones
+    jinja_env.globals = dict(base_env.globals)
+    return jinja_env, code_cache
+
+
+def _jinja_from_string(jinja_env, tmplstr, code_cache=None):
+    '''
+    Return a template for tmplstr, reusing the code compiled for the same
+    string by earlier renders when code_cache is passed
+    '''
+    if code_cache is None:
+        return jinja_env.from_string(tmplstr)
+    digest = hashlib.sha1(tmplstr.encode(SLS_ENCODING)).hexdigest()
+    code = code_cache.get(digest)
+    if code is None:
+        code = jinja_env.compile(tmplstr)
+        if len(code_cache) >= JINJA_CODE_CACHE_SIZE:
+            code_cache.clear()
+        code_cache[digest] = code
+    return jinja_env.template_class.from_code(
+        jinja_env, code, jinja_env.make_globals(None))
+
+
+def render_jinja_tmpl(tmplstr, context, tmplpath=None):
+    opts = context['opts']
+    saltenv = context['saltenv']
+    loader = None
+    newline = False
+
+    if tmplstr and not isinstance(tmplstr, six.text_type):
+        # http://jinja.pocoo.org/docs/api/#unicode
+        tmplstr = tmplstr.decode(SLS_ENCODING)
+
+    if tmplstr.endswith('\n'):
+        newline = True
+
+    if not saltenv:
+        if tmplpath:
+            # i.e., the template is from a file outside the state tree
+            #
+            # XXX: FileSystemLoader is not being properly instantiated here is
+            # it? At least it ain't according to:
+            #
+            #   http://jinja.pocoo.org/docs/api/#jinja2.FileSystemLoader
+            loader = jinja2.FileSystemLoader(
+                context, os.path.dirname(tmplpath))
+        jinja_env = _make_jinja_env(opts, loader)
+        code_cache = None
+    else:
+        jinja_env, code_cache = _get_jinja_env(
+            opts, saltenv, pillar_rend=context.get('_pillar_rend', False))
 
     decoded_context = {}
     for key, value in six.iteritems(context):
@@ -302,7 +406,7 @@ def render_jinja_tmpl(tmplstr, context, tmplpath=None):
         decoded_context[key] = salt.utils.sdecode(value)
 
     try:
-        template = jinja_env.from_string(tmplstr)
+        template = _jinja_from_string(jinja_env, tmplstr, code_cache)
         template.globals.update(decoded_context)
         output = template.render(**decoded_context)
     except jinja2.exceptions.TemplateSyntaxError as exc:
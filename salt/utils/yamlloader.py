@@ -13,6 +13,10 @@ try:
 except Exception:
     pass
 
+# Whether PyYAML was built with libyaml, the loaders named *CSafeLoader below
+# fall back on the pure Python parser when it is not.
+HAS_LIBYAML = hasattr(yaml, 'CSafeLoader')
+
 # This function is safe and needs to stay as yaml.load. The load function
 # accepts a custom loader, and every time this function is used in Salt
 # the custom loader defined below is used. This should be altered though to
@@ -37,6 +41,9 @@ class SaltYamlSafeLoader(yaml.SafeLoader, object):
     '''
     def __init__(self, stream, dictclass=dict):
         yaml.SafeLoader.__init__(self, stream)
+        self._set_dictclass(dictclass)
+
+    def _set_dictclass(self, dictclass):
         if dictclass is not dict:
             # then assume ordered dict and use it for both !map and !omap
             self.add_constructor(
@@ -96,3 +103,28 @@ class SaltYamlSafeLoader(yaml.SafeLoader, object):
                 if node.value == '':
                     node.value = '0'
         return super(SaltYamlSafeLoader, self).construct_scalar(node)
+
+
+if HAS_LIBYAML:
+    # Plain YAML safe loader, for files not rendered with Salt's semantics
+    CSafeLoader = yaml.CSafeLoader
+
+    class SaltYamlCSafeLoader(yaml.CSafeLoader, SaltYamlSafeLoader):
+        '''
+        SaltYamlSafeLoader parsing with libyaml. The nodes are built by the C
+        parser and constructed by the same Python code, so the loaded data
+        is the same, only parse errors lack the text surrounding them.
+        '''
+        def __init__(self, stream, dictclass=dict):
+            yaml.CSafeLoader.__init__(self, stream)
+            self._set_dictclass(dictclass)
+else:
+    CSafeLoader = yaml.SafeLoader
+    SaltYamlCSafeLoader = SaltYamlSafeLoader
+
+
+def safe_load(stream):
+    '''
+    Load a YAML document like ``yaml.safe_load``, with libyaml when available
+    '''
+    return yaml.load(stream, Loader=CSafeLoader)
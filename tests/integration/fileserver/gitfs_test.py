@@ -4,6 +4,7 @@
 '''
 # Import Python libs
 from __future__ import absolute_import
+import hashlib
 import os
 import logging
 import pwd
@@ -126,5 +127,30 @@ class GitFSTest(integration.ModuleCase):
             ret = gitfs.envs()
             self.assertIn('base', ret)
 
+    def test_serve_file(self):
+        with patch.dict(gitfs.__opts__, {'cachedir': self.master_opts['cachedir'],
+                                         'gitfs_remotes': ['file://' + self.tmp_repo_dir],
+                                         'sock_dir': self.master_opts['sock_dir'],
+                                         'file_buffer_size': 262144}):
+            fnd = gitfs.find_file('testfile', 'base')
+            self.assertEqual(fnd['rel'], 'testfile')
+            # Small files are served from the object database
+            self.assertFalse(os.path.exists(fnd['path']))
+            load = {'saltenv': 'base', 'path': 'testfile', 'loc': 0}
+            ret = gitfs.serve_file(load, fnd)
+            with open(os.path.join(self.tmp_repo_dir, 'testfile'), 'rb') as fp_:
+                self.assertEqual(ret['data'], fp_.read())
+
+    def test_file_hash(self):
+        with patch.dict(gitfs.__opts__, {'cachedir': self.master_opts['cachedir'],
+                                         'gitfs_remotes': ['file://' + self.tmp_repo_dir],
+                                         'sock_dir': self.master_opts['sock_dir'],
+                                         'hash_type': 'md5'}):
+            fnd = gitfs.find_file('testfile', 'base')
+            ret = gitfs.file_hash({'saltenv': 'base', 'path': 'testfile'}, fnd)
+            with open(os.path.join(self.tmp_repo_dir, 'testfile'), 'rb') as fp_:
+                self.assertEqual(ret['hsum'],
+                                 hashlib.md5(fp_.read()).hexdigest())
+
 if __name__ == '__main__':
     integration.run_tests(GitFSTest)
@@ -6,6 +6,8 @@
 # Import Python libs
 from __future__ import absolute_import
 import os
+import shutil
+import tempfile
 
 # Import Salt Testing libs
 from salttesting import skipIf
@@ -15,6 +17,8 @@ ensure_in_syspath('../..')
 
 # Import salt libs
 import integration
+import salt.fileserver
+import salt.utils
 from salt.fileserver import roots
 from salt import fileclient
 
@@ -39,6 +43,22 @@ class RootsTest(integration.ModuleCase):
             ret = roots.file_list({'saltenv': 'base'})
             self.assertIn('testfile', ret)
 
+    def test_file_list_prefix(self):
+        with patch.dict(roots.__opts__, {'cachedir': self.master_opts['cachedir'],
+                                         'file_roots': self.master_opts['file_roots'],
+                                         'fileserver_ignoresymlinks': False,
+                                         'fileserver_followsymlinks': False,
+                                         'file_ignore_regex': False,
+                                         'file_ignore_glob': False}):
+            full = roots.file_list({'saltenv': 'base'})
+            # Served from the cache built by the first call
+            ret = roots.file_list({'saltenv': 'base', 'prefix': 'issue-'})
+            self.assertTrue(ret)
+            self.assertEqual(
+                sorted(ret),
+                sorted([x for x in full if x.startswith('issue-')])
+            )
+
     def test_find_file(self):
         with patch.dict(roots.__opts__, {'file_roots': self.master_opts['file_roots'],
                                          'fileserver_ignoresymlinks': False,
@@ -87,6 +107,33 @@ class RootsTest(integration.ModuleCase):
     def test_update(self):
         pass
 
+    def test_apply_changes(self):
+        tmp = tempfile.mkdtemp(dir=integration.TMP)
+        try:
+            kept = os.path.join(tmp, 'kept')
+            gone = os.path.join(tmp, 'gone')
+            for path in (kept, gone):
+                with salt.utils.fopen(path, 'w') as fp_:
+                    fp_.write(path)
+            mtime_map = salt.fileserver.generate_mtime_map({'base': [tmp]})
+            os.remove(gone)
+            subdir = os.path.join(tmp, 'subdir')
+            os.mkdir(subdir)
+            added = os.path.join(subdir, 'added')
+            with salt.utils.fopen(added, 'w') as fp_:
+                fp_.write(added)
+            # Only the new directory is reported, as if its contents were
+            # created before the watch on it was added
+            paths, listed = roots._apply_changes(mtime_map, set([gone, subdir]))
+            self.assertTrue(listed)
+            self.assertEqual(paths, set([gone, subdir, added]))
+            self.assertEqual(
+                sorted(mtime_map),
+                sorted(salt.fileserver.generate_mtime_map({'base': [tmp]}))
+            )
+        finally:
+            shutil.rmtree(tmp)
+
     def test_file_hash(self):
         with patch.dict(roots.__opts__, {'file_roots': self.master_opts['file_roots'],
                                  'fileserver_ignoresymlinks': False,
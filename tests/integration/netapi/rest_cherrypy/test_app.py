@@ -102,6 +102,19 @@ class TestLogin(BaseRestCherryPyTest):
         })
         self.assertEqual(response.status, '401 Unauthorized')
 
+    def test_jobs_bad_limit(self):
+        '''
+        Invalid paging values are a bad request
+        '''
+        ret = self.test_good_login()
+        token = ret.headers['X-Auth-Token']
+
+        for query in ('limit=abc', 'offset=abc', 'offset=-1'):
+            request, response = self.request(
+                '/jobs/20150401120000123456?{0}'.format(query),
+                headers={'X-Auth-Token': token})
+            self.assertEqual(response.status, '400 Bad Request')
+
     def test_logout(self):
         ret = self.test_good_login()
         token = ret.headers['X-Auth-Token']
@@ -438,6 +438,17 @@ class TestJobsSaltAPIHandler(SaltnadoTestCase):
         self.assertIn('Arguments', response_obj)
         self.assertIn('Result', response_obj)
 
+    def test_get_bad_limit(self):
+        '''
+        Invalid paging values are a bad request
+        '''
+        for query in ('limit=abc', 'offset=abc', 'offset=-1'):
+            response = self.fetch(
+                '/jobs/20150401120000123456?{0}'.format(query),
+                headers={saltnado.AUTH_TOKEN_HEADER: self.token['token']},
+                follow_redirects=False)
+            self.assertEqual(response.code, 400)
+
 
 # TODO: run all the same tests from the root handler, but for now since they are
 # the same code, we'll just sanity check
@@ -15,6 +15,7 @@ ensure_in_syspath('../../')
 
 # Import Salt libs
 import integration
+import salt.utils
 from salt.output import display_output
 
 
@@ -100,6 +101,32 @@ class OutputReturnTest(integration.ShellCase):
             trace = traceback.format_exc()
             self.assertEqual(trace, '')
 
+    def test_output_highstate_summary(self):
+        '''
+        Tests the highstate outputter only summarizing the states of every
+        minion
+        '''
+        opts = copy.deepcopy(self.minion_opts)
+        opts['output_file'] = os.path.join(
+            self.minion_opts['root_dir'], 'outputtest_summary')
+        opts['state_output'] = 'summary'
+        opts['color'] = False
+        state = {'file_|-motd_|-/etc/motd_|-managed': {
+            'result': True,
+            'changes': {'diff': 'New file'},
+            'comment': 'File /etc/motd updated',
+            '__run_num__': 0}}
+        data = {'minion1': state, 'minion2': copy.deepcopy(state)}
+        if os.path.exists(opts['output_file']):
+            os.remove(opts['output_file'])
+        display_output(data, out='highstate', opts=opts)
+        with salt.utils.fopen(opts['output_file']) as fp_:
+            output = fp_.read()
+        self.assertIn('minion1:', output)
+        self.assertIn('minion2:', output)
+        self.assertEqual(output.count('changed=1'), 2)
+        self.assertNotIn('ID:', output)
+
 
 if __name__ == '__main__':
     from integration import run_tests
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+'''
+Measure the throughput of salt.crypt.Crypticle for messages of the size of
+job publications up to large job returns.
+
+    python tests/perf/crypticle.py [runs]
+
+Set ``AES_GCM=1`` in the environment to measure the ``aes_gcm`` mode.
+'''
+
+# Import python libs
+from __future__ import absolute_import, print_function
+import os
+import sys
+import timeit
+
+# Import salt libs
+import salt.crypt
+
+
+def throughput(func, size, number, runs):
+    # timeit disables the garbage collector by default, which would hide
+    # its cost from the comparison
+    elapsed = min(timeit.repeat(func, setup='import gc; gc.enable()',
+                                number=number, repeat=runs))
+    return size * number / elapsed / 1024 / 1024
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    opts = {'serial': 'msgpack', 'aes_gcm': bool(os.environ.get('AES_GCM'))}
+    crypticle = salt.crypt.Crypticle(
+        opts, salt.crypt.Crypticle.generate_key_string())
+    for size in (100, 1024, 10 * 1024, 100 * 1024, 1024 * 1024):
+        number = max(10, 10 * 1024 * 1024 // size)
+        data = os.urandom(size)
+        msg = crypticle.encrypt(data)
+        obj = {'jid': '20150601123015123456', 'return': 'x' * size}
+        packed = crypticle.dumps(obj)
+        print('{0} bytes: encrypt {1:.1f} MB/s, decrypt {2:.1f} MB/s, '
+              'dumps {3:.1f} MB/s, loads {4:.1f} MB/s'.format(
+                  size,
+                  throughput(lambda: crypticle.encrypt(data), size, number, runs),
+                  throughput(lambda: crypticle.decrypt(msg), size, number, runs),
+                  throughput(lambda: crypticle.dumps(obj), size, number, runs),
+                  throughput(lambda: crypticle.loads(packed), size, number, runs)))
+
+
+if __name__ == '__main__':
+    main()
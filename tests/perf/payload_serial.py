@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+'''
+Measure the throughput of salt.payload.Serial against plain msgpack calls,
+with payloads shaped like small job publications and large job returns.
+
+    python tests/perf/payload_serial.py [runs]
+'''
+
+# Import python libs
+from __future__ import absolute_import, print_function
+import sys
+import timeit
+
+# Import salt libs
+import salt.payload
+
+# Import 3rd-party libs
+import msgpack
+
+
+def small_payload():
+    '''
+    A job publication
+    '''
+    return {'enc': 'aes',
+            'load': {'fun': 'test.ping', 'arg': [], 'tgt': '*',
+                     'jid': '20150601123015123456', 'tgt_type': 'glob',
+                     'ret': '', 'user': 'root'}}
+
+
+def large_payload(states=2000):
+    '''
+    The return of a highstate with the given number of states
+    '''
+    ret = {}
+    for idx in range(states):
+        ret['file_|-/srv/app/file{0}_|-/srv/app/file{0}_|-managed'.format(idx)] = {
+            'result': True,
+            'comment': 'File /srv/app/file{0} is in the correct state'.format(idx),
+            'name': '/srv/app/file{0}'.format(idx),
+            'changes': {},
+            'duration': 1.5,
+            '__run_num__': idx,
+        }
+    return {'id': 'minion', 'jid': '20150601123015123456', 'return': ret}
+
+
+def throughput(func, size, number, runs):
+    # timeit disables the garbage collector by default, which would hide
+    # its cost from the comparison
+    elapsed = min(timeit.repeat(func, setup='import gc; gc.enable()',
+                                number=number, repeat=runs))
+    return size * number / elapsed / 1024 / 1024
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    serial = salt.payload.Serial('msgpack')
+    for name, data, number in (('small', small_payload(), 20000),
+                               ('large', large_payload(), 20)):
+        packed = serial.dumps(data)
+        for label, dumps, loads in (
+                ('msgpack', msgpack.dumps,
+                 lambda msg: msgpack.loads(msg, use_list=True)),
+                ('Serial', serial.dumps, serial.loads)):
+            print('{0} ({1} bytes) {2}: dumps {3:.1f} MB/s, loads {4:.1f} MB/s'.format(
+                name, len(packed), label,
+                throughput(lambda: dumps(data), len(packed), number, runs),
+                throughput(lambda: loads(packed), len(packed), number, runs)))
+
+
+if __name__ == '__main__':
+    main()
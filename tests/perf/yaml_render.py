@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+'''
+Compare the time spent loading a large SLS file with the pure Python and the
+libyaml based YAML loaders of the yaml renderer.
+
+    python tests/perf/yaml_render.py [path/to/file.sls] [runs]
+'''
+
+# Import python libs
+from __future__ import absolute_import, print_function
+import sys
+import timeit
+
+# Import salt libs
+from salt.utils import yamlloader
+from salt.utils.odict import OrderedDict
+
+
+def sample_sls(states=2000):
+    '''
+    Generate a state file with the given number of states
+    '''
+    lines = []
+    for idx in range(states):
+        lines.extend([
+            '/srv/app/conf/file{0}.conf:'.format(idx),
+            '  file.managed:',
+            '    - source: salt://app/files/file{0}.conf'.format(idx),
+            '    - user: root',
+            '    - mode: 644',
+            '    - require:',
+            '      - pkg: app',
+        ])
+    return '\n'.join(lines)
+
+
+def main():
+    if len(sys.argv) > 1:
+        with open(sys.argv[1]) as fp_:
+            data = fp_.read()
+    else:
+        data = sample_sls()
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    for loader in (yamlloader.SaltYamlSafeLoader,
+                   yamlloader.SaltYamlCSafeLoader):
+        def load():
+            yamlloader.load(
+                data,
+                Loader=lambda stream: loader(stream, dictclass=OrderedDict))
+        elapsed = min(timeit.repeat(load, number=1, repeat=runs))
+        print('{0}: {1:.3f}s'.format(loader.__name__, elapsed))
+    if not yamlloader.HAS_LIBYAML:
+        print('PyYAML is not built with libyaml, both loaders are the same')
+
+
+if __name__ == '__main__':
+    main()
@@ -9,7 +9,7 @@ from __future__ import absolute_import
 # Import Salt Testing libs
 from salttesting import TestCase, skipIf
 from salttesting.helpers import ensure_in_syspath
-from salttesting.mock import patch, NO_MOCK, NO_MOCK_REASON
+from salttesting.mock import patch, MagicMock, NO_MOCK, NO_MOCK_REASON
 ensure_in_syspath('../')
 
 # Import Salt libs
@@ -76,6 +76,112 @@ class LocalClientTestCase(TestCase,
                                   'non_existent_group', 'test.ping', expr_form='nodegroup')
 
 
+class _Clock(object):
+    '''
+    A clock advanced by time.sleep, and the events due on it
+    '''
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):  # pylint: disable=unused-argument
+        self.now += 0.25
+
+    def events(self, schedule):
+        '''
+        Yield the events of a list of (time, event) once they are due, and
+        None while there is none
+        '''
+        schedule = list(schedule)
+        while True:
+            if schedule and schedule[0][0] <= self.now:
+                yield schedule.pop(0)[1]
+            else:
+                yield None
+
+
+def _ret(id_):
+    return {'tag': 'salt/job/1/ret/{0}'.format(id_),
+            'data': {'id': id_, 'return': True}}
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class GetIterReturnsTestCase(TestCase,
+                             integration.SaltClientTestCaseMixIn):
+    '''
+    Test how get_iter_returns waits for the minions after the timeout
+    '''
+    def _get_returns(self, returns, presence=None, job_info=()):
+        '''
+        Return the returns of job 1 sent to m1, and the mocked
+        gather_job_info
+        '''
+        clock = _Clock()
+        gather_job_info = MagicMock(return_value={'jid': '2'})
+
+        def get_returns_no_block(jid, **kwargs):  # pylint: disable=unused-argument
+            return clock.events(returns if jid == '1' else job_info)
+
+        with patch.dict(self.client.opts, {'order_masters': False,
+                                           'gather_job_timeout': 1,
+                                           'syndic_wait': 1}), \
+                patch.object(self.client, 'get_returns_no_block',
+                             get_returns_no_block), \
+                patch.object(self.client, 'gather_job_info', gather_job_info), \
+                patch.object(self.client, '_present_minions',
+                             MagicMock(return_value=presence)), \
+                patch('salt.utils.event.get_event', MagicMock()), \
+                patch('time.time', clock.time), \
+                patch('time.sleep', clock.sleep):
+            ret = list(self.client.get_iter_returns('1', ['m1'], timeout=2,
+                                                    expect_minions=True))
+        return ret, gather_job_info
+
+    def test_ack_then_return(self):
+        ack = {'tag': 'salt/job/1/ack/m1', 'data': {'id': 'm1'}}
+        ret, gather_job_info = self._get_returns(
+            [(0.1, ack), (3.5, _ret('m1'))],
+            presence=(set(['m1']), set()))
+        self.assertEqual(ret, [{'m1': {'ret': True}}])
+        # Acknowledged, no need to ask
+        self.assertFalse(gather_job_info.called)
+
+    def test_ack_then_job_died(self):
+        ack = {'tag': 'salt/job/1/ack/m1', 'data': {'id': 'm1'}}
+        ret, gather_job_info = self._get_returns(
+            [(0.1, ack)],
+            presence=(set(['m1']), set()))
+        self.assertEqual(ret, [{'m1': {'failed': True}}])
+        # The acknowledged minion is still asked once the ack expired
+        gather_job_info.assert_called_once_with('1', ['m1'], 'list')
+
+    def test_ack_then_running(self):
+        ack = {'tag': 'salt/job/1/ack/m1', 'data': {'id': 'm1'}}
+        running = {'tag': 'salt/job/2/ret/m1',
+                   'data': {'id': 'm1', 'return': {'jid': '1'}}}
+        ret, gather_job_info = self._get_returns(
+            [(0.1, ack), (9, _ret('m1'))],
+            presence=(set(['m1']), set()),
+            job_info=[(4.5, running)])
+        self.assertEqual(ret, [{'m1': {'ret': True}}])
+        # Asked once, then trusted for another timeout
+        self.assertEqual(gather_job_info.call_count, 2)
+
+    def test_not_present(self):
+        ret, gather_job_info = self._get_returns(
+            [], presence=(set(), set(['m1'])))
+        self.assertEqual(ret, [{'m1': {'failed': True}}])
+        self.assertFalse(gather_job_info.called)
+
+    def test_timeout(self):
+        ret, gather_job_info = self._get_returns([])
+        self.assertEqual(ret, [{'m1': {'failed': True}}])
+        gather_job_info.assert_called_once_with('1', ['m1'], 'list')
+
+
 if __name__ == '__main__':
     from integration import run_tests
-    run_tests(LocalClientTestCase, needs_daemon=False)
+    run_tests([LocalClientTestCase, GetIterReturnsTestCase],
+              needs_daemon=False)
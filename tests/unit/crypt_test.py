@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.crypt_test
+    ~~~~~~~~~~~~~~~~~~~~~
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import hashlib
+import hmac
+import os
+
+# Import Salt Testing libs
+from salttesting import TestCase, skipIf
+from salttesting.helpers import ensure_in_syspath
+from salttesting.mock import NO_MOCK, NO_MOCK_REASON, MagicMock, patch
+
+ensure_in_syspath('../')
+
+# Import salt libs
+from salt import crypt
+from salt.exceptions import AuthenticationError
+
+# Not bound without M2Crypto and PyCrypto
+AES = getattr(crypt, 'AES', None)
+HAS_GCM = hasattr(AES, 'MODE_GCM')
+
+
+@skipIf(AES is None, 'M2Crypto and PyCrypto are not installed')
+class CrypticleTestCase(TestCase):
+    '''
+    Test the encryption of the messages between the master and the minions
+    '''
+    def setUp(self):
+        self.opts = {'serial': 'msgpack'}
+        self.key = crypt.Crypticle.generate_key_string()
+        self.crypticle = crypt.Crypticle(self.opts, self.key)
+
+    def test_roundtrip(self):
+        for size in (0, 1, 15, 16, 17, 100000):
+            data = os.urandom(size)
+            self.assertEqual(
+                self.crypticle.decrypt(self.crypticle.encrypt(data)), data)
+        obj = {'fun': 'test.ping', 'arg': [], 'ret': 'x' * 1024}
+        self.assertEqual(self.crypticle.loads(self.crypticle.dumps(obj)), obj)
+
+    def test_message_format(self):
+        '''
+        Messages are the IV, the AES-CBC ciphertext and the HMAC-SHA256 of
+        both, as read by older masters and minions
+        '''
+        aes_key, hmac_key = self.crypticle.keys
+        msg = self.crypticle.encrypt('data')
+        sig = hmac.new(hmac_key, msg[:-crypt.Crypticle.SIG_SIZE],
+                       hashlib.sha256).digest()
+        self.assertEqual(msg[-crypt.Crypticle.SIG_SIZE:], sig)
+        cypher = crypt.AES.new(aes_key,
+                               crypt.AES.MODE_CBC,
+                               msg[:crypt.Crypticle.AES_BLOCK_SIZE])
+        data = cypher.decrypt(msg[crypt.Crypticle.AES_BLOCK_SIZE:
+                                  -crypt.Crypticle.SIG_SIZE])
+        self.assertEqual(data, 'data' + 12 * chr(12))
+
+    def test_tampered(self):
+        msg = self.crypticle.encrypt('data')
+        tampered = msg[:20] + chr(ord(msg[20]) ^ 1) + msg[21:]
+        self.assertRaises(AuthenticationError,
+                          self.crypticle.decrypt,
+                          tampered)
+        self.assertRaises(AuthenticationError,
+                          self.crypticle.decrypt,
+                          msg[:crypt.Crypticle.SIG_SIZE])
+
+    @skipIf(not HAS_GCM, 'AES-GCM is not available')
+    def test_gcm(self):
+        gcm = crypt.Crypticle({'serial': 'msgpack', 'aes_gcm': True},
+                              self.key)
+        obj = {'fun': 'test.ping', 'arg': [], 'ret': 'x' * 1024}
+        msg = gcm.dumps(obj)
+        self.assertTrue(msg.startswith(crypt.Crypticle.GCM_MARKER))
+        self.assertEqual(gcm.loads(msg), obj)
+        tampered = msg[:20] + chr(ord(msg[20]) ^ 1) + msg[21:]
+        self.assertRaises(AuthenticationError, gcm.decrypt, tampered)
+
+    @skipIf(NO_MOCK, NO_MOCK_REASON)
+    def test_gcm_mismatch(self):
+        '''
+        Messages of a peer with a different aes_gcm setting are reported
+        '''
+        # Only checking the marker, GCM itself is not used
+        with patch.object(crypt, 'AES', MagicMock(MODE_GCM=11)):
+            gcm = crypt.Crypticle({'serial': 'msgpack', 'aes_gcm': True},
+                                  self.key)
+        gcm_msg = crypt.Crypticle.GCM_MARKER + os.urandom(
+            crypt.Crypticle.GCM_NONCE_SIZE + 16 + crypt.Crypticle.GCM_TAG_SIZE)
+        self.assertRaisesRegexp(AuthenticationError,
+                                'encrypted with AES-GCM.*disabled',
+                                self.crypticle.decrypt,
+                                gcm_msg)
+        self.assertRaisesRegexp(AuthenticationError,
+                                'encrypted with AES-CBC.*enabled',
+                                gcm.decrypt,
+                                self.crypticle.encrypt('data'))
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(CrypticleTestCase, needs_daemon=False)
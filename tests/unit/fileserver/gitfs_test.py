@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.fileserver.gitfs_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Test the concurrent fetches of gitfs remotes
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import shutil
+import tempfile
+import threading
+import time
+
+# Import Salt Testing libs
+from salttesting import TestCase, skipIf
+from salttesting.mock import patch, MagicMock, NO_MOCK, NO_MOCK_REASON
+from salttesting.helpers import ensure_in_syspath
+
+ensure_in_syspath('../../')
+
+# Import Salt Libs
+from salt.fileserver import gitfs
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class GitfsUpdateTestCase(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        gitfs.__opts__ = {'cachedir': self.tmp_dir,
+                          'fileserver_events': False,
+                          'gitfs_update_workers': 2,
+                          'gitfs_update_timeout': 0.1}
+        gitfs._REMOTE_STATE.clear()
+        self.repos = [{'url': 'slow'}, {'url': 'fast'}]
+        self.release = threading.Event()
+        self.fetched = []
+
+    def tearDown(self):
+        self.release.set()
+        gitfs._REMOTE_STATE.clear()
+        shutil.rmtree(self.tmp_dir)
+
+    def _update_repo(self, repo, provider):
+        self.fetched.append(repo['url'])
+        if repo['url'] == 'slow':
+            self.release.wait(10)
+
+    def _update(self):
+        with patch.multiple(gitfs,
+                            _get_provider=MagicMock(return_value='gitpython'),
+                            _clear_old_remotes=MagicMock(
+                                return_value=(False, self.repos)),
+                            _update_repo=self._update_repo,
+                            envs=MagicMock(return_value=['base'])), \
+                patch('salt.fileserver.update_file_list_generation',
+                      MagicMock()), \
+                patch('salt.fileserver.reap_fileserver_cache_dir',
+                      MagicMock()):
+            gitfs.update()
+
+    def test_fetch_in_flight(self):
+        '''
+        A remote whose fetch outlived the update timeout is not fetched again
+        until that fetch is done
+        '''
+        self._update()
+        self.assertEqual(sorted(self.fetched), ['fast', 'slow'])
+        self._update()
+        self.assertEqual(sorted(self.fetched), ['fast', 'fast', 'slow'])
+        self.release.set()
+        for _ in range(100):
+            if not gitfs._REMOTE_STATE['slow']['in_flight']:
+                break
+            time.sleep(0.05)
+        self._update()
+        self.assertEqual(self.fetched.count('slow'), 2)
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(GitfsUpdateTestCase, needs_daemon=False)
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.fileserver.list_cache_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Test the file list caches shared by the fileserver backends
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import os
+import shutil
+import tempfile
+
+# Import Salt Testing libs
+from salttesting import TestCase
+from salttesting.helpers import ensure_in_syspath
+
+ensure_in_syspath('../../')
+
+# Import Salt Libs
+import salt.fileserver
+
+
+class FileListCacheTestCase(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.opts = {'cachedir': self.tmp_dir, 'serial': 'msgpack'}
+        salt.fileserver.update_file_list_generation(self.opts, 'test', False)
+        self.list_cachedir = os.path.join(self.tmp_dir, 'file_lists', 'test')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _check(self, saltenv):
+        return salt.fileserver.check_file_list_cache(
+            self.opts,
+            'files',
+            os.path.join(self.list_cachedir, '{0}.p'.format(saltenv)),
+            os.path.join(self.list_cachedir, '.{0}.w'.format(saltenv)))
+
+    def _write(self, saltenv, files):
+        salt.fileserver.write_file_list_cache(
+            self.opts,
+            {'files': files},
+            os.path.join(self.list_cachedir, '{0}.p'.format(saltenv)),
+            os.path.join(self.list_cachedir, '.{0}.w'.format(saltenv)))
+
+    def test_cache(self):
+        self.assertEqual(self._check('base'), (None, True, True))
+        self._write('base', ['top.sls'])
+        self.assertEqual(self._check('base'), (['top.sls'], False, False))
+
+    def test_invalidate(self):
+        for saltenv in ('base', 'dev'):
+            self._check(saltenv)
+            self._write(saltenv, ['top.sls'])
+        salt.fileserver.invalidate_file_list_cache(
+            os.path.join(self.list_cachedir, 'base.p'))
+        self.assertEqual(self._check('base'), (None, True, True))
+        self.assertEqual(self._check('dev'), (['top.sls'], False, False))
+
+    def test_invalidate_while_building(self):
+        '''
+        A list which was being built when its environment was invalidated is
+        not used
+        '''
+        self.assertEqual(self._check('base'), (None, True, True))
+        salt.fileserver.invalidate_file_list_cache(
+            os.path.join(self.list_cachedir, 'base.p'))
+        self._write('base', ['old.sls'])
+        self.assertEqual(self._check('base'), (None, True, True))
+        self._write('base', ['new.sls'])
+        self.assertEqual(self._check('base'), (['new.sls'], False, False))
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(FileListCacheTestCase, needs_daemon=False)
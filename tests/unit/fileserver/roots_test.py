@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.fileserver.roots_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Test the file list caches of the roots backend when watching the
+    file_roots
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import os
+import shutil
+import tempfile
+
+# Import Salt Testing libs
+from salttesting import TestCase, skipIf
+from salttesting.mock import patch, MagicMock, NO_MOCK, NO_MOCK_REASON
+from salttesting.helpers import ensure_in_syspath
+
+ensure_in_syspath('../../')
+
+# Import Salt Libs
+import salt.fileserver
+from salt.fileserver import roots
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class RootsWatchTestCase(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.root = os.path.join(self.tmp_dir, 'base')
+        os.makedirs(self.root)
+        self._touch('top.sls')
+        roots.__opts__ = {'cachedir': os.path.join(self.tmp_dir, 'cache'),
+                          'file_roots': {'base': [self.root]},
+                          'fileserver_roots_watch': True,
+                          'fileserver_events': False,
+                          'fileserver_followsymlinks': False,
+                          'fileserver_ignoresymlinks': False,
+                          'file_ignore_regex': None,
+                          'file_ignore_glob': None,
+                          'serial': 'msgpack'}
+        roots._WATCHER.clear()
+        # Pretend the watches are set up, the first update scans the roots
+        roots._WATCHER['roots'] = set([self.root])
+        self._update(None)
+
+    def tearDown(self):
+        roots._WATCHER.clear()
+        shutil.rmtree(self.tmp_dir)
+
+    def _touch(self, name):
+        path = os.path.join(self.root, name)
+        open(path, 'w').close()
+        return path
+
+    def _update(self, changed):
+        with patch.object(roots, 'HAS_PYINOTIFY', True), \
+                patch.object(roots, '_watch_roots',
+                             MagicMock(return_value=changed)):
+            roots.update()
+
+    def test_change_while_building(self):
+        '''
+        A file list which was being built with the old contents of the
+        file_roots when a change was reported is not used
+        '''
+        list_cachedir = os.path.join(roots.__opts__['cachedir'],
+                                     'file_lists', 'roots')
+        list_cache = os.path.join(list_cachedir, 'base.p')
+        w_lock = os.path.join(list_cachedir, '.base.w')
+        # A worker starts building the list
+        self.assertEqual(
+            salt.fileserver.check_file_list_cache(
+                roots.__opts__, 'files', list_cache, w_lock),
+            (None, True, True)
+        )
+        self._update(set([self._touch('new.sls')]))
+        # and writes it once the change was handled
+        salt.fileserver.write_file_list_cache(
+            roots.__opts__, {'files': ['top.sls']}, list_cache, w_lock)
+        self.assertEqual(sorted(roots.file_list({'saltenv': 'base'})),
+                         ['new.sls', 'top.sls'])
+
+    def test_event_on_modify(self):
+        '''
+        A modified file is reported as a change, as when scanning the roots
+        '''
+        path = os.path.join(self.root, 'top.sls')
+        mtime = os.path.getmtime(path) + 10
+        os.utime(path, (mtime, mtime))
+        get_event = MagicMock()
+        with patch.dict(roots.__opts__, {'fileserver_events': True,
+                                         'sock_dir': self.tmp_dir,
+                                         'transport': 'zeromq'}), \
+                patch('salt.utils.event.get_event', get_event):
+            self._update(set([path]))
+        data = get_event.return_value.fire_event.call_args[0][0]
+        self.assertTrue(data['changed'])
+        self.assertEqual(data['paths'], [path])
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(RootsWatchTestCase, needs_daemon=False)
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+
+# Import python libs
+from __future__ import absolute_import
+import hashlib
+import os
+import shutil
+import tempfile
+
+# Import Salt Testing libs
+from salttesting import TestCase, skipIf
+from salttesting.mock import patch, MagicMock, NO_MOCK, NO_MOCK_REASON
+from salttesting.helpers import ensure_in_syspath
+
+ensure_in_syspath('../../')
+
+import integration
+
+# Import Salt Libs
+try:
+    from salt.fileserver import s3fs
+    HAS_S3FS = True
+except ImportError:
+    HAS_S3FS = False
+
+
+def _page(keys, truncated):
+    ret = [{'Name': 'bucket'}, {'IsTruncated': 'true' if truncated else 'false'}]
+    for key in keys:
+        ret.append({'Key': key,
+                    'ETag': '"{0}"'.format(key),
+                    'Size': '1',
+                    'LastModified': '2015-01-01T00:00:00.000Z'})
+    return ret
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+@skipIf(not HAS_S3FS, 'requests is not installed')
+class S3fsTestCase(TestCase):
+
+    def setUp(self):
+        s3fs.__opts__ = {'s3.workers': 1}
+
+    def test_list_bucket_pages(self):
+        query = MagicMock(side_effect=[_page(['base/a', 'base/b'], True),
+                                       _page(['base/c'], False)])
+        with patch.object(s3fs, '_s3_query', query):
+            ret = s3fs._list_bucket('bucket')
+        self.assertEqual(sorted(ret), ['base/a', 'base/b', 'base/c'])
+        self.assertEqual(ret['base/a']['ETag'], 'base/a')
+        self.assertEqual(ret['base/a']['Size'], 1)
+        # The second page starts after the last key of the first one
+        self.assertEqual(query.call_args_list[1][1]['params'],
+                         {'marker': 'base/b'})
+
+    def test_list_bucket_error(self):
+        query = MagicMock(return_value=[{'Code': 'AccessDenied'},
+                                        {'Message': 'Access Denied'}])
+        with patch.object(s3fs, '_s3_query', query):
+            self.assertIsNone(s3fs._list_bucket('bucket'))
+
+    def test_find_file_meta(self):
+        metadata = {'base': {'bucket': {'top.sls': {'ETag': 'abc'}}}}
+        self.assertEqual(
+            s3fs._find_file_meta(metadata, 'bucket', 'base', 'top.sls'),
+            {'ETag': 'abc'})
+        self.assertIsNone(
+            s3fs._find_file_meta(metadata, 'bucket', 'dev', 'top.sls'))
+
+
+def _md5(data):
+    return hashlib.md5(data).hexdigest()
+
+
+def _get(*bodies):
+    '''
+    Return a mocked _s3_query which answers the GETs with the given bodies,
+    appending to the partial file when a range was requested
+    '''
+    bodies = list(bodies)
+
+    def _query(**kwargs):
+        body = bodies.pop(0)
+        if body is None:
+            # Not modified
+            return None
+        mode = 'ab' if 'Range' in kwargs['headers'] else 'wb'
+        with open(kwargs['local_file'], mode) as fp_:
+            fp_.write(body)
+        return 'Saved to local file'
+    return MagicMock(side_effect=_query)
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+@skipIf(not HAS_S3FS, 'requests is not installed')
+class S3fsDownloadTestCase(TestCase):
+
+    def setUp(self):
+        self.cachedir = tempfile.mkdtemp(dir=integration.TMP)
+        s3fs.__opts__ = {'s3.workers': 1, 'cachedir': self.cachedir}
+        self.etags = patch.dict(s3fs._CACHED_ETAGS,
+                                {'sig': None, 'dirty': False, 'etags': {}})
+        self.etags.start()
+        self.cached = s3fs._get_cached_file_name('bucket', 'base', 'top.sls')
+
+    def tearDown(self):
+        self.etags.stop()
+        shutil.rmtree(self.cachedir, ignore_errors=True)
+
+    def _get_file(self, data, query):
+        metadata = {'base': {'bucket': {'top.sls': {'ETag': _md5(data),
+                                                    'Size': len(data)}}}}
+        with patch.object(s3fs, '_s3_query', query):
+            return s3fs._get_file_from_s3(
+                metadata, 'base', 'bucket', 'top.sls', self.cached)
+
+    def test_download(self):
+        query = _get(b'base:\n  - core\n')
+        self.assertTrue(self._get_file(b'base:\n  - core\n', query))
+        with open(self.cached, 'rb') as fp_:
+            self.assertEqual(fp_.read(), b'base:\n  - core\n')
+        self.assertEqual(s3fs._cached_etag(self.cached),
+                         _md5(b'base:\n  - core\n'))
+        # The cached copy matches the ETag, no request is made
+        self.assertFalse(self._get_file(b'base:\n  - core\n', query))
+        self.assertEqual(query.call_count, 1)
+
+    def test_resume(self):
+        data = b'base:\n  - core\n'
+        query = _get(data[:6], data[6:])
+        # The first attempt stops short and is kept for the next one
+        self.assertFalse(self._get_file(data, query))
+        self.assertFalse(os.path.isfile(self.cached))
+        self.assertTrue(self._get_file(data, query))
+        headers = query.call_args_list[1][1]['headers']
+        self.assertEqual(headers['Range'], 'bytes=6-')
+        self.assertEqual(headers['If-Match'], '"{0}"'.format(_md5(data)))
+        with open(self.cached, 'rb') as fp_:
+            self.assertEqual(fp_.read(), data)
+
+    def test_corrupt(self):
+        data = b'base:\n  - core\n'
+        # Right size, wrong content
+        query = _get(b'base:\n  - c0re\n')
+        self.assertFalse(self._get_file(data, query))
+        self.assertFalse(os.path.isfile(self.cached))
+        self.assertFalse(
+            os.path.isfile(s3fs._get_partial_file_name(self.cached)))
+
+    def test_too_long(self):
+        data = b'base:\n  - core\n'
+        query = _get(data[:6], data)
+        self.assertFalse(self._get_file(data, query))
+        # The resumed download was appended to the whole object
+        self.assertFalse(self._get_file(data, query))
+        self.assertFalse(os.path.isfile(self.cached))
+
+    def test_cached_etags_reload(self):
+        with open(self.cached, 'wb') as fp_:
+            fp_.write(b'base: {}\n')
+        self.assertEqual(s3fs._cached_etag(self.cached), _md5(b'base: {}\n'))
+        # Another process recorded the ETag of a multipart upload
+        sig, _ = s3fs._CACHED_ETAGS['etags'][self.cached]
+        s3fs._CACHED_ETAGS['etags'] = {self.cached: (sig, 'abc-2')}
+        s3fs._CACHED_ETAGS['dirty'] = True
+        s3fs._write_cached_etags()
+        s3fs._CACHED_ETAGS['etags'] = {}
+        self.assertEqual(s3fs._cached_etag(self.cached), 'abc-2')
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests([S3fsTestCase, S3fsDownloadTestCase], needs_daemon=False)
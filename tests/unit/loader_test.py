@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.loader_test
+    ~~~~~~~~~~~~~~~~~~~~~~
+
+    Test the per grain function cache of salt.loader.grains
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import os
+import shutil
+import tempfile
+
+# Import Salt Testing libs
+from salttesting import TestCase
+from salttesting.mock import MagicMock, patch
+from salttesting.helpers import ensure_in_syspath
+ensure_in_syspath('../')
+
+# Import salt libs
+import salt.loader
+
+
+class GrainsFuncTTLTestCase(TestCase):
+
+    def test_func_ttl(self):
+        opts = {'grains_cache_ttl': {'core.os_data': 3600,
+                                     'core.hostname': 'static',
+                                     'custom.*': '60',
+                                     'broken.*': 'soon'}}
+        self.assertEqual(salt.loader._grains_func_ttl(opts, 'core.os_data'),
+                         3600)
+        self.assertEqual(salt.loader._grains_func_ttl(opts, 'core.hostname'),
+                         'static')
+        self.assertEqual(salt.loader._grains_func_ttl(opts, 'custom.disks'),
+                         60)
+        # Invalid TTLs and unmatched functions are not cached
+        self.assertIsNone(salt.loader._grains_func_ttl(opts, 'broken.grain'))
+        self.assertIsNone(salt.loader._grains_func_ttl(opts, 'core.dns'))
+        self.assertIsNone(salt.loader._grains_func_ttl({}, 'core.os_data'))
+
+
+class GrainsFuncCacheTestCase(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.opts = {'cachedir': self.tmp_dir,
+                     'serial': 'msgpack',
+                     'grains_cache_ttl': {'core.os_data': 3600,
+                                          'core.hostname': 'static'}}
+        self.funcs = {'core.os_data': MagicMock(return_value={'os': 'Debian'}),
+                      'core.hostname': MagicMock(return_value={'host': 'a'}),
+                      'core.dns': MagicMock(return_value={'dns': []})}
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _grains(self, now, refresh_funcs=None):
+        with patch('salt.loader._module_dirs', MagicMock(return_value=[])), \
+                patch('salt.loader.LazyLoader', MagicMock(return_value=self.funcs)), \
+                patch('time.time', MagicMock(return_value=now)):
+            return salt.loader.grains(self.opts, refresh_funcs=refresh_funcs)
+
+    def _calls(self):
+        return dict((key, fun.call_count)
+                    for key, fun in self.funcs.items())
+
+    def test_cache(self):
+        grains = self._grains(1000)
+        self.assertEqual(grains, {'os': 'Debian', 'host': 'a', 'dns': []})
+        self.assertTrue(os.path.isfile(
+            os.path.join(self.tmp_dir, 'grains.funcs.p')))
+        # Only the grains without a TTL are recomputed, the others are read
+        # from the cache file
+        self.assertEqual(self._grains(1100), grains)
+        self.assertEqual(self._calls(),
+                         {'core.os_data': 1, 'core.hostname': 1, 'core.dns': 2})
+
+    def test_expiry(self):
+        self._grains(1000)
+        self.funcs['core.os_data'].return_value = {'os': 'Ubuntu'}
+        grains = self._grains(1000 + 3600)
+        self.assertEqual(grains['os'], 'Ubuntu')
+        # Static grains never expire
+        self.assertEqual(self._calls(),
+                         {'core.os_data': 2, 'core.hostname': 1, 'core.dns': 2})
+
+    def test_refresh_funcs(self):
+        self._grains(1000)
+        self.funcs['core.hostname'].return_value = {'host': 'b'}
+        grains = self._grains(1100, refresh_funcs=['core.hostname'])
+        self.assertEqual(grains['host'], 'b')
+        self.assertEqual(self._calls(),
+                         {'core.os_data': 1, 'core.hostname': 2, 'core.dns': 2})
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests([GrainsFuncTTLTestCase, GrainsFuncCacheTestCase],
+              needs_daemon=False)
@@ -0,0 +1,57 @@
+# coding: utf-8
+
+# Import Python libs
+from __future__ import absolute_import
+import json
+
+# Import Salt Testing libs
+from salttesting import TestCase
+from salttesting.helpers import ensure_in_syspath
+ensure_in_syspath('../../../')
+
+# Import Salt libs
+from salt.netapi.rest_cherrypy import event_fanout
+
+
+class TestEventFanout(TestCase):
+    def setUp(self):
+        self.fanout = event_fanout.EventFanout({}, buffer_size=2)
+
+    def _subscribe(self, tags=None, fmt='sse'):
+        # Register without starting the event bus thread
+        sub = event_fanout.EventSubscriber(self.fanout, tags or [''], fmt,
+                                           self.fanout.buffer_size)
+        for tag in sub.tags:
+            self.fanout.index.setdefault(tag, set()).add(sub)
+        return sub
+
+    def test_tag_filter(self):
+        jobs = self._subscribe(['salt/job/'], 'raw')
+        every = self._subscribe(fmt='raw')
+        event = {'tag': 'salt/auth', 'data': {}}
+        self.fanout.publish(event)
+        self.assertIsNone(jobs.get(timeout=0))
+        self.assertEqual(every.get(timeout=0), event)
+
+    def test_frames(self):
+        sse = self._subscribe()
+        ws = self._subscribe(fmt='ws')
+        event = {'tag': 'salt/auth', 'data': {}}
+        self.fanout.publish(event)
+        tag, data = sse.get(timeout=0).split(u'\n', 1)
+        self.assertEqual(tag, u'tag: salt/auth')
+        self.assertTrue(data.startswith(u'data: '))
+        self.assertEqual(json.loads(data[len(u'data: '):]), event)
+        self.assertEqual(ws.get(timeout=0), data)
+
+    def test_slow_consumer(self):
+        sub = self._subscribe()
+        for idx in range(3):
+            self.fanout.publish({'tag': 'salt/auth', 'data': {'idx': idx}})
+        self.assertRaises(StopIteration, sub.get, 0)
+        self.assertEqual(self.fanout.index, {})
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(TestEventFanout, needs_daemon=False)
@@ -284,6 +284,18 @@ class TestSaltAuthHandler(SaltnadoTestCase):
 
         self.assertEqual(response.code, 400)
 
+    def test_login_busy(self):
+        '''
+        Logins are turned away while too many calls wait for the executor
+        '''
+        self._app.executor = saltnado.ClientExecutor(workers=1, max_pending=1)
+        self._app.executor.pending = 1
+        response = self.fetch('/login',
+                               method='POST',
+                               body=urlencode(self.auth_creds),
+                               headers={'Content-Type': self.content_type_map['form']})
+        self.assertEqual(response.code, 503)
+
     def test_login_bad_creds(self):
         '''
         Test logins with bad/missing passwords
@@ -301,6 +313,39 @@ class TestSaltAuthHandler(SaltnadoTestCase):
         self.assertEqual(response.code, 401)
 
 
+class TestStatsSaltAPIHandler(SaltnadoTestCase):
+
+    def get_app(self):
+        urls = [('/stats', saltnado.StatsSaltAPIHandler),
+                ('/login', saltnado.SaltAuthHandler)]
+        return self.build_tornado_app(urls)
+
+    def test_get_unauthenticated(self):
+        '''
+        Without a token we are sent to the login page
+        '''
+        response = self.fetch('/stats', follow_redirects=False)
+        self.assertEqual(response.code, 302)
+        self.assertEqual(response.headers['Location'], '/login')
+
+    def test_get(self):
+        '''
+        The requests served so far are counted
+        '''
+        headers = {saltnado.AUTH_TOKEN_HEADER: self.token['token'],
+                   'Accept': self.content_type_map['json']}
+        self.fetch('/stats', headers=headers)
+        response = self.fetch('/stats', headers=headers)
+        self.assertEqual(response.code, 200)
+        stats = json.loads(response.body)['return']
+        self.assertEqual(stats['requests']['GET StatsSaltAPIHandler']['count'], 1)
+        self.assertEqual(stats['requests']['GET StatsSaltAPIHandler']['errors'], 0)
+        self.assertEqual(stats['executor']['pending'], 0)
+        self.assertEqual(stats['executor']['workers'],
+                         self.mod_opts.get('executor_threads', 10))
+
+
 if __name__ == '__main__':
     from integration import run_tests  # pylint: disable=import-error
-    run_tests(TestBaseSaltAPIHandler, TestSaltAuthHandler, needs_daemon=False)
+    run_tests(TestBaseSaltAPIHandler, TestSaltAuthHandler,
+              TestStatsSaltAPIHandler, needs_daemon=False)
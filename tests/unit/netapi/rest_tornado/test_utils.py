@@ -3,11 +3,14 @@
 # Import Python Libs
 from __future__ import absolute_import
 import os
+import multiprocessing
+import threading
 
 # Import Salt Testing Libs
 from salttesting.unit import skipIf
 from salttesting.case import TestCase
 from salttesting.helpers import ensure_in_syspath
+from salttesting.mock import NO_MOCK, NO_MOCK_REASON, MagicMock, patch
 ensure_in_syspath('../../..')
 
 # Import 3rd-party libs
@@ -131,6 +134,145 @@ class TestEventListener(AsyncTestCase):
             with self.assertRaises(saltnado.TimeoutException):
                 event_future.result()
 
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+@skipIf(HAS_TORNADO is False, 'The tornado package needs to be installed')
+class TestEventListenerListen(AsyncTestCase):
+    '''
+    Test queueing the events of a request before it waits for them
+    '''
+    def setUp(self):
+        super(TestEventListenerListen, self).setUp()
+        with patch('salt.utils.event.get_event', MagicMock()), \
+                patch.object(saltnado.zmqstream, 'ZMQStream', MagicMock()):
+            self.event_listener = saltnado.EventListener(
+                {}, {'sock_dir': SOCK_DIR, 'transport': 'zeromq'})
+        self.event_listener.event.unpack.side_effect = lambda raw, serial: raw
+
+    def _fire(self, tag, data):
+        self.event_listener._handle_event_socket_recv([(tag, data)])
+
+    def test_queued(self):
+        '''
+        Events fired before get_event is called are not lost
+        '''
+        self.event_listener.listen(1, 'salt/job/1/ret')
+        self._fire('salt/job/1/ret/m1', {'id': 'm1'})
+        self._fire('salt/job/2/ret/m1', {'id': 'm1'})
+        self._fire('salt/job/1/ret/m2', {'id': 'm2'})
+        first = self.event_listener.get_event(1, tag='salt/job/1/ret')
+        second = self.event_listener.get_event(1, tag='salt/job/1/ret')
+        self.assertEqual(first.result()['tag'], 'salt/job/1/ret/m1')
+        self.assertEqual(second.result()['tag'], 'salt/job/1/ret/m2')
+
+    def test_waiting(self):
+        '''
+        A request already waiting gets the event right away
+        '''
+        self.event_listener.listen(1, 'salt/job/1/ret')
+        future = self.event_listener.get_event(1, tag='salt/job/1/ret',
+                                               timeout=10)
+        self.assertFalse(future.done())
+        self._fire('salt/job/1/ret/m1', {'id': 'm1'})
+        self.assertEqual(future.result()['data'], {'id': 'm1'})
+        self.assertEqual(self.event_listener.timeout_map, {})
+
+    def test_timeout(self):
+        self.event_listener.listen(1, 'salt/job/1/ret')
+        future = self.event_listener.get_event(1, tag='salt/job/1/ret',
+                                               callback=self.stop,
+                                               timeout=0.1)
+        self.wait()
+        with self.assertRaises(saltnado.TimeoutException):
+            future.result()
+
+    def test_clean_timeout_futures(self):
+        '''
+        The queue of a finished request is dropped, its waiters timed out
+        '''
+        self.event_listener.listen(1, 'salt/job/1/ret')
+        future = self.event_listener.get_event(1, tag='salt/job/1/ret')
+        self.event_listener.clean_timeout_futures(1)
+        self.assertEqual(self.event_listener.listeners, {})
+        with self.assertRaises(saltnado.TimeoutException):
+            future.result()
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+@skipIf(HAS_TORNADO is False, 'The tornado package needs to be installed')
+class TestClientExecutor(AsyncTestCase):
+    '''
+    Test running blocking client calls in the executor threads
+    '''
+    @tornado.testing.gen_test
+    def test_submit(self):
+        executor = saltnado.ClientExecutor(workers=2)
+        result = yield executor.submit('add', lambda a, b: a + b, 1, b=2)
+        self.assertEqual(result, 3)
+        stats = executor.report()
+        self.assertEqual(stats['calls']['add']['count'], 1)
+        self.assertEqual(stats['pending'], 0)
+
+    @tornado.testing.gen_test
+    def test_submit_error(self):
+        def fail():
+            raise ValueError('no')
+        executor = saltnado.ClientExecutor(workers=1)
+        with self.assertRaises(ValueError):
+            yield executor.submit('fail', fail)
+        self.assertEqual(executor.report()['calls']['fail']['errors'], 1)
+
+    def test_busy(self):
+        executor = saltnado.ClientExecutor(workers=1, max_pending=1)
+        executor.pending = 1
+        with self.assertRaises(saltnado.ExecutorBusy):
+            executor.submit('local', MagicMock())
+
+    @tornado.testing.gen_test
+    def test_local_client_per_thread(self):
+        '''
+        Each thread publishes with its own LocalClient
+        '''
+        clients = MagicMock(side_effect=lambda mopts: MagicMock())
+        executor = saltnado.ClientExecutor(workers=1)
+        with patch('salt.client.get_local_client', clients):
+            first = yield executor.submit_local('local', {}, 'run_job', '*')
+            second = yield executor.submit_local('local', {}, 'run_job', '*')
+            # The client of the pool thread is reused
+            self.assertIs(first, second)
+            self.assertEqual(clients.call_count, 1)
+            # A client is not shared with the IOLoop thread
+            self.assertIsNot(executor._local_client({}).run_job.return_value,
+                             first)
+            self.assertEqual(clients.call_count, 2)
+
+    @tornado.testing.gen_test
+    def test_start_runner_busy_pool(self):
+        '''
+        Runners are started by the launcher while the threads of the pool are
+        busy
+        '''
+        started = multiprocessing.Queue()
+        runner_client = MagicMock()
+        runner_client.return_value.async.side_effect = \
+            lambda fun, low, pub: started.put((fun, low, pub))
+        release = threading.Event()
+        with patch('salt.runner.RunnerClient', runner_client):
+            executor = saltnado.ClientExecutor(workers=1, opts={})
+            busy = executor.submit('wait', release.wait, 30)
+        try:
+            pub = {'jid': '20150401120000123456', 'tag': 'salt/run/1'}
+            executor.start_runner('test.arg', {'fun': 'test.arg'}, pub)
+            self.assertEqual(started.get(timeout=10),
+                             ('test.arg', {'fun': 'test.arg'}, pub))
+            self.assertEqual(executor.pending, 1)
+        finally:
+            release.set()
+            executor.launcher.close()
+        yield busy
+
+
 if __name__ == '__main__':
     from integration import run_tests  # pylint: disable=import-error
-    run_tests(TestUtils, needs_daemon=False)
+    run_tests([TestUtils, TestEventListenerListen, TestClientExecutor],
+              needs_daemon=False)
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.output.output_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+'''
+
+# Import Python libs
+from __future__ import absolute_import
+
+# Import Salt Testing libs
+from salttesting import TestCase, skipIf
+from salttesting.helpers import ensure_in_syspath
+from salttesting.mock import NO_MOCK, NO_MOCK_REASON, MagicMock, patch
+
+ensure_in_syspath('../../')
+
+# Import Salt libs
+import salt.loader
+import salt.output
+
+
+def _output(data):
+    return '\n'.join(_output_iter(data))
+
+
+def _output_iter(data):
+    for line in data:
+        yield line
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class OutputTestCase(TestCase):
+    '''
+    Test streaming the output of the outputters with output_iter
+    '''
+    def _outputters(self, funcs):
+        return patch.object(
+            salt.loader, 'outputters',
+            MagicMock(return_value=salt.loader.FilterDictWrapper(funcs,
+                                                                 '.output')))
+
+    def test_get_printouts(self):
+        with self._outputters({'nested.output': _output,
+                               'nested.output_iter': _output_iter,
+                               'raw.output': _output}):
+            self.assertEqual(salt.output._get_printouts('nested', {}),
+                             (_output, _output_iter))
+            self.assertEqual(salt.output._get_printouts('raw', {}),
+                             (_output, None))
+            # Unknown outputters fall back to nested
+            self.assertEqual(salt.output._get_printouts('foo', {}),
+                             (_output, _output_iter))
+
+    def test_stream_rstrip(self):
+        '''
+        The streamed output ends like the output of try_printout
+        '''
+        for data in (['a  ', '', 'b  ', '  ', ''],
+                     ['', 'a', '  '],
+                     [' ', '']):
+            print_cli = MagicMock()
+            with patch.object(salt.output, 'print_cli', print_cli):
+                self.assertTrue(
+                    salt.output._stream_output(data, _output_iter, None))
+            streamed = '\n'.join([call[0][0]
+                                  for call in print_cli.call_args_list])
+            self.assertEqual(
+                streamed,
+                salt.output.try_printout(data, 'nested', {}, _output))
+
+    def test_display_output_stream(self):
+        print_cli = MagicMock()
+        output = MagicMock()
+        with self._outputters({'nested.output': output,
+                               'nested.output_iter': _output_iter}), \
+                patch.object(salt.output, 'print_cli', print_cli):
+            salt.output.display_output(['a', 'b'], 'nested', {'color': False})
+        self.assertFalse(output.called)
+        self.assertEqual(print_cli.call_args_list[0][0], ('a',))
+        self.assertEqual(print_cli.call_args_list[1][0], ('b',))
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(OutputTestCase, needs_daemon=False)
@@ -11,6 +11,7 @@
 from __future__ import absolute_import
 import time
 import errno
+import datetime
 import threading
 
 # Import Salt Testing libs
@@ -60,6 +61,48 @@ class PayloadTestCase(TestCase):
             self.assertNoOrderedDict(odata)
             self.assertEqual(idata, odata)
 
+    def test_datetime(self):
+        '''
+        datetime objects are encoded as they were before the default hook
+        '''
+        payload = salt.payload.Serial('msgpack')
+        now = datetime.datetime(2015, 6, 1, 12, 30, 15, 500)
+        odata = payload.loads(payload.dumps({'time': now}))
+        self.assertEqual(
+            odata['time'],
+            msgpack.packb(now.strftime('%Y%m%dT%H:%M:%S.%f'))
+        )
+
+    def test_very_long_ints(self):
+        payload = salt.payload.Serial('msgpack')
+        idata = {'jid': pow(2, 70), 'small': pow(2, 63)}
+        odata = payload.loads(payload.dumps(idata))
+        self.assertEqual(odata, {'jid': str(pow(2, 70)), 'small': pow(2, 63)})
+
+    def test_packer_reset_on_error(self):
+        '''
+        A failed dump does not leak into the next message
+        '''
+        payload = salt.payload.Serial('msgpack')
+        with self.assertRaises(TypeError):
+            payload.dumps({'a': 'b', 'c': object()})
+        self.assertEqual(payload.loads(payload.dumps({'d': 1})), {'d': 1})
+
+    def test_loads_memoryview(self):
+        payload = salt.payload.Serial('msgpack')
+        idata = {'load': [1, 2, 3]}
+        self.assertEqual(payload.loads(memoryview(payload.dumps(idata))),
+                         idata)
+
+    def test_unpacker(self):
+        payload = salt.payload.Serial('msgpack')
+        data = payload.dumps({'a': 1}) + payload.dumps([2])
+        unpacker = payload.unpacker()
+        unpacker.feed(data[:3])
+        self.assertEqual(list(unpacker), [])
+        unpacker.feed(data[3:])
+        self.assertEqual(list(unpacker), [{'a': 1}, [2]])
+
 
 class SREQTestCase(TestCase):
     port = 8845  # TODO: dynamically assign a port?
@@ -11,6 +11,7 @@ Based on joint work with Paul Tonelli about hg_pillar integration.
 # Import python libs
 from __future__ import absolute_import
 
+import hashlib
 import os
 import tempfile
 import shutil
@@ -174,6 +175,42 @@ class GitPillarTestCase(TestCase, integration.AdaptedConfigurationTestCaseMixIn)
         self.assertEqual(PILLAR_CONTENT, pil.compile_pillar(pillar_dirs={}))
         self.assertTrue(orig_ext_pillar.count < 7)
 
+    def _gitfs_clone(self):
+        'clone the source repo where gitfs would cache it'
+        url = 'file://{0}'.format(self.repo_path)
+        gitfs_dir = os.path.join(git_pillar.__opts__['cachedir'],
+                                 'gitfs',
+                                 hashlib.md5(url).hexdigest())
+        subprocess.check_call(['git', 'clone', self.repo_path, gitfs_dir])
+        git_pillar.__opts__['gitfs_remotes'] = [url]
+        return url, gitfs_dir
+
+    def test_gitfs_objects(self):
+        '''
+        A new repo borrows the objects of gitfs for its first fetch, and then
+        copies them so that it does not depend on the gitfs cache
+        '''
+        url, gitfs_dir = self._gitfs_clone()
+        gitpil = git_pillar.GitPillar('master', url, git_pillar.__opts__)
+        alternates, paths = gitpil._alternates()
+        self.assertEqual(paths, [os.path.join(gitfs_dir, '.git', 'objects')])
+        self.assertTrue(gitpil.update())
+        self.assertFalse(os.path.exists(alternates))
+        shutil.rmtree(gitfs_dir)
+        subprocess.check_call(['git', 'fsck'], cwd=gitpil.working_dir)
+
+    def test_gitfs_objects_gone(self):
+        '''
+        The repo is fetched again if the gitfs cache is cleared before the
+        borrowed objects were copied
+        '''
+        url, gitfs_dir = self._gitfs_clone()
+        gitpil = git_pillar.GitPillar('master', url, git_pillar.__opts__)
+        shutil.rmtree(gitfs_dir)
+        self.assertTrue(gitpil.update())
+        self.assertFalse(os.path.exists(gitpil._alternates()[0]))
+        subprocess.check_call(['git', 'fsck'], cwd=gitpil.working_dir)
+
 
 if __name__ == '__main__':
     from integration import run_tests
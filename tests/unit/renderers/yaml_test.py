@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+
+# Import Python libs
+from __future__ import absolute_import
+
+# Import Salt Testing libs
+from salttesting import skipIf, TestCase
+from salttesting.helpers import ensure_in_syspath
+from salttesting.mock import NO_MOCK, NO_MOCK_REASON, patch
+
+ensure_in_syspath('../..')
+
+# Import Salt libs
+from salt.exceptions import SaltRenderError
+from salt.renderers import yaml
+from salt.utils import yamlloader
+
+yaml.__salt__ = {}
+yaml.__opts__ = {}
+
+TAB_TEMPLATE = 'foo:\n\tbar: baz\n'
+BAD_CHARACTER_TEMPLATE = 'foo:\n  - @bar\n'
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class YAMLRendererTestCase(TestCase):
+    '''
+    Test the errors reported by the yaml renderer, with libyaml when it is
+    available and with the pure python parser
+    '''
+    def _render_error(self, template, loader):
+        with patch.object(yaml, 'SaltYamlCSafeLoader', loader):
+            with self.assertRaises(SaltRenderError) as exc:
+                yaml.render(template)
+        return exc.exception
+
+    def test_tab(self):
+        for loader in (yamlloader.SaltYamlCSafeLoader,
+                       yamlloader.SaltYamlSafeLoader):
+            exc = self._render_error(TAB_TEMPLATE, loader)
+            self.assertEqual(exc.error, 'Illegal tab character')
+            self.assertEqual(exc.line_num, 2)
+            self.assertIn('\tbar: baz', exc.context)
+
+    def test_bad_character(self):
+        for loader in (yamlloader.SaltYamlCSafeLoader,
+                       yamlloader.SaltYamlSafeLoader):
+            exc = self._render_error(BAD_CHARACTER_TEMPLATE, loader)
+            self.assertEqual(exc.error, 'Unknown yaml render error')
+            self.assertEqual(exc.line_num, 2)
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(YAMLRendererTestCase, needs_daemon=False)
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.returners.elasticsearch_return_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+'''
+
+# Import Python libs
+from __future__ import absolute_import
+
+# Import Salt Testing libs
+from salttesting import TestCase, skipIf
+from salttesting.helpers import ensure_in_syspath
+from salttesting.mock import NO_MOCK, NO_MOCK_REASON, MagicMock, patch
+
+ensure_in_syspath('../../')
+
+# Import salt libs
+import salt.utils.dbpool
+from salt.returners import elasticsearch_return
+
+elasticsearch_return.__salt__ = {}
+elasticsearch_return.__opts__ = {}
+
+RET = {'id': 'minion1',
+       'fun': 'test.ping',
+       'jid': '20150401120000123456',
+       'return': True}
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class ElasticsearchReturnerTestCase(TestCase):
+    '''
+    Test the elasticsearch returner with a mocked client
+    '''
+    def setUp(self):
+        self.config = {'elasticsearch:host': 'es:9200',
+                       'elasticsearch:index': 'salt'}
+        self.elasticsearch = MagicMock()
+        self.elasticsearch.helpers.scan.return_value = []
+        self.client = self.elasticsearch.Elasticsearch.return_value
+        pickler = MagicMock()
+        pickler.return_value.flatten.side_effect = lambda data: data
+        for patcher in (
+                patch.object(elasticsearch_return, 'elasticsearch',
+                             self.elasticsearch, create=True),
+                patch.object(elasticsearch_return, 'Pickler', pickler,
+                             create=True),
+                patch.dict(elasticsearch_return.__salt__,
+                           {'config.get': self.config.get}),
+                patch.dict(elasticsearch_return.__opts__,
+                           {'__role': 'master', 'id': 'master'}),
+                patch.dict(elasticsearch_return._CLIENTS, clear=True),
+                patch.object(elasticsearch_return, '_INDEXES', set()),
+                patch.dict(salt.utils.dbpool._WRITERS, clear=True)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _bulk_ids(self, call=-1):
+        actions = self.elasticsearch.helpers.bulk.call_args_list[call][0][1]
+        return [action['_id'] for action in actions]
+
+    def test_returner(self):
+        # Batching is opt-in, the return is indexed right away
+        elasticsearch_return.returner(dict(RET))
+        self.assertEqual(self._bulk_ids(),
+                         ['{0}:minion1'.format(RET['jid'])])
+        self.assertEqual(self.client.indices.create.call_count, 1)
+        elasticsearch_return.returner(dict(RET, id='minion2'))
+        # The client and index are set up once
+        self.assertEqual(self.elasticsearch.Elasticsearch.call_count, 1)
+        self.assertEqual(self.client.indices.create.call_count, 1)
+
+    def test_returner_batch(self):
+        self.config['elasticsearch:batch_size'] = 2
+        self.config['elasticsearch:flush_interval'] = 60
+        elasticsearch_return.returner(dict(RET))
+        self.assertFalse(self.elasticsearch.helpers.bulk.called)
+        elasticsearch_return.returner(dict(RET, id='minion2'))
+        self.assertEqual(self._bulk_ids(),
+                         ['{0}:minion1'.format(RET['jid']),
+                          '{0}:minion2'.format(RET['jid'])])
+
+    def test_returner_batch_failure(self):
+        self.config['elasticsearch:batch_size'] = 2
+        self.config['elasticsearch:flush_interval'] = 60
+        self.elasticsearch.helpers.bulk.side_effect = [Exception('down'),
+                                                       None]
+        elasticsearch_return.returner(dict(RET))
+        elasticsearch_return.returner(dict(RET, id='minion2'))
+        # The failed batch is sent again with the next one
+        elasticsearch_return.returner(dict(RET, id='minion3'))
+        self.assertEqual(len(self._bulk_ids()), 3)
+        self.assertEqual(salt.utils.dbpool.flush_writers(), 0)
+
+    def test_get_jid_flushes(self):
+        self.config['elasticsearch:batch_size'] = 10
+        self.config['elasticsearch:flush_interval'] = 60
+        elasticsearch_return.returner(dict(RET))
+        elasticsearch_return.get_jid(RET['jid'])
+        self.assertEqual(self._bulk_ids(),
+                         ['{0}:minion1'.format(RET['jid'])])
+        self.client.indices.refresh.assert_called_once_with(index='salt')
+        # Nothing left to send
+        elasticsearch_return.get_jid(RET['jid'])
+        self.assertEqual(self.client.indices.refresh.call_count, 1)
+
+    def test_minion_no_batch(self):
+        self.config['elasticsearch:batch_size'] = 10
+        with patch.dict(elasticsearch_return.__opts__, {'__role': 'minion'}):
+            elasticsearch_return.returner(dict(RET))
+        self.assertEqual(self.elasticsearch.helpers.bulk.call_count, 1)
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(ElasticsearchReturnerTestCase, needs_daemon=False)
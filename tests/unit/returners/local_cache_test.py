@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.returners.local_cache_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+'''
+
+# Import Python libs
+from __future__ import absolute_import
+import datetime
+import os
+import shutil
+import tempfile
+
+# Import Salt Testing libs
+from salttesting import TestCase
+from salttesting.helpers import ensure_in_syspath
+
+ensure_in_syspath('../../')
+
+# Import salt libs
+import integration
+import salt.payload
+import salt.utils
+from salt.returners import local_cache
+
+local_cache.__opts__ = {}
+
+
+class LocalCacheDedupTestCase(TestCase):
+    '''
+    Test the deduplicated storage of job returns
+    '''
+    def setUp(self):
+        self.blob_dir = tempfile.mkdtemp(dir=integration.TMP)
+        self.serial = salt.payload.Serial({'serial': 'msgpack'})
+
+    def tearDown(self):
+        shutil.rmtree(self.blob_dir, ignore_errors=True)
+
+    def _roundtrip(self, data):
+        reduced = local_cache._dedup(data, self.blob_dir, self.serial)
+        return reduced, local_cache._resolve(
+            reduced, self.blob_dir, self.serial, {})
+
+    def test_small_returns_inline(self):
+        reduced, data = self._roundtrip({'ret': True})
+        self.assertEqual(reduced, {'ret': True})
+        self.assertEqual(os.listdir(self.blob_dir), [])
+
+    def test_identical_returns(self):
+        ret = {'line{0}'.format(idx): 'x' * 20 for idx in range(50)}
+        first, data = self._roundtrip(ret)
+        self.assertEqual(data, ret)
+        second, data = self._roundtrip(dict(ret))
+        self.assertEqual(second, first)
+        self.assertEqual(data, ret)
+        self.assertEqual(len(os.listdir(self.blob_dir)), 1)
+
+    def test_identical_sub_trees(self):
+        changes = {'diff': 'y' * 1024}
+        first, data = self._roundtrip({'state_a': {'changes': changes,
+                                                   'duration': 1}})
+        second, data = self._roundtrip({'state_a': {'changes': changes,
+                                                    'duration': 2}})
+        self.assertEqual(data, {'state_a': {'changes': changes,
+                                            'duration': 2}})
+        # Only the large diff is stored, the rest stays inline
+        self.assertNotEqual(first, second)
+        self.assertEqual(len(os.listdir(self.blob_dir)), 1)
+
+
+class LocalCacheGetJidTestCase(TestCase):
+    '''
+    Test reading the returns of a job one minion at a time
+    '''
+    jid = '20150601123015123456'
+
+    def setUp(self):
+        self.cachedir = tempfile.mkdtemp(dir=integration.TMP)
+        local_cache.__opts__ = {'cachedir': self.cachedir,
+                                'hash_type': 'md5'}
+        serial = salt.payload.Serial({'serial': 'msgpack'})
+        jid_dir = local_cache._jid_dir(self.jid)
+        for minion in ('minion3', 'minion1', 'minion2'):
+            os.makedirs(os.path.join(jid_dir, minion))
+            with salt.utils.fopen(os.path.join(jid_dir, minion,
+                                               local_cache.RETURN_P), 'w+b') as fp_:
+                serial.dump(minion.upper(), fp_)
+
+    def tearDown(self):
+        local_cache.__opts__ = {}
+        shutil.rmtree(self.cachedir, ignore_errors=True)
+
+    def test_get_jid_iter(self):
+        self.assertEqual(
+            list(local_cache.get_jid_iter(self.jid)),
+            [('minion1', {'return': 'MINION1'}),
+             ('minion2', {'return': 'MINION2'}),
+             ('minion3', {'return': 'MINION3'})]
+        )
+        self.assertEqual(local_cache.get_jid(self.jid),
+                         dict(local_cache.get_jid_iter(self.jid)))
+
+    def test_get_jid_iter_select(self):
+        self.assertEqual(
+            [minion for minion, _ in
+             local_cache.get_jid_iter(self.jid, offset=1, limit=1)],
+            ['minion2']
+        )
+        self.assertEqual(
+            [minion for minion, _ in
+             local_cache.get_jid_iter(self.jid, minions=['minion3', 'other'])],
+            ['minion3']
+        )
+        self.assertEqual(list(local_cache.get_jid_iter('20150601000000000000')),
+                         [])
+
+
+class LocalCacheIndexTestCase(TestCase):
+    '''
+    Test listing and cleaning jobs with the job index
+    '''
+    def setUp(self):
+        self.cachedir = tempfile.mkdtemp(dir=integration.TMP)
+        local_cache.__opts__ = {'cachedir': self.cachedir,
+                                'hash_type': 'md5',
+                                'keep_jobs': 24}
+        now = datetime.datetime.now()
+        self.old = self._add_job(now - datetime.timedelta(hours=30))
+        self.recent = self._add_job(now - datetime.timedelta(hours=2))
+        self.new = self._add_job(now)
+
+    def tearDown(self):
+        local_cache.__opts__ = {}
+        shutil.rmtree(self.cachedir, ignore_errors=True)
+
+    def _add_job(self, start):
+        jid = start.strftime('%Y%m%d%H%M%S%f')
+        local_cache.prep_jid(passed_jid=jid)
+        local_cache.save_load(jid, {'jid': jid,
+                                    'fun': 'test.ping',
+                                    'arg': [],
+                                    'user': 'root'})
+        return jid
+
+    def test_build_index(self):
+        # Jobs are listed by walking the cache until the index is complete
+        self.assertFalse(local_cache._use_index())
+        self.assertEqual(sorted(local_cache.get_jids()),
+                         [self.old, self.recent, self.new])
+        local_cache.clean_old_jobs()
+        self.assertTrue(local_cache._use_index())
+        self.assertFalse(os.path.isdir(local_cache._jid_dir(self.old)))
+        self.assertEqual(sorted(local_cache.get_jids()),
+                         [self.recent, self.new])
+        self.assertEqual(local_cache.get_jids()[self.new]['Function'],
+                         'test.ping')
+
+    def test_get_jids_iter(self):
+        local_cache.clean_old_jobs()
+        self.assertEqual(
+            [jid for jid, _ in local_cache.get_jids_iter(reverse=True)],
+            [self.new, self.recent]
+        )
+        start = datetime.datetime.now() - datetime.timedelta(hours=1)
+        self.assertEqual(
+            [jid for jid, _ in local_cache.get_jids_iter(start_time=start)],
+            [self.new]
+        )
+
+    def test_clean_buckets(self):
+        local_cache.clean_old_jobs()
+        local_cache.__opts__['keep_jobs'] = 1
+        local_cache.clean_old_jobs()
+        self.assertFalse(os.path.isdir(local_cache._jid_dir(self.recent)))
+        self.assertEqual(list(local_cache.get_jids()), [self.new])
+
+    def test_index_add_failure(self):
+        local_cache.clean_old_jobs()
+        later = datetime.datetime.now() + datetime.timedelta(hours=2)
+        # A directory in place of the bucket fails the record
+        os.makedirs(os.path.join(local_cache._index_dir(),
+                                 later.strftime('%Y%m%d%H') +
+                                 local_cache.INDEX_EXT))
+        jid = self._add_job(later)
+        # The job is listed by walking the cache until the index is rebuilt
+        self.assertFalse(local_cache._use_index())
+        self.assertEqual(sorted(local_cache.get_jids()),
+                         [self.recent, self.new, jid])
+        local_cache.clean_old_jobs()
+        self.assertTrue(local_cache._use_index())
+        self.assertEqual(sorted(local_cache.get_jids()),
+                         [self.recent, self.new, jid])
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests([LocalCacheDedupTestCase,
+               LocalCacheGetJidTestCase,
+               LocalCacheIndexTestCase], needs_daemon=False)
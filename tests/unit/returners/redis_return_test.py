@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.returners.redis_return_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+'''
+
+# Import Python libs
+from __future__ import absolute_import
+import json
+
+# Import Salt Testing libs
+from salttesting import TestCase, skipIf
+from salttesting.helpers import ensure_in_syspath
+from salttesting.mock import NO_MOCK, NO_MOCK_REASON, MagicMock, patch
+
+ensure_in_syspath('../../')
+
+# Import salt libs
+from salt.returners import redis_return
+
+redis_return.__salt__ = {}
+redis_return.__opts__ = {}
+
+OPTIONS = {'host': 'salt', 'port': 6379, 'db': '0', 'batch_size': 1,
+           'flush_interval': 1}
+RET = {'id': 'minion1',
+       'fun': 'test.ping',
+       'jid': '20150401120000123456',
+       'return': True}
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+@patch.object(redis_return, '_get_options', MagicMock(return_value=OPTIONS))
+class RedisReturnerTestCase(TestCase):
+    '''
+    Test the redis returner with a mocked redis client
+    '''
+    def setUp(self):
+        self.redis = MagicMock(VERSION=(3, 0, 1))
+        self.pipe = self.redis.StrictRedis.return_value.pipeline.return_value
+        patcher = patch.object(redis_return, 'redis', self.redis, create=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.dict(redis_return._POOLS, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_pool(self):
+        redis_return._get_serv()
+        redis_return._get_serv()
+        self.redis.ConnectionPool.assert_called_once_with(
+            host='salt', port=6379, db='0')
+        self.redis.StrictRedis.assert_called_with(
+            connection_pool=self.redis.ConnectionPool.return_value)
+
+    def test_returner(self):
+        with patch.dict(redis_return.__opts__, {'keep_jobs': 2}):
+            redis_return.returner(RET)
+        self.pipe.hset.assert_any_call('ret:{0}'.format(RET['jid']),
+                                       'minion1', json.dumps(RET))
+        self.pipe.expire.assert_called_once_with(
+            'ret:{0}'.format(RET['jid']), 7200)
+        self.pipe.hset.assert_any_call('fun:test.ping', 'minion1', RET['jid'])
+        self.pipe.zadd.assert_called_once_with(
+            'jids', {RET['jid']: redis_return._jid_score(RET['jid'])})
+        self.pipe.sadd.assert_called_once_with('minions', 'minion1')
+        self.pipe.execute.assert_called_once_with()
+
+    def test_save_load(self):
+        self.redis.VERSION = (2, 10, 6)
+        with patch.dict(redis_return.__opts__, {'keep_jobs': 24}):
+            redis_return.save_load(RET['jid'], {'fun': 'test.ping'})
+        self.pipe.setex.assert_called_once_with(
+            'load:{0}'.format(RET['jid']), 86400,
+            json.dumps({'fun': 'test.ping'}))
+        # redis-py 2.x takes the score before the member
+        self.pipe.zadd.assert_called_once_with(
+            'jids', redis_return._jid_score(RET['jid']), RET['jid'])
+
+    def test_clean_old_jobs(self):
+        serv = self.redis.StrictRedis.return_value
+        with patch.dict(redis_return.__opts__, {'keep_jobs': 1}):
+            with patch('time.time', MagicMock(return_value=10000)):
+                redis_return.clean_old_jobs()
+        serv.zremrangebyscore.assert_called_once_with('jids', '-inf', 6400)
+
+    def test_keep_jobs_forever(self):
+        '''
+        Nothing expires with keep_jobs set to 0
+        '''
+        serv = self.redis.StrictRedis.return_value
+        with patch.dict(redis_return.__opts__, {'keep_jobs': 0}):
+            redis_return.returner(RET)
+            redis_return.save_load(RET['jid'], {'fun': 'test.ping'})
+            redis_return.clean_old_jobs()
+        self.assertFalse(self.pipe.expire.called)
+        self.assertFalse(self.pipe.setex.called)
+        self.pipe.set.assert_called_once_with(
+            'load:{0}'.format(RET['jid']), json.dumps({'fun': 'test.ping'}))
+        self.assertFalse(serv.zremrangebyscore.called)
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(RedisReturnerTestCase, needs_daemon=False)
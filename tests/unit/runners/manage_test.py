@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.runners.manage_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+'''
+
+# Import Python libs
+from __future__ import absolute_import
+
+# Import Salt Testing libs
+from salttesting import TestCase, skipIf
+from salttesting.helpers import ensure_in_syspath
+from salttesting.mock import NO_MOCK, NO_MOCK_REASON, MagicMock, patch
+
+ensure_in_syspath('../../')
+
+# Import Salt libs
+from salt.exceptions import SaltClientError
+from salt.runners import manage
+
+manage.__opts__ = {}
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class ManagePresenceTestCase(TestCase):
+    '''
+    Test the status of the minions answered from presence data
+    '''
+    def setUp(self):
+        manage.__opts__ = {'presence_events': True,
+                           'conf_file': '',
+                           'timeout': 5}
+        self.key = MagicMock()
+        self.key.return_value.list_keys.return_value = {
+            'minions': ['alpha', 'beta', 'gamma']
+        }
+        # gamma was never seen
+        self.ckminions = MagicMock()
+        self.ckminions.return_value.stale_ids.return_value = set(['beta',
+                                                                 'gamma'])
+        self.client = MagicMock()
+        self.wheel = MagicMock()
+        self.patches = [
+            patch('salt.key.Key', self.key),
+            patch('salt.utils.minions.CkMinions', self.ckminions),
+            patch('salt.client.get_local_client',
+                  MagicMock(return_value=self.client)),
+            patch('salt.wheel.Wheel', self.wheel),
+        ]
+        for patcher in self.patches:
+            patcher.start()
+
+    def tearDown(self):
+        for patcher in self.patches:
+            patcher.stop()
+        manage.__opts__ = {}
+
+    def _deleted(self):
+        return [call[1]['match']
+                for call in self.wheel.return_value.call_func.call_args_list]
+
+    def test_status(self):
+        self.assertEqual(manage.status(),
+                         {'up': ['alpha'], 'down': ['beta', 'gamma']})
+        self.assertFalse(self.client.cmd.called)
+
+    def test_down_removekeys_probes(self):
+        '''
+        Keys are only removed for the minions which do not answer a ping
+        '''
+        self.client.cmd.return_value = {'gamma': True}
+        self.assertEqual(manage.down(removekeys=True), ['beta'])
+        self.assertEqual(sorted(self.client.cmd.call_args[0][0]),
+                         ['beta', 'gamma'])
+        self.assertEqual(self._deleted(), ['beta'])
+
+    def test_down_removekeys_probe_failed(self):
+        self.client.cmd.side_effect = SaltClientError()
+        self.assertEqual(manage.down(removekeys=True), [])
+        self.assertEqual(self._deleted(), [])
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(ManagePresenceTestCase, needs_daemon=False)
@@ -8,11 +8,13 @@ import tempfile
 import json
 import datetime
 import pprint
+import shutil
 
 # Import Salt Testing libs
 from salttesting.unit import skipIf, TestCase
 from salttesting.case import ModuleCase
 from salttesting.helpers import ensure_in_syspath
+from salttesting.mock import NO_MOCK, NO_MOCK_REASON, patch
 ensure_in_syspath('../../')
 
 # Import salt libs
@@ -21,6 +23,7 @@ import salt.utils
 from salt.exceptions import SaltRenderError
 from salt.utils import get_context
 from salt.utils.jinja import (
+    SaltBytecodeCache,
     SaltCacheLoader,
     SerializerExtension,
     ensure_sequence_filter
@@ -31,6 +34,7 @@ from salt.utils.odict import OrderedDict
 # Import 3rd party libs
 import yaml
 from jinja2 import Environment, DictLoader, exceptions
+from jinja2.bccache import bc_magic
 try:
     import timelib  # pylint: disable=W0611
     HAS_TIMELIB = True
@@ -205,6 +209,70 @@ class TestGetTemplate(TestCase):
         self.assertEqual(fc.requests[0]['path'], 'salt://macro')
         SaltCacheLoader.file_client = _fc
 
+    @skipIf(NO_MOCK, NO_MOCK_REASON)
+    def test_env_cache(self):
+        '''
+        The code compiled for a template string and for the templates it
+        imports is reused by the following renders
+        '''
+        # Not shared with the renders of the other tests
+        opts = dict(self.local_opts, master_uri='tcp://test_env_cache')
+        filename = os.path.join(TEMPLATES_DIR, 'files', 'test', 'hello_import')
+        tmplstr = salt.utils.fopen(filename).read()
+        with patch.object(Environment, 'compile', autospec=True,
+                          side_effect=Environment.compile) as compile_:
+            out = render_jinja_tmpl(
+                tmplstr, dict(opts=opts, saltenv='test', a='Hi', b='Salt'))
+            self.assertEqual(out, 'Hey world !Hi Salt !\n')
+            # The template string and the imported macro
+            self.assertEqual(compile_.call_count, 2)
+            out = render_jinja_tmpl(tmplstr, dict(opts=opts, saltenv='test'))
+            self.assertEqual(out, 'Hey world !a b !\n')
+            self.assertEqual(compile_.call_count, 2)
+
+    def test_env_cache_context(self):
+        '''
+        The context of a render is not seen by the following renders
+        '''
+        tmplstr = '{{ secret|default("none") }}'
+        out = render_jinja_tmpl(
+            tmplstr,
+            dict(opts=self.local_opts, saltenv='test', secret='password'))
+        self.assertEqual(out, 'password')
+        out = render_jinja_tmpl(tmplstr,
+                                dict(opts=self.local_opts, saltenv='test'))
+        self.assertEqual(out, 'none')
+
+    def test_bytecode_cache(self):
+        '''
+        The bytecode of loaded templates is stored, and a damaged cache file
+        is ignored
+        '''
+        cache_dir = tempfile.mkdtemp()
+        try:
+            loader = DictLoader({'macro': '{% macro m() %}ok{% endmacro %}'})
+            tmpl = '{% from "macro" import m %}{{ m() }}'
+            env = Environment(loader=loader,
+                              bytecode_cache=SaltBytecodeCache(cache_dir))
+            self.assertEqual(env.from_string(tmpl).render(), 'ok')
+            cache_files = os.listdir(cache_dir)
+            self.assertEqual(len(cache_files), 1)
+            cache_file = os.path.join(cache_dir, cache_files[0])
+            with salt.utils.fopen(cache_file, 'rb') as fp_:
+                data = fp_.read()
+            # As left by a process killed while writing it, after the
+            # header
+            with salt.utils.fopen(cache_file, 'wb') as fp_:
+                fp_.write(data[:len(bc_magic) + 2])
+            env = Environment(loader=loader,
+                              bytecode_cache=SaltBytecodeCache(cache_dir))
+            self.assertEqual(env.from_string(tmpl).render(), 'ok')
+            # And written again
+            with salt.utils.fopen(cache_file, 'rb') as fp_:
+                self.assertEqual(fp_.read(), data)
+        finally:
+            shutil.rmtree(cache_dir)
+
     def test_macro_additional_log_for_generalexc(self):
         '''
         If we failed in a macro because of e.g. a TypeError, get
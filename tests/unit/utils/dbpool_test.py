@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.utils.dbpool_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Test the connection pool and batch writer of the SQL returners
+'''
+
+# Import python libs
+from __future__ import absolute_import
+
+# Import Salt Testing libs
+from salttesting import TestCase
+from salttesting.mock import MagicMock, patch
+from salttesting.helpers import ensure_in_syspath
+ensure_in_syspath('../../')
+
+# Import salt libs
+from salt.utils import dbpool
+
+
+class ConnectionPoolTestCase(TestCase):
+
+    def test_reuse(self):
+        '''
+        Released connections are handed out again
+        '''
+        connect = MagicMock(side_effect=lambda: MagicMock())
+        pool = dbpool.ConnectionPool(connect, size=1)
+        conn = pool.acquire()
+        pool.release(conn)
+        self.assertIs(pool.acquire(), conn)
+        self.assertEqual(connect.call_count, 1)
+
+        # The pool is full, the second connection is closed
+        other = pool.acquire()
+        pool.release(conn)
+        pool.release(other)
+        other.close.assert_called_once_with()
+
+    def test_stale(self):
+        '''
+        Connections failing the health check are replaced
+        '''
+        connect = MagicMock(side_effect=lambda: MagicMock())
+        ping = MagicMock(side_effect=Exception('gone away'))
+        pool = dbpool.ConnectionPool(connect, ping=ping, check_interval=0)
+        conn = pool.acquire()
+        pool.release(conn)
+        self.assertIsNot(pool.acquire(), conn)
+        conn.close.assert_called_once_with()
+
+    def test_connection_rollback(self):
+        '''
+        The transaction is rolled back when the block raises
+        '''
+        conn = MagicMock()
+        pool = dbpool.ConnectionPool(MagicMock(return_value=conn))
+        try:
+            with pool.connection():
+                raise ValueError()
+        except ValueError:
+            pass
+        conn.rollback.assert_called_once_with()
+        self.assertEqual(len(pool.idle), 1)
+
+
+class InsertRowsTestCase(TestCase):
+
+    def test_insert_rows(self):
+        cursor = MagicMock()
+        dbpool.insert_rows(cursor,
+                           'INSERT INTO t (a, b) VALUES',
+                           [(1, 2), (3, 4)])
+        cursor.execute.assert_called_once_with(
+            'INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s)',
+            [1, 2, 3, 4]
+        )
+
+    def test_insert_rows_chunked(self):
+        cursor = MagicMock()
+        rows = [(idx,) for idx in range(dbpool.MAX_ROWS_PER_INSERT + 1)]
+        dbpool.insert_rows(cursor, 'INSERT INTO t (a) VALUES', rows)
+        self.assertEqual(cursor.execute.call_count, 2)
+
+    def test_insert_rows_suffix(self):
+        cursor = MagicMock()
+        dbpool.insert_rows(cursor,
+                           'INSERT INTO t (a) VALUES',
+                           [(1,), (2,)],
+                           'ON DUPLICATE KEY UPDATE a = a')
+        cursor.execute.assert_called_once_with(
+            'INSERT INTO t (a) VALUES (%s), (%s) ON DUPLICATE KEY UPDATE a = a',
+            [1, 2]
+        )
+
+
+class BatchWriterTestCase(TestCase):
+
+    def test_batch_size(self):
+        write = MagicMock()
+        writer = dbpool.BatchWriter(write, batch_size=2, flush_interval=60)
+        writer.add((1,))
+        self.assertFalse(write.called)
+        writer.add((2,))
+        write.assert_called_once_with([(1,), (2,)])
+        self.assertIsNone(writer.timer)
+
+    def test_flush(self):
+        write = MagicMock()
+        writer = dbpool.BatchWriter(write, batch_size=10, flush_interval=60)
+        writer.add((1,))
+        writer.flush()
+        write.assert_called_once_with([(1,)])
+        writer.flush()
+        self.assertEqual(write.call_count, 1)
+
+    def test_retry(self):
+        write = MagicMock(side_effect=[Exception('down'), None])
+        writer = dbpool.BatchWriter(write, batch_size=2, flush_interval=60)
+        writer.add((1,))
+        writer.add((2,))
+        # The failed batch is kept and written with the next one
+        self.assertEqual(writer.rows, [(1,), (2,)])
+        writer.add((3,))
+        write.assert_called_with([(1,), (2,), (3,)])
+        self.assertEqual(writer.rows, [])
+        self.assertIsNone(writer.timer)
+
+    def test_retry_limit(self):
+        write = MagicMock(side_effect=Exception('down'))
+        writer = dbpool.BatchWriter(write, batch_size=1, flush_interval=60)
+        for idx in range(dbpool.MAX_QUEUED_BATCHES + 2):
+            writer.add((idx,))
+        writer.timer.cancel()
+        # The oldest rows are dropped
+        self.assertEqual(writer.rows,
+                         [(idx,) for idx in range(2, dbpool.MAX_QUEUED_BATCHES + 2)])
+
+    def test_flush_writers(self):
+        write = MagicMock()
+        with patch.dict(dbpool._WRITERS, clear=True):
+            dbpool.get_writer('a', write, batch_size=10).add((1,))
+            dbpool.get_writer('b', write, batch_size=10).add((2,))
+            self.assertEqual(dbpool.flush_writers('a'), 1)
+            write.assert_called_once_with([(1,)])
+            self.assertEqual(dbpool.flush_writers('c'), 0)
+            self.assertEqual(dbpool.flush_writers(), 1)
+            write.assert_called_with([(2,)])
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests([ConnectionPoolTestCase,
+               InsertRowsTestCase,
+               BatchWriterTestCase], needs_daemon=False)
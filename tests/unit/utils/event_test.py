@@ -11,6 +11,8 @@
 from __future__ import absolute_import
 import os
 import hashlib
+import shutil
+import tempfile
 import time
 from tornado.testing import AsyncTestCase
 import zmq
@@ -343,6 +345,72 @@ class TestAsyncEventPublisher(AsyncTestCase):
         self.data.pop('_stamp')  # drop the stamp
         self.assertEqual(self.data, {'data': 'foo1'})
 
+
+class TestEventReturnQueue(TestCase):
+    def setUp(self):
+        self.spool_dir = tempfile.mkdtemp(dir=integration.TMP)
+        self.stored = []
+        self.failing = False
+
+    def tearDown(self):
+        shutil.rmtree(self.spool_dir, ignore_errors=True)
+
+    def _event_return(self, events):
+        if self.failing:
+            raise Exception('returner is down')
+        self.stored.append(events)
+
+    def _queue(self, **kwargs):
+        opts = {'event_return_queue': 2}
+        opts.update(kwargs)
+        return event.EventReturnQueue(opts, 'test', self._event_return,
+                                      spool_dir=self.spool_dir)
+
+    def test_batch(self):
+        '''Test events are written once a batch is full'''
+        queue = self._queue()
+        queue.put({'tag': 'evt1'})
+        self.assertIsNone(queue._next_action(time.time()))
+        queue.put({'tag': 'evt2'})
+        self.assertEqual(queue._next_action(time.time()), 'send')
+        self.assertTrue(queue._send(queue._take()))
+        self.assertEqual(self.stored, [[{'tag': 'evt1'}, {'tag': 'evt2'}]])
+
+    def test_max_seconds(self):
+        '''Test old events are written before a batch is full'''
+        queue = self._queue(event_return_queue_max_seconds=5)
+        queue.put({'tag': 'evt1'})
+        self.assertIsNone(queue._next_action(time.time()))
+        self.assertEqual(queue._next_action(time.time() + 5), 'send')
+
+    def test_max_queue_size(self):
+        '''Test the oldest events are dropped from a full queue'''
+        queue = self._queue(event_return_max_queue_size=2)
+        for idx in range(3):
+            queue.put({'tag': 'evt{0}'.format(idx)})
+        self.assertEqual(queue._take(), [{'tag': 'evt1'}, {'tag': 'evt2'}])
+        self.assertEqual(queue.get_stats()['dropped'], 1)
+
+    def test_spool(self):
+        '''Test events are spooled while the returner fails'''
+        queue = self._queue()
+        self.failing = True
+        queue.put({'tag': 'evt1'})
+        queue.put({'tag': 'evt2'})
+        batch = queue._take()
+        self.assertFalse(queue._send(batch))
+        queue._spool(batch)
+        self.assertEqual(len(os.listdir(self.spool_dir)), 1)
+        # The returner is backing off
+        self.assertIsNone(queue._next_action(time.time()))
+
+        self.failing = False
+        queue.retry_at = 0
+        self.assertEqual(queue._next_action(time.time()), 'drain')
+        queue._drain()
+        self.assertEqual(self.stored, [[{'tag': 'evt1'}, {'tag': 'evt2'}]])
+        self.assertEqual(os.listdir(self.spool_dir), [])
+
 if __name__ == '__main__':
     from integration import run_tests
     run_tests(TestSaltEvent, needs_daemon=False)
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.utils.mine_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Test the master side mine storage
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import os
+import shutil
+import tempfile
+
+# Import Salt Testing libs
+from salttesting import TestCase
+from salttesting.helpers import ensure_in_syspath
+ensure_in_syspath('../../')
+
+# Import salt libs
+import salt.payload
+import salt.utils
+from salt.utils import mine
+
+
+class MineCacheTestCase(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.opts = {'cachedir': self.tmp_dir, 'serial': 'msgpack'}
+        self.mine = mine.MineCache(self.opts)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_store_and_get(self):
+        self.mine.store('alpha', {'network.ip_addrs': ['10.0.0.1'],
+                                  'grains.item': {'os': 'Debian'}})
+        self.mine.store('alpha', {'network.ip_addrs': ['10.0.0.2']})
+        self.assertEqual(self.mine.get('alpha', 'network.ip_addrs'),
+                         ['10.0.0.2'])
+        self.assertEqual(self.mine.get_all('alpha'),
+                         {'network.ip_addrs': ['10.0.0.2'],
+                          'grains.item': {'os': 'Debian'}})
+
+    def test_store_clear(self):
+        self.mine.store('alpha', {'network.ip_addrs': ['10.0.0.1']})
+        self.mine.store('alpha', {'grains.item': {'os': 'Debian'}}, clear=True)
+        self.assertEqual(self.mine.get_all('alpha'),
+                         {'grains.item': {'os': 'Debian'}})
+
+    def test_cache_sees_other_writers(self):
+        self.mine.store('alpha', {'test.ping': 1})
+        self.assertEqual(self.mine.get('alpha', 'test.ping'), 1)
+        mine.MineCache(self.opts).store('alpha', {'test.ping': 2})
+        self.assertEqual(self.mine.get('alpha', 'test.ping'), 2)
+
+    def test_delete_and_flush(self):
+        self.mine.store('alpha', {'test.ping': 1, 'test.echo': 'a'})
+        self.mine.store('beta', {'test.ping': 1})
+        self.assertTrue(self.mine.delete('alpha', 'test.ping'))
+        self.assertEqual(self.mine.get_all('alpha'), {'test.echo': 'a'})
+        self.mine.flush('alpha')
+        self.assertEqual(self.mine.get_all('alpha'), {})
+        self.assertEqual(self.mine.get_many(['alpha', 'beta'], 'test.ping'),
+                         {'beta': 1})
+
+    def test_legacy_mine_file(self):
+        cdir = os.path.join(self.tmp_dir, 'minions', 'alpha')
+        os.makedirs(cdir)
+        serial = salt.payload.Serial(self.opts)
+        with salt.utils.fopen(os.path.join(cdir, 'mine.p'), 'w+b') as fp_:
+            fp_.write(serial.dumps({'test.ping': 1, 'test.echo': 'a'}))
+        self.assertEqual(self.mine.get('alpha', 'test.echo'), 'a')
+        self.mine.store('alpha', {'test.ping': 2})
+        self.assertFalse(os.path.exists(os.path.join(cdir, 'mine.p')))
+        self.assertEqual(self.mine.get_all('alpha'),
+                         {'test.ping': 2, 'test.echo': 'a'})
+
+    def test_function_names(self):
+        '''
+        Function names which only differ in characters which are not valid
+        in file names are stored separately
+        '''
+        self.mine.store('alpha', {'a/b': 1, 'a_b': 2, 'a%2Fb': 3})
+        self.assertEqual(self.mine.get_all('alpha'),
+                         {'a/b': 1, 'a_b': 2, 'a%2Fb': 3})
+        self.mine.store('alpha', {'test.ping': True})
+        # Plain function names keep their file name
+        self.assertTrue(os.path.isfile(os.path.join(
+            self.tmp_dir, 'minions', 'alpha', 'mine', 'test.ping.p')))
+
+    def test_legacy_migration_keeps_newer(self):
+        '''
+        Functions stored since the old mine file was written are not
+        overwritten by its contents
+        '''
+        cdir = os.path.join(self.tmp_dir, 'minions', 'alpha')
+        self.mine.store('alpha', {'test.ping': 2})
+        serial = salt.payload.Serial(self.opts)
+        with salt.utils.fopen(os.path.join(cdir, 'mine.p'), 'w+b') as fp_:
+            fp_.write(serial.dumps({'test.ping': 1, 'test.echo': 'a'}))
+        self.mine.store('alpha', {'test.arg': 3})
+        self.assertEqual(self.mine.get_all('alpha'),
+                         {'test.ping': 2, 'test.echo': 'a', 'test.arg': 3})
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(MineCacheTestCase, needs_daemon=False)
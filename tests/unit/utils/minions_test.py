@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.utils.minions_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Test the presence tracking and minion data cache in salt.utils.minions
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+
+# Import Salt Testing libs
+from salttesting import TestCase
+from salttesting.mock import MagicMock
+from salttesting.helpers import ensure_in_syspath
+ensure_in_syspath('../../')
+
+# Import salt libs
+from salt.utils import minions
+
+
+class CkMinionsPresenceTestCase(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.pki_dir = os.path.join(self.tmp_dir, 'pki')
+        for id_ in ('alpha', 'beta', 'gamma'):
+            accepted = os.path.join(self.pki_dir, 'minions')
+            if not os.path.isdir(accepted):
+                os.makedirs(accepted)
+            open(os.path.join(accepted, id_), 'w').close()
+        self.ckminions = minions.CkMinions({'cachedir': self.tmp_dir,
+                                            'pki_dir': self.pki_dir,
+                                            'transport': 'zeromq'})
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_presence_empty(self):
+        self.assertEqual(self.ckminions.presence(), {})
+
+    def test_update_presence(self):
+        self.ckminions.update_presence(['alpha', 'beta'], now=100)
+        self.ckminions.update_presence(['alpha'], now=200)
+        self.assertEqual(self.ckminions.presence(),
+                         {'alpha': 200, 'beta': 100})
+
+    def test_update_presence_drops_deleted_keys(self):
+        self.ckminions.update_presence(['alpha', 'beta'], now=100)
+        os.remove(os.path.join(self.pki_dir, 'minions', 'beta'))
+        self.ckminions.update_presence(['alpha'], now=200)
+        self.assertEqual(self.ckminions.presence(), {'alpha': 200})
+
+    def test_stale_ids(self):
+        self.ckminions.update_presence(['alpha', 'beta'], now=100)
+        self.ckminions.update_presence(['alpha'], now=200)
+        self.assertEqual(self.ckminions.stale_ids(stale_time=50, now=220),
+                         set(['beta', 'gamma']))
+        self.assertEqual(self.ckminions.stale_ids(stale_time=500, now=220),
+                         set(['gamma']))
+
+
+class MinionDataCacheTestCase(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.event = MagicMock()
+        self.data_cache = minions.MinionDataCache(
+            {'cachedir': self.tmp_dir, 'serial': 'msgpack'},
+            self.event)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_store_skips_unchanged(self):
+        grains = {'os': 'Debian'}
+        pillar = {'role': 'web'}
+        self.assertEqual(self.data_cache.store('alpha', grains, pillar),
+                         ['grains', 'pillar'])
+        self.assertEqual(self.data_cache.store('alpha', grains, pillar), [])
+        self.assertEqual(self.data_cache.store('alpha', grains, {'role': 'db'}),
+                         ['pillar'])
+        self.assertEqual(self.event.fire_event.call_count, 2)
+        self.assertEqual(
+            minions.get_minion_data('alpha', {'cachedir': self.tmp_dir,
+                                              'minion_data_cache': True}),
+            ('alpha', grains, {'role': 'db'})
+        )
+
+    def test_hash(self):
+        first = OrderedDict([('os', 'Debian'), ('ipv4', ['10.0.0.1'])])
+        second = OrderedDict([('os', 'Debian'), ('ipv4', ['10.0.0.1'])])
+        self.assertEqual(self.data_cache._hash({'grains': first}),
+                         self.data_cache._hash({'grains': second}))
+        self.assertNotEqual(self.data_cache._hash({'os': 'Debian'}),
+                            self.data_cache._hash([['os', 'Debian']]))
+        self.data_cache.store('alpha', first)
+        self.assertEqual(self.data_cache.store('alpha', second), [])
+        second['ipv4'].append('10.0.0.2')
+        self.assertEqual(self.data_cache.store('alpha', second), ['grains'])
+
+    def test_update_grains(self):
+        self.data_cache.store('alpha', {'os': 'Debian', 'gpus': []}, {})
+        self.assertEqual(
+            self.data_cache.update_grains('alpha',
+                                          changed={'os': 'Ubuntu'},
+                                          removed=['gpus']),
+            ['grains']
+        )
+        self.assertEqual(
+            minions.get_minion_data('alpha', {'cachedir': self.tmp_dir,
+                                              'minion_data_cache': True}),
+            ('alpha', {'os': 'Ubuntu'}, {})
+        )
+
+    def test_update_grains_without_cache(self):
+        self.assertEqual(
+            self.data_cache.update_grains('alpha', changed={'os': 'Ubuntu'}),
+            []
+        )
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests([CkMinionsPresenceTestCase, MinionDataCacheTestCase],
+              needs_daemon=False)
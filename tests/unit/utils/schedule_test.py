@@ -211,6 +211,55 @@ class ScheduleTestCase(TestCase):
         self.schedule.opts = {'schedule': ''}
         self.assertRaises(ValueError, Schedule.eval, self.schedule)
 
+    def _eval_at(self, now):
+        '''
+        Run eval() at the given time and return the names of the jobs which
+        were evaluated
+        '''
+        evaluated = []
+
+        def _eval_job(job, data):
+            evaluated.append(job)
+            self.schedule.intervals[job] = now
+
+        with patch('salt.utils.schedule.time.time', MagicMock(return_value=now)):
+            with patch.object(self.schedule, '_eval_job', _eval_job):
+                self.schedule.eval()
+        return sorted(evaluated)
+
+    def test_eval_only_due_jobs(self):
+        '''
+        Tests that jobs are only evaluated once they are due
+        '''
+        self.schedule.functions = {'test.ping': None}
+        self.schedule.opts = {'schedule': {'job1': {'function': 'test.ping',
+                                                    'seconds': 10},
+                                           'job2': {'function': 'test.ping',
+                                                    'minutes': 1}},
+                              'pillar': {},
+                              'grains': {}}
+        self.assertEqual(self._eval_at(1000), ['job1', 'job2'])
+        self.assertEqual(self._eval_at(1005), [])
+        self.assertEqual(self._eval_at(1010), ['job1'])
+        self.assertEqual(self._eval_at(1060), ['job1', 'job2'])
+
+    def test_eval_modified_job(self):
+        '''
+        Tests that a modified job is evaluated on the next eval
+        '''
+        self.schedule.functions = {'test.ping': None}
+        self.schedule.opts = {'schedule': {'job1': {'function': 'test.ping',
+                                                    'hours': 1}},
+                              'pillar': {},
+                              'grains': {}}
+        self.assertEqual(self._eval_at(1000), ['job1'])
+        self.assertEqual(self._eval_at(1001), [])
+        self.schedule.modify_job('job1', {'function': 'test.ping',
+                                          'seconds': 5})
+        self.assertEqual(self._eval_at(1002), ['job1'])
+        self.schedule.delete_job('job1')
+        self.assertEqual(self._eval_at(1010), [])
+
 
 if __name__ == '__main__':
     from integration import run_tests
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.utils.yamlloader_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Check that the libyaml loader builds the same data as the pure Python one
+'''
+
+# Import python libs
+from __future__ import absolute_import
+
+# Import Salt Testing libs
+from salttesting import TestCase, skipIf
+from salttesting.helpers import ensure_in_syspath
+ensure_in_syspath('../../')
+
+# Import salt libs
+from salt.utils import yamlloader
+from salt.utils.odict import OrderedDict
+from yaml.constructor import ConstructorError
+
+DOCUMENTS = (
+    'a: 1\nb: [1, 2, {c: d}]\n',
+    # octal looking integers are read as decimals
+    'x: 010\ny: 0x1f\nz: 0b11\nw: 000\n',
+    'a: &x {k: v}\nb:\n  <<: *x\n  j: 2\n',
+    "s: 'str'\nd: 2015-01-01\nf: 1.5\nn: ~\nt: yes\nu: \xc3\xa9\n",
+    'pkgs:\n  - vim\n  - {git: 1.9}\nfile.managed:\n  - name: /etc/motd\n',
+)
+
+
+@skipIf(not yamlloader.HAS_LIBYAML, 'PyYAML is not built with libyaml')
+class YamlLoaderConformanceTestCase(TestCase):
+
+    def _load(self, loader, doc, dictclass):
+        return yamlloader.load(
+            doc, Loader=lambda stream: loader(stream, dictclass=dictclass))
+
+    def test_same_data(self):
+        for doc in DOCUMENTS:
+            for dictclass in (dict, OrderedDict):
+                expected = self._load(yamlloader.SaltYamlSafeLoader,
+                                      doc, dictclass)
+                data = self._load(yamlloader.SaltYamlCSafeLoader,
+                                  doc, dictclass)
+                self.assertEqual(data, expected)
+                self.assertEqual(type(data), type(expected))
+                self.assertEqual(list(data), list(expected))
+
+    def test_duplicate_keys(self):
+        for loader in (yamlloader.SaltYamlSafeLoader,
+                       yamlloader.SaltYamlCSafeLoader):
+            self.assertRaises(ConstructorError,
+                              self._load, loader, 'a: 1\na: 2\n', dict)
+
+    def test_safe_load(self):
+        self.assertEqual(yamlloader.safe_load('x: 010\n'), {'x': 8})
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(YamlLoaderConformanceTestCase, needs_daemon=False)